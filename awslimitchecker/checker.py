@@ -37,17 +37,89 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 ################################################################################
 """
 
-from .connectable import ConnectableCredentials
+from .connectable import (
+    ClientPool, ConnectableCredentials, get_credential_cache
+)
+from .ratelimit import RateLimiter
+from .responsecache import ResponseCache
+from .timings import Timings
 from .services import _services
 from .trustedadvisor import TrustedAdvisor
+from .limitcache import get_limit_cache, DEFAULT_LIMIT_MAX_AGE
+from .usagecache import get_usage_cache
 from .version import _get_version_info
-from .utils import _get_latest_version
-import boto3
+from .utils import (
+    check_latest_version, pool_map, lazy_import, BackgroundCall, WorkerBudget
+)
+from functools import partial
 import sys
 import logging
+import threading
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:  # python 2
+    from collections import MutableMapping
 
 logger = logging.getLogger(__name__)
 
+boto3 = lazy_import('boto3')
+
+#: Value for the ``regions`` argument of :py:class:`~.AwsLimitChecker` that
+#: selects every region enabled for the account.
+ALL_REGIONS = 'all'
+
+
+class _LazyServiceDict(MutableMapping):
+    """
+    Dict of service name to :py:class:`~._AwsService` instance, that only
+    instantiates each service the first time it is accessed. Listing the
+    keys (service names) or removing services never instantiates anything.
+    """
+
+    def __init__(self, factories):
+        """
+        :param factories: dict of service name to a callable that takes no
+          arguments and returns the :py:class:`~._AwsService` instance
+        :type factories: dict
+        """
+        self._factories = dict(factories)
+        self._services = {}
+
+    def __getitem__(self, key):
+        if key not in self._services:
+            factory = self._factories[key]
+            logger.debug('Instantiating service: %s', key)
+            self._services[key] = factory()
+        return self._services[key]
+
+    def __setitem__(self, key, value):
+        self._factories[key] = None
+        self._services[key] = value
+
+    def __delitem__(self, key):
+        del self._factories[key]
+        self._services.pop(key, None)
+
+    def __iter__(self):
+        return iter(self._factories)
+
+    def __len__(self):
+        return len(self._factories)
+
+    def __contains__(self, key):
+        return key in self._factories
+
+    def is_loaded(self, key):
+        """
+        Return whether the named service has been instantiated yet.
+
+        :param key: service name
+        :type key: str
+        :rtype: bool
+        """
+        return key in self._services
+
 
 class AwsLimitChecker(object):
 
@@ -55,14 +127,29 @@ class AwsLimitChecker(object):
                  profile_name=None, account_id=None, account_role=None,
                  region=None, external_id=None, mfa_serial_number=None,
                  mfa_token=None, ta_refresh_mode=None, ta_refresh_timeout=None,
-                 check_version=True):
+                 check_version=True, max_workers=None, regions=None,
+                 sts_cache_file=None, max_pool_connections=None,
+                 rate_limiter=None, ta_cache_file=None, record_replay=None,
+                 usage_cache_file=None, usage_max_age=0,
+                 service_usage_max_age=None, limit_cache_file=None,
+                 limit_max_age=DEFAULT_LIMIT_MAX_AGE, refresh_limits=False,
+                 cache_responses=False):
         """
         Main AwsLimitChecker class - this should be the only externally-used
         portion of awslimitchecker.
 
         Constructor builds ``self.services`` as a dict of service_name (str)
         to :py:class:`~._AwsService` instance, and sets limit
-        thresholds.
+        thresholds. Each service is only instantiated the first time it is
+        used, so operations that only touch some services (or none, such as
+        listing service names) do not pay for the others.
+
+        If ``regions`` is specified, one set of services is built for each
+        region, in ``self.region_services`` (a dict of region name to
+        services dict). ``self.services`` is then the services dict for the
+        first region. In this mode, :py:meth:`~.get_limits` and
+        :py:meth:`~.check_thresholds` return dicts keyed by region name,
+        then service name, then limit name.
 
         :param warning_threshold: the default warning threshold, as an
           integer percentage, for any limits without a specifically-set
@@ -117,8 +204,102 @@ class AwsLimitChecker(object):
           refresh to finish before continuing on anyway.
         :type ta_refresh_timeout: :py:class:`int` or :py:data:`None`
         :param check_version: Whether or not to check for latest version of
-          awslimitchecker on PyPI during instantiation.
+          awslimitchecker on PyPI during instantiation. This never blocks; a
+          recent result is read from an on-disk cache, or else PyPI is
+          queried in a background thread (see
+          :py:func:`~.utils.check_latest_version`).
         :type check_version: bool
+        :param max_workers: If set to an integer greater than 1, query
+          services concurrently using a pool of up to this many threads in
+          :py:meth:`~.get_limits`, :py:meth:`~.find_usage` and
+          :py:meth:`~.check_thresholds`. Services that make per-resource API
+          calls (such as API Gateway) also spread those calls across threads.
+          All of these share one :py:class:`~.utils.WorkerBudget`, so at most
+          this many threads (including the calling thread) query services at
+          once, plus one for Trusted Advisor. If None (the default), services
+          are queried one after another.
+        :type max_workers: :py:class:`int` or :py:data:`None`
+        :param regions: check multiple regions in this one instance; either
+          a list of region names, or :py:const:`~.ALL_REGIONS` to check every
+          region enabled for the account (found via EC2 DescribeRegions the
+          first time any region's services are needed, not when constructed).
+          Cannot be combined with ``region``.
+        :type regions: :py:class:`list` or :py:class:`str`
+        :param sts_cache_file: STS credentials are always cached in memory
+          for the life of the process and reused until shortly before they
+          expire (see :py:class:`~.CredentialCache`). If this is set to a
+          file path, the cache is also persisted to that file so that later
+          runs and other processes can reuse the credentials.
+        :type sts_cache_file: str
+        :param max_pool_connections: All services (and Trusted Advisor) share
+          one :py:class:`~.ClientPool`, so that services using the same API in
+          the same region share a single boto3 client. This sets the maximum
+          number of HTTP connections kept by each of those clients. If None,
+          the botocore default of 10 is used, or ``max_workers`` if that is
+          larger.
+        :type max_pool_connections: :py:class:`int` or :py:data:`None`
+        :param rate_limiter: All AWS API calls made by services and Trusted
+          Advisor are rate-limited per API and region, backing off when AWS
+          throttles them. If None, a :py:class:`~.RateLimiter` with the
+          default rates is used; pass an instance to change the rates, or to
+          share one budget between several AwsLimitChecker instances for the
+          same account. Its call counters are available from
+          :py:meth:`~.get_api_call_stats`.
+        :type rate_limiter: :py:class:`~.RateLimiter`
+        :param ta_cache_file: If set to a file path, cache the Trusted Advisor
+          Service Limits check ID and metadata, and the last check result, in
+          that file (see :py:class:`~.TrustedAdvisorCache`). Later runs reuse
+          the check ID, and reuse the result unless the check has been
+          refreshed since it was fetched.
+        :type ta_cache_file: str
+        :param record_replay: An :py:class:`~.ApiRecorder` to record every
+          AWS API call made by services and Trusted Advisor (for instance to
+          profile awslimitchecker offline later), or an
+          :py:class:`~.ApiReplayer` to answer those calls from a recording
+          instead of sending them to AWS. Calls to assume ``account_role``
+          are not recorded or replayed.
+        :type record_replay: :py:class:`~.ApiRecorder` or
+          :py:class:`~.ApiReplayer`
+        :param usage_cache_file: If set to a file path, store the usage that
+          each service finds in that file (see :py:class:`~.UsageCache`),
+          keyed by account, region and service. Services whose cached usage
+          is recent enough (see ``usage_max_age``) reuse it instead of
+          finding it again.
+        :type usage_cache_file: str
+        :param usage_max_age: When using ``usage_cache_file``, reuse cached
+          usage that is up to this many seconds old. The default of 0 never
+          reuses cached usage, but still updates the cache.
+        :type usage_max_age: int
+        :param service_usage_max_age: dict of service name to the
+          ``usage_max_age`` to use for that service instead, i.e. a long one
+          for services whose usage rarely changes, such as IAM, and 0 for
+          ones whose usage changes quickly, such as EC2.
+        :type service_usage_max_age: dict
+        :param limit_cache_file: If set to a file path, store the limit values
+          that each service gets from its API and from Trusted Advisor in that
+          file (see :py:class:`~.LimitCache`), keyed by account, region and
+          service. While every service's cached limits are recent enough (see
+          ``limit_max_age``), they are used instead of querying Trusted
+          Advisor and the services' limit APIs, so only usage is found.
+        :type limit_cache_file: str
+        :param limit_max_age: When using ``limit_cache_file``, reuse cached
+          limits that are up to this many seconds old; defaults to
+          :py:const:`~.limitcache.DEFAULT_LIMIT_MAX_AGE` (one week).
+        :type limit_max_age: int
+        :param refresh_limits: When using ``limit_cache_file``, ignore the
+          cached limits and retrieve them again (updating the cache), i.e.
+          after AWS has raised a limit.
+        :type refresh_limits: bool
+        :param cache_responses: Reuse the responses to the account attribute
+          and limit API calls that are made more than once (i.e. both when
+          finding usage and when retrieving limits) within one
+          :py:meth:`~.find_usage`, :py:meth:`~.get_limits` or
+          :py:meth:`~.check_thresholds` call (see
+          :py:class:`~.ResponseCache`).
+        :type cache_responses: bool
+        :raises: :py:exc:`ValueError` if both ``region`` and ``regions`` are
+          specified, or if ``service_usage_max_age`` has a key that is not a
+          service name.
         """
         # ###### IMPORTANT license notice ##########
         # Pursuant to Sections 5(b) and 13 of the GNU Affero General Public
@@ -134,6 +315,15 @@ class AwsLimitChecker(object):
         # <http://awslimitchecker.readthedocs.org/en/latest/development.html> )
         # for further information.
         # ###### IMPORTANT license notice ##########
+        if region is not None and regions is not None:
+            raise ValueError('region and regions parameters are mutually '
+                             'exclusive')
+        unknown = sorted(
+            k for k in (service_usage_max_age or {}) if k not in _services
+        )
+        if unknown:
+            raise ValueError('service_usage_max_age has unknown service '
+                             'name(s): %s' % ', '.join(unknown))
         self.vinfo = _get_version_info()
         sys.stderr.write(
             "awslimitchecker %s is AGPL-licensed free software; "
@@ -144,13 +334,7 @@ class AwsLimitChecker(object):
             )
         )
         if check_version:
-            latest_ver = _get_latest_version()
-            if latest_ver is not None:
-                logger.warning(
-                    'You are running awslimitchecker %s, but the latest version'
-                    ' is %s; please consider upgrading.', self.vinfo.release,
-                    latest_ver
-                )
+            check_latest_version(self._warn_if_outdated)
         self.warning_threshold = warning_threshold
         self.critical_threshold = critical_threshold
         self.profile_name = profile_name
@@ -159,20 +343,156 @@ class AwsLimitChecker(object):
         self.external_id = external_id
         self.mfa_serial_number = mfa_serial_number
         self.mfa_token = mfa_token
+        self.sts_cache_file = sts_cache_file
         self.region = region
+        self.max_workers = max_workers
+        self.worker_budget = None
+        if max_workers is not None:
+            self.worker_budget = WorkerBudget(max_workers)
+        if (
+            max_pool_connections is None and max_workers is not None and
+            max_workers > 10
+        ):
+            max_pool_connections = max_workers
+        if rate_limiter is None:
+            rate_limiter = RateLimiter()
+        self.rate_limiter = rate_limiter
+        self.timings = Timings()
+        self.response_cache = None
+        if cache_responses:
+            self.response_cache = ResponseCache()
+        self._client_pool = ClientPool(
+            max_pool_connections=max_pool_connections,
+            rate_limiter=rate_limiter,
+            timings=self.timings,
+            response_cache=self.response_cache,
+            record_replay=record_replay
+        )
+        self.usage_cache = None
+        if usage_cache_file is not None:
+            self.usage_cache = get_usage_cache(usage_cache_file)
+        self.usage_max_age = usage_max_age
+        self.service_usage_max_age = dict(service_usage_max_age or {})
+        self.limit_cache = None
+        if limit_cache_file is not None:
+            self.limit_cache = get_limit_cache(limit_cache_file)
+        self.limit_max_age = limit_max_age
+        self.refresh_limits = refresh_limits
+        #: dict of (region name, service name) to whether Trusted Advisor was
+        #: checked, for the services whose limits are in ``limit_cache``
+        self._cached_limits = {}
+        self._cache_account_id = None
+        self._cache_scope_lock = threading.Lock()
+        self.multi_region = regions is not None
+        if self.multi_region and regions != ALL_REGIONS:
+            # used for STS and other non-service connections
+            self.region = regions[0]
+        self._service_classes = dict(_services)
+        self._ta_kwargs = {
+            'ta_refresh_mode': ta_refresh_mode,
+            'ta_refresh_timeout': ta_refresh_timeout,
+            'cache_file': ta_cache_file,
+            'account_id': account_id
+        }
+        self._regions_lock = threading.Lock()
+        self._regions = None
+        self._region_services = {}
+        self._region_ta = {}
+        if not self.multi_region:
+            self._build_regions([region])
+        elif regions != ALL_REGIONS:
+            self._build_regions(list(regions))
+
+    def _build_regions(self, regions):
+        """
+        Build the services dict and :py:class:`~.TrustedAdvisor` of each of
+        the given regions.
 
-        self.services = {}
-
+        :param regions: region names; ``[None]`` when not checking multiple
+          regions
+        :type regions: list
+        """
         boto_conn_kwargs = self._boto_conn_kwargs
-        for sname, cls in _services.items():
-            self.services[sname] = cls(warning_threshold,
-                                       critical_threshold,
-                                       boto_conn_kwargs)
+        for rname in regions:
+            kwargs = boto_conn_kwargs
+            if self.multi_region:
+                kwargs = dict(boto_conn_kwargs)
+                kwargs['region_name'] = rname
+            services = _LazyServiceDict(dict(
+                (sname, partial(cls, self.warning_threshold,
+                                self.critical_threshold, kwargs,
+                                client_pool=self._client_pool,
+                                max_workers=self.max_workers,
+                                worker_budget=self.worker_budget))
+                for sname, cls in self._service_classes.items()
+            ))
+            self._region_services[rname] = services
+            self._region_ta[rname] = TrustedAdvisor(
+                services,
+                kwargs,
+                client_pool=self._client_pool,
+                **self._ta_kwargs
+            )
+        self._regions = regions
+
+    @property
+    def regions(self):
+        """
+        The names of the regions checked, or ``[None]`` when not checking
+        multiple regions. When constructed with ``regions=ALL_REGIONS``,
+        the regions enabled for the account are looked up (and their
+        services built) the first time this, :py:attr:`~.region_services`,
+        :py:attr:`~.region_ta`, :py:attr:`~.services` or :py:attr:`~.ta` is
+        used.
+
+        :rtype: list
+        """
+        with self._regions_lock:
+            if self._regions is None:
+                self._build_regions(
+                    self._get_enabled_regions(self._boto_conn_kwargs)
+                )
+            return self._regions
 
-        self.ta = TrustedAdvisor(self.services,
-                                 boto_conn_kwargs,
-                                 ta_refresh_mode=ta_refresh_mode,
-                                 ta_refresh_timeout=ta_refresh_timeout)
+    @property
+    def region_services(self):
+        """
+        dict of region name to that region's dict of service name to
+        :py:class:`~._AwsService` instance
+
+        :rtype: dict
+        """
+        self.regions
+        return self._region_services
+
+    @property
+    def region_ta(self):
+        """
+        dict of region name to that region's :py:class:`~.TrustedAdvisor`
+
+        :rtype: dict
+        """
+        self.regions
+        return self._region_ta
+
+    @property
+    def services(self):
+        """
+        dict of service name to :py:class:`~._AwsService` instance for the
+        first region
+
+        :rtype: dict
+        """
+        return self.region_services[self.regions[0]]
+
+    @property
+    def ta(self):
+        """
+        :py:class:`~.TrustedAdvisor` instance for the first region
+
+        :rtype: :py:class:`~.TrustedAdvisor`
+        """
+        return self.region_ta[self.regions[0]]
 
     @property
     def _boto_conn_kwargs(self):
@@ -213,6 +533,43 @@ class AwsLimitChecker(object):
             logger.debug("Connecting to region %s", self.region)
         return kwargs
 
+    def _warn_if_outdated(self, latest_ver):
+        """
+        Callback for :py:func:`~.utils.check_latest_version`; log a warning
+        if a newer version of awslimitchecker is available.
+
+        :param latest_ver: the newer version, or None
+        :type latest_ver: str
+        """
+        if latest_ver is not None:
+            logger.warning(
+                'You are running awslimitchecker %s, but the latest version'
+                ' is %s; please consider upgrading.', self.vinfo.release,
+                latest_ver
+            )
+
+    def _get_enabled_regions(self, boto_conn_kwargs):
+        """
+        Return a sorted list of the names of all regions enabled for the
+        account, using `EC2.Client.describe_regions <https://boto3.readthedocs.
+        io/en/latest/reference/services/ec2.html#EC2.Client.describe_regions>`_.
+
+        :param boto_conn_kwargs: keyword arguments for boto3 connection
+          functions, as returned by :py:meth:`~._boto_conn_kwargs`
+        :type boto_conn_kwargs: dict
+        :returns: list of region names
+        :rtype: list
+        """
+        conn = self._client_pool.client('ec2', boto_conn_kwargs)
+        logger.debug("Querying EC2 DescribeRegions for enabled regions")
+        regions = sorted([
+            r['RegionName'] for r in conn.describe_regions()['Regions']
+        ])
+        logger.info("Found %d enabled regions: %s", len(regions), regions)
+        if len(regions) == 0:
+            raise RuntimeError('EC2 DescribeRegions returned no regions')
+        return regions
+
     def get_version(self):
         """
         Return the version of awslimitchecker currently running.
@@ -231,6 +588,86 @@ class AwsLimitChecker(object):
         """
         return self.vinfo.url
 
+    def get_api_call_stats(self):
+        """
+        Return counts of the AWS API calls made so far by services and
+        Trusted Advisor, how many of them were retries, and how many were
+        throttled by AWS, along with the current (possibly backed-off)
+        request rate; see :py:meth:`.RateLimiter.get_stats`. ``cached`` is
+        the number of calls that were not made because an identical call
+        had already been made during the same :py:meth:`~.find_usage`,
+        :py:meth:`~.get_limits` or :py:meth:`~.check_thresholds` call, if
+        constructed with ``cache_responses=True``; see
+        :py:class:`~.ResponseCache`.
+
+        :returns: dict of API name to dict of region name to dict with keys
+          ``calls``, ``retried``, ``throttled``, ``rate`` and ``cached``
+        :rtype: dict
+        """
+        res = self.rate_limiter.get_stats()
+        for api_name, regions in res.items():
+            for region_name, stats in regions.items():
+                stats['cached'] = 0
+        if self.response_cache is None:
+            return res
+        for api_name, regions in self.response_cache.get_stats().items():
+            for region_name, stats in regions.items():
+                if region_name in res.get(api_name, {}):
+                    res[api_name][region_name]['cached'] = stats['hits']
+        return res
+
+    def get_timings(self):
+        """
+        Return how long each service's usage collection
+        (``find_usage``) and limit lookup from its API
+        (``_update_limits_from_api``) took, and how long Trusted Advisor's
+        ``update_limits`` took, along with the number of AWS API calls,
+        result pages and response bytes each of them needed, and a
+        per-API-operation breakdown of the calls. Times accumulate over all
+        calls made so far; see :py:meth:`.Timings.get_timings`.
+
+        :returns: dict of service name (or ``TrustedAdvisor``) to dict of
+          phase name to dict with keys ``seconds``, ``calls``, ``pages``,
+          ``bytes`` and ``operations``; if checking multiple regions, a dict
+          of region name to that dict.
+        :rtype: dict
+        """
+        return self._region_result(self.timings.get_timings())
+
+    def invalidate(self):
+        """
+        Start a new run: forget the usage, the limits from service APIs and
+        Trusted Advisor, and any cached API responses (see
+        :py:meth:`~._clear_response_cache`) that have already been retrieved,
+        so that the next :py:meth:`~.find_usage`, :py:meth:`~.get_limits` or
+        :py:meth:`~.check_thresholds` call retrieves them again. Within a run,
+        each service's limits API is only called once, however many of those
+        methods are called; long-lived callers that check limits periodically
+        should call this before each check. Limits in ``self.limit_cache`` are
+        still reused while they are recent enough.
+        """
+        for services in self._region_services.values():
+            for sname in services:
+                # services that have not been instantiated have no state yet
+                if services.is_loaded(sname):
+                    services[sname].invalidate()
+        for ta in self._region_ta.values():
+            ta.invalidate()
+        self._clear_response_cache()
+        self._cached_limits = {}
+
+    def _clear_response_cache(self):
+        """
+        Discard the API responses cached by ``self.response_cache``, if
+        constructed with ``cache_responses=True``. This is done at the start
+        of every :py:meth:`~.find_usage`, :py:meth:`~.get_limits` and
+        :py:meth:`~.check_thresholds` call, so that cached responses are only
+        reused within one refresh cycle, and a later call (i.e. IAM or RDS
+        finding usage again) always gets current data from AWS.
+        """
+        if self.response_cache is not None:
+            self.response_cache.clear()
+
     def remove_services(self, services_to_remove=[]):
         """
         Remove all service names specified in ``services_to_remove`` from
@@ -250,7 +687,76 @@ class AwsLimitChecker(object):
         """
         for sname in services_to_remove:
             logger.warning('Skipping service: %s', sname)
-            self.services.pop(sname, None)
+            self._service_classes.pop(sname, None)
+            # regions that have not been built yet use _service_classes
+            for services in self._region_services.values():
+                if sname in services:
+                    del services[sname]
+
+    def _services_to_get(self, service=None):
+        """
+        Return a list of (region name, service name, :py:class:`~._AwsService`)
+        3-tuples for every region, for either all services or the named ones.
+
+        :param service: the name(s) of one or more services, or None for all
+        :type service: list
+        :rtype: list
+        """
+        res = []
+        for rname in self.regions:
+            services = self.region_services[rname]
+            names = service
+            if names is None:
+                names = sorted(services.keys())
+            for sname in names:
+                res.append((rname, sname, services[sname]))
+        return res
+
+    def _update_ta(self):
+        """
+        Update limits from Trusted Advisor for every region. The Service
+        Limits check result covers all regions, so it is only fetched once
+        (by the first region's :py:class:`~.TrustedAdvisor`, and timed under
+        that region) and applied to every region's limits.
+        """
+        rname = self.regions[0]
+        with self.timings.timed(rname, 'TrustedAdvisor', 'update_limits'):
+            if not self.multi_region:
+                self.ta.update_limits()
+                return
+            self.ta.update_limits(region_tas=[
+                self.region_ta[r] for r in self.regions[1:]
+            ])
+
+    def _start_ta_update(self, use_ta):
+        """
+        If ``use_ta`` is True, start updating limits from Trusted Advisor
+        (:py:meth:`~._update_ta`) in the background, and return the
+        :py:class:`~.BackgroundCall` to wait on before the limits are used.
+        Trusted Advisor only changes limits, not usage, so callers can find
+        usage while a Trusted Advisor check refresh is in progress.
+
+        :param use_ta: whether to update limits from Trusted Advisor
+        :type use_ta: bool
+        :rtype: :py:class:`~.BackgroundCall` or None
+        """
+        if not use_ta:
+            return None
+        return BackgroundCall(self._update_ta)
+
+    def _region_result(self, res):
+        """
+        Given a dict of region name to per-region results, return it as-is
+        if this instance checks multiple regions, or else just the results
+        for our single region.
+
+        :param res: dict of region name to results dict
+        :type res: dict
+        :rtype: dict
+        """
+        if self.multi_region:
+            return res
+        return res.get(self.regions[0], {})
 
     def get_limits(self, service=None, use_ta=True):
         """
@@ -265,20 +771,41 @@ class AwsLimitChecker(object):
         :param use_ta: check Trusted Advisor for information on limits
         :type use_ta: bool
         :returns: dict of service name (string) to nested dict
-          of limit name (string) to limit (:py:class:`~.AwsLimit`)
+          of limit name (string) to limit (:py:class:`~.AwsLimit`); if
+          checking multiple regions, a dict of region name to that dict.
         :rtype: dict
         """
         res = {}
-        to_get = self.services
-        if service is not None:
-            to_get = dict((each, self.services[each]) for each in service)
-        if use_ta:
-            self.ta.update_limits()
-        for sname, cls in to_get.items():
-            if hasattr(cls, '_update_limits_from_api'):
-                cls._update_limits_from_api()
-            res[sname] = cls.get_limits()
-        return res
+        to_get = self._services_to_get(service)
+        self._clear_response_cache()
+        ta = self._start_ta_update(self._load_cached_limits(to_get, use_ta))
+        pool_map(self._update_service_limits_from_api, to_get,
+                 max_workers=self.max_workers, budget=self.worker_budget)
+        if ta is not None:
+            ta.wait()
+        self._save_cached_limits(to_get, use_ta)
+        for rname, sname, cls in to_get:
+            res.setdefault(rname, {})[sname] = cls.get_limits()
+        return self._region_result(res)
+
+    def _update_service_limits_from_api(self, item):
+        """
+        Call ``_update_limits_from_api()`` on the given
+        :py:class:`~._AwsService` instance, if it has that method and has not
+        already done so since it was last :py:meth:`~.invalidate`-ed (see
+        :py:meth:`~._AwsService._update_limits_from_api_if_needed`) and its
+        limits did not come from ``self.limit_cache``.
+
+        :param item: 3-tuple of region name, service name and the
+          :py:class:`~._AwsService` to update limits for
+        :type item: tuple
+        """
+        rname, sname, cls = item
+        if (rname, sname) in self._cached_limits:
+            return
+        if hasattr(cls, '_update_limits_from_api'):
+            with self.timings.timed(rname, sname, '_update_limits_from_api'):
+                cls._update_limits_from_api_if_needed()
 
     def get_service_names(self):
         """
@@ -287,23 +814,30 @@ class AwsLimitChecker(object):
         :returns: list of service names
         :rtype: list
         """
-        return sorted(self.services.keys())
+        return sorted(self._service_classes.keys())
 
     def _get_sts_token(self):
         """
         Assume a role via STS and return the credentials.
 
-        First connect to STS via :py:func:`boto3.client`, then
+        If the :py:class:`~.CredentialCache` for ``self.sts_cache_file`` holds
+        unexpired credentials for this account, role and external ID, return
+        those. Otherwise, first connect to STS via :py:func:`boto3.client`, then
         assume a role using `boto3.STS.Client.assume_role <https://boto3.readthe
         docs.org/en/latest/reference/services/sts.html#STS.Client.assume_role>`_
         using ``self.account_id`` and ``self.account_role`` (and optionally
         ``self.external_id``, ``self.mfa_serial_number``, ``self.mfa_token``).
-        Return the resulting :py:class:`~.ConnectableCredentials`
+        Cache and return the resulting :py:class:`~.ConnectableCredentials`
         object.
 
         :returns: STS assumed role credentials
         :rtype: :py:class:`~.ConnectableCredentials`
         """
+        cache = get_credential_cache(self.sts_cache_file)
+        creds = cache.get(self.account_id, self.account_role,
+                          self.external_id)
+        if creds is not None:
+            return creds
         logger.debug("Connecting to STS in region %s", self.region)
         sts = boto3.client('sts', region_name=self.region)
         arn = "arn:aws:iam::%s:role/%s" % (self.account_id, self.account_role)
@@ -325,6 +859,7 @@ class AwsLimitChecker(object):
 
         logger.debug("Got STS credentials for role; access_key_id=%s "
                      "(account_id=%s)", creds.access_key, creds.account_id)
+        cache.set(creds, self.account_id, self.account_role, self.external_id)
         return creds
 
     def find_usage(self, service=None, use_ta=True):
@@ -343,16 +878,225 @@ class AwsLimitChecker(object):
         :param use_ta: check Trusted Advisor for information on limits
         :type use_ta: bool
         """
-        to_get = self.services
-        if service is not None:
-            to_get = dict((each, self.services[each]) for each in service)
-        if use_ta:
-            self.ta.update_limits()
-        for cls in to_get.values():
-            if hasattr(cls, '_update_limits_from_api'):
-                cls._update_limits_from_api()
-            logger.debug("Finding usage for service: %s", cls.service_name)
+        to_get = self._services_to_get(service)
+        self._clear_response_cache()
+        ta = self._start_ta_update(self._load_cached_limits(to_get, use_ta))
+        self._save_cached_usage(pool_map(
+            self._find_service_usage, to_get, max_workers=self.max_workers,
+            budget=self.worker_budget
+        ))
+        if ta is not None:
+            ta.wait()
+        self._save_cached_limits(to_get, use_ta)
+
+    def _find_service_usage(self, item, if_needed=False):
+        """
+        Update limits from the service's API (if supported) and then find
+        current usage for a single :py:class:`~._AwsService` instance. This
+        is the unit of work that :py:meth:`~.find_usage` and
+        :py:meth:`~.check_thresholds` run, possibly concurrently, for each
+        service.
+
+        :param item: 3-tuple of region name, service name and the
+          :py:class:`~._AwsService` to find usage for
+        :type item: tuple
+        :param if_needed: if True, only find usage if the service does not
+          already have it (:py:meth:`~._AwsService.find_usage_if_needed`)
+        :type if_needed: bool
+        :returns: the entry to store in ``self.usage_cache`` (see
+          :py:meth:`~._find_service_usage_cached`), or None
+        :rtype: tuple
+        """
+        rname, sname, cls = item
+        self._update_service_limits_from_api(item)
+        logger.debug("Finding usage for service: %s", sname)
+        with self.timings.timed(rname, sname, 'find_usage'):
+            if self.usage_cache is not None:
+                return self._find_service_usage_cached(
+                    rname, sname, cls, if_needed
+                )
+            elif if_needed:
+                cls.find_usage_if_needed()
+            else:
+                cls.find_usage()
+        return None
+
+    def _find_service_usage_cached(self, rname, sname, cls, if_needed):
+        """
+        Find usage for a single :py:class:`~._AwsService` instance, reusing
+        its usage from ``self.usage_cache`` if that is no older than the
+        service's maximum age, and otherwise finding it and returning the
+        entry to store in the cache. Entries are stored by
+        :py:meth:`~._save_cached_usage` once every service's usage has been
+        found, so that the cache file is only rewritten once per run.
+
+        :param rname: region name, or None if not checking multiple regions
+        :type rname: str
+        :param sname: service name
+        :type sname: str
+        :param cls: the service to find usage for
+        :type cls: :py:class:`~._AwsService`
+        :param if_needed: if True, do nothing if the service already has usage
+        :type if_needed: bool
+        :returns: (account ID, region name, service name, usage) 4-tuple to
+          store in ``self.usage_cache``, or None if usage was not found or
+          came from the cache
+        :rtype: tuple
+        """
+        if if_needed and cls._have_usage:
+            return None
+        scope = self._get_cache_scope(cls, rname)
+        cache = self.usage_cache
+        if scope is None or cache is None:
             cls.find_usage()
+            return None
+        account_id, region_name = scope
+        max_age = self.service_usage_max_age.get(sname, self.usage_max_age)
+        usage = None
+        if max_age > 0:
+            usage = cache.get(account_id, region_name, sname, max_age)
+        if usage is not None:
+            cls._load_usage(usage)
+            return None
+        cls.find_usage()
+        return account_id, region_name, sname, cls._dump_usage()
+
+    def _save_cached_usage(self, entries):
+        """
+        Store the usage that :py:meth:`~._find_service_usage` found for each
+        service in ``self.usage_cache``, with a single write.
+
+        :param entries: return values of :py:meth:`~._find_service_usage`
+        :type entries: list
+        """
+        if self.usage_cache is None:
+            return
+        entries = [e for e in entries if e is not None]
+        if entries:
+            self.usage_cache.set_many(entries)
+
+    def _get_cache_scope(self, cls, rname):
+        """
+        Return the account ID and region name to key a service's usage or
+        limits by in ``self.usage_cache`` or ``self.limit_cache``. Unless it
+        was given to the constructor, the account ID is looked up (once) with
+        STS GetCallerIdentity; if that fails, stop using both caches and
+        return None.
+
+        :param cls: the service the usage or limits are for
+        :type cls: :py:class:`~._AwsService`
+        :param rname: region name, or None to use the service's region
+        :type rname: str
+        :returns: 2-tuple of account ID and region name, or None
+        :rtype: tuple
+        """
+        with self._cache_scope_lock:
+            if self.usage_cache is None and self.limit_cache is None:
+                return None
+            try:
+                sts = cls._client('sts')
+                if self._cache_account_id is None:
+                    self._cache_account_id = self.account_id
+                if self._cache_account_id is None:
+                    self._cache_account_id = \
+                        sts.get_caller_identity()['Account']
+            except Exception:
+                logger.warning("Unable to determine AWS account ID; not "
+                               "using usage or limit caches", exc_info=True)
+                self.usage_cache = None
+                self.limit_cache = None
+                return None
+            if rname is None:
+                rname = sts.meta.region_name
+            return self._cache_account_id, rname
+
+    def _load_cached_limits(self, to_get, use_ta):
+        """
+        Load the limits of each of the given services from
+        ``self.limit_cache``, if they are no older than ``self.limit_max_age``
+        (and, if ``use_ta`` is True, include Trusted Advisor's values).
+        Services whose limits were loaded skip
+        :py:meth:`~._update_service_limits_from_api` until the next
+        :py:meth:`~.invalidate`. Does nothing if there is no limit cache or
+        ``self.refresh_limits`` is True.
+
+        :param to_get: list of (region name, service name,
+          :py:class:`~._AwsService`) 3-tuples
+        :type to_get: list
+        :param use_ta: whether limits should include Trusted Advisor's
+        :type use_ta: bool
+        :returns: whether Trusted Advisor still needs to be checked, i.e.
+          ``use_ta`` unless every service's limits came from the cache
+        :rtype: bool
+        """
+        if self.limit_cache is None or self.refresh_limits:
+            return use_ta
+        for rname, sname, cls in to_get:
+            if self._limits_cached(rname, sname, use_ta):
+                continue
+            scope = self._get_cache_scope(cls, rname)
+            if scope is None:
+                return use_ta
+            entry = self.limit_cache.get(
+                scope[0], scope[1], sname, self.limit_max_age
+            )
+            if entry is None or entry['ta'] != use_ta:
+                continue
+            cls._load_limits(entry['limits'])
+            self._cached_limits[(rname, sname)] = entry['ta']
+        if not use_ta:
+            return False
+        return not all(
+            self._limits_cached(rname, sname, True)
+            for rname, sname, cls in to_get
+        )
+
+    def _limits_cached(self, rname, sname, use_ta):
+        """
+        Return whether a service's limits have been loaded from, or stored
+        in, ``self.limit_cache`` since the last :py:meth:`~.invalidate`
+        (including Trusted Advisor's values, if ``use_ta`` is True).
+
+        :param rname: region name
+        :type rname: str
+        :param sname: service name
+        :type sname: str
+        :param use_ta: whether Trusted Advisor's values are needed
+        :type use_ta: bool
+        :rtype: bool
+        """
+        ta = self._cached_limits.get((rname, sname))
+        return ta is True or (ta is False and not use_ta)
+
+    def _save_cached_limits(self, to_get, use_ta):
+        """
+        Store the limits of each of the given services that did not come
+        from ``self.limit_cache`` in it (with a single write), once they have
+        been retrieved from the service's API and (if ``use_ta`` is True)
+        Trusted Advisor.
+
+        :param to_get: list of (region name, service name,
+          :py:class:`~._AwsService`) 3-tuples
+        :type to_get: list
+        :param use_ta: whether Trusted Advisor was checked
+        :type use_ta: bool
+        """
+        if self.limit_cache is None:
+            return
+        entries = []
+        for rname, sname, cls in to_get:
+            if self._limits_cached(rname, sname, use_ta):
+                continue
+            scope = self._get_cache_scope(cls, rname)
+            if scope is None:
+                return
+            entries.append((
+                scope[0], scope[1], sname,
+                {'ta': use_ta, 'limits': cls._dump_limits()}
+            ))
+            self._cached_limits[(rname, sname)] = use_ta
+        if entries:
+            self.limit_cache.set_many(entries)
 
     def set_limit_overrides(self, override_dict, override_ta=True):
         """
@@ -390,7 +1134,8 @@ class AwsLimitChecker(object):
         """
         for svc_name in override_dict:
             for lim_name in override_dict[svc_name]:
-                self.services[svc_name].set_limit_override(
+                self.set_limit_override(
+                    svc_name,
                     lim_name,
                     override_dict[svc_name][lim_name],
                     override_ta=override_ta
@@ -422,11 +1167,12 @@ class AwsLimitChecker(object):
         :raises: :py:exc:`ValueError` if limit_name is not known to the
           service instance
         """
-        self.services[service_name].set_limit_override(
-            limit_name,
-            value,
-            override_ta=override_ta
-        )
+        for services in self.region_services.values():
+            services[service_name].set_limit_override(
+                limit_name,
+                value,
+                override_ta=override_ta
+            )
 
     def set_threshold_overrides(self, override_dict):
         """
@@ -478,10 +1224,11 @@ class AwsLimitChecker(object):
                         kwargs['crit_percent'] = d['critical']['percent']
                     if 'count' in d['critical']:
                         kwargs['crit_count'] = d['critical']['count']
-                self.services[svc_name].set_threshold_override(
-                    lim_name,
-                    **kwargs
-                )
+                for services in self.region_services.values():
+                    services[svc_name].set_threshold_override(
+                        lim_name,
+                        **kwargs
+                    )
 
     def set_threshold_override(self, service_name, limit_name,
                                warn_percent=None, warn_count=None,
@@ -507,13 +1254,14 @@ class AwsLimitChecker(object):
         :param crit_count: new critical threshold, actual count/number
         :type crit_count: int
         """
-        self.services[service_name].set_threshold_override(
-            limit_name,
-            warn_percent=warn_percent,
-            warn_count=warn_count,
-            crit_percent=crit_percent,
-            crit_count=crit_count
-        )
+        for services in self.region_services.values():
+            services[service_name].set_threshold_override(
+                limit_name,
+                warn_percent=warn_percent,
+                warn_count=warn_count,
+                crit_percent=crit_percent,
+                crit_count=crit_count
+            )
 
     def check_thresholds(self, service=None, use_ta=True):
         """
@@ -539,22 +1287,42 @@ class AwsLimitChecker(object):
         :param use_ta: check Trusted Advisor for information on limits
         :type use_ta: bool
         :returns: dict of service name (string) to nested dict
-          of limit name (string) to limit (:py:class:`~.AwsLimit`)
+          of limit name (string) to limit (:py:class:`~.AwsLimit`); if
+          checking multiple regions, a dict of region name to that dict.
         :rtype: dict
         """
         res = {}
-        to_get = self.services
-        if service is not None:
-            to_get = dict((each, self.services[each]) for each in service)
-        if use_ta:
-            self.ta.update_limits()
-        for sname, cls in to_get.items():
-            if hasattr(cls, '_update_limits_from_api'):
-                cls._update_limits_from_api()
-            tmp = cls.check_thresholds()
+        to_get = self._services_to_get(service)
+        self._clear_response_cache()
+        ta = self._start_ta_update(self._load_cached_limits(to_get, use_ta))
+        # usage does not depend on limits, so find it while TA is updating
+        self._save_cached_usage(pool_map(
+            partial(self._find_service_usage, if_needed=True), to_get,
+            max_workers=self.max_workers, budget=self.worker_budget
+        ))
+        if ta is not None:
+            ta.wait()
+        self._save_cached_limits(to_get, use_ta)
+        results = [self._check_service_thresholds(item) for item in to_get]
+        for rname, sname, tmp in results:
             if len(tmp) > 0:
-                res[sname] = tmp
-        return res
+                res.setdefault(rname, {})[sname] = tmp
+        return self._region_result(res)
+
+    def _check_service_thresholds(self, item):
+        """
+        Check thresholds for a single service, once its usage and limits are
+        known.
+
+        :param item: 3-tuple of region name, service name and
+          :py:class:`~._AwsService`
+        :type item: tuple
+        :returns: 3-tuple of region name, service name and the return value
+          of :py:meth:`._AwsService.check_thresholds`
+        :rtype: tuple
+        """
+        rname, sname, cls = item
+        return rname, sname, cls.check_thresholds()
 
     def get_required_iam_policy(self):
         """
@@ -569,6 +1337,7 @@ class AwsLimitChecker(object):
         :rtype: dict
         """
         required_actions = [
+            'ec2:DescribeRegions',
             'support:*',
             'trustedadvisor:Describe*',
             'trustedadvisor:RefreshCheck'
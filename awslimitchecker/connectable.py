@@ -37,11 +37,28 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 ################################################################################
 """
 
+import calendar
 import logging
-import boto3
+import threading
+import time
+from datetime import datetime
+from .utils import lazy_import, JsonFileCache, get_file_cache
+
+boto3 = lazy_import('boto3')
+botocore_config = lazy_import('botocore.config')
+pytz = lazy_import('pytz')
 
 logger = logging.getLogger(__name__)
 
+#: Cached STS credentials are only reused if they are valid for at least this
+#: many more seconds, so that they don't expire partway through a run.
+STS_CREDENTIAL_MIN_REMAINING = 900
+
+#: :py:func:`boto3.client` and :py:func:`boto3.resource` share a default
+#: session that is not safe to use from multiple threads at once, so all
+#: client and resource creation is serialized through this lock.
+boto3_lock = threading.RLock()
+
 
 class ConnectableCredentials(object):
     """
@@ -64,6 +81,339 @@ class ConnectableCredentials(object):
         self.assumed_role_arn = creds_dict['AssumedRoleUser']['Arn']
         self.account_id = None
 
+    @property
+    def expiration_timestamp(self):
+        """
+        Return the credential expiration as an integer Unix timestamp.
+
+        :rtype: int
+        """
+        return calendar.timegm(self.expiration.utctimetuple())
+
+    def to_dict(self):
+        """
+        Return these credentials in the same form as the ``assume_role``
+        response they were created from, with the expiration as a Unix
+        timestamp so that it can be serialized to JSON.
+
+        :rtype: dict
+        """
+        return {
+            'Credentials': {
+                'AccessKeyId': self.access_key,
+                'SecretAccessKey': self.secret_key,
+                'SessionToken': self.session_token,
+                'Expiration': self.expiration_timestamp
+            },
+            'AssumedRoleUser': {
+                'AssumedRoleId': self.assumed_role_id,
+                'Arn': self.assumed_role_arn
+            }
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        """
+        Inverse of :py:meth:`~.to_dict`.
+
+        :param d: dict as returned by :py:meth:`~.to_dict`
+        :type d: dict
+        :rtype: :py:class:`~.ConnectableCredentials`
+        """
+        d = {
+            'Credentials': dict(d['Credentials']),
+            'AssumedRoleUser': d['AssumedRoleUser']
+        }
+        d['Credentials']['Expiration'] = datetime.fromtimestamp(
+            d['Credentials']['Expiration'], pytz.utc
+        )
+        return cls(d)
+
+
+class CredentialCache(JsonFileCache):
+    """
+    Thread-safe cache of STS assume-role credentials
+    (:py:class:`~.ConnectableCredentials`), keyed by account ID, role name and
+    external ID. Credentials are reused until they are within
+    ``min_remaining`` seconds of expiring.
+
+    If ``path`` is given, the cache is also persisted to that JSON file
+    (created with mode 0600, as it holds secrets; see
+    :py:class:`~.JsonFileCache`), so that later runs and other processes can
+    reuse the credentials. Use :py:func:`~.get_credential_cache` to get the
+    shared instance for a given path.
+    """
+
+    _description = 'STS credential'
+    _file_mode = 0o600
+
+    def __init__(self, path=None, min_remaining=STS_CREDENTIAL_MIN_REMAINING):
+        """
+        :param path: path to the JSON file to persist the cache to, or None
+          to only cache in memory
+        :type path: str
+        :param min_remaining: minimum number of seconds of validity that
+          cached credentials must have left to be reused
+        :type min_remaining: int
+        """
+        super(CredentialCache, self).__init__(path)
+        self.min_remaining = min_remaining
+        self._creds = {}
+
+    @staticmethod
+    def _key(account_id, account_role, external_id):
+        return '{a}/{r}/{e}'.format(
+            a=account_id, r=account_role,
+            e=external_id if external_id is not None else ''
+        )
+
+    def _merge_file(self):
+        """
+        Merge credentials from ``self.path`` into the in-memory cache.
+        """
+        for key, d in self._load().items():
+            try:
+                creds = ConnectableCredentials.from_dict(d)
+            except Exception:
+                logger.warning('Unable to read STS credentials for %s from '
+                               '%s', key, self.path, exc_info=True)
+                continue
+            creds.account_id = d.get('account_id')
+            current = self._creds.get(key)
+            if (
+                current is None or
+                creds.expiration_timestamp > current.expiration_timestamp
+            ):
+                self._creds[key] = creds
+
+    def _write_file(self):
+        """
+        Write all unexpired credentials to ``self.path``.
+        """
+        if self.path is None:
+            return
+        data = {}
+        for key, creds in self._creds.items():
+            if creds.expiration_timestamp <= time.time():
+                continue
+            data[key] = creds.to_dict()
+            data[key]['account_id'] = creds.account_id
+        self._save(data)
+
+    def get(self, account_id, account_role, external_id=None):
+        """
+        Return cached credentials for the given account, role and external
+        ID, or None if there are none with enough validity remaining.
+
+        :param account_id: AWS Account ID
+        :type account_id: str
+        :param account_role: name of the assumed IAM role
+        :type account_role: str
+        :param external_id: External ID used to assume the role
+        :type external_id: str
+        :rtype: :py:class:`~.ConnectableCredentials` or None
+        """
+        key = self._key(account_id, account_role, external_id)
+        with self._lock:
+            self._merge_file()
+            creds = self._creds.get(key)
+        if creds is None:
+            return None
+        remaining = creds.expiration_timestamp - time.time()
+        if remaining < self.min_remaining:
+            logger.debug('Cached STS credentials for %s expire in %ds; not '
+                         'reusing', key, remaining)
+            return None
+        logger.debug('Using cached STS credentials for %s (expire in %ds)',
+                     key, remaining)
+        return creds
+
+    def set(self, creds, account_id, account_role, external_id=None):
+        """
+        Add credentials to the cache, and persist it if configured to.
+
+        :param creds: the credentials to cache
+        :type creds: :py:class:`~.ConnectableCredentials`
+        :param account_id: AWS Account ID
+        :type account_id: str
+        :param account_role: name of the assumed IAM role
+        :type account_role: str
+        :param external_id: External ID used to assume the role
+        :type external_id: str
+        """
+        key = self._key(account_id, account_role, external_id)
+        with self._lock:
+            self._merge_file()
+            self._creds[key] = creds
+            self._write_file()
+
+
+def get_credential_cache(path=None):
+    """
+    Return the process-wide :py:class:`~.CredentialCache` for ``path`` (or
+    the in-memory-only cache, if ``path`` is None), creating it if needed.
+
+    :param path: path to the JSON file to persist the cache to
+    :type path: str
+    :rtype: :py:class:`~.CredentialCache`
+    """
+    return get_file_cache(CredentialCache, path)
+
+
+class ClientPool(object):
+    """
+    Pool of boto3 sessions, clients and resources, shared by all of the
+    services (and Trusted Advisor) of one :py:class:`~.AwsLimitChecker`.
+
+    One :py:class:`boto3.session.Session` is created per set of credentials,
+    so the botocore service models are only loaded once per session; one
+    client (or resource) is created per API name, region, credentials and
+    client configuration, so services using the same API in the same region
+    (such as EC2 and VPC) share a single client and its HTTP connection pool.
+    boto3 clients are thread-safe once created; creation itself is serialized
+    by a per-pool lock.
+
+    If a :py:class:`~.RateLimiter`, :py:class:`~.Timings`,
+    :py:class:`~.ResponseCache`, :py:class:`~.ApiRecorder` and/or
+    :py:class:`~.ApiReplayer` is given, every client (including those
+    underlying resources) is registered with it when created.
+    """
+
+    def __init__(self, max_pool_connections=None, rate_limiter=None,
+                 timings=None, response_cache=None, record_replay=None):
+        """
+        :param max_pool_connections: maximum number of HTTP connections each
+          client keeps in its connection pool; if None, use the botocore
+          default (10).
+        :type max_pool_connections: int
+        :param rate_limiter: rate limiter to register all clients with, or
+          None to not rate-limit API calls
+        :type rate_limiter: :py:class:`~.RateLimiter`
+        :param timings: timings to register all clients with, or None to not
+          count API calls
+        :type timings: :py:class:`~.Timings`
+        :param response_cache: response cache to register all clients with,
+          or None to not cache API responses
+        :type response_cache: :py:class:`~.ResponseCache`
+        :param record_replay: recorder to record all API calls with, or
+          replayer to answer them from, or None to send them to AWS
+        :type record_replay: :py:class:`~.ApiRecorder` or
+          :py:class:`~.ApiReplayer`
+        """
+        self.max_pool_connections = max_pool_connections
+        self.rate_limiter = rate_limiter
+        self.timings = timings
+        self.response_cache = response_cache
+        self.record_replay = record_replay
+        self._lock = threading.RLock()
+        self._sessions = {}
+        self._clients = {}
+        self._resources = {}
+
+    @staticmethod
+    def _creds_key(connection_kwargs):
+        return tuple(
+            connection_kwargs.get(k) for k in (
+                'aws_access_key_id', 'aws_secret_access_key',
+                'aws_session_token'
+            )
+        )
+
+    def _session(self, connection_kwargs):
+        """
+        Return the session for the credentials in ``connection_kwargs``,
+        creating it if needed. Must be called with ``self._lock`` held.
+
+        :param connection_kwargs: keyword arguments for boto3 connection
+          functions
+        :type connection_kwargs: dict
+        :rtype: :py:class:`boto3.session.Session`
+        """
+        key = self._creds_key(connection_kwargs)
+        if key not in self._sessions:
+            kwargs = dict(
+                (k, v) for k, v in connection_kwargs.items()
+                if k != 'region_name' and v is not None
+            )
+            logger.debug('Creating new boto3 Session')
+            self._sessions[key] = boto3.session.Session(**kwargs)
+        return self._sessions[key]
+
+    def _config(self, config_kwargs):
+        """
+        Return the :py:class:`botocore.config.Config` to create a client
+        with, or None to use the defaults.
+
+        :param config_kwargs: keyword arguments for the Config
+        :type config_kwargs: dict
+        :rtype: :py:class:`botocore.config.Config`
+        """
+        kwargs = dict(config_kwargs)
+        if self.max_pool_connections is not None:
+            kwargs['max_pool_connections'] = self.max_pool_connections
+        if len(kwargs) == 0:
+            return None
+        return botocore_config.Config(**kwargs)
+
+    def _get(self, cache, factory_name, api_name, connection_kwargs,
+             config_kwargs):
+        key = (
+            api_name, connection_kwargs.get('region_name'),
+            self._creds_key(connection_kwargs),
+            repr(sorted(config_kwargs.items()))
+        )
+        with self._lock:
+            if key not in cache:
+                session = self._session(connection_kwargs)
+                kwargs = {'region_name': connection_kwargs.get('region_name')}
+                config = self._config(config_kwargs)
+                if config is not None:
+                    kwargs['config'] = config
+                conn = getattr(session, factory_name)(api_name, **kwargs)
+                for registry in (
+                    self.rate_limiter, self.timings, self.response_cache,
+                    self.record_replay
+                ):
+                    if registry is not None:
+                        registry.register(
+                            conn if factory_name == 'client'
+                            else conn.meta.client,
+                            api_name
+                        )
+                cache[key] = conn
+            return cache[key]
+
+    def client(self, api_name, connection_kwargs, **config_kwargs):
+        """
+        Return a shared boto3 client for the given API, creating it if needed.
+
+        :param api_name: name of the AWS API
+        :type api_name: str
+        :param connection_kwargs: keyword arguments for boto3 connection
+          functions; the region and credentials to connect with
+        :type connection_kwargs: dict
+        :param config_kwargs: additional keyword arguments for the client's
+          :py:class:`botocore.config.Config`
+        :returns: boto3 client
+        """
+        return self._get(self._clients, 'client', api_name,
+                         connection_kwargs, config_kwargs)
+
+    def resource(self, api_name, connection_kwargs):
+        """
+        Return a shared boto3 resource for the given API, creating it if
+        needed.
+
+        :param api_name: name of the AWS API
+        :type api_name: str
+        :param connection_kwargs: keyword arguments for boto3 connection
+          functions; the region and credentials to connect with
+        :type connection_kwargs: dict
+        :returns: boto3 resource
+        """
+        return self._get(self._resources, 'resource', api_name,
+                         connection_kwargs, {})
+
 
 class Connectable(object):
 
@@ -72,6 +422,31 @@ class Connectable(object):
     connecting via regions and/or STS.
     """
 
+    #: :py:class:`~.ClientPool` to get shared clients and resources from; if
+    #: None, every connection creates a new client or resource.
+    _client_pool = None
+
+    def _client(self, api_name, **config_kwargs):
+        """
+        Return a boto3 client for ``api_name``, connected with
+        ``self._boto3_connection_kwargs``. The client comes from
+        ``self._client_pool`` if set, otherwise a new one is created.
+
+        :param api_name: name of the AWS API
+        :type api_name: str
+        :param config_kwargs: keyword arguments for the client's
+          :py:class:`botocore.config.Config`
+        :returns: boto3 client
+        """
+        kwargs = self._boto3_connection_kwargs
+        if self._client_pool is not None:
+            return self._client_pool.client(api_name, kwargs, **config_kwargs)
+        if len(config_kwargs) > 0:
+            kwargs = dict(kwargs)
+            kwargs['config'] = botocore_config.Config(**config_kwargs)
+        with boto3_lock:
+            return boto3.client(api_name, **kwargs)
+
     def connect(self):
         """
         Connect to an AWS API via boto3 low-level client and set ``self.conn``
@@ -84,8 +459,7 @@ class Connectable(object):
         """
         if self.conn is not None:
             return
-        kwargs = self._boto3_connection_kwargs
-        self.conn = boto3.client(self.api_name, **kwargs)
+        self.conn = self._client(self.api_name)
         logger.info("Connected to %s in region %s",
                     self.api_name, self.conn._client_config.region_name)
 
@@ -103,6 +477,12 @@ class Connectable(object):
         if self.resource_conn is not None:
             return
         kwargs = self._boto3_connection_kwargs
-        self.resource_conn = boto3.resource(self.api_name, **kwargs)
+        if self._client_pool is not None:
+            self.resource_conn = self._client_pool.resource(
+                self.api_name, kwargs
+            )
+        else:
+            with boto3_lock:
+                self.resource_conn = boto3.resource(self.api_name, **kwargs)
         logger.info("Connected to %s (resource) in region %s", self.api_name,
                     self.resource_conn.meta.client._client_config.region_name)
@@ -0,0 +1,403 @@
+"""
+awslimitchecker/fleet.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+##############################################################################
+Copyright 2015-2017 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+##############################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+##############################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+##############################################################################
+"""
+
+import logging
+import time
+import traceback
+from multiprocessing import Pool, cpu_count
+
+from .checker import AwsLimitChecker, ALL_REGIONS
+
+logger = logging.getLogger(__name__)
+
+
+class FleetTarget(object):
+    """
+    One unit of work for :py:class:`~.FleetChecker`; a single account (or the
+    current credentials, if ``account_id`` is None) and one or more regions
+    to check in it, along with any overrides to apply.
+    """
+
+    def __init__(self, account_id=None, account_role=None, region=None,
+                 regions=None, external_id=None, name=None,
+                 limit_overrides=None, threshold_overrides=None):
+        """
+        :param account_id: AWS Account ID (12-digit string) to assume a role
+          in, or None to use the current credentials
+        :type account_id: str
+        :param account_role: name of the IAM role to assume in ``account_id``
+        :type account_role: str
+        :param region: single region name to check
+        :type region: str
+        :param regions: list of region names to check, or
+          :py:const:`~.ALL_REGIONS`; see :py:class:`~.AwsLimitChecker`.
+          Mutually exclusive with ``region``.
+        :type regions: :py:class:`list` or :py:class:`str`
+        :param external_id: External ID to use when assuming the role
+        :type external_id: str
+        :param name: optional human-readable name for this account
+        :type name: str
+        :param limit_overrides: dict to pass to
+          :py:meth:`~.AwsLimitChecker.set_limit_overrides`
+        :type limit_overrides: dict
+        :param threshold_overrides: dict to pass to
+          :py:meth:`~.AwsLimitChecker.set_threshold_overrides`
+        :type threshold_overrides: dict
+        """
+        self.account_id = account_id
+        self.account_role = account_role
+        self.region = region
+        self.regions = regions
+        self.external_id = external_id
+        self.name = name
+        self.limit_overrides = limit_overrides or {}
+        self.threshold_overrides = threshold_overrides or {}
+
+    def __repr__(self):
+        return '<FleetTarget account_id={a} region={r} regions={rs}>'.format(
+            a=self.account_id, r=self.region, rs=self.regions
+        )
+
+
+class FleetResult(object):
+    """
+    The result of checking one :py:class:`~.FleetTarget`. This holds only
+    plain data (no :py:class:`~.AwsLimit` or boto3 objects) so that it can
+    be passed back from a worker process.
+
+    ``limits`` is a dict of service name to limit name to a dict with keys
+    ``limit`` (the effective limit value), ``warnings`` and ``criticals``
+    (lists of string representations of the :py:class:`~.AwsLimitUsage`
+    values that crossed each threshold). It only includes limits with at
+    least one warning or critical. When the target checked multiple regions,
+    there is an extra outer level keyed by region name.
+
+    If the check raised an exception, ``error`` is the formatted traceback
+    and ``limits`` is empty.
+    """
+
+    def __init__(self, target, limits=None, error=None, duration=None):
+        self.target = target
+        self.limits = limits or {}
+        self.error = error
+        self.duration = duration
+
+    def _iter_limits(self):
+        """
+        Yield (region, service, limit name, limit dict) for every limit in
+        this result; region is None for single-region targets.
+        """
+        if self.target.regions is None:
+            by_region = {None: self.limits}
+        else:
+            by_region = self.limits
+        for rname in sorted(by_region.keys(), key=str):
+            for svc in sorted(by_region[rname].keys()):
+                for lim in sorted(by_region[rname][svc].keys()):
+                    yield rname, svc, lim, by_region[rname][svc][lim]
+
+    @property
+    def warning_count(self):
+        """
+        Return the number of limits with at least one warning and no
+        criticals.
+
+        :rtype: int
+        """
+        return len([
+            x for x in self._iter_limits()
+            if len(x[3]['warnings']) > 0 and len(x[3]['criticals']) == 0
+        ])
+
+    @property
+    def critical_count(self):
+        """
+        Return the number of limits with at least one critical.
+
+        :rtype: int
+        """
+        return len([
+            x for x in self._iter_limits() if len(x[3]['criticals']) > 0
+        ])
+
+
+def _limit_to_dict(limit):
+    """
+    Return the plain-data representation of a limit used in
+    :py:attr:`FleetResult.limits`.
+
+    :param limit: the limit to represent
+    :type limit: :py:class:`~.AwsLimit`
+    :rtype: dict
+    """
+    return {
+        'limit': limit.get_limit(),
+        'warnings': [str(x) for x in sorted(limit.get_warnings())],
+        'criticals': [str(x) for x in sorted(limit.get_criticals())],
+    }
+
+
+def _check_target(args):
+    """
+    Check a single :py:class:`~.FleetTarget`; this is the function run in
+    each worker process of :py:class:`~.FleetChecker`. It must never raise
+    an exception; failures are captured in the returned result.
+
+    :param args: 2-tuple of (:py:class:`~.FleetTarget`, dict of additional
+      keyword arguments for :py:class:`~.AwsLimitChecker`)
+    :type args: tuple
+    :rtype: :py:class:`~.FleetResult`
+    """
+    target, checker_kwargs = args
+    start = time.time()
+    try:
+        checker = AwsLimitChecker(
+            account_id=target.account_id,
+            account_role=target.account_role,
+            region=target.region,
+            regions=target.regions,
+            external_id=target.external_id,
+            **checker_kwargs
+        )
+        if len(target.threshold_overrides) > 0:
+            checker.set_threshold_overrides(target.threshold_overrides)
+        if len(target.limit_overrides) > 0:
+            checker.set_limit_overrides(target.limit_overrides)
+        problems = checker.check_thresholds()
+        if target.regions is None:
+            problems = {None: problems}
+        limits = {}
+        for rname, svcs in problems.items():
+            res = {}
+            for svc, lims in svcs.items():
+                res[svc] = dict(
+                    (lname, _limit_to_dict(lim)) for lname, lim in lims.items()
+                )
+            limits[rname] = res
+        if target.regions is None:
+            limits = limits[None]
+        return FleetResult(target, limits=limits,
+                           duration=time.time() - start)
+    except Exception:
+        logger.error('Error checking %s', target, exc_info=True)
+        return FleetResult(target, error=traceback.format_exc(),
+                           duration=time.time() - start)
+
+
+class FleetReport(object):
+    """
+    The merged results of a :py:class:`~.FleetChecker` run.
+    """
+
+    def __init__(self):
+        #: list of every :py:class:`~.FleetResult`, in completion order
+        self.results = []
+
+    def add(self, result):
+        """
+        Add a :py:class:`~.FleetResult` to the report.
+
+        :param result: the result to add
+        :type result: :py:class:`~.FleetResult`
+        """
+        self.results.append(result)
+
+    @property
+    def warning_count(self):
+        """
+        Total number of limits above their warning (but not critical)
+        threshold, across all results.
+
+        :rtype: int
+        """
+        return sum([r.warning_count for r in self.results])
+
+    @property
+    def critical_count(self):
+        """
+        Total number of limits above their critical threshold, across all
+        results.
+
+        :rtype: int
+        """
+        return sum([r.critical_count for r in self.results])
+
+    @property
+    def errors(self):
+        """
+        Return the results for targets that could not be checked.
+
+        :rtype: list
+        """
+        return [r for r in self.results if r.error is not None]
+
+    def problems(self):
+        """
+        Return a dict of every limit that crossed a threshold, keyed by
+        "account/region/service/limit" (the account and region parts are
+        omitted when None).
+
+        :returns: dict of string key to the limit dict described in
+          :py:class:`~.FleetResult`
+        :rtype: dict
+        """
+        res = {}
+        for result in self.results:
+            acct = result.target.account_id
+            for rname, svc, lim, data in result._iter_limits():
+                if rname is None:
+                    rname = result.target.region
+                key = '/'.join([
+                    str(x) for x in [acct, rname, svc, lim] if x is not None
+                ])
+                res[key] = data
+        return res
+
+
+class FleetChecker(object):
+    """
+    Check many accounts and regions (a "fleet") in parallel, spreading one
+    :py:class:`~.AwsLimitChecker` per :py:class:`~.FleetTarget` across a
+    pool of worker processes.
+    """
+
+    def __init__(self, targets, processes=None, max_workers=None,
+                 **checker_kwargs):
+        """
+        :param targets: the targets to check
+        :type targets: :py:obj:`list` of :py:class:`~.FleetTarget`
+        :param processes: number of worker processes to use; defaults to the
+          number of CPUs. If 1, targets are checked serially in the current
+          process.
+        :type processes: int
+        :param max_workers: per-target concurrency; passed through to
+          :py:class:`~.AwsLimitChecker`
+        :type max_workers: int
+        :param checker_kwargs: additional keyword arguments to pass to every
+          :py:class:`~.AwsLimitChecker`, such as ``warning_threshold``,
+          ``critical_threshold``, ``profile_name``, ``ta_refresh_mode`` or
+          ``ta_refresh_timeout``.
+        :type checker_kwargs: dict
+        """
+        self.targets = list(targets)
+        if processes is None:
+            processes = cpu_count()
+        self.processes = processes
+        self.checker_kwargs = dict(checker_kwargs)
+        self.checker_kwargs['max_workers'] = max_workers
+        self.checker_kwargs.setdefault('check_version', False)
+
+    def iter_results(self):
+        """
+        Check every target, yielding each :py:class:`~.FleetResult` as soon
+        as it is available (i.e. in completion order, not target order).
+
+        :rtype: generator
+        """
+        work = [(t, self.checker_kwargs) for t in self.targets]
+        if self.processes < 2 or len(work) < 2:
+            for item in work:
+                yield _check_target(item)
+            return
+        pool = Pool(min(self.processes, len(work)))
+        try:
+            for result in pool.imap_unordered(_check_target, work):
+                yield result
+        finally:
+            pool.close()
+            pool.join()
+
+    def run(self, callback=None):
+        """
+        Check every target and return the merged :py:class:`~.FleetReport`.
+
+        :param callback: optional function to call with each
+          :py:class:`~.FleetResult` as it completes
+        :type callback: function
+        :rtype: :py:class:`~.FleetReport`
+        """
+        report = FleetReport()
+        for result in self.iter_results():
+            logger.info('Finished checking %s in %.2fs', result.target,
+                        result.duration)
+            if callback is not None:
+                callback(result)
+            report.add(result)
+        return report
+
+
+def build_targets(account_ids, regions, account_role=None, external_id=None):
+    """
+    Build the list of :py:class:`~.FleetTarget` to check ``regions`` in each
+    of ``account_ids``, assuming the same role in each account. There is one
+    target per account, checking all of its regions with a single
+    multi-region :py:class:`~.AwsLimitChecker` (so Trusted Advisor is only
+    polled once per account), unless only one region is given.
+
+    :param account_ids: list of account IDs; None in the list means the
+      current credentials
+    :type account_ids: list
+    :param regions: list of region names, or :py:const:`~.ALL_REGIONS`
+    :type regions: :py:class:`list` or :py:class:`str`
+    :param account_role: name of the IAM role to assume in each account
+    :type account_role: str
+    :param external_id: External ID to use when assuming the role
+    :type external_id: str
+    :rtype: :py:obj:`list` of :py:class:`~.FleetTarget`
+    """
+    region = None
+    if regions != ALL_REGIONS and len(regions) == 1:
+        region = regions[0]
+        regions = None
+    elif regions != ALL_REGIONS:
+        regions = list(regions)
+    res = []
+    seen = set()
+    for acct in account_ids:
+        if acct in seen:
+            continue
+        seen.add(acct)
+        res.append(FleetTarget(
+            account_id=acct,
+            account_role=account_role if acct is not None else None,
+            region=region,
+            regions=regions,
+            external_id=external_id
+        ))
+    return res
@@ -52,6 +52,17 @@ SOURCE_API = 3
 
 class AwsLimit(object):
 
+    # services can have hundreds of limits, and a fleet run keeps the limits
+    # of every account and region in memory; no per-instance __dict__
+    __slots__ = (
+        'name', 'service', 'default_limit', 'limit_type', 'limit_subtype',
+        'limit_override', 'override_ta', 'ta_limit', 'ta_unlimited',
+        'api_limit', '_current_usage', 'def_warning_threshold',
+        'def_critical_threshold', 'warn_percent', 'warn_count',
+        'crit_percent', 'crit_count', '_warnings', '_criticals',
+        '_ta_service_name', '_ta_limit_name'
+    )
+
     def __init__(self, name, service, default_limit,
                  def_warning_threshold, def_critical_threshold,
                  limit_type=None, limit_subtype=None,
@@ -435,6 +446,10 @@ class AwsLimit(object):
 
 class AwsLimitUsage(object):
 
+    # per-resource limits create one instance per resource, so these can
+    # number in the millions; no per-instance __dict__
+    __slots__ = ('limit', 'value', 'resource_id', 'aws_type')
+
     def __init__(self, limit, value, resource_id=None, aws_type=None):
         """
         This object describes the usage of an AWS resource, with the capability
@@ -0,0 +1,74 @@
+"""
+awslimitchecker/limitcache.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+##############################################################################
+Copyright 2015-2017 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+##############################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+##############################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+##############################################################################
+"""
+
+from .usagecache import UsageCache
+from .utils import get_file_cache
+
+#: Default maximum age, in seconds, of cached limits to reuse (one week)
+DEFAULT_LIMIT_MAX_AGE = 604800
+
+
+class LimitCache(UsageCache):
+    """
+    Thread-safe on-disk cache of the limit values that services got from
+    their own APIs and from Trusted Advisor, keyed by AWS account ID, region
+    and service name. These only change when AWS raises a limit, so runs can
+    reuse them for a long time and only have to find usage. Each entry holds
+    the time the limits were retrieved and a dict with a ``ta`` key (whether
+    Trusted Advisor was checked) and a ``limits`` key, a dict of limit name
+    to a list of ``[source, value]`` pairs (see
+    :py:meth:`~._AwsService._dump_limits`).
+
+    The file is handled the same way as a :py:class:`~.UsageCache`'s. Use
+    :py:func:`~.get_limit_cache` to get the shared instance for a given path.
+    """
+
+    _description = 'limits'
+
+
+def get_limit_cache(path):
+    """
+    Return the process-wide :py:class:`~.LimitCache` for ``path``, creating
+    it if needed.
+
+    :param path: path to the JSON file to persist the cache to
+    :type path: str
+    :rtype: :py:class:`~.LimitCache`
+    """
+    return get_file_cache(LimitCache, path)
@@ -0,0 +1,298 @@
+"""
+awslimitchecker/ratelimit.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+##############################################################################
+Copyright 2015-2017 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+##############################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+##############################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+##############################################################################
+"""
+
+import logging
+import threading
+import time
+from functools import partial
+
+logger = logging.getLogger(__name__)
+
+#: Default sustained rate, in requests per second, allowed for each API in
+#: each region. This matches the refill rate of EC2's bucket for
+#: non-mutating (``Describe*``) actions.
+DEFAULT_RATE = 20.0
+
+#: Default burst size (bucket capacity) for each API in each region.
+DEFAULT_BURST = 100.0
+
+#: Default ``(rate, burst)`` for APIs that AWS throttles well below
+#: :py:const:`~.DEFAULT_RATE`. API Gateway's control-plane (management) API
+#: allows 10 requests per second per account, with bursts of 40.
+DEFAULT_API_RATES = {
+    'apigateway': (10.0, 40.0),
+}
+
+#: The rate is never backed off below this many requests per second.
+MIN_RATE = 0.5
+
+#: When a call is throttled, multiply the API's current rate by this.
+BACKOFF_FACTOR = 0.5
+
+#: After each successful call, increase the API's current rate by this
+#: fraction of its configured rate, until it is back to the configured rate.
+RECOVERY_STEP = 0.05
+
+#: Error codes that AWS APIs use to signal that a request was throttled.
+THROTTLING_ERROR_CODES = frozenset([
+    'Throttling',
+    'ThrottlingException',
+    'ThrottledException',
+    'RequestThrottledException',
+    'RequestThrottled',
+    'TooManyRequestsException',
+    'ProvisionedThroughputExceededException',
+    'RequestLimitExceeded',
+    'BandwidthLimitExceeded',
+    'PriorRequestNotComplete',
+    'EC2ThrottledException',
+    'SlowDown',
+])
+
+
+class TokenBucket(object):
+    """
+    Thread-safe token bucket with additive-increase / multiplicative-decrease
+    rate adaptation. Each request takes one token; tokens are refilled at
+    ``rate`` per second up to ``burst``. When a request is throttled, the
+    rate is cut by :py:const:`~.BACKOFF_FACTOR` and the bucket is emptied, so
+    that every caller sharing it pauses; each successful request then raises
+    the rate again by :py:const:`~.RECOVERY_STEP` of the configured rate.
+    """
+
+    def __init__(self, rate, burst, min_rate=MIN_RATE):
+        """
+        :param rate: configured (maximum) sustained rate, in requests per
+          second
+        :type rate: float
+        :param burst: bucket capacity
+        :type burst: float
+        :param min_rate: minimum rate to back off to
+        :type min_rate: float
+        """
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.tokens = float(burst)
+        self._last = time.time()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """
+        Add the tokens accrued since the last refill. Must be called with
+        ``self._lock`` held.
+        """
+        now = time.time()
+        self.tokens = min(
+            self.burst, self.tokens + ((now - self._last) * self.rate)
+        )
+        self._last = now
+
+    def acquire(self):
+        """
+        Take one token from the bucket, sleeping until one is available.
+
+        :returns: number of seconds spent waiting
+        :rtype: float
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def throttled(self):
+        """
+        Record that a request was throttled; back off the rate and empty the
+        bucket.
+        """
+        with self._lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate * BACKOFF_FACTOR)
+            self.tokens = min(self.tokens, 0.0)
+
+    def succeeded(self):
+        """
+        Record that a request succeeded; recover the rate towards its
+        configured value.
+        """
+        with self._lock:
+            if self.rate < self.max_rate:
+                self._refill()
+                self.rate = min(
+                    self.max_rate, self.rate + (self.max_rate * RECOVERY_STEP)
+                )
+
+
+class RateLimiter(object):
+    """
+    Client-side rate limiter for AWS API calls, with one
+    :py:class:`~.TokenBucket` per API name and region. AWS throttles API
+    requests per account and region, so a single RateLimiter is shared by all
+    of the services (and Trusted Advisor) of an
+    :py:class:`~.AwsLimitChecker`, via its :py:class:`~.ClientPool`.
+
+    :py:meth:`~.register` hooks a boto3 client's event system so that every
+    HTTP request it sends (including botocore's own retries) first takes a
+    token from the appropriate bucket, and so that throttling errors back off
+    that bucket for every thread using it. Counts of calls, retries and
+    throttled calls are available from :py:meth:`~.get_stats`.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST,
+                 api_rates=None):
+        """
+        :param rate: default sustained rate, in requests per second, for
+          each API in each region
+        :type rate: float
+        :param burst: default burst size for each API in each region
+        :type burst: float
+        :param api_rates: dict of API name (e.g. "ec2") to a
+          ``(rate, burst)`` tuple, overriding the defaults (and
+          :py:const:`~.DEFAULT_API_RATES`) for that API
+        :type api_rates: dict
+        """
+        self.rate = rate
+        self.burst = burst
+        self.api_rates = dict(DEFAULT_API_RATES)
+        if api_rates is not None:
+            self.api_rates.update(api_rates)
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._stats = {}
+
+    def bucket(self, api_name, region_name):
+        """
+        Return the :py:class:`~.TokenBucket` for an API in a region, creating
+        it if needed.
+
+        :param api_name: name of the AWS API
+        :type api_name: str
+        :param region_name: region name
+        :type region_name: str
+        :rtype: :py:class:`~.TokenBucket`
+        """
+        key = (api_name, region_name)
+        with self._lock:
+            if key not in self._buckets:
+                rate, burst = self.api_rates.get(
+                    api_name, (self.rate, self.burst)
+                )
+                self._buckets[key] = TokenBucket(rate, burst)
+                self._stats[key] = {'calls': 0, 'retried': 0, 'throttled': 0}
+            return self._buckets[key]
+
+    def _incr(self, api_name, region_name, counter):
+        with self._lock:
+            self._stats[(api_name, region_name)][counter] += 1
+
+    def register(self, client, api_name):
+        """
+        Rate-limit all requests made by a boto3 client.
+
+        :param client: boto3 client
+        :param api_name: name of the AWS API the client connects to
+        :type api_name: str
+        """
+        region_name = client.meta.region_name
+        self.bucket(api_name, region_name)
+        client.meta.events.register(
+            'before-send', partial(self._before_send, api_name, region_name)
+        )
+        client.meta.events.register(
+            'needs-retry', partial(self._needs_retry, api_name, region_name)
+        )
+
+    def _before_send(self, api_name, region_name, request=None, **kwargs):
+        """
+        botocore ``before-send`` event handler; wait for a token before each
+        HTTP request. Must return None, or botocore will not send the request.
+        """
+        self._incr(api_name, region_name, 'calls')
+        context = getattr(request, 'context', None) or {}
+        if context.get('retries', {}).get('attempt', 1) > 1:
+            self._incr(api_name, region_name, 'retried')
+        waited = self.bucket(api_name, region_name).acquire()
+        if waited > 0:
+            logger.debug('Rate limited %s in %s for %.3fs', api_name,
+                         region_name, waited)
+        return None
+
+    def _needs_retry(self, api_name, region_name, response=None, **kwargs):
+        """
+        botocore ``needs-retry`` event handler; adapt the API's rate based on
+        whether the request was throttled. Must return None, to leave the
+        retry decision to botocore.
+        """
+        if response is None:
+            return None
+        code = response[1].get('Error', {}).get('Code')
+        bucket = self.bucket(api_name, region_name)
+        if code in THROTTLING_ERROR_CODES:
+            self._incr(api_name, region_name, 'throttled')
+            bucket.throttled()
+            logger.info('%s call in %s was throttled (%s); backing off to '
+                        '%.2f requests per second', api_name, region_name,
+                        code, bucket.rate)
+        elif code is None:
+            bucket.succeeded()
+        return None
+
+    def get_stats(self):
+        """
+        Return counts of API calls (HTTP requests), retried calls and
+        throttled calls, along with the current rate, per API and region.
+
+        :returns: dict of API name to dict of region name to dict with keys
+          ``calls``, ``retried``, ``throttled`` and ``rate``
+        :rtype: dict
+        """
+        res = {}
+        with self._lock:
+            for (api_name, region_name), stats in self._stats.items():
+                d = dict(stats)
+                d['rate'] = self._buckets[(api_name, region_name)].rate
+                res.setdefault(api_name, {})[region_name] = d
+        return res
@@ -0,0 +1,271 @@
+"""
+awslimitchecker/replay.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+##############################################################################
+Copyright 2015-2017 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+##############################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+##############################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+##############################################################################
+"""
+
+import base64
+import copy
+import gzip
+import json
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from functools import partial
+
+from .responsecache import CONTEXT_HIT_KEY, _HTTPResponse, normalize_params
+from .utils import lazy_import
+
+parser = lazy_import('dateutil.parser')
+
+logger = logging.getLogger(__name__)
+
+#: Version of the archive format written by :py:class:`~.ApiRecorder`.
+ARCHIVE_VERSION = 1
+
+
+def _encode(obj):
+    """
+    ``default`` function for :py:func:`json.dumps`, for the types that
+    botocore parses responses into that JSON does not support.
+    """
+    if isinstance(obj, datetime):
+        return {'__datetime__': obj.isoformat()}
+    if isinstance(obj, bytes):
+        return {'__bytes__': base64.b64encode(obj).decode('ascii')}
+    raise TypeError('Cannot serialize {t}'.format(t=type(obj)))
+
+
+def _decode(d):
+    """
+    ``object_hook`` function for :py:func:`json.loads`; inverse of
+    :py:func:`~._encode`.
+    """
+    if '__datetime__' in d:
+        return parser.parse(d['__datetime__'])
+    if '__bytes__' in d:
+        return base64.b64decode(d['__bytes__'])
+    return d
+
+
+#: Key the normalized parameters of a call are stored under in its botocore
+#: request context.
+_PARAMS_KEY = 'awslimitchecker_replay_params'
+
+
+def _save_params(params=None, context=None, **kwargs):
+    """
+    botocore ``before-parameter-build`` event handler; store the normalized
+    parameters of a call (as passed by the caller, before botocore adds to
+    them) in its request context.
+    """
+    if context is not None:
+        context[_PARAMS_KEY] = normalize_params(params)
+
+
+class ApiRecorder(object):
+    """
+    Records every AWS API call made by the clients registered with it (which
+    :py:class:`~.ClientPool` does for all services and Trusted Advisor of an
+    :py:class:`~.AwsLimitChecker` given it as ``record_replay``), and writes
+    them to a gzipped JSON archive with :py:meth:`~.save`, for
+    :py:class:`~.ApiReplayer` to answer the same calls from later, without
+    network access or AWS credentials.
+
+    Calls answered by a :py:class:`~.ResponseCache` are not recorded, as they
+    will be answered by it again on replay. Calls made outside of the client
+    pool (i.e. STS AssumeRole) are not recorded either.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: path to write the archive to
+        :type path: str
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._calls = []
+
+    def register(self, client, api_name):
+        """
+        Record all calls made by a boto3 client.
+
+        :param client: boto3 client
+        :param api_name: name of the AWS API the client connects to
+        :type api_name: str
+        """
+        region_name = client.meta.region_name
+        client.meta.events.register('before-parameter-build', _save_params)
+        client.meta.events.register(
+            'after-call', partial(self._after_call, api_name, region_name)
+        )
+
+    def _after_call(self, api_name, region_name, http_response=None,
+                    parsed=None, model=None, context=None, **kwargs):
+        """
+        botocore ``after-call`` event handler; record the call and its
+        response.
+        """
+        context = context or {}
+        if context.get(CONTEXT_HIT_KEY) or http_response is None:
+            return
+        response = dict(parsed or {})
+        response.pop('ResponseMetadata', None)
+        call = {
+            'api': api_name,
+            'region': region_name,
+            'operation': model.name,
+            'params': context.get(_PARAMS_KEY, '{}'),
+            'status': http_response.status_code,
+            'response': response
+        }
+        with self._lock:
+            self._calls.append(call)
+
+    def save(self):
+        """
+        Write all calls recorded so far to ``self.path``.
+        """
+        with self._lock:
+            data = {'version': ARCHIVE_VERSION, 'calls': list(self._calls)}
+        with gzip.open(self.path, 'wb') as fh:
+            fh.write(json.dumps(
+                data, default=_encode, separators=(',', ':')
+            ).encode('utf-8'))
+        logger.info('Wrote %d recorded API calls to %s', len(data['calls']),
+                    self.path)
+
+
+class ApiReplayer(object):
+    """
+    Answers the AWS API calls made by the clients registered with it (which
+    :py:class:`~.ClientPool` does for all services and Trusted Advisor of an
+    :py:class:`~.AwsLimitChecker` given it as ``record_replay``) from an
+    archive written by :py:class:`~.ApiRecorder`, instead of sending them to
+    AWS.
+
+    Calls are matched by API, region, operation and parameters. If the same
+    call was recorded more than once (i.e. Trusted Advisor refresh status
+    polls), the recorded responses are replayed in order, and the last one
+    is repeated once they run out. A call that was not recorded fails with a
+    ``NotRecorded`` :py:class:`botocore.exceptions.ClientError`.
+    """
+
+    def __init__(self, path, latency=0.0):
+        """
+        :param path: path of the archive to replay
+        :type path: str
+        :param latency: number of seconds to wait before answering each
+          call, to simulate the network round trip
+        :type latency: float
+        """
+        self.path = path
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._responses = {}
+        with gzip.open(path, 'rb') as fh:
+            data = json.loads(fh.read().decode('utf-8'), object_hook=_decode)
+        if data.get('version') != ARCHIVE_VERSION:
+            raise ValueError(
+                'Unsupported API call archive version in {p}: {v}'.format(
+                    p=path, v=data.get('version'))
+            )
+        for c in data['calls']:
+            key = (c['api'], c['region'], c['operation'], c['params'])
+            self._responses.setdefault(key, deque()).append(
+                (c['status'], c['response'])
+            )
+        logger.info('Loaded %d recorded API calls from %s',
+                    len(data['calls']), path)
+
+    def register(self, client, api_name):
+        """
+        Answer all calls made by a boto3 client from the archive.
+
+        :param client: boto3 client
+        :param api_name: name of the AWS API the client connects to
+        :type api_name: str
+        """
+        region_name = client.meta.region_name
+        client.meta.events.register('before-parameter-build', _save_params)
+        # last, so that a ResponseCache hit still answers first
+        client.meta.events.register_last(
+            'before-call', partial(self._before_call, api_name, region_name)
+        )
+
+    def _next_response(self, key):
+        """
+        Return the next recorded ``(status, response)`` for a call, or None.
+        """
+        with self._lock:
+            responses = self._responses.get(key)
+            if not responses:
+                return None
+            if len(responses) > 1:
+                return responses.popleft()
+            return responses[0]
+
+    def _before_call(self, api_name, region_name, model=None, context=None,
+                     **kwargs):
+        """
+        botocore ``before-call`` event handler; return the recorded response
+        so that botocore does not send the request.
+        """
+        key = (
+            api_name, region_name, model.name,
+            (context or {}).get(_PARAMS_KEY, '{}')
+        )
+        res = self._next_response(key)
+        if res is None:
+            logger.warning('No recorded response for %s.%s in %s with '
+                           'params %s', api_name, model.name, region_name,
+                           key[3])
+            status = 400
+            response = {'Error': {
+                'Code': 'NotRecorded',
+                'Message': 'No recorded response for this call'
+            }}
+        else:
+            status, response = res
+        if self.latency > 0:
+            time.sleep(self.latency)
+        parsed = copy.deepcopy(response)
+        parsed['ResponseMetadata'] = {
+            'HTTPStatusCode': status, 'HTTPHeaders': {}, 'RetryAttempts': 0
+        }
+        return _HTTPResponse(status), parsed
@@ -0,0 +1,229 @@
+"""
+awslimitchecker/responsecache.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+##############################################################################
+Copyright 2015-2017 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+##############################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+##############################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+##############################################################################
+"""
+
+import copy
+import json
+import logging
+import threading
+from functools import partial
+
+logger = logging.getLogger(__name__)
+
+#: The (API name, operation name) pairs whose responses are cached. These
+#: are small, non-paginated calls for account-wide attributes and limits,
+#: that more than one phase of a refresh cycle (usage and limits) may make.
+#: Responses are keyed by API name, so ``elb`` and ``elbv2``
+#: DescribeAccountLimits are separate entries. Paginated list responses are
+#: never cached, as they can be large, and the other ``ec2`` Describe calls
+#: are not either: the EC2, EBS and VPC services each make different ones,
+#: once per cycle.
+CACHEABLE_OPERATIONS = frozenset([
+    ('autoscaling', 'DescribeAccountLimits'),
+    ('cloudformation', 'DescribeAccountLimits'),
+    ('dynamodb', 'DescribeLimits'),
+    ('ec2', 'DescribeAccountAttributes'),
+    ('elb', 'DescribeAccountLimits'),
+    ('elbv2', 'DescribeAccountLimits'),
+    ('iam', 'GetAccountSummary'),
+    ('rds', 'DescribeAccountAttributes'),
+    ('ses', 'GetSendQuota'),
+])
+
+#: Key set to True in the botocore request context of calls answered from
+#: the cache, so that other event handlers (i.e. :py:class:`~.Timings`) can
+#: tell that no request was sent.
+CONTEXT_HIT_KEY = 'awslimitchecker_response_cache_hit'
+
+#: Key the cache key of a cacheable call is stored under in its botocore
+#: request context.
+_CONTEXT_KEY = 'awslimitchecker_response_cache_key'
+
+
+def normalize_params(params):
+    """
+    Return the parameters of an API call as a string that is the same for
+    all calls with equal parameters, regardless of dict ordering.
+
+    :param params: API call parameters
+    :type params: dict
+    :rtype: str
+    """
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+class _HTTPResponse(object):
+    """
+    Minimal stand-in for the :py:class:`botocore.awsrequest.AWSResponse` of a
+    call that was answered without sending a request; botocore only checks
+    its status code.
+    """
+
+    headers = {}
+    content = None
+
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+
+
+class ResponseCache(object):
+    """
+    Thread-safe cache of the parsed responses to some read-only AWS API calls
+    (see :py:const:`~.CACHEABLE_OPERATIONS`), so that identical calls (same
+    API, region, operation and parameters) made by any service during one
+    refresh cycle are only sent to AWS once. It is only used if
+    :py:class:`~.AwsLimitChecker` is constructed with
+    ``cache_responses=True``; one ResponseCache is then shared by all of its
+    services, via its :py:class:`~.ClientPool`, and is cleared at the start
+    of every :py:meth:`~.AwsLimitChecker.find_usage`,
+    :py:meth:`~.AwsLimitChecker.get_limits` and
+    :py:meth:`~.AwsLimitChecker.check_thresholds` call, so responses are never
+    reused from one cycle to the next.
+
+    :py:meth:`~.register` hooks a boto3 client's event system so that
+    cacheable calls are answered from the cache when possible, and
+    successful responses are added to it. Each hit gets its own copy of the
+    cached response, so modifying it does not affect the cache. Counts of
+    hits and misses are available from :py:meth:`~.get_stats`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._responses = {}
+        self._stats = {}
+
+    def _incr(self, api_name, region_name, counter):
+        with self._lock:
+            stats = self._stats.setdefault(
+                (api_name, region_name), {'hits': 0, 'misses': 0}
+            )
+            stats[counter] += 1
+
+    def register(self, client, api_name):
+        """
+        Cache the responses to read-only calls made by a boto3 client.
+
+        :param client: boto3 client
+        :param api_name: name of the AWS API the client connects to
+        :type api_name: str
+        """
+        if not any(api == api_name for api, _ in CACHEABLE_OPERATIONS):
+            return
+        region_name = client.meta.region_name
+        client.meta.events.register(
+            'before-parameter-build',
+            partial(self._before_parameter_build, api_name, region_name)
+        )
+        client.meta.events.register('before-call', self._before_call)
+        client.meta.events.register('after-call', self._after_call)
+
+    def _before_parameter_build(self, api_name, region_name, params=None,
+                                model=None, context=None, **kwargs):
+        """
+        botocore ``before-parameter-build`` event handler; if the operation
+        is cacheable, store its cache key (built from the parameters the
+        caller passed) in the request context.
+        """
+        if (
+            context is None or
+            (api_name, model.name) not in CACHEABLE_OPERATIONS
+        ):
+            return
+        context[_CONTEXT_KEY] = (
+            api_name, region_name, model.name, normalize_params(params)
+        )
+
+    def _before_call(self, context=None, **kwargs):
+        """
+        botocore ``before-call`` event handler; if the response to this call
+        is cached, return it so that botocore does not send the request.
+        """
+        key = (context or {}).get(_CONTEXT_KEY)
+        if key is None:
+            return None
+        with self._lock:
+            parsed = self._responses.get(key)
+        if parsed is None:
+            self._incr(key[0], key[1], 'misses')
+            return None
+        self._incr(key[0], key[1], 'hits')
+        logger.debug('Using cached response for %s.%s in %s', key[0], key[2],
+                     key[1])
+        context[CONTEXT_HIT_KEY] = True
+        return _HTTPResponse(), copy.deepcopy(parsed)
+
+    def _after_call(self, http_response=None, parsed=None, context=None,
+                    **kwargs):
+        """
+        botocore ``after-call`` event handler; cache successful responses to
+        cacheable calls. The response is stored as-is (it is copied on each
+        hit), as none of the cacheable calls are paginated, so callers do not
+        modify their responses.
+        """
+        context = context or {}
+        key = context.get(_CONTEXT_KEY)
+        if key is None or context.get(CONTEXT_HIT_KEY):
+            return
+        if http_response is None or http_response.status_code >= 300:
+            return
+        with self._lock:
+            self._responses[key] = parsed
+
+    def clear(self):
+        """
+        Discard all cached responses, so that every call is sent to AWS
+        again. Hit and miss counts are kept.
+        """
+        with self._lock:
+            self._responses = {}
+
+    def get_stats(self):
+        """
+        Return counts of cacheable calls answered from the cache (``hits``,
+        i.e. API calls saved) and sent to AWS (``misses``), per API and
+        region.
+
+        :returns: dict of API name to dict of region name to dict with keys
+          ``hits`` and ``misses``
+        :rtype: dict
+        """
+        res = {}
+        with self._lock:
+            for (api_name, region_name), stats in self._stats.items():
+                res.setdefault(api_name, {})[region_name] = dict(stats)
+        return res
@@ -43,9 +43,12 @@ import logging
 import json
 import termcolor
 
-from .checker import AwsLimitChecker
+from .checker import AwsLimitChecker, ALL_REGIONS
+from .replay import ApiRecorder, ApiReplayer
 from .utils import StoreKeyValuePair, dict2cols
 from .limit import SOURCE_TA, SOURCE_API
+from .limitcache import DEFAULT_LIMIT_MAX_AGE
+from .services import _services
 
 logging.basicConfig(level=logging.WARNING)
 logger = logging.getLogger()
@@ -68,6 +71,7 @@ class Runner(object):
         self.checker = None
         self.skip_ta = False
         self.service_name = None
+        self.multi_region = False
 
     def parse_args(self, argv):
         """
@@ -159,9 +163,21 @@ class Runner(object):
         p.add_argument('-T', '--mfa-token', action='store', type=str,
                        default=None, help='MFA Token to use when assuming '
                        'a role via STS')
+        p.add_argument('--sts-cache-file', dest='sts_cache_file',
+                       action='store', type=str, default=None,
+                       help='file to cache STS assumed role credentials in, '
+                       'so that they can be reused by later runs until '
+                       'shortly before they expire')
         p.add_argument('-r', '--region', action='store',
                        type=str, default=None,
                        help='AWS region name to connect to; required for STS')
+        p.add_argument('--regions', dest='regions', action='store',
+                       nargs='+', type=str, default=None, metavar='REGION',
+                       help='check each of these AWS regions (concurrently '
+                       'with --parallel); specify "all" to check every '
+                       'region enabled for the account. Results are shown '
+                       'as region/service/limit. Cannot be used with '
+                       '-r/--region')
         p.add_argument('--skip-ta', action='store_true', default=False,
                        help='do not attempt to pull *any* information on limits'
                        ' from Trusted Advisor')
@@ -189,6 +205,74 @@ class Runner(object):
                        help='If waiting for TA checks to refresh, wait up to '
                             'this number of seconds before continuing on '
                             'anyway.')
+        p.add_argument('--ta-cache-file', dest='ta_cache_file',
+                       action='store', type=str, default=None,
+                       help='file to cache the Trusted Advisor check ID and '
+                       'results in, so that later runs only fetch results '
+                       'again when the check has been refreshed')
+        p.add_argument('--usage-cache-file', dest='usage_cache_file',
+                       action='store', type=str, default=None,
+                       metavar='FILE',
+                       help='file to cache the usage each service finds in, '
+                            'so that later runs can reuse it (see '
+                            '--max-age)')
+        p.add_argument('--max-age', dest='usage_max_age', action='store',
+                       type=int, default=0, metavar='SECONDS',
+                       help='with --usage-cache-file, reuse cached usage '
+                            'that is up to this many seconds old instead of '
+                            'finding it again; default 0 (never reuse)')
+        p.add_argument('--service-max-age', dest='service_max_age',
+                       action=StoreKeyValuePair, metavar='SERVICE=SECONDS',
+                       help='override --max-age for one service, in '
+                            '"service_name=seconds" format; can be '
+                            'specified multiple times.')
+        p.add_argument('--limit-cache-file', dest='limit_cache_file',
+                       action='store', type=str, default=None,
+                       metavar='FILE',
+                       help='file to cache the limits each service gets from '
+                            'its API and Trusted Advisor in, so that later '
+                            'runs only have to find usage (see '
+                            '--limit-max-age and --refresh-limits)')
+        p.add_argument('--limit-max-age', dest='limit_max_age',
+                       action='store', type=int,
+                       default=DEFAULT_LIMIT_MAX_AGE, metavar='SECONDS',
+                       help='with --limit-cache-file, reuse cached limits '
+                            'that are up to this many seconds old; default '
+                            '%d (one week)' % DEFAULT_LIMIT_MAX_AGE)
+        p.add_argument('--refresh-limits', dest='refresh_limits',
+                       action='store_true', default=False,
+                       help='with --limit-cache-file, ignore cached limits '
+                            'and retrieve them again, i.e. after AWS has '
+                            'raised a limit')
+        p.add_argument('--record-api-calls', dest='record_file',
+                       action='store', type=str, default=None,
+                       metavar='FILE',
+                       help='record every AWS API call made, and its response, '
+                            'to FILE (a gzipped JSON archive), for later '
+                            'use with --replay-api-calls')
+        p.add_argument('--replay-api-calls', dest='replay_file',
+                       action='store', type=str, default=None,
+                       metavar='FILE',
+                       help='answer AWS API calls from a file recorded with '
+                            '--record-api-calls, instead of sending them to '
+                            'AWS')
+        p.add_argument('--replay-latency', dest='replay_latency',
+                       action='store', type=float, default=0.0,
+                       metavar='SECONDS',
+                       help='when replaying API calls, wait this many seconds '
+                            'before answering each one, to simulate network '
+                            'latency')
+        p.add_argument('--parallel', dest='max_workers', action='store',
+                       type=int, default=None, metavar='N',
+                       help='query up to N services concurrently; services '
+                            'that make per-resource API calls share the same '
+                            'N threads, so at most N threads (plus one for '
+                            'Trusted Advisor) query AWS at once; default is '
+                            'to query one service at a time')
+        p.add_argument('--timings', action='store_true', default=False,
+                       help='after checking, print how long each service '
+                            'took and how many API calls, result pages and '
+                            'response bytes it needed, to STDERR')
         p.add_argument('--no-color', action='store_true', default=False,
                        help='do not colorize output')
         p.add_argument('--no-check-version', action='store_false', default=True,
@@ -202,6 +286,24 @@ class Runner(object):
                        default=False,
                        help='print version number and exit.')
         args = p.parse_args(argv)
+        if args.record_file is not None and args.replay_file is not None:
+            p.error('--record-api-calls and --replay-api-calls cannot be '
+                    'used together')
+        if args.region is not None and args.regions is not None:
+            p.error('-r/--region and --regions cannot be used together')
+        try:
+            args.service_max_age = dict(
+                (k, int(v)) for k, v in args.service_max_age.items()
+            )
+        except ValueError:
+            p.error('--service-max-age must be in SERVICE=SECONDS format, '
+                    'with an integer number of seconds')
+        unknown = sorted(
+            k for k in args.service_max_age if k not in _services
+        )
+        if unknown:
+            p.error('--service-max-age: unknown service name(s): %s; see '
+                    '--list-services' % ', '.join(unknown))
         args.ta_refresh_mode = None
         if args.ta_refresh_wait:
             args.ta_refresh_mode = 'wait'
@@ -211,14 +313,33 @@ class Runner(object):
             args.ta_refresh_mode = args.ta_refresh_older
         return args
 
+    def _flatten_regions(self, res):
+        """
+        When checking multiple regions, flatten a dict of region name to
+        service name to per-service results into a dict of "region/service"
+        to per-service results, so that output is keyed by
+        "region/service/limit". Otherwise return ``res`` unchanged.
+
+        :param res: results from the checker
+        :type res: dict
+        :rtype: dict
+        """
+        if not self.multi_region:
+            return res
+        flat = {}
+        for rname, svcs in res.items():
+            for svc, lims in svcs.items():
+                flat['{r}/{s}'.format(r=rname, s=svc)] = lims
+        return flat
+
     def list_services(self):
         for x in sorted(self.checker.get_service_names()):
             print(x)
 
     def list_limits(self):
-        limits = self.checker.get_limits(
+        limits = self._flatten_regions(self.checker.get_limits(
             use_ta=(not self.skip_ta),
-            service=self.service_name)
+            service=self.service_name))
         data = {}
         for svc in sorted(limits.keys()):
             for lim in sorted(limits[svc].keys()):
@@ -233,7 +354,8 @@ class Runner(object):
         print(dict2cols(data))
 
     def list_defaults(self):
-        limits = self.checker.get_limits(service=self.service_name)
+        limits = self._flatten_regions(
+            self.checker.get_limits(service=self.service_name))
         data = {}
         for svc in sorted(limits.keys()):
             for lim in sorted(limits[svc].keys()):
@@ -248,8 +370,8 @@ class Runner(object):
     def show_usage(self):
         self.checker.find_usage(
             service=self.service_name, use_ta=(not self.skip_ta))
-        limits = self.checker.get_limits(
-            service=self.service_name, use_ta=(not self.skip_ta))
+        limits = self._flatten_regions(self.checker.get_limits(
+            service=self.service_name, use_ta=(not self.skip_ta)))
         data = {}
         for svc in sorted(limits.keys()):
             for lim in sorted(limits[svc].keys()):
@@ -257,6 +379,22 @@ class Runner(object):
                     v=limits[svc][lim].get_current_usage_str())
         print(dict2cols(data))
 
+    def print_timings(self):
+        timings = self._flatten_regions(self.checker.get_timings())
+        data = {}
+        for svc in timings.keys():
+            for phase, t in timings[svc].items():
+                k = '{s}/{p}'.format(s=svc, p=phase)
+                data[k] = '{t:9.3f}s {c:6d} calls {p:6d} pages {b:10d} ' \
+                          'bytes'.format(t=t['seconds'], c=t['calls'],
+                                         p=t['pages'], b=t['bytes'])
+                for op, o in t['operations'].items():
+                    data['{k}/{o}'.format(k=k, o=op)] = \
+                        '{x:10} {c:6d} calls {x:12} {b:10d} bytes'.format(
+                            x='', c=o['calls'], b=o['bytes'])
+        if len(data) > 0:
+            sys.stderr.write(dict2cols(data))
+
     def color_output(self, s, color):
         if not self.colorize:
             return s
@@ -299,9 +437,9 @@ class Runner(object):
     def check_thresholds(self):
         have_warn = False
         have_crit = False
-        problems = self.checker.check_thresholds(
+        problems = self._flatten_regions(self.checker.check_thresholds(
             use_ta=(not self.skip_ta),
-            service=self.service_name)
+            service=self.service_name))
         columns = {}
         for svc in sorted(problems.keys()):
             for lim_name in sorted(problems[svc].keys()):
@@ -350,6 +488,19 @@ class Runner(object):
         if args.skip_ta:
             self.skip_ta = True
 
+        if args.regions is not None:
+            self.multi_region = True
+            if args.regions == [ALL_REGIONS]:
+                args.regions = ALL_REGIONS
+
+        record_replay = None
+        if args.record_file is not None:
+            record_replay = ApiRecorder(args.record_file)
+        elif args.replay_file is not None:
+            record_replay = ApiReplayer(
+                args.replay_file, latency=args.replay_latency
+            )
+
         # the rest of these actually use the checker
         self.checker = AwsLimitChecker(
             warning_threshold=args.warning_threshold,
@@ -363,7 +514,18 @@ class Runner(object):
             mfa_token=args.mfa_token,
             ta_refresh_mode=args.ta_refresh_mode,
             ta_refresh_timeout=args.ta_refresh_timeout,
-            check_version=args.check_version
+            check_version=args.check_version,
+            max_workers=args.max_workers,
+            regions=args.regions,
+            sts_cache_file=args.sts_cache_file,
+            ta_cache_file=args.ta_cache_file,
+            record_replay=record_replay,
+            usage_cache_file=args.usage_cache_file,
+            usage_max_age=args.usage_max_age,
+            service_usage_max_age=args.service_max_age,
+            limit_cache_file=args.limit_cache_file,
+            limit_max_age=args.limit_max_age,
+            refresh_limits=args.refresh_limits
         )
 
         if args.version:
@@ -376,6 +538,15 @@ class Runner(object):
         if len(args.skip_service) > 0:
             self.checker.remove_services(args.skip_service)
 
+        try:
+            self._run_action(args)
+        finally:
+            if args.timings:
+                self.print_timings()
+            if args.record_file is not None:
+                record_replay.save()
+
+    def _run_action(self, args):
         if len(args.limit) > 0:
             self.set_limit_overrides(args.limit)
 
@@ -42,7 +42,7 @@ import logging
 
 from .base import _AwsService
 from ..limit import AwsLimit
-from awslimitchecker.utils import paginate_dict
+from awslimitchecker.utils import paginate_iter, count_iter, pool_map
 
 logger = logging.getLogger(__name__)
 
@@ -85,45 +85,30 @@ class _ApigatewayService(_AwsService):
             len(api_ids), aws_type='AWS::ApiGateway::RestApi'
         )
         # now the per-API limits...
-        warn_stages_paginated = None
         logger.debug('Finding usage for per-API limits')
-        for api_id in api_ids:
-            res_count = 0
-            paginator = self.conn.get_paginator('get_resources')
-            for resp in paginator.paginate(restApiId=api_id):
-                res_count += len(resp['items'])
+        results = pool_map(
+            self._get_api_usage, api_ids, max_workers=self.max_workers,
+            budget=self.worker_budget
+        )
+        warn_stages_paginated = None
+        for api_id, usage in zip(api_ids, results):
+            res_count, doc_parts, stages, authorizers = usage
             self.limits['Resources per API']._add_current_usage(
                 res_count, resource_id=api_id,
                 aws_type='AWS::ApiGateway::Resource'
             )
-            doc_parts = paginate_dict(
-                self.conn.get_documentation_parts,
-                restApiId=api_id,
-                alc_marker_path=['position'],
-                alc_data_path=['items'],
-                alc_marker_param='position'
-            )
             self.limits['Documentation parts per API']._add_current_usage(
-                len(doc_parts), resource_id=api_id,
+                doc_parts, resource_id=api_id,
                 aws_type='AWS::ApiGateway::DocumentationPart'
             )
-            # note that per the boto3 docs, there's no pagination of this...
-            stages = self.conn.get_stages(restApiId=api_id)
             if len(set(stages.keys()) - set(['item', 'ResponseMetadata'])) > 0:
                 warn_stages_paginated = stages.keys()
             self.limits['Stages per API']._add_current_usage(
                 len(stages['item']), resource_id=api_id,
                 aws_type='AWS::ApiGateway::Stage'
             )
-            authorizers = paginate_dict(
-                self.conn.get_authorizers,
-                restApiId=api_id,
-                alc_marker_path=['position'],
-                alc_data_path=['items'],
-                alc_marker_param='position'
-            )
             self.limits['Custom authorizers per API']._add_current_usage(
-                len(authorizers), resource_id=api_id,
+                authorizers, resource_id=api_id,
                 aws_type='AWS::ApiGateway::Authorizer'
             )
         if warn_stages_paginated is not None:
@@ -132,6 +117,40 @@ class _ApigatewayService(_AwsService):
                 'boto3 docs: %s', sorted(warn_stages_paginated)
             )
 
+    def _get_api_usage(self, api_id):
+        """
+        Query the per-API usage of one API. Called from
+        :py:meth:`~._find_usage_apis`, possibly in a worker thread, so this
+        must not update ``self.limits`` itself.
+
+        :param api_id: ID of the REST API
+        :type api_id: str
+        :returns: 4-tuple of resource count, documentation part count,
+          ``get_stages`` response and authorizer count
+        :rtype: tuple
+        """
+        res_count = 0
+        paginator = self.conn.get_paginator('get_resources')
+        for resp in paginator.paginate(restApiId=api_id):
+            res_count += len(resp['items'])
+        doc_parts = count_iter(paginate_iter(
+            self.conn.get_documentation_parts,
+            restApiId=api_id,
+            alc_marker_path=['position'],
+            alc_data_path=['items'],
+            alc_marker_param='position'
+        ))
+        # note that per the boto3 docs, there's no pagination of this...
+        stages = self.conn.get_stages(restApiId=api_id)
+        authorizers = count_iter(paginate_iter(
+            self.conn.get_authorizers,
+            restApiId=api_id,
+            alc_marker_path=['position'],
+            alc_data_path=['items'],
+            alc_marker_param='position'
+        ))
+        return res_count, doc_parts, stages, authorizers
+
     def _find_usage_api_keys(self):
         """
         Find usage on API Keys.
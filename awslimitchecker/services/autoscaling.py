@@ -42,7 +42,7 @@ import logging
 
 from .base import _AwsService
 from ..limit import AwsLimit
-from ..utils import paginate_dict
+from ..utils import paginate_iter, count_iter
 
 logger = logging.getLogger(__name__)
 
@@ -64,25 +64,25 @@ class _AutoscalingService(_AwsService):
             lim._reset_usage()
 
         self.limits['Auto Scaling groups']._add_current_usage(
-            len(
-                paginate_dict(
+            count_iter(
+                paginate_iter(
                     self.conn.describe_auto_scaling_groups,
                     alc_marker_path=['NextToken'],
                     alc_data_path=['AutoScalingGroups'],
                     alc_marker_param='NextToken'
-                )['AutoScalingGroups']
+                )
             ),
             aws_type='AWS::AutoScaling::AutoScalingGroup',
         )
 
         self.limits['Launch configurations']._add_current_usage(
-            len(
-                paginate_dict(
+            count_iter(
+                paginate_iter(
                     self.conn.describe_launch_configurations,
                     alc_marker_path=['NextToken'],
                     alc_data_path=['LaunchConfigurations'],
                     alc_marker_param='NextToken'
-                )['LaunchConfigurations']
+                )
             ),
             aws_type='AWS::AutoScaling::LaunchConfiguration',
         )
@@ -40,6 +40,7 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 import abc
 import logging
 from awslimitchecker.connectable import Connectable
+from awslimitchecker.limit import SOURCE_API, SOURCE_TA
 
 logger = logging.getLogger(__name__)
 
@@ -51,7 +52,8 @@ class _AwsService(Connectable):
     api_name = 'baseclass'
 
     def __init__(self, warning_threshold, critical_threshold,
-                 boto_connection_kwargs={}):
+                 boto_connection_kwargs={}, client_pool=None,
+                 max_workers=None, worker_budget=None):
         """
         Describes an AWS service and its limits, and provides methods to
         query current utilization.
@@ -96,15 +98,32 @@ class _AwsService(Connectable):
         :param mfa_token: (optional) the `MFA Token` string to use when
           assuming a role via STS.
         :type mfa_token: str
+        :param client_pool: pool to get shared boto3 clients and resources
+          from; if None, this service creates its own.
+        :type client_pool: :py:class:`~.ClientPool`
+        :param max_workers: services that make many independent API calls
+          (such as one or more per resource) may spread them across up to
+          this many threads, via :py:func:`~.utils.pool_map`. If None, they
+          are made one after another.
+        :type max_workers: :py:class:`int` or :py:data:`None`
+        :param worker_budget: threads shared with the other services (and
+          their calls) checked concurrently, so that together they stay
+          within one limit; if None, each call may use up to ``max_workers``
+          threads of its own.
+        :type worker_budget: :py:class:`~.utils.WorkerBudget`
         """
         self.warning_threshold = warning_threshold
         self.critical_threshold = critical_threshold
         self._boto3_connection_kwargs = boto_connection_kwargs
+        self._client_pool = client_pool
+        self.max_workers = max_workers
+        self.worker_budget = worker_budget
         self.conn = None
         self.resource_conn = None
         self.limits = {}
         self.limits = self.get_limits()
         self._have_usage = False
+        self._have_api_limits = False
 
     @abc.abstractmethod
     def find_usage(self):
@@ -259,6 +278,128 @@ class _AwsService(Connectable):
                 s=self.service_name,
                 l=limit_name))
 
+    def find_usage_if_needed(self):
+        """
+        Call :py:meth:`~.find_usage`, unless usage has already been found.
+        """
+        if not self._have_usage:
+            self.find_usage()
+
+    def _update_limits_from_api_if_needed(self):
+        """
+        If this service has an ``_update_limits_from_api()`` method, call it,
+        unless it has already been called since this service was created or
+        last :py:meth:`~.invalidate`-ed; limits from a service's API only
+        need to be fetched once per run.
+        """
+        if self._have_api_limits or not hasattr(
+            self, '_update_limits_from_api'
+        ):
+            return
+        self._update_limits_from_api()
+        self._have_api_limits = True
+
+    def invalidate(self):
+        """
+        Forget that usage and limits from the service's API have been
+        retrieved, so that the next :py:meth:`~.check_thresholds` or
+        :py:meth:`~._update_limits_from_api_if_needed` call retrieves them
+        again.
+        """
+        self._have_usage = False
+        self._have_api_limits = False
+
+    def _dump_usage(self):
+        """
+        Return the current usage of all of this service's limits in a form
+        that can be serialized to JSON, for :py:class:`~.UsageCache`.
+
+        :returns: dict of limit name to list of ``[value, resource_id,
+          aws_type]`` lists, one per :py:class:`~.AwsLimitUsage`
+        :rtype: dict
+        """
+        return dict(
+            (name, [
+                [u.value, u.resource_id, u.aws_type]
+                for u in lim.get_current_usage()
+            ])
+            for name, lim in self.limits.items()
+        )
+
+    def _load_usage(self, usage):
+        """
+        Replace the current usage of this service's limits with usage as
+        returned by :py:meth:`~._dump_usage` (i.e. from a
+        :py:class:`~.UsageCache`), instead of finding it with
+        :py:meth:`~.find_usage`. Limits that are not in ``usage`` (such as
+        ones added since it was cached) are left without usage.
+
+        :param usage: dict of limit name to list of ``[value, resource_id,
+          aws_type]`` lists
+        :type usage: dict
+        """
+        for lim in self.limits.values():
+            lim._reset_usage()
+        for name, values in usage.items():
+            if name not in self.limits:
+                continue
+            for value, resource_id, aws_type in values:
+                self.limits[name]._add_current_usage(
+                    value, resource_id=resource_id, aws_type=aws_type
+                )
+        self._have_usage = True
+
+    def _dump_limits(self):
+        """
+        Return the limit values that this service's limits got from the
+        service's API and from Trusted Advisor, in a form that can be
+        serialized to JSON, for :py:class:`~.LimitCache`. Defaults and
+        overrides are not included.
+
+        :returns: dict of limit name to list of ``[source, value]`` lists,
+          where ``source`` is :py:const:`~awslimitchecker.limit.SOURCE_API` or
+          :py:const:`~awslimitchecker.limit.SOURCE_TA`, and a Trusted Advisor
+          value of None means unlimited; limits with neither are omitted
+        :rtype: dict
+        """
+        res = {}
+        for name, lim in self.limits.items():
+            values = []
+            if lim.api_limit is not None:
+                values.append([SOURCE_API, lim.api_limit])
+            if lim.ta_unlimited is True:
+                values.append([SOURCE_TA, None])
+            elif lim.ta_limit is not None:
+                values.append([SOURCE_TA, lim.ta_limit])
+            if len(values) > 0:
+                res[name] = values
+        return res
+
+    def _load_limits(self, limits):
+        """
+        Replace the API and Trusted Advisor values of this service's limits
+        with ones as returned by :py:meth:`~._dump_limits` (i.e. from a
+        :py:class:`~.LimitCache`), instead of retrieving them again.
+
+        :param limits: dict of limit name to list of ``[source, value]``
+          lists
+        :type limits: dict
+        """
+        for lim in self.limits.values():
+            lim._set_api_limit(None)
+            lim._set_ta_limit(None)
+            lim.ta_unlimited = False
+        for name, values in limits.items():
+            if name not in self.limits:
+                continue
+            for source, value in values:
+                if source == SOURCE_API:
+                    self.limits[name]._set_api_limit(value)
+                elif value is None:
+                    self.limits[name]._set_ta_unlimited()
+                else:
+                    self.limits[name]._set_ta_limit(value)
+
     def check_thresholds(self):
         """
         Checks current usage against configured thresholds for all limits
@@ -268,8 +409,7 @@ class _AwsService(Connectable):
           for all limits that crossed one or more of their thresholds.
         :rtype: :py:obj:`dict` of :py:class:`~.AwsLimit`
         """
-        if not self._have_usage:
-            self.find_usage()
+        self.find_usage_if_needed()
         ret = {}
         for name, limit in self.limits.items():
             if limit.check_thresholds() is False:
@@ -42,9 +42,12 @@ import logging
 
 from .base import _AwsService
 from ..limit import AwsLimit
+from ..utils import lazy_import, paginate_iter, pool_map
 
 logger = logging.getLogger(__name__)
 
+boto3 = lazy_import('boto3')
+
 
 class _DynamodbService(_AwsService):
 
@@ -58,7 +61,7 @@ class _DynamodbService(_AwsService):
         :py:meth:`~.AwsLimit._add_current_usage`.
         """
         logger.debug("Checking usage for service %s", self.service_name)
-        self.connect_resource()
+        self.connect()
         for lim in self.limits.values():
             lim._reset_usage()
         self._find_usage_dynamodb()
@@ -72,47 +75,53 @@ class _DynamodbService(_AwsService):
         region_write_capacity = 0
 
         logger.debug("Getting usage for DynamoDB tables")
-        for table in self.resource_conn.tables.all():
+        names = list(paginate_iter(
+            self.conn.list_tables,
+            alc_marker_path=['LastEvaluatedTableName'],
+            alc_data_path=['TableNames'],
+            alc_marker_param='ExclusiveStartTableName'
+        ))
+        for table in pool_map(
+            self._describe_table, names, max_workers=self.max_workers,
+            budget=self.worker_budget
+        ):
             table_count += 1
             gsi_write = 0
             gsi_read = 0
             gsi_count = 0
-            if table.global_secondary_indexes is not None:
-                for gsi in table.global_secondary_indexes:
-                    gsi_count += 1
-                    gsi_read += gsi['ProvisionedThroughput'][
-                        'ReadCapacityUnits']
-                    gsi_write += gsi['ProvisionedThroughput'][
-                        'WriteCapacityUnits']
-            table_write_capacity = table.provisioned_throughput[
+            for gsi in table.get('GlobalSecondaryIndexes', []):
+                gsi_count += 1
+                gsi_read += gsi['ProvisionedThroughput']['ReadCapacityUnits']
+                gsi_write += gsi['ProvisionedThroughput'][
+                    'WriteCapacityUnits']
+            table_write_capacity = table['ProvisionedThroughput'][
                                        'WriteCapacityUnits'] + gsi_write
-            table_read_capacity = table.provisioned_throughput[
+            table_read_capacity = table['ProvisionedThroughput'][
                                       'ReadCapacityUnits'] + gsi_read
             region_write_capacity += table_write_capacity
             region_read_capacity += table_read_capacity
 
             self.limits['Global Secondary Indexes']._add_current_usage(
                 gsi_count,
-                resource_id=table.name,
+                resource_id=table['TableName'],
                 aws_type='AWS::DynamoDB::Table'
             )
 
             self.limits['Local Secondary Indexes']._add_current_usage(
-                len(table.local_secondary_indexes)
-                if table.local_secondary_indexes is not None else 0,
-                resource_id=table.name,
+                len(table.get('LocalSecondaryIndexes', [])),
+                resource_id=table['TableName'],
                 aws_type='AWS::DynamoDB::Table'
             )
 
             self.limits['Table Max Write Capacity Units']._add_current_usage(
                 table_write_capacity,
-                resource_id=table.name,
+                resource_id=table['TableName'],
                 aws_type='AWS::DynamoDB::Table'
             )
 
             self.limits['Table Max Read Capacity Units']._add_current_usage(
                 table_read_capacity,
-                resource_id=table.name,
+                resource_id=table['TableName'],
                 aws_type='AWS::DynamoDB::Table'
             )
 
@@ -131,6 +140,19 @@ class _DynamodbService(_AwsService):
             aws_type='AWS::DynamoDB::Table'
         )
 
+    def _describe_table(self, name):
+        """
+        Return the description of one table, from DescribeTable. Called from
+        :py:meth:`~._find_usage_dynamodb` through :py:func:`~.utils.pool_map`,
+        possibly in a worker thread.
+
+        :param name: table name
+        :type name: str
+        :returns: the ``Table`` dict of the DescribeTable response
+        :rtype: dict
+        """
+        return self.conn.describe_table(TableName=name)['Table']
+
     def get_limits(self):
         """
         Return all known limits for this service, as a dict of their names
@@ -139,10 +161,9 @@ class _DynamodbService(_AwsService):
         :returns: dict of limit names to :py:class:`~.AwsLimit` objects
         :rtype: dict
         """
-        self.connect()
-        region_name = self.conn._client_config.region_name
         if self.limits != {}:
             return self.limits
+        region_name = self._get_region_name()
         limits = {}
 
         limits['Tables Per Region'] = AwsLimit(
@@ -210,6 +231,19 @@ class _DynamodbService(_AwsService):
         self.limits = limits
         return limits
 
+    def _get_region_name(self):
+        """
+        Return the name of the region this service will connect to, without
+        creating a connection; either the explicitly-configured region, or
+        the default region boto3 would use.
+
+        :rtype: str
+        """
+        region_name = self._boto3_connection_kwargs.get('region_name')
+        if region_name is None:
+            region_name = boto3.session.Session().region_name
+        return region_name
+
     def _update_limits_from_api(self):
         """
         Query DynamoDB's DescribeLimits API action, and update limits
@@ -42,7 +42,7 @@ import logging
 
 from .base import _AwsService
 from ..limit import AwsLimit
-from ..utils import paginate_dict
+from ..utils import paginate_iter, count_iter
 
 logger = logging.getLogger(__name__)
 
@@ -77,13 +77,12 @@ class _EbsService(_AwsService):
         st_gb = 0
         sc_gb = 0
         logger.debug("Getting usage for EBS volumes")
-        results = paginate_dict(
+        for vol in paginate_iter(
             self.conn.describe_volumes,
             alc_marker_path=['NextToken'],
             alc_data_path=['Volumes'],
             alc_marker_param='NextToken'
-        )
-        for vol in results['Volumes']:
+        ):
             vols += 1
             if vol['VolumeType'] == 'io1':
                 piops_gb += vol['Size']
@@ -140,15 +139,15 @@ class _EbsService(_AwsService):
     def _find_usage_snapshots(self):
         """find snapshot usage"""
         logger.debug("Getting usage for EBS snapshots")
-        snaps = paginate_dict(
+        snaps = count_iter(paginate_iter(
             self.conn.describe_snapshots,
             OwnerIds=['self'],
             alc_marker_path=['NextToken'],
             alc_data_path=['Snapshots'],
             alc_marker_param='NextToken'
-        )
+        ))
         self.limits['Active snapshots']._add_current_usage(
-            len(snaps['Snapshots']),
+            snaps,
             aws_type='AWS::EC2::VolumeSnapshot'
         )
 
@@ -40,17 +40,26 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 import abc  # noqa
 import logging
 from collections import defaultdict
-from copy import deepcopy
 
 import botocore
 
 from .base import _AwsService
 from ..limit import AwsLimit
+from ..utils import paginate_iter
 
 logger = logging.getLogger(__name__)
 
 RI_NO_AZ = 'xxREGIONAL_BENEFIT-NO_AZxx'
 
+#: Instance states counted as running for On-Demand instance usage; instances
+#: in any other state (``stopped`` and ``terminated``) are filtered out by the
+#: DescribeInstances API itself.
+RUNNING_INSTANCE_STATES = ['pending', 'running', 'shutting-down', 'stopping']
+
+#: ``MaxResults`` for the paginated EC2 Describe calls; without it, EC2 returns
+#: every result in a single page.
+DESCRIBE_PAGE_SIZE = 1000
+
 
 class _Ec2Service(_AwsService):
 
@@ -65,7 +74,6 @@ class _Ec2Service(_AwsService):
         """
         logger.debug("Checking usage for service %s", self.service_name)
         self.connect()
-        self.connect_resource()
         for lim in self.limits.values():
             lim._reset_usage()
         self._find_usage_instances()
@@ -201,26 +209,22 @@ class _Ec2Service(_AwsService):
 
         :rtype: dict
         """
-        reservations = defaultdict(int)
         az_to_res = {}
         logger.debug("Getting reserved instance information")
-        res = self.conn.describe_reserved_instances()
+        res = self.conn.describe_reserved_instances(
+            Filters=[{'Name': 'state', 'Values': ['active']}]
+        )
 
         for x in res['ReservedInstances']:
             if x['State'] != 'active':
                 logger.debug("Skipping ReservedInstance %s with state %s",
                              x['ReservedInstancesId'], x['State'])
                 continue
-            if 'AvailabilityZone' not in x:
-                # "Regional Benefit" AZ-less reservation
-                x['AvailabilityZone'] = RI_NO_AZ
-            if x['AvailabilityZone'] not in az_to_res:
-                az_to_res[x['AvailabilityZone']] = deepcopy(reservations)
-            az_to_res[x['AvailabilityZone']][
-                x['InstanceType']] += x['InstanceCount']
-        # flatten and return
-        for x in az_to_res:
-            az_to_res[x] = dict(az_to_res[x])
+            # "Regional Benefit" reservations have no AZ
+            az = x.get('AvailabilityZone', RI_NO_AZ)
+            counts = az_to_res.setdefault(az, {})
+            counts[x['InstanceType']] = counts.get(
+                x['InstanceType'], 0) + x['InstanceCount']
         return az_to_res
 
     def _instance_usage(self):
@@ -233,29 +237,34 @@ class _Ec2Service(_AwsService):
         :rtype: dict
         """
         # On-Demand instances by type
-        ondemand = {}
-        for t in self._instance_types():
-            ondemand[t] = 0
+        i_types = self._instance_types()
         az_to_inst = {}
         logger.debug("Getting usage for on-demand instances")
-        for inst in self.resource_conn.instances.all():
-            if inst.spot_instance_request_id:
-                logger.info("Spot instance found (%s); skipping from "
-                            "Running On-Demand Instances count", inst.id)
-                continue
-            if inst.state['Name'] in ['stopped', 'terminated']:
-                logger.debug("Ignoring instance %s in state %s", inst.id,
-                             inst.state['Name'])
-                continue
-            if inst.placement['AvailabilityZone'] not in az_to_inst:
-                az_to_inst[
-                    inst.placement['AvailabilityZone']] = deepcopy(ondemand)
-            try:
-                az_to_inst[
-                    inst.placement['AvailabilityZone']][inst.instance_type] += 1
-            except KeyError:
-                logger.error("ERROR - unknown instance type '%s'; not "
-                             "counting", inst.instance_type)
+        for rsv in paginate_iter(
+            self.conn.describe_instances,
+            Filters=[{
+                'Name': 'instance-state-name',
+                'Values': RUNNING_INSTANCE_STATES
+            }],
+            MaxResults=DESCRIBE_PAGE_SIZE,
+            alc_marker_path=['NextToken'],
+            alc_data_path=['Reservations'],
+            alc_marker_param='NextToken'
+        ):
+            for inst in rsv['Instances']:
+                if inst.get('SpotInstanceRequestId'):
+                    logger.info("Spot instance found (%s); skipping from "
+                                "Running On-Demand Instances count",
+                                inst['InstanceId'])
+                    continue
+                az = inst['Placement']['AvailabilityZone']
+                if az not in az_to_inst:
+                    az_to_inst[az] = dict.fromkeys(i_types, 0)
+                try:
+                    az_to_inst[az][inst['InstanceType']] += 1
+                except KeyError:
+                    logger.error("ERROR - unknown instance type '%s'; not "
+                                 "counting", inst['InstanceType'])
         return az_to_inst
 
     def get_limits(self):
@@ -281,7 +290,6 @@ class _Ec2Service(_AwsService):
         with the quotas returned. Updates ``self.limits``.
         """
         self.connect()
-        self.connect_resource()
         logger.info("Querying EC2 DescribeAccountAttributes for limits")
         # no need to paginate
         attribs = self.conn.describe_account_attributes()
@@ -445,11 +453,17 @@ class _Ec2Service(_AwsService):
         """calculate usage for VPC-related things"""
         logger.debug("Getting usage for EC2 VPC resources")
         sgs_per_vpc = defaultdict(int)
-        rules_per_sg = defaultdict(int)
-        for sg in self.resource_conn.security_groups.all():
-            if sg.vpc_id is not None:
-                sgs_per_vpc[sg.vpc_id] += 1
-                rules_per_sg[sg.id] = len(sg.ip_permissions)
+        rules_per_sg = {}
+        for sg in paginate_iter(
+            self.conn.describe_security_groups,
+            MaxResults=DESCRIBE_PAGE_SIZE,
+            alc_marker_path=['NextToken'],
+            alc_data_path=['SecurityGroups'],
+            alc_marker_param='NextToken'
+        ):
+            if sg.get('VpcId') is not None:
+                sgs_per_vpc[sg['VpcId']] += 1
+                rules_per_sg[sg['GroupId']] = len(sg['IpPermissions'])
         # set usage
         for vpc_id, count in sgs_per_vpc.items():
             self.limits['Security groups per VPC']._add_current_usage(
@@ -466,31 +480,39 @@ class _Ec2Service(_AwsService):
 
     def _find_usage_networking_eips(self):
         logger.debug("Getting usage for EC2 EIPs")
-        vpc_addrs = self.resource_conn.vpc_addresses.all()
+        # DescribeAddresses is not paginated; one call returns both VPC and
+        # EC2-Classic addresses
+        domains = defaultdict(int)
+        for addr in self.conn.describe_addresses()['Addresses']:
+            domains[addr['Domain']] += 1
         self.limits['VPC Elastic IP addresses (EIPs)']._add_current_usage(
-            sum(1 for a in vpc_addrs if a.domain == 'vpc'),
+            domains['vpc'],
             aws_type='AWS::EC2::EIP',
         )
         # the EC2 limits screen calls this 'EC2-Classic Elastic IPs'
         # but Trusted Advisor just calls it 'Elastic IP addresses (EIPs)'
-        classic_addrs = self.resource_conn.classic_addresses.all()
         self.limits['Elastic IP addresses (EIPs)']._add_current_usage(
-            sum(1 for a in classic_addrs if a.domain == 'standard'),
+            domains['standard'],
             aws_type='AWS::EC2::EIP',
         )
 
     def _find_usage_networking_eni_sg(self):
         logger.debug("Getting usage for EC2 Network Interfaces")
-        ints = self.resource_conn.network_interfaces.all()
-        for iface in ints:
-            if iface.vpc is None:
+        lim = self.limits['VPC security groups per elastic network interface']
+        for iface in paginate_iter(
+            self.conn.describe_network_interfaces,
+            MaxResults=DESCRIBE_PAGE_SIZE,
+            alc_marker_path=['NextToken'],
+            alc_data_path=['NetworkInterfaces'],
+            alc_marker_param='NextToken'
+        ):
+            if iface.get('VpcId') is None:
                 continue
-            self.limits['VPC security groups per elastic network '
-                        'interface']._add_current_usage(
-                            len(iface.groups),
-                            aws_type='AWS::EC2::NetworkInterface',
-                            resource_id=iface.id,
-                        )
+            lim._add_current_usage(
+                len(iface['Groups']),
+                aws_type='AWS::EC2::NetworkInterface',
+                resource_id=iface['NetworkInterfaceId'],
+            )
 
     def _get_limits_networking(self):
         """
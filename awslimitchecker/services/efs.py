@@ -43,7 +43,7 @@ from botocore.exceptions import EndpointConnectionError
 
 from .base import _AwsService
 from ..limit import AwsLimit
-from ..utils import paginate_dict
+from ..utils import paginate_iter, count_iter
 
 logger = logging.getLogger(__name__)
 
@@ -75,14 +75,14 @@ class _EfsService(_AwsService):
         logger.debug("Done checking usage.")
 
     def _find_usage_filesystems(self):
-        filesystems = paginate_dict(
+        filesystems = count_iter(paginate_iter(
             self.conn.describe_file_systems,
             alc_marker_path=['NextMarker'],
             alc_data_path=['FileSystems'],
             alc_marker_param='Marker'
-        )
+        ))
         self.limits['File systems']._add_current_usage(
-            len(filesystems['FileSystems']),
+            filesystems,
             aws_type='AWS::EFS::FileSystem',
         )
 
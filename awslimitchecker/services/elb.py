@@ -39,12 +39,11 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 
 import abc  # noqa
 import logging
-from boto3 import client
-from botocore.config import Config
+from functools import partial
 
 from .base import _AwsService
 from ..limit import AwsLimit
-from ..utils import paginate_dict
+from ..utils import paginate_iter, count_iter, pool_map
 
 logger = logging.getLogger(__name__)
 
@@ -90,20 +89,21 @@ class _ElbService(_AwsService):
         """
         logger.debug("Checking usage for ELBv1")
         self.connect()
-        lbs = paginate_dict(
+        count = 0
+        for lb in paginate_iter(
             self.conn.describe_load_balancers,
             alc_marker_path=['NextMarker'],
             alc_data_path=['LoadBalancerDescriptions'],
             alc_marker_param='Marker'
-        )
-        for lb in lbs['LoadBalancerDescriptions']:
+        ):
+            count += 1
             self.limits['Listeners per load balancer']._add_current_usage(
                 len(lb['ListenerDescriptions']),
                 aws_type='AWS::ElasticLoadBalancing::LoadBalancer',
                 resource_id=lb['LoadBalancerName'],
             )
         logger.debug('Done with ELBv1 usage')
-        return len(lbs['LoadBalancerDescriptions'])
+        return count
 
     def _find_usage_elbv2(self):
         """
@@ -113,84 +113,118 @@ class _ElbService(_AwsService):
         :rtype: int
         """
         logger.debug('Checking usage for ELBv2')
-        conn2 = client(
-            'elbv2',
-            config=Config(retries={'max_attempts': ELBV2_MAX_RETRY_ATTEMPTS}),
-            **self._boto3_connection_kwargs
+        conn2 = self._client(
+            'elbv2', retries={'max_attempts': ELBV2_MAX_RETRY_ATTEMPTS}
         )
         logger.debug("Connected to %s in region %s (with max retry attempts "
                      "overridden to %d)", 'elbv2',
                      conn2._client_config.region_name, ELBV2_MAX_RETRY_ATTEMPTS)
         # Target groups
-        tgroups = paginate_dict(
+        tgroups = count_iter(paginate_iter(
             conn2.describe_target_groups,
             alc_marker_path=['NextMarker'],
             alc_data_path=['TargetGroups'],
             alc_marker_param='Marker'
-        )
+        ))
         self.limits['Target groups']._add_current_usage(
-            len(tgroups['TargetGroups']),
+            tgroups,
             aws_type='AWS::ElasticLoadBalancingV2::TargetGroup'
         )
         # ALBs
-        lbs = paginate_dict(
-            conn2.describe_load_balancers,
-            alc_marker_path=['NextMarker'],
-            alc_data_path=['LoadBalancers'],
-            alc_marker_param='Marker'
-        )
-        logger.debug(
-            'Checking usage for each of %d ALBs', len(lbs['LoadBalancers'])
+        albs = [
+            (lb['LoadBalancerArn'], lb['LoadBalancerName'])
+            for lb in paginate_iter(
+                conn2.describe_load_balancers,
+                alc_marker_path=['NextMarker'],
+                alc_data_path=['LoadBalancers'],
+                alc_marker_param='Marker'
+            )
+        ]
+        self._update_usage_for_elbv2(conn2, albs)
+        logger.debug('Done with ELBv2 usage for %d ALBs', len(albs))
+        return len(albs)
+
+    def _update_usage_for_elbv2(self, conn, albs):
+        """
+        Update listener and rule usage for Application LBs.
+
+        Listeners are fetched for every ALB, and then rules for every
+        listener, each through :py:func:`~.utils.pool_map` with up to
+        ``self.max_workers`` threads, taken from ``self.worker_budget`` (if
+        set) so that they count towards the threads of the other services
+        checked concurrently. Usage is then added from the calling thread,
+        in the order of ``albs``.
+
+        :param conn: elbv2 API connection
+        :type conn: boto3.client
+        :param albs: list of (Load Balancer ARN, Load Balancer Name) tuples
+        :type albs: list
+        """
+        listeners = pool_map(
+            partial(self._get_elbv2_listeners, conn),
+            [arn for arn, _ in albs],
+            max_workers=self.max_workers, budget=self.worker_budget
         )
-        for lb in lbs['LoadBalancers']:
-            self._update_usage_for_elbv2(
-                conn2,
-                lb['LoadBalancerArn'],
-                lb['LoadBalancerName']
+        listener_arns = [arn for l_arns in listeners for arn in l_arns]
+        rule_counts = dict(zip(listener_arns, pool_map(
+            partial(self._count_elbv2_rules, conn),
+            listener_arns,
+            max_workers=self.max_workers, budget=self.worker_budget
+        )))
+        for (_, alb_name), l_arns in zip(albs, listeners):
+            self.limits[
+                'Listeners per application load balancer'
+            ]._add_current_usage(
+                len(l_arns),
+                aws_type='AWS::ElasticLoadBalancingV2::LoadBalancer',
+                resource_id=alb_name,
+            )
+            self.limits[
+                'Rules per application load balancer'
+            ]._add_current_usage(
+                sum(rule_counts[arn] for arn in l_arns),
+                aws_type='AWS::ElasticLoadBalancingV2::LoadBalancer',
+                resource_id=alb_name,
             )
-        logger.debug('Done with ELBv2 usage')
-        return len(lbs['LoadBalancers'])
 
-    def _update_usage_for_elbv2(self, conn, alb_arn, alb_name):
+    def _get_elbv2_listeners(self, conn, alb_arn):
         """
-        Update usage for a single ALB.
+        Return the ARNs of the listeners of one ALB.
 
         :param conn: elbv2 API connection
         :type conn: boto3.client
         :param alb_arn: Load Balancer ARN
         :type alb_arn: str
-        :param alb_name: Load Balancer Name
-        :type alb_name: str
+        :rtype: list
         """
-        logger.debug('Updating usage for ALB %s', alb_arn)
-        listeners = paginate_dict(
-            conn.describe_listeners,
-            LoadBalancerArn=alb_arn,
-            alc_marker_path=['NextMarker'],
-            alc_data_path=['Listeners'],
-            alc_marker_param='Marker'
-        )['Listeners']
-        num_rules = 0
-        for l in listeners:
-            rules = paginate_dict(
-                conn.describe_rules,
-                ListenerArn=l['ListenerArn'],
+        logger.debug('Getting listeners for ALB %s', alb_arn)
+        return [
+            l['ListenerArn'] for l in paginate_iter(
+                conn.describe_listeners,
+                LoadBalancerArn=alb_arn,
                 alc_marker_path=['NextMarker'],
-                alc_data_path=['Rules'],
+                alc_data_path=['Listeners'],
                 alc_marker_param='Marker'
-            )['Rules']
-            num_rules += len(rules)
-        self.limits[
-            'Listeners per application load balancer']._add_current_usage(
-            len(listeners),
-            aws_type='AWS::ElasticLoadBalancingV2::LoadBalancer',
-            resource_id=alb_name,
-        )
-        self.limits['Rules per application load balancer']._add_current_usage(
-            num_rules,
-            aws_type='AWS::ElasticLoadBalancingV2::LoadBalancer',
-            resource_id=alb_name,
-        )
+            )
+        ]
+
+    def _count_elbv2_rules(self, conn, listener_arn):
+        """
+        Return the number of rules of one ALB listener.
+
+        :param conn: elbv2 API connection
+        :type conn: boto3.client
+        :param listener_arn: Listener ARN
+        :type listener_arn: str
+        :rtype: int
+        """
+        return count_iter(paginate_iter(
+            conn.describe_rules,
+            ListenerArn=listener_arn,
+            alc_marker_path=['NextMarker'],
+            alc_data_path=['Rules'],
+            alc_marker_param='Marker'
+        ))
 
     def get_limits(self):
         """
@@ -272,7 +306,7 @@ class _ElbService(_AwsService):
                 continue
             self.limits[name_to_limits[name]]._set_api_limit(int(attrib['Max']))
         # connect to ELBv2 API as well
-        self.conn2 = client('elbv2', **self._boto3_connection_kwargs)
+        self.conn2 = self._client('elbv2')
         logger.debug("Connected to %s in region %s",
                      'elbv2', self.conn2._client_config.region_name)
         logger.debug("Querying ELBv2 (ALB) DescribeAccountLimits for limits")
@@ -67,11 +67,22 @@ class _IamService(_AwsService):
         Determine the current usage for each limit of this service,
         and update corresponding Limit via
         :py:meth:`~.AwsLimit._add_current_usage`.
+
+        Usage comes from the AccountSummary that
+        :py:meth:`~._update_limits_from_api` fetches; that is reused if it
+        has not been used to find usage yet, and fetched again otherwise.
         """
         logger.debug("Checking usage for service %s", self.service_name)
         for lim in self.limits.values():
             lim._reset_usage()
-        self._update_limits_from_api()
+        # AccountSummary has both limits and usage; don't report usage from
+        # a summary that an earlier find_usage() call already used
+        if self._have_usage:
+            self._have_api_limits = False
+        self._update_limits_from_api_if_needed()
+        for k, v in sorted(self._account_summary.items()):
+            if k in self.API_TO_LIMIT_NAME:
+                self.limits[self.API_TO_LIMIT_NAME[k]]._add_current_usage(v)
         self._have_usage = True
         logger.debug("Done checking usage.")
 
@@ -148,16 +159,17 @@ class _IamService(_AwsService):
     def _update_limits_from_api(self):
         """
         Call the service's API action to retrieve limit/quota information, and
-        update AwsLimit objects in ``self.limits`` with this information.
+        update AwsLimit objects in ``self.limits`` with this information. The
+        summary is kept in ``self._account_summary``, for
+        :py:meth:`~.find_usage` to take usage from.
         """
         self.connect_resource()
         summary = self.resource_conn.AccountSummary()
+        self._account_summary = summary.summary_map
         for k, v in sorted(summary.summary_map.items()):
             if k in self.API_TO_LIMIT_NAME:
-                # this is a usage for one of our limits
-                lname = self.API_TO_LIMIT_NAME[k]
-                # if len(self.limits[lname].get_current_usage()) < 1:
-                self.limits[lname]._add_current_usage(v)
+                # this is a usage for one of our limits; see find_usage()
+                continue
             elif k.endswith('Quota') and k[:-5] in self.API_TO_LIMIT_NAME:
                 # quota for one of our limits
                 lname = self.API_TO_LIMIT_NAME[k[:-5]]
@@ -75,6 +75,11 @@ class _RDSService(_AwsService):
         Determine the current usage for each limit of this service,
         and update corresponding Limit via
         :py:meth:`~.AwsLimit._add_current_usage`.
+
+        Some usage comes from the DescribeAccountAttributes quotas that
+        :py:meth:`~._update_limits_from_api` fetches; those are reused if
+        they have not been used to find usage yet, and fetched again
+        otherwise.
         """
         logger.debug("Checking usage for service %s", self.service_name)
         self.connect()
@@ -83,8 +88,12 @@ class _RDSService(_AwsService):
         self._find_usage_instances()
         self._find_usage_subnet_groups()
         self._find_usage_security_groups()
-        # RDS API also provides usage information
-        self._update_limits_from_api()
+        # RDS API also provides usage information; don't report usage from
+        # quotas that an earlier find_usage() call already used
+        if self._have_usage:
+            self._have_api_limits = False
+        self._update_limits_from_api_if_needed()
+        self._find_usage_account_quotas()
         self._have_usage = True
         logger.debug("Done checking usage.")
 
@@ -274,13 +283,14 @@ class _RDSService(_AwsService):
     def _update_limits_from_api(self):
         """
         Query RDS's DescribeAccountAttributes API action, and update limits
-        with the quotas returned. Updates ``self.limits``.
-
-        We ignore the usage information from the API,
+        with the quotas returned. Updates ``self.limits``. The quotas are kept
+        in ``self._account_quotas``, for :py:meth:`~._find_usage_account_quotas`
+        to take usage from.
         """
         self.connect()
         logger.info("Querying RDS DescribeAccountAttributes for limits")
         lims = self.conn.describe_account_attributes()['AccountQuotas']
+        self._account_quotas = lims
         for lim in lims:
             if lim['AccountQuotaName'] not in self.API_NAME_TO_LIMIT:
                 logger.info('RDS DescribeAccountAttributes returned unknown'
@@ -289,9 +299,20 @@ class _RDSService(_AwsService):
                 continue
             lname = self.API_NAME_TO_LIMIT[lim['AccountQuotaName']]
             self.limits[lname]._set_api_limit(lim['Max'])
+        logger.debug('Done setting limits from API.')
+
+    def _find_usage_account_quotas(self):
+        """
+        Set usage from DescribeAccountAttributes (as fetched by
+        :py:meth:`~._update_limits_from_api`) for the limits that we have not
+        already calculated usage for.
+        """
+        for lim in self._account_quotas:
+            lname = self.API_NAME_TO_LIMIT.get(lim['AccountQuotaName'])
+            if lname is None:
+                continue
             if len(self.limits[lname].get_current_usage()) < 1:
                 self.limits[lname]._add_current_usage(lim['Used'])
-        logger.debug('Done setting limits from API.')
 
     def required_iam_permissions(self):
         """
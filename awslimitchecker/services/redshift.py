@@ -42,7 +42,7 @@ import logging
 
 from .base import _AwsService
 from ..limit import AwsLimit
-from ..utils import paginate_dict
+from ..utils import paginate_iter, count_iter
 
 logger = logging.getLogger(__name__)
 
@@ -68,28 +68,28 @@ class _RedshiftService(_AwsService):
         logger.debug("Done checking usage.")
 
     def _find_cluster_manual_snapshots(self):
-        results = paginate_dict(
+        count = count_iter(paginate_iter(
             self.conn.describe_cluster_snapshots,
             alc_marker_path=['Marker'],
             alc_data_path=['Snapshots'],
             alc_marker_param='Marker',
             SnapshotType='manual'
-        )
+        ))
         self.limits['Redshift manual snapshots']._add_current_usage(
-            len(results['Snapshots']),
+            count,
             resource_id=self._boto3_connection_kwargs['region_name'],
             aws_type='AWS::Redshift::Snapshot',
         )
 
     def _find_cluster_subnet_groups(self):
-        results = paginate_dict(
+        count = count_iter(paginate_iter(
             self.conn.describe_cluster_subnet_groups,
             alc_marker_path=['Marker'],
             alc_data_path=['ClusterSubnetGroups'],
             alc_marker_param='Marker'
-        )
+        ))
         self.limits['Redshift subnet groups']._add_current_usage(
-            len(results['ClusterSubnetGroups']),
+            count,
             resource_id=self._boto3_connection_kwargs['region_name'],
             aws_type='AWS::Redshift::SubnetGroup',
         )
@@ -0,0 +1,267 @@
+"""
+awslimitchecker/tests/benchmark.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+################################################################################
+Copyright 2015-2017 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+################################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+################################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+################################################################################
+"""
+
+import argparse
+import logging
+import sys
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+# https://code.google.com/p/mock/issues/detail?id=249
+# py>=3.4 should use unittest.mock not the mock package on pypi
+if (
+        sys.version_info[0] < 3 or
+        sys.version_info[0] == 3 and sys.version_info[1] < 4
+):
+    from mock import patch
+else:
+    from unittest.mock import patch
+
+from awslimitchecker.checker import AwsLimitChecker
+from awslimitchecker.limit import AwsLimit
+from awslimitchecker.tests.synthetic import (
+    SyntheticAccount, SyntheticClientPool
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BenchmarkResult(object):
+    """Wall time, API calls and peak memory for one benchmarked operation."""
+
+    def __init__(self, name, seconds, api_calls, peak_bytes=None):
+        """
+        :param name: name of the service or operation benchmarked
+        :type name: str
+        :param seconds: wall-clock time taken
+        :type seconds: float
+        :param api_calls: number of AWS API calls made
+        :type api_calls: int
+        :param peak_bytes: peak memory allocated by Python, or None if
+          :py:mod:`tracemalloc` is not available
+        :type peak_bytes: int
+        """
+        self.name = name
+        self.seconds = seconds
+        self.api_calls = api_calls
+        self.peak_bytes = peak_bytes
+
+    def __repr__(self):
+        return '<BenchmarkResult {n}: {s:.3f}s {c} calls>'.format(
+            n=self.name, s=self.seconds, c=self.api_calls
+        )
+
+
+def synthetic_checker(account, **kwargs):
+    """
+    Return an :py:class:`~.AwsLimitChecker` whose API calls are all answered
+    by ``account``.
+
+    :param account: the synthetic account to check
+    :type account: :py:class:`~.SyntheticAccount`
+    :param kwargs: additional keyword arguments for
+      :py:class:`~.AwsLimitChecker`
+    :rtype: :py:class:`~.AwsLimitChecker`
+    """
+    kwargs.setdefault('region', 'us-east-1')
+    kwargs.setdefault('check_version', False)
+
+    def make_pool(**pool_kwargs):
+        return SyntheticClientPool(account, **pool_kwargs)
+
+    with patch('awslimitchecker.checker.ClientPool', make_pool):
+        return AwsLimitChecker(**kwargs)
+
+
+def _measure(name, account, func, trace_memory=True):
+    """
+    Call ``func`` and return a :py:class:`~.BenchmarkResult` for it.
+    """
+    trace_memory = trace_memory and tracemalloc is not None
+    if trace_memory:
+        tracemalloc.start()
+    calls = account.total_calls()
+    start = time.time()
+    func()
+    seconds = time.time() - start
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return BenchmarkResult(
+        name, seconds, account.total_calls() - calls, peak_bytes=peak
+    )
+
+
+def run_benchmark(scale=1.0, services=None, trace_memory=True,
+                  **checker_kwargs):
+    """
+    Run every service's collector (or just those named in ``services``)
+    against a synthetic account of the given scale, one at a time, and then
+    a full :py:meth:`~.AwsLimitChecker.check_thresholds` run against a fresh
+    account and checker.
+
+    :param scale: multiplier for :py:data:`~.synthetic.BASE_COUNTS`
+    :type scale: float
+    :param services: names of the services to benchmark, or None for all
+    :type services: list
+    :param trace_memory: whether to measure peak memory use with
+      :py:mod:`tracemalloc`, which makes everything much slower
+    :type trace_memory: bool
+    :param checker_kwargs: additional keyword arguments for
+      :py:class:`~.AwsLimitChecker`
+    :returns: list of :py:class:`~.BenchmarkResult`, one per service and a
+      final one named ``TOTAL`` for the full run
+    :rtype: list
+    """
+    account = SyntheticAccount(scale=scale)
+    checker = synthetic_checker(account, **checker_kwargs)
+    if services is None:
+        services = sorted(checker.services.keys())
+    results = []
+    for name in services:
+        item = (checker.regions[0], name, checker.services[name])
+        results.append(_measure(
+            name, account, lambda: checker._find_service_usage(item),
+            trace_memory=trace_memory
+        ))
+    account = SyntheticAccount(scale=scale)
+    checker = synthetic_checker(account, **checker_kwargs)
+    results.append(_measure(
+        'TOTAL', account,
+        lambda: checker.check_thresholds(service=services),
+        trace_memory=trace_memory
+    ))
+    return results
+
+
+def measure_usage_memory(count=100000):
+    """
+    Measure the memory that :py:meth:`~.AwsLimit._add_current_usage` needs
+    for each per-resource usage value, such as one security group's rule
+    count. The resource IDs are created before measuring starts, so this is
+    the cost of the :py:class:`~.AwsLimitUsage` object and its place in the
+    limit's usage list.
+
+    :param count: number of usage values to add
+    :type count: int
+    :returns: bytes allocated per usage value, or None if
+      :py:mod:`tracemalloc` is not available
+    :rtype: float
+    """
+    if tracemalloc is None:
+        return None
+    limit = AwsLimit('Rules per VPC security group', None, 50, 80, 99)
+    ids = ['sg-{i:017d}'.format(i=i) for i in range(count)]
+    tracemalloc.start()
+    for i, resource_id in enumerate(ids):
+        limit._add_current_usage(
+            i % 50, resource_id=resource_id, aws_type='AWS::EC2::SecurityGroup'
+        )
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return used / float(count)
+
+
+def format_results(results):
+    """
+    Format a list of :py:class:`~.BenchmarkResult` as a text table.
+
+    :rtype: str
+    """
+    lines = ['{n:<20} {s:>10} {c:>10} {m:>12}'.format(
+        n='Service', s='Seconds', c='API Calls', m='Peak KiB'
+    )]
+    for r in results:
+        lines.append('{n:<20} {s:>10.3f} {c:>10} {m:>12}'.format(
+            n=r.name, s=r.seconds, c=r.api_calls,
+            m='-' if r.peak_bytes is None else r.peak_bytes // 1024
+        ))
+    return '\n'.join(lines)
+
+
+def parse_args(argv):
+    p = argparse.ArgumentParser(
+        description='Benchmark awslimitchecker against a synthetic AWS '
+                    'account, without making any network calls.'
+    )
+    p.add_argument('-s', '--scale', type=float, default=1.0,
+                   help='size of the synthetic account, as a multiple of '
+                   'a very large account (default: 1.0)')
+    p.add_argument('-S', '--service', action='append', default=None,
+                   help='benchmark only this service; can be specified '
+                   'multiple times')
+    p.add_argument('--max-workers', type=int, default=1,
+                   help='number of services to check concurrently in the '
+                   'full run (default: 1)')
+    p.add_argument('--no-memory', dest='trace_memory', action='store_false',
+                   default=True, help='do not measure peak memory use '
+                   '(which slows down every collector)')
+    p.add_argument('--usage-memory', dest='usage_memory', type=int,
+                   default=None, metavar='N',
+                   help='instead of benchmarking services, measure the '
+                   'memory used per resource usage value when adding N of '
+                   'them to one limit')
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    if args.usage_memory is not None:
+        per_usage = measure_usage_memory(args.usage_memory)
+        if per_usage is None:
+            print('tracemalloc is not available')
+        else:
+            print('{b:.1f} bytes per usage value ({n} values)'.format(
+                b=per_usage, n=args.usage_memory
+            ))
+        return
+    results = run_benchmark(
+        scale=args.scale, services=args.service,
+        trace_memory=args.trace_memory, max_workers=args.max_workers
+    )
+    print(format_results(results))
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
@@ -136,13 +136,15 @@ class Test_ApigatewayService(object):
             elif api_name == 'get_resources':
                 return mock_res_paginator
 
-        def se_paginate_dict(*args, **kwargs):
+        def se_paginate_iter(*args, **kwargs):
             if args[0] == mock_conn.get_documentation_parts:
-                return result_fixtures.ApiGateway.doc_parts[kwargs['restApiId']]
+                return iter(
+                    result_fixtures.ApiGateway.doc_parts[kwargs['restApiId']]
+                )
             if args[0] == mock_conn.get_authorizers:
-                return result_fixtures.ApiGateway.authorizers[
-                    kwargs['restApiId']
-                ]
+                return iter(
+                    result_fixtures.ApiGateway.authorizers[kwargs['restApiId']]
+                )
 
         def se_get_stages(restApiId=None):
             return result_fixtures.ApiGateway.stages[restApiId]
@@ -151,9 +153,9 @@ class Test_ApigatewayService(object):
         mock_conn.get_stages.side_effect = se_get_stages
         cls = _ApigatewayService(21, 43)
         cls.conn = mock_conn
-        with patch('%s.paginate_dict' % pbm, autospec=True) as mock_pd:
+        with patch('%s.paginate_iter' % pbm, autospec=True) as mock_pd:
             with patch('%s.logger' % pbm) as mock_logger:
-                mock_pd.side_effect = se_paginate_dict
+                mock_pd.side_effect = se_paginate_iter
                 cls._find_usage_apis()
         # APIs usage
         usage = cls.limits['APIs per account'].get_current_usage()
@@ -257,6 +259,50 @@ class Test_ApigatewayService(object):
             call.debug('Finding usage for per-API limits')
         ]
 
+    def test_find_usage_apis_concurrent(self):
+        mock_conn = Mock()
+        mock_paginator = Mock()
+        mock_paginator.paginate.return_value = \
+            result_fixtures.ApiGateway.get_rest_apis
+        mock_conn.get_paginator.return_value = mock_paginator
+
+        def se_get_api_usage(klass, api_id):
+            return {
+                'api1': (3, 4, {'item': [1, 2, 3]}, 1),
+                'api2': (2, 1, {'item': [1]}, 2),
+                'api3': (0, 2, {'item': []}, 0)
+            }[api_id]
+
+        cls = _ApigatewayService(21, 43, max_workers=3)
+        cls.conn = mock_conn
+        with patch('%s._get_api_usage' % pb, autospec=True) as mock_gau:
+            with patch('%s.pool_map' % pbm, autospec=True) as mock_pool:
+                mock_gau.side_effect = se_get_api_usage
+                mock_pool.side_effect = lambda f, items, max_workers, budget: [
+                    f(i) for i in items
+                ]
+                cls._find_usage_apis()
+        assert len(mock_pool.mock_calls) == 1
+        assert mock_pool.call_args[0][1] == ['api3', 'api2', 'api1']
+        assert mock_pool.call_args[1] == {
+            'max_workers': 3, 'budget': cls.worker_budget
+        }
+        assert mock_gau.mock_calls == [
+            call(cls, 'api3'), call(cls, 'api2'), call(cls, 'api1')
+        ]
+        usage = cls.limits['Resources per API'].get_current_usage()
+        assert [(u.resource_id, u.get_value()) for u in usage] == [
+            ('api3', 0), ('api2', 2), ('api1', 3)
+        ]
+        usage = cls.limits['Stages per API'].get_current_usage()
+        assert [(u.resource_id, u.get_value()) for u in usage] == [
+            ('api3', 0), ('api2', 1), ('api1', 3)
+        ]
+        usage = cls.limits['Custom authorizers per API'].get_current_usage()
+        assert [(u.resource_id, u.get_value()) for u in usage] == [
+            ('api3', 0), ('api2', 2), ('api1', 1)
+        ]
+
     def test_find_usage_apis_stages_now_paginated(self):
         mock_conn = Mock()
         res = result_fixtures.ApiGateway.get_rest_apis
@@ -275,13 +321,15 @@ class Test_ApigatewayService(object):
             elif api_name == 'get_resources':
                 return mock_res_paginator
 
-        def se_paginate_dict(*args, **kwargs):
+        def se_paginate_iter(*args, **kwargs):
             if args[0] == mock_conn.get_documentation_parts:
-                return result_fixtures.ApiGateway.doc_parts[kwargs['restApiId']]
+                return iter(
+                    result_fixtures.ApiGateway.doc_parts[kwargs['restApiId']]
+                )
             if args[0] == mock_conn.get_authorizers:
-                return result_fixtures.ApiGateway.authorizers[
-                    kwargs['restApiId']
-                ]
+                return iter(
+                    result_fixtures.ApiGateway.authorizers[kwargs['restApiId']]
+                )
 
         def se_get_stages(restApiId=None):
             r = deepcopy(result_fixtures.ApiGateway.stages[restApiId])
@@ -292,9 +340,9 @@ class Test_ApigatewayService(object):
         mock_conn.get_stages.side_effect = se_get_stages
         cls = _ApigatewayService(21, 43)
         cls.conn = mock_conn
-        with patch('%s.paginate_dict' % pbm, autospec=True) as mock_pd:
+        with patch('%s.paginate_iter' % pbm, autospec=True) as mock_pd:
             with patch('%s.logger' % pbm) as mock_logger:
-                mock_pd.side_effect = se_paginate_dict
+                mock_pd.side_effect = se_paginate_iter
                 cls._find_usage_apis()
         assert mock_logger.mock_calls == [
             call.debug('Finding usage for APIs'),
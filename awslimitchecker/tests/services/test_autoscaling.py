@@ -91,24 +91,20 @@ class Test_AutoscalingService(object):
 
         def se_wrapper(func, *args, **kwargs):
             if func == mock_conn.describe_auto_scaling_groups:
-                return {
-                    'AutoScalingGroups': [
-                        {'AutoScalingGroupName': 'foo'},
-                        {'AutoScalingGroupName': 'bar'},
-                        {'AutoScalingGroupName': 'baz'},
-                    ],
-                }
+                return iter([
+                    {'AutoScalingGroupName': 'foo'},
+                    {'AutoScalingGroupName': 'bar'},
+                    {'AutoScalingGroupName': 'baz'},
+                ])
             elif func == mock_conn.describe_launch_configurations:
-                return {
-                    'LaunchConfigurations': [
-                        {'LaunchConfigurationName': 'foo'},
-                        {'LaunchConfigurationName': 'bar'},
-                    ],
-                }
+                return iter([
+                    {'LaunchConfigurationName': 'foo'},
+                    {'LaunchConfigurationName': 'bar'},
+                ])
             return None
 
         with patch('%s.connect' % self.pb) as mock_connect:
-            with patch('%s.paginate_dict' % self.pbm) as mock_paginate:
+            with patch('%s.paginate_iter' % self.pbm) as mock_paginate:
                 cls = _AutoscalingService(21, 43)
                 cls.conn = mock_conn
                 mock_paginate.side_effect = se_wrapper
@@ -38,7 +38,7 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 """
 
 from awslimitchecker.services.base import _AwsService
-from awslimitchecker.limit import AwsLimit
+from awslimitchecker.limit import AwsLimit, SOURCE_API, SOURCE_TA
 import pytest
 import sys
 
@@ -109,6 +109,7 @@ class Test_AwsService(object):
         assert cls.limits == {'foo': 'bar'}
         assert cls.conn is None
         assert cls._have_usage is False
+        assert cls._have_api_limits is False
         assert not cls._boto3_connection_kwargs
 
     def test_init_subclass_boto_xargs(self):
@@ -266,6 +267,94 @@ class Test_AwsService(object):
         assert res == {'foo': mock_limit1, 'foo4': mock_limit4}
         assert mock_find_usage.mock_calls == [call()]
 
+    def test_update_limits_from_api_if_needed(self):
+        cls = AwsServiceTester(1, 2)
+        assert cls._have_api_limits is False
+        mock_update = Mock()
+        cls._update_limits_from_api = mock_update
+        cls._update_limits_from_api_if_needed()
+        cls._update_limits_from_api_if_needed()
+        assert mock_update.mock_calls == [call()]
+        assert cls._have_api_limits is True
+
+    def test_update_limits_from_api_if_needed_no_method(self):
+        cls = AwsServiceTester(1, 2)
+        cls._update_limits_from_api_if_needed()
+        assert cls._have_api_limits is False
+
+    def test_invalidate(self):
+        cls = AwsServiceTester(1, 2)
+        mock_update = Mock()
+        cls._update_limits_from_api = mock_update
+        cls._update_limits_from_api_if_needed()
+        cls.find_usage()
+        cls.invalidate()
+        assert cls._have_usage is False
+        assert cls._have_api_limits is False
+        cls._update_limits_from_api_if_needed()
+        assert mock_update.mock_calls == [call(), call()]
+
+    def test_dump_load_usage(self):
+        cls = AwsServiceTester(1, 2)
+        cls.limits = {
+            'foo': AwsLimit('foo', cls, 10, 80, 99),
+            'bar': AwsLimit('bar', cls, 20, 80, 99),
+        }
+        cls.limits['foo']._add_current_usage(
+            3, resource_id='r1', aws_type='AWS::Foo')
+        cls.limits['foo']._add_current_usage(4, resource_id='r2')
+        usage = cls._dump_usage()
+        assert usage == {
+            'foo': [[3, 'r1', 'AWS::Foo'], [4, 'r2', None]],
+            'bar': []
+        }
+        other = AwsServiceTester(1, 2)
+        other.limits = {
+            'foo': AwsLimit('foo', other, 10, 80, 99),
+            'baz': AwsLimit('baz', other, 30, 80, 99),
+        }
+        other.limits['baz']._add_current_usage(5)
+        other._load_usage(usage)
+        assert other._have_usage is True
+        assert other._dump_usage() == {
+            'foo': [[3, 'r1', 'AWS::Foo'], [4, 'r2', None]],
+            'baz': []
+        }
+
+    def test_dump_load_limits(self):
+        cls = AwsServiceTester(1, 2)
+        cls.limits = {
+            'foo': AwsLimit('foo', cls, 10, 80, 99),
+            'bar': AwsLimit('bar', cls, 20, 80, 99),
+            'baz': AwsLimit('baz', cls, 30, 80, 99),
+            'blam': AwsLimit('blam', cls, 40, 80, 99),
+        }
+        cls.limits['foo']._set_api_limit(15)
+        cls.limits['foo']._set_ta_limit(12)
+        cls.limits['bar']._set_ta_unlimited()
+        cls.limits['blam'].set_limit_override(50)
+        limits = cls._dump_limits()
+        assert limits == {
+            'foo': [[SOURCE_API, 15], [SOURCE_TA, 12]],
+            'bar': [[SOURCE_TA, None]]
+        }
+        other = AwsServiceTester(1, 2)
+        other.limits = {
+            'foo': AwsLimit('foo', other, 10, 80, 99),
+            'bar': AwsLimit('bar', other, 20, 80, 99),
+            'baz': AwsLimit('baz', other, 30, 80, 99),
+        }
+        other.limits['baz']._set_api_limit(35)
+        other._load_limits(limits)
+        assert other._dump_limits() == limits
+        assert other.limits['foo'].get_limit() == 15
+        assert other.limits['foo'].get_limit_source() == SOURCE_API
+        assert other.limits['bar'].get_limit() is None
+        assert other.limits['bar'].get_limit_source() == SOURCE_TA
+        assert other.limits['baz'].get_limit() == 30
+        # limits from the cache do not count as fetched from the API
+        assert other._have_api_limits is False
+
 
 class Test_AwsServiceSubclasses(object):
 
@@ -71,17 +71,9 @@ class Test_DynamodbService(object):
         assert cls.critical_threshold == 43
 
     def test_get_limits_other_region(self):
-        mock_conn = Mock()
-        m_client = Mock()
-        type(m_client).region_name = 'foo'
-        type(mock_conn)._client_config = m_client
-
-        def se_conn(cls):
-            cls.conn = mock_conn
-
         with patch('%s.connect' % pb, autospec=True) as mock_connect:
-            mock_connect.side_effect = se_conn
-            cls = _DynamodbService(21, 43)
+            cls = _DynamodbService(21, 43, {'region_name': 'foo'})
+        assert mock_connect.mock_calls == []
 
         limits = cls.limits
         for x in limits:
@@ -113,17 +105,9 @@ class Test_DynamodbService(object):
         assert read_capacity_table.default_limit == 10000
 
     def test_get_limits_us_east_1(self):
-        mock_conn = Mock()
-        m_client = Mock()
-        type(m_client).region_name = 'us-east-1'
-        type(mock_conn)._client_config = m_client
-
-        def se_conn(cls):
-            cls.conn = mock_conn
-
         with patch('%s.connect' % pb, autospec=True) as mock_connect:
-            mock_connect.side_effect = se_conn
-            cls = _DynamodbService(21, 43)
+            cls = _DynamodbService(21, 43, {'region_name': 'us-east-1'})
+        assert mock_connect.mock_calls == []
 
         limits = cls.limits
         for x in limits:
@@ -154,6 +138,15 @@ class Test_DynamodbService(object):
         assert read_capacity_region.default_limit == 80000
         assert read_capacity_table.default_limit == 40000
 
+    def test_get_region_name_default(self):
+        with patch('%s.get_limits' % pb):
+            cls = _DynamodbService(21, 43, {'region_name': None})
+        with patch('%s.boto3' % pbm) as mock_boto3:
+            mock_boto3.session.Session.return_value.region_name = 'rX'
+            res = cls._get_region_name()
+        assert res == 'rX'
+        assert mock_boto3.mock_calls == [call.session.Session()]
+
     def test_get_limits_again(self):
         """test that existing limits dict is returned on subsequent calls"""
         mock_limits = Mock(spec_set=AwsLimit)
@@ -182,9 +175,7 @@ class Test_DynamodbService(object):
         assert cls.limits['Account Max Write Capacity Units'].api_limit == 222
         assert cls.limits['Table Max Read Capacity Units'].api_limit == 333
         assert cls.limits['Table Max Write Capacity Units'].api_limit == 444
-        assert mock_connect.mock_calls == [
-            call(cls), call(cls)
-        ]
+        assert mock_connect.mock_calls == [call(cls)]
         assert mock_conn.mock_calls == [call.describe_limits()]
 
     def test_find_usage(self):
@@ -198,43 +189,40 @@ class Test_DynamodbService(object):
 
         with patch('%s.connect' % pb, autospec=True) as mock_connect:
             with patch('%s._find_usage_dynamodb' % pb, autospec=True) as m_fud:
-                with patch(
-                    '%s.connect_resource' % pb, autospec=True
-                ) as mock_conn_res:
-                    mock_connect.side_effect = se_conn
-                    cls = _DynamodbService(21, 43)
-                    cls.conn = mock_conn
-                    assert cls._have_usage is False
-                    cls.find_usage()
+                mock_connect.side_effect = se_conn
+                cls = _DynamodbService(21, 43)
+                cls.conn = mock_conn
+                assert cls._have_usage is False
+                cls.find_usage()
         assert mock_connect.mock_calls == [call(cls)]
-        assert mock_conn_res.mock_calls == [call(cls)]
         assert mock_conn.mock_calls == []
         assert m_client.mock_calls == []
         assert m_fud.mock_calls == [call(cls)]
         assert cls._have_usage is True
 
     def test_find_usage_dynamodb(self):
-        response = result_fixtures.DynamoDB.test_find_usage_dynamodb
+        tables = result_fixtures.DynamoDB.test_find_usage_dynamodb
         mock_conn = Mock()
-        mock_conn.describe_limits.return_value = response
-        m_client = Mock()
-        type(m_client).region_name = 'foo'
-        type(mock_conn)._client_config = m_client
-
-        def se_conn(cls):
-            cls.conn = mock_conn
-
-        mock_tables = Mock()
-        mock_tables.all.return_value = response
-        mock_res_conn = Mock()
-        type(mock_res_conn).tables = mock_tables
+        mock_conn.list_tables.side_effect = [
+            {
+                'TableNames': ['table1', 'table2'],
+                'LastEvaluatedTableName': 'table2'
+            },
+            {'TableNames': ['table3']}
+        ]
+        mock_conn.describe_table.side_effect = lambda TableName=None: \
+            tables[TableName]
 
-        with patch('%s.connect' % pb, autospec=True) as mock_connect:
-            mock_connect.side_effect = se_conn
-            cls = _DynamodbService(21, 43)
-            cls.conn = mock_conn
-            cls.resource_conn = mock_res_conn
-            cls._find_usage_dynamodb()
+        cls = _DynamodbService(21, 43)
+        cls.conn = mock_conn
+        cls._find_usage_dynamodb()
+        assert mock_conn.mock_calls == [
+            call.list_tables(),
+            call.list_tables(ExclusiveStartTableName='table2'),
+            call.describe_table(TableName='table1'),
+            call.describe_table(TableName='table2'),
+            call.describe_table(TableName='table3')
+        ]
         # Account/Region wide limits
         u = cls.limits['Tables Per Region'].get_current_usage()
         assert len(u) == 1
@@ -279,6 +267,34 @@ class Test_DynamodbService(object):
         assert u[2].resource_id == 'table3'
         assert u[2].get_value() == 600
 
+    def test_find_usage_dynamodb_concurrent(self):
+        tables = result_fixtures.DynamoDB.test_find_usage_dynamodb
+        mock_conn = Mock()
+        mock_conn.list_tables.return_value = {
+            'TableNames': ['table1', 'table2', 'table3']
+        }
+        mock_conn.describe_table.side_effect = lambda TableName=None: \
+            tables[TableName]
+
+        cls = _DynamodbService(21, 43, max_workers=3)
+        cls.conn = mock_conn
+        with patch('%s.pool_map' % pbm, autospec=True) as mock_pool:
+            mock_pool.side_effect = lambda f, items, max_workers, budget: [
+                f(i) for i in items
+            ]
+            cls._find_usage_dynamodb()
+        assert len(mock_pool.mock_calls) == 1
+        assert mock_pool.call_args[0][1] == ['table1', 'table2', 'table3']
+        assert mock_pool.call_args[1] == {
+            'max_workers': 3, 'budget': cls.worker_budget
+        }
+        u = cls.limits['Table Max Read Capacity Units'].get_current_usage()
+        assert [(x.resource_id, x.get_value()) for x in u] == [
+            ('table1', 64), ('table2', 336), ('table3', 600)
+        ]
+        u = cls.limits['Tables Per Region'].get_current_usage()
+        assert u[0].get_value() == 3
+
     def test_required_iam_permissions(self):
         cls = _DynamodbService(21, 43)
         assert cls.required_iam_permissions() == [
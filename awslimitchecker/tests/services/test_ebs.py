@@ -136,8 +136,8 @@ class Test_EbsService(object):
         cls = _EbsService(21, 43)
         cls.conn = mock_conn
         with patch('awslimitchecker.services.ebs.logger') as mock_logger:
-            with patch('%s.paginate_dict' % self.pbm) as mock_paginate:
-                mock_paginate.return_value = response
+            with patch('%s.paginate_iter' % self.pbm) as mock_paginate:
+                mock_paginate.return_value = iter(response['Volumes'])
                 cls._find_usage_ebs()
         assert mock_logger.mock_calls == [
             call.debug("Getting usage for EBS volumes"),
@@ -190,8 +190,8 @@ class Test_EbsService(object):
         cls = _EbsService(21, 43)
         cls.conn = mock_conn
         with patch('awslimitchecker.services.ebs.logger') as mock_logger:
-            with patch('%s.paginate_dict' % self.pbm) as mock_paginate:
-                mock_paginate.return_value = response
+            with patch('%s.paginate_iter' % self.pbm) as mock_paginate:
+                mock_paginate.return_value = iter(response['Snapshots'])
                 cls._find_usage_snapshots()
         assert mock_logger.mock_calls == [
             call.debug("Getting usage for EBS snapshots"),
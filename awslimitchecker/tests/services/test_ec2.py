@@ -211,9 +211,9 @@ class Test_Ec2Service(object):
         mock_conn = Mock()
 
         retval = fixtures.test_instance_usage
-        mock_conn.instances.all.return_value = retval
+        mock_conn.describe_instances.return_value = retval
 
-        cls.resource_conn = mock_conn
+        cls.conn = mock_conn
         cls.limits = limits
 
         with patch('awslimitchecker.services.ec2._Ec2Service._instance_types',
@@ -234,7 +234,10 @@ class Test_Ec2Service(object):
             }
         }
         assert mock_conn.mock_calls == [
-            call.instances.all()
+            call.describe_instances(Filters=[{
+                'Name': 'instance-state-name',
+                'Values': ['pending', 'running', 'shutting-down', 'stopping']
+            }], MaxResults=1000)
         ]
 
     def test_get_reserved_instance_count(self):
@@ -244,8 +247,6 @@ class Test_Ec2Service(object):
         mock_client_conn = Mock()
         cls.conn = mock_client_conn
         mock_client_conn.describe_reserved_instances.return_value = response
-        mock_conn = Mock()
-        cls.resource_conn = mock_conn
 
         res = cls._get_reserved_instance_count()
         assert res == {
@@ -260,9 +261,10 @@ class Test_Ec2Service(object):
                 'it3': 6
             }
         }
-        assert mock_conn.mock_calls == []
         assert mock_client_conn.mock_calls == [
-            call.describe_reserved_instances()
+            call.describe_reserved_instances(
+                Filters=[{'Name': 'state', 'Values': ['active']}]
+            )
         ]
 
     def test_find_usage_instances(self):
@@ -350,9 +352,9 @@ class Test_Ec2Service(object):
     def test_instance_usage_key_error(self):
         mock_conn = Mock()
         data = fixtures.test_instance_usage_key_error
-        mock_conn.instances.all.return_value = data
+        mock_conn.describe_instances.return_value = data
         cls = _Ec2Service(21, 43)
-        cls.resource_conn = mock_conn
+        cls.conn = mock_conn
         cls.limits = {'Running On-Demand t2.micro instances': Mock()}
 
         with patch(
@@ -367,7 +369,10 @@ class Test_Ec2Service(object):
                        'foobar'),
         ]
         assert mock_conn.mock_calls == [
-            call.instances.all()
+            call.describe_instances(Filters=[{
+                'Name': 'instance-state-name',
+                'Values': ['pending', 'running', 'shutting-down', 'stopping']
+            }], MaxResults=1000)
         ]
 
     def test_required_iam_permissions(self):
@@ -396,13 +401,13 @@ class Test_Ec2Service(object):
         ]
 
     def test_find_usage_networking_sgs(self):
-        mocks = fixtures.test_find_usage_networking_sgs
+        data = fixtures.test_find_usage_networking_sgs
 
         mock_conn = Mock()
-        mock_conn.security_groups.all.return_value = mocks
+        mock_conn.describe_security_groups.return_value = data
 
         cls = _Ec2Service(21, 43)
-        cls.resource_conn = mock_conn
+        cls.conn = mock_conn
 
         with patch('awslimitchecker.services.ec2.logger') as mock_logger:
             cls._find_usage_networking_sgs()
@@ -435,17 +440,16 @@ class Test_Ec2Service(object):
         assert sorted_usage[2].resource_id == 'sg-3'
         assert sorted_usage[2].get_value() == 9
         assert mock_conn.mock_calls == [
-            call.security_groups.all()
+            call.describe_security_groups(MaxResults=1000)
         ]
 
     def test_find_usage_networking_eips(self):
-        mocks = fixtures.test_find_usage_networking_eips
+        data = fixtures.test_find_usage_networking_eips
 
         mock_conn = Mock()
-        mock_conn.classic_addresses.all.return_value = mocks['Classic']
-        mock_conn.vpc_addresses.all.return_value = mocks['Vpc']
+        mock_conn.describe_addresses.return_value = data
         cls = _Ec2Service(21, 43)
-        cls.resource_conn = mock_conn
+        cls.conn = mock_conn
 
         with patch('awslimitchecker.services.ec2.logger') as mock_logger:
             cls._find_usage_networking_eips()
@@ -469,17 +473,16 @@ class Test_Ec2Service(object):
         assert usage[0].aws_type == 'AWS::EC2::EIP'
 
         assert mock_conn.mock_calls == [
-            call.vpc_addresses.all(),
-            call.classic_addresses.all()
+            call.describe_addresses()
         ]
 
     def test_find_usage_networking_eni_sg(self):
-        mocks = fixtures.test_find_usage_networking_eni_sg
+        data = fixtures.test_find_usage_networking_eni_sg
 
         mock_conn = Mock()
-        mock_conn.network_interfaces.all.return_value = mocks
+        mock_conn.describe_network_interfaces.return_value = data
         cls = _Ec2Service(21, 43)
-        cls.resource_conn = mock_conn
+        cls.conn = mock_conn
         with patch('awslimitchecker.services.ec2.logger') as mock_logger:
             cls._find_usage_networking_eni_sg()
         assert mock_logger.mock_calls == [
@@ -498,7 +501,7 @@ class Test_Ec2Service(object):
         assert sorted_usage[2].resource_id == 'if-3'
         assert sorted_usage[2].get_value() == 8
         assert mock_conn.mock_calls == [
-            call.network_interfaces.all()
+            call.describe_network_interfaces(MaxResults=1000)
         ]
 
     def test_get_limits_networking(self):
@@ -730,16 +733,13 @@ class Test_Ec2Service(object):
 
     def test_update_limits_from_api(self):
         data = fixtures.test_update_limits_from_api
-        mock_conn = Mock()
         mock_client_conn = Mock()
         mock_client_conn.describe_account_attributes.return_value = data
 
         cls = _Ec2Service(21, 43)
-        cls.resource_conn = mock_conn
         cls.conn = mock_client_conn
         with patch('awslimitchecker.services.ec2.logger') as mock_logger:
             cls._update_limits_from_api()
-        assert mock_conn.mock_calls == []
         assert mock_client_conn.mock_calls == [
             call.describe_account_attributes()
         ]
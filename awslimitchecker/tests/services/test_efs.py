@@ -91,14 +91,12 @@ class Test_EfsService(object):
     def test_find_usage(self):
         mock_conn = Mock()
         with patch('%s.connect' % pb) as mock_connect:
-            with patch('%s.paginate_dict' % pbm) as mock_paginate:
-                mock_paginate.return_value = {
-                    'FileSystems': [
-                        {'FileSystemId': 'foo'},
-                        {'FileSystemId': 'bar'},
-                        {'FileSystemId': 'baz'}
-                    ]
-                }
+            with patch('%s.paginate_iter' % pbm) as mock_paginate:
+                mock_paginate.return_value = iter([
+                    {'FileSystemId': 'foo'},
+                    {'FileSystemId': 'bar'},
+                    {'FileSystemId': 'baz'}
+                ])
                 cls = _EfsService(21, 43)
                 cls.conn = mock_conn
                 assert cls._have_usage is False
@@ -125,7 +123,7 @@ class Test_EfsService(object):
         )
         mock_conn = Mock()
         with patch('%s.connect' % pb) as mock_connect:
-            with patch('%s.paginate_dict' % pbm) as mock_paginate:
+            with patch('%s.paginate_iter' % pbm) as mock_paginate:
                 mock_paginate.side_effect = exc
                 cls = _EfsService(21, 43)
                 cls.conn = mock_conn
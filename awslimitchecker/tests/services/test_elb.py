@@ -40,6 +40,7 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 import sys
 from awslimitchecker.tests.services import result_fixtures
 from awslimitchecker.services.elb import _ElbService
+from awslimitchecker.utils import WorkerBudget
 
 # https://code.google.com/p/mock/issues/detail?id=249
 # py>=3.4 should use unittest.mock not the mock package on pypi
@@ -98,7 +99,7 @@ class Test_ElbService(object):
         mock_conn.describe_account_limits.return_value = r1
 
         with patch('%s.connect' % pb) as mock_connect:
-            with patch('%s.client' % pbm) as mock_client:
+            with patch('%s._client' % pb) as mock_client:
                 m_cli = mock_client.return_value
                 m_cli._client_config.region_name = PropertyMock(
                     return_value='rname'
@@ -112,7 +113,7 @@ class Test_ElbService(object):
         assert mock_connect.mock_calls == [call()]
         assert mock_conn.mock_calls == [call.describe_account_limits()]
         assert mock_client.mock_calls == [
-            call('elbv2', foo='bar', baz='blam'),
+            call('elbv2'),
             call().describe_account_limits()
         ]
         assert cls.limits['Active load balancers'].api_limit == 3
@@ -143,8 +144,10 @@ class Test_ElbService(object):
         return_value = result_fixtures.ELB.test_find_usage
 
         with patch('%s.connect' % pb) as mock_connect:
-            with patch('%s.paginate_dict' % pbm) as mock_paginate:
-                mock_paginate.return_value = return_value
+            with patch('%s.paginate_iter' % pbm) as mock_paginate:
+                mock_paginate.return_value = iter(
+                    return_value['LoadBalancerDescriptions']
+                )
                 cls = _ElbService(21, 43)
                 cls.conn = mock_conn
                 res = cls._find_usage_elbv1()
@@ -176,33 +179,23 @@ class Test_ElbService(object):
         tgs_res = result_fixtures.ELB.test_find_usage_elbv2_target_groups
 
         with patch('%s.connect' % pb) as mock_connect:
-            with patch('%s.client' % pbm) as mock_client:
+            with patch('%s._client' % pb) as mock_client:
                 mock_client.return_value._client_config.region_name = \
                     PropertyMock(return_value='rname')
-                with patch('%s.paginate_dict' % pbm) as mock_paginate:
+                with patch('%s.paginate_iter' % pbm) as mock_paginate:
                     with patch(
                         '%s._update_usage_for_elbv2' % pb, autospec=True
                     ) as mock_u:
-                        with patch(
-                            '%s.Config' % pbm, autospec=True
-                        ) as mock_conf:
-                            mock_paginate.side_effect = [
-                                tgs_res,
-                                lbs_res
-                            ]
-                            cls = _ElbService(21, 43)
-                            cls._boto3_connection_kwargs = {
-                                'foo': 'bar',
-                                'baz': 'blam'
-                            }
-                            res = cls._find_usage_elbv2()
+                        mock_paginate.side_effect = [
+                            iter(tgs_res['TargetGroups']),
+                            iter(lbs_res['LoadBalancers'])
+                        ]
+                        cls = _ElbService(21, 43)
+                        res = cls._find_usage_elbv2()
         assert res == 2
-        assert mock_conf.mock_calls == [
-            call(retries={'max_attempts': 12})
-        ]
         assert mock_connect.mock_calls == []
         assert mock_client.mock_calls == [
-            call('elbv2', foo='bar', baz='blam', config=mock_conf.return_value),
+            call('elbv2', retries={'max_attempts': 12}),
         ]
         assert mock_paginate.mock_calls == [
             call(
@@ -219,8 +212,11 @@ class Test_ElbService(object):
             )
         ]
         assert mock_u.mock_calls == [
-            call(cls, mock_client.return_value, 'lb-arn1', 'lb1'),
-            call(cls, mock_client.return_value, 'lb-arn2', 'lb2')
+            call(
+                cls,
+                mock_client.return_value,
+                [('lb-arn1', 'lb1'), ('lb-arn2', 'lb2')]
+            )
         ]
         lim = cls.limits['Target groups'].get_current_usage()
         assert len(lim) == 1
@@ -229,15 +225,17 @@ class Test_ElbService(object):
 
     def test_update_usage_for_elbv2(self):
         conn = Mock()
-        with patch('%s.paginate_dict' % pbm) as mock_paginate:
+        rules = result_fixtures.ELB.test_usage_elbv2_rules
+        with patch('%s.paginate_iter' % pbm) as mock_paginate:
             mock_paginate.side_effect = [
-                result_fixtures.ELB.test_usage_elbv2_listeners,
-                result_fixtures.ELB.test_usage_elbv2_rules[0],
-                result_fixtures.ELB.test_usage_elbv2_rules[1],
-                result_fixtures.ELB.test_usage_elbv2_rules[2]
+                iter(result_fixtures.ELB.test_usage_elbv2_listeners[
+                    'Listeners']),
+                iter(rules[0]['Rules']),
+                iter(rules[1]['Rules']),
+                iter(rules[2]['Rules'])
             ]
             cls = _ElbService(21, 43)
-            cls._update_usage_for_elbv2(conn, 'myarn', 'albname')
+            cls._update_usage_for_elbv2(conn, [('myarn', 'albname')])
         assert mock_paginate.mock_calls == [
             call(
                 conn.describe_listeners,
@@ -281,6 +279,47 @@ class Test_ElbService(object):
         assert r[0].aws_type == 'AWS::ElasticLoadBalancingV2::LoadBalancer'
         assert r[0].resource_id == 'albname'
 
+    def test_update_usage_for_elbv2_concurrent(self):
+        listeners = {
+            'arn1': ['l1a', 'l1b'],
+            'arn2': [],
+            'arn3': ['l3a'],
+        }
+        rules = {'l1a': 2, 'l1b': 3, 'l3a': 1}
+
+        def se_listeners(LoadBalancerArn=None):
+            return {
+                'Listeners': [
+                    {'ListenerArn': x} for x in listeners[LoadBalancerArn]
+                ]
+            }
+
+        def se_rules(ListenerArn=None):
+            return {'Rules': [{'RuleArn': 'r'}] * rules[ListenerArn]}
+
+        conn = Mock()
+        conn.describe_listeners.side_effect = se_listeners
+        conn.describe_rules.side_effect = se_rules
+        budget = WorkerBudget(4)
+        cls = _ElbService(21, 43, max_workers=4, worker_budget=budget)
+        cls._update_usage_for_elbv2(
+            conn, [('arn1', 'alb1'), ('arn2', 'alb2'), ('arn3', 'alb3')]
+        )
+        assert conn.describe_listeners.call_count == 3
+        assert conn.describe_rules.call_count == 3
+        # every thread taken from the shared budget was returned
+        assert budget.acquire(4) == 3
+        l = cls.limits[
+            'Listeners per application load balancer'].get_current_usage()
+        assert [(u.resource_id, u.get_value()) for u in l] == [
+            ('alb1', 2), ('alb2', 0), ('alb3', 1)
+        ]
+        r = cls.limits[
+            'Rules per application load balancer'].get_current_usage()
+        assert [(u.resource_id, u.get_value()) for u in r] == [
+            ('alb1', 5), ('alb2', 0), ('alb3', 1)
+        ]
+
     def test_required_iam_permissions(self):
         cls = _ElbService(21, 43)
         assert cls.required_iam_permissions() == [
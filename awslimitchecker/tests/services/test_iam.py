@@ -94,12 +94,70 @@ class Test_IamService(object):
         assert res == mock_limits
 
     def test_find_usage(self):
-        with patch('%s._update_limits_from_api' % pb) as mock_update:
+        mock_summary = Mock(
+            summary_map=result_fixtures.IAM.test_update_limits_from_api
+        )
+        mock_conn = Mock()
+        mock_conn.AccountSummary.return_value = mock_summary
+        with patch('%s.connect_resource' % pb):
             cls = _IamService(21, 43)
+            cls.resource_conn = mock_conn
             assert cls._have_usage is False
             cls.find_usage()
-        assert mock_update.mock_calls == [call()]
+        assert mock_conn.mock_calls == [call.AccountSummary()]
         assert cls._have_usage is True
+        assert cls._have_api_limits is True
+
+        expected = {
+            'Groups': 25,
+            'Users': 152,
+            'Roles': 375,
+            'Instance profiles': 394,
+            'Server certificates': 55,
+            'Policies': 17,
+            'Policy Versions In Use': 53,
+        }
+        for lname, val in expected.items():
+            usage = cls.limits[lname].get_current_usage()
+            assert len(usage) == 1
+            assert usage[0].get_value() == val
+
+    def test_find_usage_after_update_limits(self):
+        mock_summary = Mock(
+            summary_map=result_fixtures.IAM.test_update_limits_from_api
+        )
+        mock_conn = Mock()
+        mock_conn.AccountSummary.return_value = mock_summary
+        with patch('%s.connect_resource' % pb):
+            cls = _IamService(21, 43)
+            cls.resource_conn = mock_conn
+            cls._update_limits_from_api_if_needed()
+            cls.find_usage()
+        # the summary fetched for the limits is reused
+        assert mock_conn.mock_calls == [call.AccountSummary()]
+        usage = cls.limits['Users'].get_current_usage()
+        assert len(usage) == 1
+        assert usage[0].get_value() == 152
+
+    def test_find_usage_again(self):
+        first = dict(result_fixtures.IAM.test_update_limits_from_api)
+        second = dict(first, Users=153)
+        mock_conn = Mock()
+        mock_conn.AccountSummary.side_effect = [
+            Mock(summary_map=first), Mock(summary_map=second)
+        ]
+        with patch('%s.connect_resource' % pb):
+            cls = _IamService(21, 43)
+            cls.resource_conn = mock_conn
+            cls.find_usage()
+            cls.find_usage()
+        # a repeated find_usage() fetches a fresh summary
+        assert mock_conn.mock_calls == [
+            call.AccountSummary(), call.AccountSummary()
+        ]
+        usage = cls.limits['Users'].get_current_usage()
+        assert len(usage) == 1
+        assert usage[0].get_value() == 153
 
     def test_required_iam_permissions(self):
         cls = _IamService(21, 43)
@@ -123,31 +181,32 @@ class Test_IamService(object):
 
         assert call.debug('Ignoring IAM AccountSummary attribute: %s',
                           'GroupsPerUserQuota') in mock_logger.mock_calls
+        assert cls._account_summary == mock_summary.summary_map
 
         lim = cls.limits['Groups']
         assert lim.api_limit == 100
-        assert lim.get_current_usage()[0].get_value() == 25
+        assert lim.get_current_usage() == []
 
         lim = cls.limits['Users']
         assert lim.api_limit == 5000
-        assert lim.get_current_usage()[0].get_value() == 152
+        assert lim.get_current_usage() == []
 
         lim = cls.limits['Roles']
         assert lim.api_limit == 501
-        assert lim.get_current_usage()[0].get_value() == 375
+        assert lim.get_current_usage() == []
 
         lim = cls.limits['Instance profiles']
         assert lim.api_limit == 500
-        assert lim.get_current_usage()[0].get_value() == 394
+        assert lim.get_current_usage() == []
 
         lim = cls.limits['Server certificates']
         assert lim.api_limit == 101
-        assert lim.get_current_usage()[0].get_value() == 55
+        assert lim.get_current_usage() == []
 
         lim = cls.limits['Policies']
         assert lim.api_limit == 1000
-        assert lim.get_current_usage()[0].get_value() == 17
+        assert lim.get_current_usage() == []
 
         lim = cls.limits['Policy Versions In Use']
         assert lim.api_limit == 10000
-        assert lim.get_current_usage()[0].get_value() == 53
+        assert lim.get_current_usage() == []
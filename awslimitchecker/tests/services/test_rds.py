@@ -110,7 +110,8 @@ class Test_RDSService(object):
                     _find_usage_instances=DEFAULT,
                     _find_usage_subnet_groups=DEFAULT,
                     _find_usage_security_groups=DEFAULT,
-                    _update_limits_from_api=DEFAULT,
+                    _update_limits_from_api_if_needed=DEFAULT,
+                    _find_usage_account_quotas=DEFAULT,
             ) as mocks:
                 cls = _RDSService(21, 43)
                 cls.conn = mock_conn
@@ -122,10 +123,35 @@ class Test_RDSService(object):
                 '_find_usage_instances',
                 '_find_usage_subnet_groups',
                 '_find_usage_security_groups',
-                '_update_limits_from_api',
+                '_update_limits_from_api_if_needed',
+                '_find_usage_account_quotas',
         ]:
             assert mocks[x].mock_calls == [call()]
 
+    def test_find_usage_again(self):
+        mock_conn = Mock()
+        mock_conn.describe_account_attributes.return_value = {
+            'AccountQuotas': []
+        }
+        with patch('%s.connect' % self.pb):
+            with patch.multiple(
+                    self.pb,
+                    _find_usage_instances=DEFAULT,
+                    _find_usage_subnet_groups=DEFAULT,
+                    _find_usage_security_groups=DEFAULT,
+            ):
+                cls = _RDSService(21, 43)
+                cls.conn = mock_conn
+                cls._update_limits_from_api_if_needed()
+                cls.find_usage()
+                assert len(mock_conn.mock_calls) == 1
+                # a repeated find_usage() fetches fresh quotas
+                cls.find_usage()
+        assert mock_conn.mock_calls == [
+            call.describe_account_attributes(),
+            call.describe_account_attributes()
+        ]
+
     def test_required_iam_permissions(self):
         cls = _RDSService(21, 43)
         assert cls.required_iam_permissions() == [
@@ -270,6 +296,10 @@ class Test_RDSService(object):
                 usage_replicas = cls.limits[
                     'Read replicas per master'].get_current_usage()
                 cls._update_limits_from_api()
+                assert cls._account_quotas == response['AccountQuotas']
+                # usage is only set by find_usage()
+                assert cls.limits['DB instances'].get_current_usage() == []
+                cls._find_usage_account_quotas()
         assert mock_connect.mock_calls == [call()]
         assert mock_conn.mock_calls == [
             call.describe_account_attributes()
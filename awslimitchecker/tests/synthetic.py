@@ -0,0 +1,865 @@
+"""
+awslimitchecker/tests/synthetic.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+################################################################################
+Copyright 2015-2017 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+################################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+################################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+################################################################################
+"""
+
+import threading
+from collections import defaultdict
+
+import botocore.session
+from botocore.awsrequest import AWSResponse
+
+from awslimitchecker.connectable import ClientPool
+
+#: Number of each kind of resource in a synthetic account at ``scale=1.0``;
+#: roughly a very large production account.
+BASE_COUNTS = {
+    'instances': 50000,
+    'reserved_instances': 500,
+    'security_groups': 20000,
+    'eips': 2000,
+    'network_interfaces': 60000,
+    'spot_instance_requests': 500,
+    'spot_fleets': 50,
+    'vpcs': 200,
+    'subnets': 2400,
+    'network_acls': 400,
+    'route_tables': 1200,
+    'nat_gateways': 400,
+    'vpn_gateways': 20,
+    'volumes': 60000,
+    'snapshots': 100000,
+    'elbs': 1000,
+    'albs': 500,
+    'target_groups': 2000,
+    'asgs': 2000,
+    'launch_configs': 4000,
+    'stacks': 1500,
+    'dynamodb_tables': 1000,
+    'efs_filesystems': 200,
+    'cache_clusters': 500,
+    'cache_subnet_groups': 100,
+    'cache_parameter_groups': 100,
+    'cache_security_groups': 20,
+    'eb_applications': 100,
+    'eb_versions': 1000,
+    'eb_environments': 200,
+    'firehose_streams': 200,
+    'rds_instances': 1000,
+    'rds_subnet_groups': 200,
+    'rds_security_groups': 50,
+    'redshift_snapshots': 1000,
+    'redshift_subnet_groups': 50,
+    'buckets': 1000,
+    'rest_apis': 300,
+    'api_keys': 500,
+    'client_certificates': 50,
+    'usage_plans': 100,
+}
+
+#: Number of child resources per parent resource; these do not scale.
+PER_PARENT_COUNTS = {
+    'rules_per_sg': 8,
+    'listeners_per_alb': 3,
+    'rules_per_listener': 10,
+    'resources_per_api': 30,
+    'doc_parts_per_api': 5,
+    'stages_per_api': 3,
+    'authorizers_per_api': 2,
+}
+
+#: Page size AWS uses for operations that paginate even when the caller
+#: does not ask for a page size. Other operations return every result in
+#: one response unless the caller passes a page size.
+DEFAULT_PAGE_SIZES = {
+    ('autoscaling', 'DescribeAutoScalingGroups'): 50,
+    ('autoscaling', 'DescribeLaunchConfigurations'): 50,
+    ('cloudformation', 'DescribeStacks'): 100,
+    ('dynamodb', 'ListTables'): 100,
+    ('efs', 'DescribeFileSystems'): 100,
+    ('elasticache', 'DescribeCacheClusters'): 100,
+    ('elasticache', 'DescribeCacheSubnetGroups'): 100,
+    ('elasticache', 'DescribeCacheParameterGroups'): 100,
+    ('elasticache', 'DescribeCacheSecurityGroups'): 100,
+    ('elb', 'DescribeLoadBalancers'): 400,
+    ('elbv2', 'DescribeLoadBalancers'): 400,
+    ('elbv2', 'DescribeTargetGroups'): 400,
+    ('elbv2', 'DescribeListeners'): 400,
+    ('elbv2', 'DescribeRules'): 400,
+    ('rds', 'DescribeDBInstances'): 100,
+    ('rds', 'DescribeDBSubnetGroups'): 100,
+    ('rds', 'DescribeDBSecurityGroups'): 100,
+    ('redshift', 'DescribeClusterSnapshots'): 100,
+    ('redshift', 'DescribeClusterSubnetGroups'): 100,
+    ('apigateway', 'GetRestApis'): 25,
+    ('apigateway', 'GetResources'): 25,
+    ('apigateway', 'GetDocumentationParts'): 25,
+    ('apigateway', 'GetAuthorizers'): 25,
+    ('apigateway', 'GetApiKeys'): 25,
+    ('apigateway', 'GetClientCertificates'): 25,
+    ('apigateway', 'GetUsagePlans'): 25,
+}
+
+AZS = ['us-east-1a', 'us-east-1b', 'us-east-1c', 'us-east-1d']
+INSTANCE_TYPES = ['m4.large', 't2.micro', 'c4.xlarge', 'r4.large', 'm5.2xlarge']
+VOLUME_TYPES = ['gp2', 'io1', 'standard', 'st1', 'sc1']
+
+
+def _ec2_instance(acct, i, params):
+    inst = {
+        'InstanceId': 'i-{i:017x}'.format(i=i),
+        'InstanceType': INSTANCE_TYPES[i % len(INSTANCE_TYPES)],
+        'State': {'Name': 'stopped' if i % 10 == 9 else 'running'},
+        'Placement': {'AvailabilityZone': AZS[i % len(AZS)]},
+        'VpcId': acct.vpc_id(i),
+    }
+    if i % 20 == 19:
+        inst['SpotInstanceRequestId'] = 'sir-{i:08x}'.format(i=i)
+    return {
+        'ReservationId': 'r-{i:017x}'.format(i=i),
+        'Instances': [inst]
+    }
+
+
+def _ec2_reserved_instance(acct, i, params):
+    return {
+        'ReservedInstancesId': 'ri-{i:08x}'.format(i=i),
+        'InstanceType': INSTANCE_TYPES[i % len(INSTANCE_TYPES)],
+        'AvailabilityZone': AZS[i % len(AZS)],
+        'InstanceCount': 2,
+        'State': 'retired' if i % 5 == 4 else 'active',
+    }
+
+
+def _ec2_security_group(acct, i, params):
+    return {
+        'GroupId': 'sg-{i:017x}'.format(i=i),
+        'GroupName': 'sg{i}'.format(i=i),
+        'VpcId': acct.vpc_id(i),
+        'IpPermissions': [
+            {
+                'IpProtocol': 'tcp',
+                'FromPort': 1000 + x,
+                'ToPort': 1000 + x,
+                'IpRanges': [{'CidrIp': '10.0.0.0/8'}]
+            } for x in range(acct.counts['rules_per_sg'])
+        ],
+    }
+
+
+def _ec2_network_interface(acct, i, params):
+    return {
+        'NetworkInterfaceId': 'eni-{i:017x}'.format(i=i),
+        'VpcId': acct.vpc_id(i),
+        'SubnetId': acct.subnet_id(i),
+        'Groups': [
+            {'GroupId': 'sg-{x:017x}'.format(x=x), 'GroupName': 'sg'}
+            for x in range((i % 5) + 1)
+        ],
+    }
+
+
+def _ec2_spot_instance_request(acct, i, params):
+    return {
+        'SpotInstanceRequestId': 'sir-{i:08x}'.format(i=i),
+        'State': ['open', 'active', 'closed', 'cancelled'][i % 4],
+    }
+
+
+def _ec2_spot_fleet(acct, i, params):
+    return {
+        'SpotFleetRequestId': 'sfr-{i:08x}'.format(i=i),
+        'SpotFleetRequestState': 'cancelled' if i % 5 == 4 else 'active',
+        'SpotFleetRequestConfig': {
+            'TargetCapacity': 10 + (i % 10),
+            'LaunchSpecifications': [
+                {'InstanceType': t} for t in INSTANCE_TYPES[:(i % 3) + 1]
+            ],
+        },
+    }
+
+
+def _ec2_vpc(acct, i, params):
+    return {'VpcId': acct.vpc_id(i), 'CidrBlock': '10.0.0.0/16'}
+
+
+def _ec2_subnet(acct, i, params):
+    return {
+        'SubnetId': acct.subnet_id(i),
+        'VpcId': acct.vpc_id(i),
+        'AvailabilityZone': AZS[i % len(AZS)],
+    }
+
+
+def _ec2_network_acl(acct, i, params):
+    return {
+        'NetworkAclId': 'acl-{i:017x}'.format(i=i),
+        'VpcId': acct.vpc_id(i),
+        'Entries': [{'RuleNumber': x} for x in range((i % 10) + 2)],
+    }
+
+
+def _ec2_route_table(acct, i, params):
+    routes = [
+        {
+            'Origin': 'CreateRoute',
+            'DestinationCidrBlock': '10.{x}.0.0/16'.format(x=x)
+        } for x in range((i % 20) + 1)
+    ]
+    routes.append({'Origin': 'EnableVgwRoutePropagation'})
+    return {
+        'RouteTableId': 'rtb-{i:017x}'.format(i=i),
+        'VpcId': acct.vpc_id(i),
+        'Routes': routes,
+    }
+
+
+def _ec2_internet_gateway(acct, i, params):
+    return {'InternetGatewayId': 'igw-{i:017x}'.format(i=i)}
+
+
+def _ec2_nat_gateway(acct, i, params):
+    return {
+        'NatGatewayId': 'nat-{i:017x}'.format(i=i),
+        'SubnetId': acct.subnet_id(i),
+        'State': 'deleted' if i % 10 == 9 else 'available',
+    }
+
+
+def _ec2_vpn_gateway(acct, i, params):
+    return {'VpnGatewayId': 'vgw-{i:017x}'.format(i=i), 'State': 'available'}
+
+
+def _ec2_volume(acct, i, params):
+    vtype = VOLUME_TYPES[i % len(VOLUME_TYPES)]
+    vol = {
+        'VolumeId': 'vol-{i:017x}'.format(i=i),
+        'VolumeType': vtype,
+        'Size': 100 + (i % 100),
+    }
+    if vtype == 'io1':
+        vol['Iops'] = 1000
+    return vol
+
+
+def _ec2_snapshot(acct, i, params):
+    return {'SnapshotId': 'snap-{i:017x}'.format(i=i), 'VolumeSize': 100}
+
+
+def _elb_load_balancer(acct, i, params):
+    return {
+        'LoadBalancerName': 'elb{i}'.format(i=i),
+        'ListenerDescriptions': [
+            {'Listener': {'LoadBalancerPort': 80 + x}}
+            for x in range((i % 3) + 1)
+        ],
+    }
+
+
+def _elbv2_load_balancer(acct, i, params):
+    return {
+        'LoadBalancerArn': 'arn:alb/{i}'.format(i=i),
+        'LoadBalancerName': 'alb{i}'.format(i=i),
+    }
+
+
+def _elbv2_target_group(acct, i, params):
+    return {'TargetGroupArn': 'arn:tg/{i}'.format(i=i)}
+
+
+def _elbv2_listener(acct, i, params):
+    return {
+        'ListenerArn': '{lb}/listener/{i}'.format(
+            lb=params['LoadBalancerArn'], i=i)
+    }
+
+
+def _elbv2_rule(acct, i, params):
+    return {
+        'RuleArn': '{l}/rule/{i}'.format(l=params['ListenerArn'], i=i)
+    }
+
+
+def _named(fmt, key):
+    def _item(acct, i, params):
+        return {key: fmt.format(i=i)}
+    return _item
+
+
+def _cfn_stack(acct, i, params):
+    return {
+        'StackName': 'stack{i}'.format(i=i),
+        'StackStatus': 'DELETE_COMPLETE' if i % 10 == 9 else 'CREATE_COMPLETE',
+    }
+
+
+def _cache_cluster(acct, i, params):
+    nodes = (i % 4) + 1
+    return {
+        'CacheClusterId': 'cc{i}'.format(i=i),
+        'Engine': 'redis' if i % 2 else 'memcached',
+        'NumCacheNodes': nodes,
+        'CacheNodes': [{'CacheNodeId': str(x)} for x in range(nodes)],
+    }
+
+
+def _subnet_group(name_key):
+    def _item(acct, i, params):
+        return {
+            name_key: 'subnetgroup{i}'.format(i=i),
+            'Subnets': [
+                {'SubnetIdentifier': acct.subnet_id(i + x)}
+                for x in range((i % 4) + 1)
+            ],
+        }
+    return _item
+
+
+def _rds_instance(acct, i, params):
+    return {
+        'DBInstanceIdentifier': 'db{i}'.format(i=i),
+        'ReadReplicaDBInstanceIdentifiers': [
+            'db{i}-replica{x}'.format(i=i, x=x) for x in range(i % 3)
+        ],
+    }
+
+
+def _rds_security_group(acct, i, params):
+    return {
+        'DBSecurityGroupName': 'dbsg{i}'.format(i=i),
+        'VpcId': acct.vpc_id(i),
+        'EC2SecurityGroups': [{'EC2SecurityGroupId': 'sg-1'}] * (i % 3),
+        'IPRanges': [{'CIDRIP': '10.0.0.0/8'}] * (i % 2),
+    }
+
+
+def _apigw_item(acct, i, params):
+    return {'id': 'id{i}'.format(i=i)}
+
+
+#: Synthetic list operations: ``(api name, operation name)`` to a
+#: ``(response key, count key, item function)`` tuple. The item function
+#: takes the :py:class:`~.SyntheticAccount`, the item index and the request
+#: parameters, and returns one item of the response list.
+LIST_OPERATIONS = {
+    ('ec2', 'DescribeInstances'): (
+        'Reservations', 'instances', _ec2_instance),
+    ('ec2', 'DescribeReservedInstances'): (
+        'ReservedInstances', 'reserved_instances', _ec2_reserved_instance),
+    ('ec2', 'DescribeSecurityGroups'): (
+        'SecurityGroups', 'security_groups', _ec2_security_group),
+    ('ec2', 'DescribeNetworkInterfaces'): (
+        'NetworkInterfaces', 'network_interfaces', _ec2_network_interface),
+    ('ec2', 'DescribeSpotInstanceRequests'): (
+        'SpotInstanceRequests', 'spot_instance_requests',
+        _ec2_spot_instance_request),
+    ('ec2', 'DescribeSpotFleetRequests'): (
+        'SpotFleetRequestConfigs', 'spot_fleets', _ec2_spot_fleet),
+    ('ec2', 'DescribeVpcs'): ('Vpcs', 'vpcs', _ec2_vpc),
+    ('ec2', 'DescribeSubnets'): ('Subnets', 'subnets', _ec2_subnet),
+    ('ec2', 'DescribeNetworkAcls'): (
+        'NetworkAcls', 'network_acls', _ec2_network_acl),
+    ('ec2', 'DescribeRouteTables'): (
+        'RouteTables', 'route_tables', _ec2_route_table),
+    ('ec2', 'DescribeInternetGateways'): (
+        'InternetGateways', 'vpcs', _ec2_internet_gateway),
+    ('ec2', 'DescribeNatGateways'): (
+        'NatGateways', 'nat_gateways', _ec2_nat_gateway),
+    ('ec2', 'DescribeVpnGateways'): (
+        'VpnGateways', 'vpn_gateways', _ec2_vpn_gateway),
+    ('ec2', 'DescribeVolumes'): ('Volumes', 'volumes', _ec2_volume),
+    ('ec2', 'DescribeSnapshots'): ('Snapshots', 'snapshots', _ec2_snapshot),
+    ('elb', 'DescribeLoadBalancers'): (
+        'LoadBalancerDescriptions', 'elbs', _elb_load_balancer),
+    ('elbv2', 'DescribeLoadBalancers'): (
+        'LoadBalancers', 'albs', _elbv2_load_balancer),
+    ('elbv2', 'DescribeTargetGroups'): (
+        'TargetGroups', 'target_groups', _elbv2_target_group),
+    ('elbv2', 'DescribeListeners'): (
+        'Listeners', 'listeners_per_alb', _elbv2_listener),
+    ('elbv2', 'DescribeRules'): (
+        'Rules', 'rules_per_listener', _elbv2_rule),
+    ('autoscaling', 'DescribeAutoScalingGroups'): (
+        'AutoScalingGroups', 'asgs',
+        _named('asg{i}', 'AutoScalingGroupName')),
+    ('autoscaling', 'DescribeLaunchConfigurations'): (
+        'LaunchConfigurations', 'launch_configs',
+        _named('lc{i}', 'LaunchConfigurationName')),
+    ('cloudformation', 'DescribeStacks'): ('Stacks', 'stacks', _cfn_stack),
+    ('efs', 'DescribeFileSystems'): (
+        'FileSystems', 'efs_filesystems',
+        _named('fs-{i:08x}', 'FileSystemId')),
+    ('elasticache', 'DescribeCacheClusters'): (
+        'CacheClusters', 'cache_clusters', _cache_cluster),
+    ('elasticache', 'DescribeCacheSubnetGroups'): (
+        'CacheSubnetGroups', 'cache_subnet_groups',
+        _subnet_group('CacheSubnetGroupName')),
+    ('elasticache', 'DescribeCacheParameterGroups'): (
+        'CacheParameterGroups', 'cache_parameter_groups',
+        _named('pg{i}', 'CacheParameterGroupName')),
+    ('elasticache', 'DescribeCacheSecurityGroups'): (
+        'CacheSecurityGroups', 'cache_security_groups',
+        _named('csg{i}', 'CacheSecurityGroupName')),
+    ('elasticbeanstalk', 'DescribeApplications'): (
+        'Applications', 'eb_applications',
+        _named('app{i}', 'ApplicationName')),
+    ('elasticbeanstalk', 'DescribeApplicationVersions'): (
+        'ApplicationVersions', 'eb_versions', _named('v{i}', 'VersionLabel')),
+    ('elasticbeanstalk', 'DescribeEnvironments'): (
+        'Environments', 'eb_environments', _named('env{i}', 'EnvironmentName')),
+    ('rds', 'DescribeDBInstances'): (
+        'DBInstances', 'rds_instances', _rds_instance),
+    ('rds', 'DescribeDBSubnetGroups'): (
+        'DBSubnetGroups', 'rds_subnet_groups',
+        _subnet_group('DBSubnetGroupName')),
+    ('rds', 'DescribeDBSecurityGroups'): (
+        'DBSecurityGroups', 'rds_security_groups', _rds_security_group),
+    ('redshift', 'DescribeClusterSnapshots'): (
+        'Snapshots', 'redshift_snapshots',
+        _named('rs-snap{i}', 'SnapshotIdentifier')),
+    ('redshift', 'DescribeClusterSubnetGroups'): (
+        'ClusterSubnetGroups', 'redshift_subnet_groups',
+        _named('rs-sg{i}', 'ClusterSubnetGroupName')),
+    ('s3', 'ListBuckets'): ('Buckets', 'buckets', _named('bucket{i}', 'Name')),
+    ('apigateway', 'GetRestApis'): ('items', 'rest_apis', _apigw_item),
+    ('apigateway', 'GetResources'): (
+        'items', 'resources_per_api', _apigw_item),
+    ('apigateway', 'GetDocumentationParts'): (
+        'items', 'doc_parts_per_api', _apigw_item),
+    ('apigateway', 'GetStages'): ('item', 'stages_per_api', _named(
+        'stage{i}', 'stageName')),
+    ('apigateway', 'GetAuthorizers'): (
+        'items', 'authorizers_per_api', _apigw_item),
+    ('apigateway', 'GetApiKeys'): ('items', 'api_keys', _apigw_item),
+    ('apigateway', 'GetClientCertificates'): (
+        'items', 'client_certificates',
+        _named('cert{i}', 'clientCertificateId')),
+    ('apigateway', 'GetUsagePlans'): ('items', 'usage_plans', _apigw_item),
+}
+
+#: Server-side ``Filters`` supported by synthetic list operations:
+#: ``(api name, operation name)`` to a dict of filter name to a function
+#: returning the values of that field for one response item. Like AWS, an
+#: item matches a filter if any of its values is in the filter's values, and
+#: filtered pages may hold fewer items than the page size. Other filters are
+#: ignored.
+FILTERS = {
+    ('ec2', 'DescribeInstances'): {
+        'instance-state-name': lambda r: [
+            i['State']['Name'] for i in r['Instances']
+        ],
+    },
+    ('ec2', 'DescribeReservedInstances'): {
+        'state': lambda r: [r['State']],
+    },
+}
+
+#: ID of the synthetic Trusted Advisor "Service Limits" check
+TA_CHECK_ID = 'eW7HH0l7J9'
+
+
+class UnknownOperation(Exception):
+    """Raised when a collector calls an operation with no synthetic data."""
+    pass
+
+
+class SyntheticAccount(object):
+    """
+    A synthetic AWS account. :py:meth:`~.install` hooks a botocore event
+    emitter so that every API call made by clients created from it is
+    answered in-process (in the same way as :py:class:`botocore.stub.Stubber`)
+    with generated responses, paginated the way AWS paginates them.
+    Calls are counted per API and operation in ``self.calls``.
+    """
+
+    def __init__(self, scale=1.0, counts=None):
+        """
+        :param scale: multiplier applied to :py:data:`~.BASE_COUNTS`
+        :type scale: float
+        :param counts: overrides for specific resource counts
+        :type counts: dict
+        """
+        self.scale = scale
+        self.counts = dict(
+            (k, max(1, int(round(v * scale)))) for k, v in BASE_COUNTS.items()
+        )
+        self.counts.update(PER_PARENT_COUNTS)
+        if counts is not None:
+            self.counts.update(counts)
+        self.calls = defaultdict(int)
+        self._lock = threading.Lock()
+        self._botocore_session = botocore.session.get_session()
+        self._paginators = {}
+
+    def vpc_id(self, i):
+        return 'vpc-{v:017x}'.format(v=i % self.counts['vpcs'])
+
+    def subnet_id(self, i):
+        return 'subnet-{s:017x}'.format(s=i % self.counts['subnets'])
+
+    def total_calls(self):
+        """
+        :returns: total number of API calls answered so far
+        :rtype: int
+        """
+        with self._lock:
+            return sum(self.calls.values())
+
+    def install(self, events):
+        """
+        Answer all API calls made through the given event emitter.
+
+        :param events: botocore event emitter, i.e. a session's or client's
+          ``events``
+        """
+        events.register_first('before-parameter-build', self._save_params)
+        # last, so that handlers that answer calls without sending them
+        # (i.e. ResponseCache) still can
+        events.register_last('before-call', self._before_call)
+
+    @staticmethod
+    def _save_params(params=None, context=None, **kwargs):
+        context['synthetic_params'] = dict(params)
+
+    def _before_call(self, model=None, context=None, **kwargs):
+        api = model.service_model.service_name
+        op = model.name
+        params = context.get('synthetic_params', {})
+        with self._lock:
+            self.calls[(api, op)] += 1
+        parsed = self.response(api, op, params)
+        parsed['ResponseMetadata'] = {
+            'HTTPStatusCode': 200, 'HTTPHeaders': {}, 'RetryAttempts': 0
+        }
+        return AWSResponse(None, 200, {}, None), parsed
+
+    def _paginator_config(self, api, op):
+        key = (api, op)
+        if key not in self._paginators:
+            try:
+                self._paginators[key] = self._botocore_session\
+                    .get_paginator_model(api).get_paginator(op)
+            except Exception:
+                self._paginators[key] = None
+        return self._paginators[key]
+
+    def response(self, api, op, params):
+        """
+        Return the parsed response to an API call.
+
+        :param api: API (botocore service) name
+        :type api: str
+        :param op: operation name
+        :type op: str
+        :param params: request parameters
+        :type params: dict
+        :rtype: dict
+        """
+        handler = getattr(
+            self, '_resp_{a}_{o}'.format(a=api, o=op), None
+        )
+        if handler is not None:
+            return handler(params)
+        if (api, op) not in LIST_OPERATIONS:
+            raise UnknownOperation('{a}.{o}'.format(a=api, o=op))
+        result_key, count_key, item_fn = LIST_OPERATIONS[(api, op)]
+        return self._page(api, op, params, result_key,
+                          self.counts[count_key], item_fn)
+
+    def _page(self, api, op, params, result_key, total, item_fn):
+        conf = self._paginator_config(api, op)
+        start = 0
+        page_size = total
+        if conf is not None:
+            if params.get(conf['input_token']):
+                start = int(params[conf['input_token']])
+            size = params.get(conf.get('limit_key'))
+            if size is None:
+                size = DEFAULT_PAGE_SIZES.get((api, op))
+            if size is not None:
+                page_size = int(size)
+        end = min(total, start + page_size)
+        items = [item_fn(self, i, params) for i in range(start, end)]
+        for f in params.get('Filters', []):
+            values_fn = FILTERS.get((api, op), {}).get(f['Name'])
+            if values_fn is None:
+                continue
+            items = [
+                x for x in items if set(values_fn(x)) & set(f['Values'])
+            ]
+        resp = {result_key: items}
+        if end < total:
+            resp[conf['output_token']] = str(end)
+        return resp
+
+    def _resp_ec2_DescribeAddresses(self, params):
+        # one EC2-Classic address for every 10 VPC addresses
+        count = self.counts['eips']
+        domains = ['vpc'] * count + ['standard'] * max(1, count // 10)
+        for f in params.get('Filters', []):
+            if f['Name'] == 'domain':
+                domains = [d for d in domains if d in f['Values']]
+        return {
+            'Addresses': [
+                {
+                    'PublicIp': '192.0.{a}.{b}'.format(a=i // 256, b=i % 256),
+                    'AllocationId': 'eipalloc-{i:08x}'.format(i=i),
+                    'Domain': d
+                } for i, d in enumerate(domains)
+            ]
+        }
+
+    def _resp_ec2_DescribeAccountAttributes(self, params):
+        return {
+            'AccountAttributes': [
+                {
+                    'AttributeName': name,
+                    'AttributeValues': [{'AttributeValue': str(val)}]
+                } for name, val in [
+                    ('max-elastic-ips', 5),
+                    ('max-instances', self.counts['instances'] * 2),
+                    ('vpc-max-elastic-ips', self.counts['eips'] * 2),
+                    ('vpc-max-security-groups-per-interface', 5),
+                    ('supported-platforms', 'VPC'),
+                ]
+            ]
+        }
+
+    def _resp_elb_DescribeAccountLimits(self, params):
+        return {'Limits': [
+            {'Name': 'classic-load-balancers',
+             'Max': str(self.counts['elbs'] * 2)},
+            {'Name': 'classic-listeners', 'Max': '100'},
+        ]}
+
+    def _resp_elbv2_DescribeAccountLimits(self, params):
+        return {'Limits': [
+            {'Name': 'target-groups',
+             'Max': str(self.counts['target_groups'] * 2)},
+            {'Name': 'listeners-per-application-load-balancer', 'Max': '50'},
+            {'Name': 'rules-per-application-load-balancer', 'Max': '100'},
+        ]}
+
+    def _resp_autoscaling_DescribeAccountLimits(self, params):
+        return {
+            'MaxNumberOfAutoScalingGroups': self.counts['asgs'] * 2,
+            'MaxNumberOfLaunchConfigurations':
+                self.counts['launch_configs'] * 2,
+            'NumberOfAutoScalingGroups': self.counts['asgs'],
+            'NumberOfLaunchConfigurations': self.counts['launch_configs'],
+        }
+
+    def _resp_cloudformation_DescribeAccountLimits(self, params):
+        return {'AccountLimits': [
+            {'Name': 'StackLimit', 'Value': self.counts['stacks'] * 2}
+        ]}
+
+    def _resp_dynamodb_DescribeLimits(self, params):
+        return {
+            'AccountMaxReadCapacityUnits': 80000,
+            'AccountMaxWriteCapacityUnits': 80000,
+            'TableMaxReadCapacityUnits': 40000,
+            'TableMaxWriteCapacityUnits': 40000,
+        }
+
+    def _resp_dynamodb_DescribeTable(self, params):
+        i = int(params['TableName'][len('table'):])
+        return {'Table': {
+            'TableName': params['TableName'],
+            'TableStatus': 'ACTIVE',
+            'ProvisionedThroughput': {
+                'ReadCapacityUnits': 5 + (i % 10),
+                'WriteCapacityUnits': 5 + (i % 5),
+            },
+            'GlobalSecondaryIndexes': [
+                {
+                    'IndexName': 'gsi{x}'.format(x=x),
+                    'ProvisionedThroughput': {
+                        'ReadCapacityUnits': 5, 'WriteCapacityUnits': 5
+                    }
+                } for x in range(i % 3)
+            ],
+            'LocalSecondaryIndexes': [
+                {'IndexName': 'lsi{x}'.format(x=x)} for x in range(i % 2)
+            ],
+        }}
+
+    def _resp_dynamodb_ListTables(self, params):
+        total = self.counts['dynamodb_tables']
+        start = 0
+        if params.get('ExclusiveStartTableName'):
+            start = int(params['ExclusiveStartTableName'][len('table'):]) + 1
+        end = min(total, start + params.get(
+            'Limit', DEFAULT_PAGE_SIZES[('dynamodb', 'ListTables')]))
+        resp = {
+            'TableNames': [
+                'table{i:08d}'.format(i=i) for i in range(start, end)
+            ]
+        }
+        if end < total:
+            resp['LastEvaluatedTableName'] = resp['TableNames'][-1]
+        return resp
+
+    def _resp_firehose_ListDeliveryStreams(self, params):
+        total = self.counts['firehose_streams']
+        start = 0
+        if params.get('ExclusiveStartDeliveryStreamName'):
+            start = int(params['ExclusiveStartDeliveryStreamName'][
+                len('stream'):]) + 1
+        end = min(total, start + params.get('Limit', 10))
+        return {
+            'DeliveryStreamNames': [
+                'stream{i:08d}'.format(i=i) for i in range(start, end)
+            ],
+            'HasMoreDeliveryStreams': end < total
+        }
+
+    def _resp_iam_GetAccountSummary(self, params):
+        return {'SummaryMap': {
+            'Groups': 50, 'GroupsQuota': 300,
+            'Users': 500, 'UsersQuota': 5000,
+            'Roles': 800, 'RolesQuota': 1000,
+            'InstanceProfiles': 400, 'InstanceProfilesQuota': 1000,
+            'ServerCertificates': 10, 'ServerCertificatesQuota': 20,
+            'Policies': 900, 'PoliciesQuota': 1500,
+            'PolicyVersionsInUse': 2000, 'PolicyVersionsInUseQuota': 10000,
+            'MFADevices': 20,
+        }}
+
+    def _resp_rds_DescribeAccountAttributes(self, params):
+        return {'AccountQuotas': [
+            {'AccountQuotaName': 'DBInstances',
+             'Used': self.counts['rds_instances'],
+             'Max': self.counts['rds_instances'] * 2},
+            {'AccountQuotaName': 'DBSubnetGroups',
+             'Used': self.counts['rds_subnet_groups'],
+             'Max': self.counts['rds_subnet_groups'] * 2},
+            {'AccountQuotaName': 'DBSecurityGroups',
+             'Used': self.counts['rds_security_groups'],
+             'Max': self.counts['rds_security_groups'] * 2},
+            {'AccountQuotaName': 'AllocatedStorage', 'Used': 50000,
+             'Max': 100000},
+        ]}
+
+    def _resp_ses_GetSendQuota(self, params):
+        return {
+            'Max24HourSend': 50000.0,
+            'MaxSendRate': 14.0,
+            'SentLast24Hours': 12345.0
+        }
+
+    def _resp_sts_GetCallerIdentity(self, params):
+        return {
+            'UserId': 'AIDASYNTHETIC',
+            'Account': '123456789012',
+            'Arn': 'arn:aws:iam::123456789012:user/synthetic'
+        }
+
+    def _resp_apigateway_GetStages(self, params):
+        _, count_key, item_fn = LIST_OPERATIONS[('apigateway', 'GetStages')]
+        return {
+            'item': [
+                item_fn(self, i, params)
+                for i in range(self.counts[count_key])
+            ]
+        }
+
+    def _resp_support_DescribeTrustedAdvisorChecks(self, params):
+        return {'checks': [{
+            'id': TA_CHECK_ID,
+            'name': 'Service Limits',
+            'category': 'performance',
+            'description': 'synthetic',
+            'metadata': [
+                'Region', 'Service', 'Limit Name', 'Limit Amount',
+                'Current Usage', 'Status'
+            ]
+        }]}
+
+    def _resp_support_DescribeTrustedAdvisorCheckResult(self, params):
+        rows = [
+            ('AutoScaling', 'Auto Scaling groups', self.counts['asgs'] * 2),
+            ('AutoScaling', 'Launch configurations',
+             self.counts['launch_configs'] * 2),
+            ('CloudFormation', 'Stacks', self.counts['stacks'] * 2),
+            ('EBS', 'Active snapshots', self.counts['snapshots'] * 2),
+            ('EBS', 'Active volumes', self.counts['volumes'] * 2),
+            ('VPC', 'VPCs', self.counts['vpcs'] * 2),
+            ('VPC', 'Internet gateways', self.counts['vpcs'] * 2),
+        ]
+        return {'result': {
+            'checkId': TA_CHECK_ID,
+            'status': 'ok',
+            'timestamp': '2017-01-01T00:00:00Z',
+            'flaggedResources': [
+                {
+                    'region': 'us-east-1',
+                    'status': 'ok',
+                    'resourceId': 'r{i}'.format(i=i),
+                    'metadata': [
+                        'us-east-1', svc, lim, str(val), '0', 'Green'
+                    ]
+                } for i, (svc, lim, val) in enumerate(rows)
+            ]
+        }}
+
+
+class SyntheticClientPool(ClientPool):
+    """
+    :py:class:`~.ClientPool` whose sessions answer every API call from a
+    :py:class:`~.SyntheticAccount`, using static fake credentials.
+    """
+
+    def __init__(self, account, **kwargs):
+        """
+        :param account: the synthetic account to answer API calls from
+        :type account: :py:class:`~.SyntheticAccount`
+        :param kwargs: keyword arguments for :py:class:`~.ClientPool`
+        """
+        super(SyntheticClientPool, self).__init__(**kwargs)
+        self.account = account
+
+    def _session(self, connection_kwargs):
+        kwargs = dict(connection_kwargs)
+        kwargs['aws_access_key_id'] = 'AKIDSYNTHETIC'
+        kwargs['aws_secret_access_key'] = 'synthetic'
+        key = self._creds_key(kwargs)
+        new = key not in self._sessions
+        session = super(SyntheticClientPool, self)._session(kwargs)
+        if new:
+            self.account.install(session.events)
+        return session
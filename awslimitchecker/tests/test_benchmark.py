@@ -0,0 +1,241 @@
+"""
+awslimitchecker/tests/test_benchmark.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+##############################################################################
+Copyright 2015-2017 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+##############################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+##############################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+##############################################################################
+"""
+
+import sys
+
+import pytest
+
+from awslimitchecker.tests.benchmark import (
+    BenchmarkResult, format_results, main, measure_usage_memory,
+    run_benchmark, synthetic_checker
+)
+from awslimitchecker.tests.synthetic import (
+    SyntheticAccount, UnknownOperation, BASE_COUNTS, PER_PARENT_COUNTS
+)
+
+#: Scale at which the benchmark runs in the test suite; small enough to be
+#: quick, but large enough that paginated APIs return more than one page.
+TEST_SCALE = 0.002
+
+#: Number of API calls each service's collector makes (including updating
+#: limits from the service's API) against a synthetic account at
+#: ``TEST_SCALE``. A change here means a change in how many round-trips
+#: awslimitchecker makes against a real account.
+EXPECTED_API_CALLS = {
+    'ApiGateway': 9,
+    'AutoScaling': 3,
+    'CloudFormation': 2,
+    'DynamoDB': 4,
+    'EBS': 2,
+    'EC2': 8,
+    'EFS': 1,
+    'ELB': 9,
+    'ElastiCache': 4,
+    'ElasticBeanstalk': 3,
+    'Firehose': 1,
+    'IAM': 1,
+    'RDS': 4,
+    'Redshift': 2,
+    'S3': 1,
+    'SES': 2,
+    'VPC': 7,
+    'TOTAL': 65,
+}
+
+
+@pytest.fixture(scope='module')
+def results():
+    return run_benchmark(scale=TEST_SCALE, trace_memory=False)
+
+
+class TestSyntheticAccount(object):
+
+    def test_counts(self):
+        acct = SyntheticAccount(scale=0.01, counts={'vpcs': 7})
+        assert acct.counts['instances'] == 500
+        assert acct.counts['reserved_instances'] == 5
+        assert acct.counts['vpcs'] == 7
+        assert acct.counts['rules_per_sg'] == PER_PARENT_COUNTS['rules_per_sg']
+        assert acct.counts['efs_filesystems'] == 2
+        assert sorted(acct.counts.keys()) == sorted(
+            list(BASE_COUNTS.keys()) + list(PER_PARENT_COUNTS.keys())
+        )
+
+    def test_counts_minimum(self):
+        acct = SyntheticAccount(scale=0.00001)
+        assert min(acct.counts.values()) == 1
+
+    def test_page_limit_key(self):
+        acct = SyntheticAccount(counts={'volumes': 5})
+        res = acct.response('ec2', 'DescribeVolumes', {'MaxResults': 2})
+        assert len(res['Volumes']) == 2
+        assert res['NextToken'] == '2'
+        res = acct.response(
+            'ec2', 'DescribeVolumes', {'MaxResults': 2, 'NextToken': '4'}
+        )
+        assert [v['VolumeId'] for v in res['Volumes']] == [
+            'vol-00000000000000004'
+        ]
+        assert 'NextToken' not in res
+
+    def test_page_unlimited(self):
+        acct = SyntheticAccount(counts={'volumes': 5})
+        res = acct.response('ec2', 'DescribeVolumes', {})
+        assert len(res['Volumes']) == 5
+        assert 'NextToken' not in res
+
+    def test_page_default_size(self):
+        acct = SyntheticAccount(counts={'asgs': 120})
+        res = acct.response('autoscaling', 'DescribeAutoScalingGroups', {})
+        assert len(res['AutoScalingGroups']) == 50
+        assert res['NextToken'] == '50'
+
+    def test_unknown_operation(self):
+        acct = SyntheticAccount()
+        with pytest.raises(UnknownOperation):
+            acct.response('ec2', 'RunInstances', {})
+
+    def test_checker_usage(self):
+        acct = SyntheticAccount(scale=TEST_SCALE)
+        checker = synthetic_checker(acct)
+        checker.find_usage(service=['EC2', 'EBS', 'ELB'], use_ta=False)
+        limits = checker.get_limits(service=['EC2', 'EBS', 'ELB'])
+        ec2 = limits['EC2']
+        # 100 instances, every 10th of which is stopped, less 2 reserved
+        assert ec2['Running On-Demand EC2 instances'].get_current_usage()[
+            0].get_value() == 88
+        assert limits['EBS']['Active volumes'].get_current_usage()[
+            0].get_value() == 120
+        rules = limits['ELB'][
+            'Rules per application load balancer'].get_current_usage()
+        assert len(rules) == acct.counts['albs']
+        assert rules[0].get_value() == 30
+        assert acct.calls[('ec2', 'DescribeInstances')] == 1
+        assert acct.calls[('elbv2', 'DescribeRules')] == (
+            acct.counts['albs'] * 3
+        )
+        assert acct.total_calls() == sum(acct.calls.values())
+
+    def test_checker_cache_responses(self):
+        acct = SyntheticAccount(scale=TEST_SCALE)
+        checker = synthetic_checker(acct, cache_responses=True)
+        for _ in range(2):
+            checker.find_usage(service=['IAM', 'RDS', 'SES'], use_ta=False)
+        # the cache only lasts one find_usage call, so IAM and RDS account
+        # attributes are retrieved again the second time
+        assert acct.calls[('iam', 'GetAccountSummary')] == 2
+        assert acct.calls[('rds', 'DescribeAccountAttributes')] == 2
+        assert acct.calls[('ses', 'GetSendQuota')] == 2
+
+    def test_checker_timings(self):
+        acct = SyntheticAccount(scale=TEST_SCALE)
+        checker = synthetic_checker(acct, max_workers=4)
+        checker.find_usage(service=['EC2', 'ELB', 'ApiGateway'])
+        res = checker.get_timings()
+        assert sorted(res.keys()) == [
+            'ApiGateway', 'EC2', 'ELB', 'TrustedAdvisor'
+        ]
+        assert sum(
+            p['calls'] for s in res.values() for p in s.values()
+        ) == acct.total_calls()
+        ec2 = res['EC2']['find_usage']
+        assert ec2['operations']['ec2.DescribeInstances']['calls'] == 1
+        assert res['ELB']['find_usage']['operations'][
+            'elbv2.DescribeRules']['calls'] == acct.counts['albs'] * 3
+
+
+class TestBenchmark(object):
+
+    def test_services(self, results):
+        names = [r.name for r in results]
+        assert names[-1] == 'TOTAL'
+        assert names[:-1] == sorted(
+            k for k in EXPECTED_API_CALLS.keys() if k != 'TOTAL'
+        )
+
+    def test_api_calls(self, results):
+        assert dict(
+            (r.name, r.api_calls) for r in results
+        ) == EXPECTED_API_CALLS
+
+    def test_no_memory(self, results):
+        for r in results:
+            assert r.peak_bytes is None
+            assert r.seconds >= 0
+
+    def test_trace_memory(self):
+        res = run_benchmark(scale=TEST_SCALE, services=['VPC'])
+        assert [r.name for r in res] == ['VPC', 'TOTAL']
+        assert res[0].api_calls == EXPECTED_API_CALLS['VPC']
+        if sys.version_info[0] >= 3:
+            assert res[0].peak_bytes > 0
+
+    def test_format_results(self):
+        res = format_results([
+            BenchmarkResult('EC2', 1.23456, 12, peak_bytes=4096),
+            BenchmarkResult('TOTAL', 2.5, 20)
+        ])
+        assert res.split('\n') == [
+            'Service                 Seconds  API Calls     Peak KiB',
+            'EC2                       1.235         12            4',
+            'TOTAL                     2.500         20            -',
+        ]
+
+    def test_main(self, capsys):
+        main(['--scale', str(TEST_SCALE), '-S', 'S3', '--no-memory'])
+        out, err = capsys.readouterr()
+        lines = out.strip().split('\n')
+        assert len(lines) == 3
+        assert lines[1].startswith('S3 ')
+        assert lines[2].startswith('TOTAL ')
+
+    @pytest.mark.skipif(sys.version_info[0] < 3,
+                        reason='tracemalloc requires python 3')
+    def test_usage_memory(self):
+        # AwsLimitUsage has no __dict__; an instance (with its GC header)
+        # and its list slot take ~72 bytes, versus ~112 or more with one
+        assert measure_usage_memory(count=10000) < 90
+
+    def test_main_usage_memory(self, capsys):
+        main(['--usage-memory', '100'])
+        out, err = capsys.readouterr()
+        if sys.version_info[0] >= 3:
+            assert out.endswith(' bytes per usage value (100 values)\n')
+        else:
+            assert out == 'tracemalloc is not available\n'
@@ -38,12 +38,14 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 """
 
 import sys
+import pytest
 
 from awslimitchecker.services.base import _AwsService
-from awslimitchecker.checker import AwsLimitChecker
+from awslimitchecker.checker import AwsLimitChecker, _LazyServiceDict
 from awslimitchecker.version import _get_version_info
 from awslimitchecker.limit import AwsLimit
 from awslimitchecker.trustedadvisor import TrustedAdvisor
+from awslimitchecker.utils import WorkerBudget
 from .support import sample_limits
 
 
@@ -53,9 +55,9 @@ if (
         sys.version_info[0] < 3 or
         sys.version_info[0] == 3 and sys.version_info[1] < 4
 ):
-    from mock import patch, call, Mock, DEFAULT
+    from mock import patch, call, Mock, DEFAULT, ANY
 else:
-    from unittest.mock import patch, call, Mock, DEFAULT
+    from unittest.mock import patch, call, Mock, DEFAULT, ANY
 
 pbm = 'awslimitchecker.checker'  # patch base path - module
 pb = '%s.AwsLimitChecker' % pbm  # patch base path
@@ -71,6 +73,53 @@ class ApiServiceSpec(_AwsService):
         pass
 
 
+class TestLazyServiceDict(object):
+
+    def setup(self):
+        self.mock_foo = Mock()
+        self.mock_bar = Mock()
+        self.cls = _LazyServiceDict(
+            {'Foo': self.mock_foo, 'Bar': self.mock_bar}
+        )
+
+    def test_keys_do_not_instantiate(self):
+        assert sorted(self.cls.keys()) == ['Bar', 'Foo']
+        assert len(self.cls) == 2
+        assert 'Foo' in self.cls
+        assert 'Baz' not in self.cls
+        assert self.mock_foo.mock_calls == []
+        assert self.mock_bar.mock_calls == []
+
+    def test_getitem(self):
+        res = self.cls['Foo']
+        assert res == self.mock_foo.return_value
+        assert self.cls['Foo'] == self.mock_foo.return_value
+        assert self.mock_foo.mock_calls == [call()]
+        assert self.mock_bar.mock_calls == []
+        assert self.cls.is_loaded('Foo') is True
+        assert self.cls.is_loaded('Bar') is False
+
+    def test_getitem_missing(self):
+        with pytest.raises(KeyError):
+            self.cls['Baz']
+
+    def test_delitem(self):
+        del self.cls['Foo']
+        assert list(self.cls.keys()) == ['Bar']
+        assert self.mock_foo.mock_calls == []
+
+    def test_setitem(self):
+        self.cls['Baz'] = 'bazval'
+        assert self.cls['Baz'] == 'bazval'
+        assert sorted(self.cls.keys()) == ['Bar', 'Baz', 'Foo']
+
+    def test_items(self):
+        assert dict(self.cls.items()) == {
+            'Foo': self.mock_foo.return_value,
+            'Bar': self.mock_bar.return_value
+        }
+
+
 class TestAwsLimitChecker(object):
 
     def setup(self):
@@ -95,15 +144,15 @@ class TestAwsLimitChecker(object):
                     logger=DEFAULT,
                     _get_version_info=DEFAULT,
                     TrustedAdvisor=DEFAULT,
-                    _get_latest_version=DEFAULT,
+                    check_latest_version=DEFAULT,
                     autospec=True,
             ) as mocks:
                 self.mock_logger = mocks['logger']
                 self.mock_version = mocks['_get_version_info']
                 self.mock_ta_constr = mocks['TrustedAdvisor']
-                self.mock_glv = mocks['_get_latest_version']
+                self.mock_clv = mocks['check_latest_version']
                 mocks['TrustedAdvisor'].return_value = self.mock_ta
-                mocks['_get_latest_version'].return_value = None
+                mocks['check_latest_version'].return_value = None
                 self.mock_version.return_value = self.mock_ver_info
                 self.cls = AwsLimitChecker(check_version=False)
 
@@ -116,25 +165,239 @@ class TestAwsLimitChecker(object):
         assert self.cls.services == services
         # _AwsService instances should exist, but have no other calls
         assert self.mock_foo.mock_calls == [
-            call(80, 99, {'region_name': None})
+            call(80, 99, {'region_name': None},
+                 client_pool=self.cls._client_pool, max_workers=None,
+                 worker_budget=None)
         ]
         assert self.mock_bar.mock_calls == [
-            call(80, 99, {'region_name': None})
+            call(80, 99, {'region_name': None},
+                 client_pool=self.cls._client_pool, max_workers=None,
+                 worker_budget=None)
         ]
         assert self.mock_ta_constr.mock_calls == [
             call(services, {'region_name': None},
-                 ta_refresh_mode=None, ta_refresh_timeout=None)
+                 ta_refresh_mode=None, ta_refresh_timeout=None,
+                 client_pool=self.cls._client_pool, cache_file=None,
+                 account_id=None)
         ]
         assert self.mock_svc1.mock_calls == []
         assert self.mock_svc2.mock_calls == []
         assert self.cls.ta == self.mock_ta
+        assert self.cls.max_workers is None
         assert self.mock_version.mock_calls == [call()]
         assert self.cls.vinfo == self.mock_ver_info
-        assert self.mock_glv.mock_calls == []
+        assert self.mock_clv.mock_calls == []
         assert self.mock_logger.mock_calls == [
             call.debug('Connecting to region %s', None)
         ]
 
+    def test_init_services_lazy(self):
+        assert self.mock_foo.mock_calls == []
+        assert self.mock_bar.mock_calls == []
+        assert sorted(self.cls.get_service_names()) == ['SvcBar', 'SvcFoo']
+        self.cls.remove_services(['SvcBar'])
+        self.cls.get_limits(service=['SvcFoo'], use_ta=False)
+        assert self.mock_foo.mock_calls == [
+            call(80, 99, {'region_name': None},
+                 client_pool=self.cls._client_pool, max_workers=None,
+                 worker_budget=None),
+            call().get_limits()
+        ]
+        assert self.mock_bar.mock_calls == []
+
+    def test_init_max_workers_services(self):
+        with patch.dict('%s._services' % pbm, values=self.svcs, clear=True):
+            with patch.multiple(
+                    'awslimitchecker.checker',
+                    _get_version_info=DEFAULT,
+                    TrustedAdvisor=DEFAULT,
+                    autospec=True,
+            ):
+                cls = AwsLimitChecker(check_version=False, max_workers=4)
+                cls.services['SvcFoo']
+        assert isinstance(cls.worker_budget, WorkerBudget)
+        assert cls.worker_budget.max_workers == 4
+        assert self.mock_foo.mock_calls[-1] == call(
+            80, 99, {'region_name': None}, client_pool=cls._client_pool,
+            max_workers=4, worker_budget=cls.worker_budget
+        )
+
+    def test_init_max_pool_connections(self):
+        with patch('%s.ClientPool' % pbm) as mock_pool:
+            with patch('%s.RateLimiter' % pbm) as mock_rl:
+                with patch('%s._get_version_info' % pbm):
+                    AwsLimitChecker(check_version=False)
+                    AwsLimitChecker(check_version=False, max_workers=4)
+                    AwsLimitChecker(check_version=False, max_workers=32)
+                    AwsLimitChecker(check_version=False, max_workers=32,
+                                    max_pool_connections=50)
+        rl = mock_rl.return_value
+        assert mock_pool.mock_calls == [
+            call(max_pool_connections=None, rate_limiter=rl, timings=ANY,
+                 response_cache=None, record_replay=None),
+            call(max_pool_connections=None, rate_limiter=rl, timings=ANY,
+                 response_cache=None, record_replay=None),
+            call(max_pool_connections=32, rate_limiter=rl, timings=ANY,
+                 response_cache=None, record_replay=None),
+            call(max_pool_connections=50, rate_limiter=rl, timings=ANY,
+                 response_cache=None, record_replay=None)
+        ]
+        assert mock_rl.mock_calls == [call(), call(), call(), call()]
+
+    def test_init_rate_limiter(self):
+        rl = Mock()
+        rl.get_stats.return_value = {'ec2': {'rA': {'calls': 3}}}
+        with patch('%s.ClientPool' % pbm) as mock_pool:
+            with patch('%s.RateLimiter' % pbm) as mock_rl:
+                with patch('%s._get_version_info' % pbm):
+                    cls = AwsLimitChecker(check_version=False,
+                                          rate_limiter=rl)
+        assert cls.rate_limiter == rl
+        assert mock_rl.mock_calls == []
+        assert mock_pool.mock_calls == [
+            call(max_pool_connections=None, rate_limiter=rl,
+                 timings=cls.timings, response_cache=cls.response_cache,
+                 record_replay=None)
+        ]
+        assert cls.get_api_call_stats() == {
+            'ec2': {'rA': {'calls': 3, 'cached': 0}}
+        }
+
+    def test_init_cache_responses(self):
+        with patch('%s.ClientPool' % pbm) as mock_pool:
+            with patch('%s.ResponseCache' % pbm) as mock_rc:
+                with patch('%s._get_version_info' % pbm):
+                    cls = AwsLimitChecker(check_version=False,
+                                          cache_responses=True)
+        assert cls.response_cache is mock_rc.return_value
+        assert mock_rc.mock_calls == [call()]
+        assert mock_pool.mock_calls == [
+            call(max_pool_connections=None, rate_limiter=cls.rate_limiter,
+                 timings=cls.timings, response_cache=mock_rc.return_value,
+                 record_replay=None)
+        ]
+
+    def test_init_record_replay(self):
+        rr = Mock()
+        with patch('%s.ClientPool' % pbm) as mock_pool:
+            with patch('%s._get_version_info' % pbm):
+                cls = AwsLimitChecker(check_version=False, record_replay=rr)
+        assert mock_pool.mock_calls == [
+            call(max_pool_connections=None, rate_limiter=cls.rate_limiter,
+                 timings=cls.timings, response_cache=cls.response_cache,
+                 record_replay=rr)
+        ]
+
+    def test_get_api_call_stats_cached(self):
+        self.cls.rate_limiter = Mock()
+        self.cls.rate_limiter.get_stats.return_value = {
+            'ec2': {'rA': {'calls': 3}, 'rB': {'calls': 1}},
+            'elb': {'rA': {'calls': 2}}
+        }
+        self.cls.response_cache = Mock()
+        self.cls.response_cache.get_stats.return_value = {
+            'ec2': {'rA': {'hits': 4, 'misses': 3}}
+        }
+        res = self.cls.get_api_call_stats()
+        assert res == {
+            'ec2': {
+                'rA': {'calls': 3, 'cached': 4},
+                'rB': {'calls': 1, 'cached': 0}
+            },
+            'elb': {'rA': {'calls': 2, 'cached': 0}}
+        }
+
+    def test_get_timings(self):
+        self.cls.find_usage(service=['SvcBar'])
+        res = self.cls.get_timings()
+        assert sorted(res.keys()) == ['SvcBar', 'TrustedAdvisor']
+        assert sorted(res['SvcBar'].keys()) == [
+            '_update_limits_from_api', 'find_usage'
+        ]
+        assert sorted(res['TrustedAdvisor'].keys()) == ['update_limits']
+        assert res['SvcBar']['find_usage']['calls'] == 0
+
+    def test_get_timings_check_thresholds(self):
+        self.mock_svc1.check_thresholds.return_value = {}
+        self.cls.check_thresholds(service=['SvcFoo'], use_ta=False)
+        res = self.cls.get_timings()
+        assert list(res.keys()) == ['SvcFoo']
+        assert list(res['SvcFoo'].keys()) == ['find_usage']
+
+    def test_invalidate(self):
+        assert self.cls.services['SvcBar'] == self.mock_svc2
+        self.cls.invalidate()
+        assert self.mock_svc2.mock_calls == [call.invalidate()]
+        # services that were never instantiated are left alone
+        assert self.mock_foo.mock_calls == []
+        assert self.mock_ta.mock_calls == [call.invalidate()]
+
+    def test_init_usage_cache(self):
+        with patch.dict('%s._services' % pbm, values=self.svcs, clear=True):
+            with patch.multiple(
+                    'awslimitchecker.checker',
+                    _get_version_info=DEFAULT,
+                    TrustedAdvisor=DEFAULT,
+                    get_usage_cache=DEFAULT,
+                    autospec=True,
+            ) as mocks:
+                mocks['_get_version_info'].return_value = self.mock_ver_info
+                cls = AwsLimitChecker(
+                    check_version=False, usage_cache_file='/tmp/foo.json',
+                    usage_max_age=60, service_usage_max_age={'SvcFoo': 0}
+                )
+        assert mocks['get_usage_cache'].mock_calls == [call('/tmp/foo.json')]
+        assert cls.usage_cache == mocks['get_usage_cache'].return_value
+        assert cls.usage_max_age == 60
+        assert cls.service_usage_max_age == {'SvcFoo': 0}
+        assert self.cls.usage_cache is None
+
+    def test_init_service_usage_max_age_unknown(self):
+        with patch.dict('%s._services' % pbm, values=self.svcs, clear=True):
+            with patch.multiple(
+                    'awslimitchecker.checker',
+                    _get_version_info=DEFAULT,
+                    TrustedAdvisor=DEFAULT,
+                    autospec=True,
+            ) as mocks:
+                with pytest.raises(ValueError) as excinfo:
+                    AwsLimitChecker(
+                        check_version=False,
+                        service_usage_max_age={'SvcFoo': 0, 'EC2': 60}
+                    )
+        assert str(excinfo.value) == 'service_usage_max_age has unknown ' \
+            'service name(s): EC2'
+        assert mocks['_get_version_info'].mock_calls == []
+
+    def test_init_limit_cache(self):
+        with patch.dict('%s._services' % pbm, values=self.svcs, clear=True):
+            with patch.multiple(
+                    'awslimitchecker.checker',
+                    _get_version_info=DEFAULT,
+                    TrustedAdvisor=DEFAULT,
+                    get_limit_cache=DEFAULT,
+                    autospec=True,
+            ) as mocks:
+                mocks['_get_version_info'].return_value = self.mock_ver_info
+                cls = AwsLimitChecker(
+                    check_version=False, limit_cache_file='/tmp/foo.json',
+                    limit_max_age=60, refresh_limits=True
+                )
+        assert mocks['get_limit_cache'].mock_calls == [call('/tmp/foo.json')]
+        assert cls.limit_cache == mocks['get_limit_cache'].return_value
+        assert cls.limit_max_age == 60
+        assert cls.refresh_limits is True
+        assert self.cls.limit_cache is None
+        assert self.cls.limit_max_age == 604800
+        assert self.cls.refresh_limits is False
+
+    def test_invalidate_response_cache(self):
+        assert self.cls.response_cache is None
+        self.cls.invalidate()
+        self.cls.response_cache = Mock()
+        self.cls.invalidate()
+        assert self.cls.response_cache.mock_calls == [call.clear()]
+
     def test_init_AGPL_message(self, capsys):
         # get rid of the class
         self.cls = None
@@ -156,13 +419,15 @@ class TestAwsLimitChecker(object):
             logger=DEFAULT,
             _get_version_info=DEFAULT,
             TrustedAdvisor=DEFAULT,
-            _get_latest_version=DEFAULT,
+            check_latest_version=DEFAULT,
             autospec=True,
         ) as mocks:
             mocks['_get_version_info'].return_value = self.mock_ver_info
-            mocks['_get_latest_version'].return_value = '3.4.5'
-            AwsLimitChecker()
-        assert mocks['_get_latest_version'].mock_calls == [call()]
+            mocks['check_latest_version'].side_effect = lambda cb: cb('3.4.5')
+            cls = AwsLimitChecker()
+        assert mocks['check_latest_version'].mock_calls == [
+            call(cls._warn_if_outdated)
+        ]
         assert mocks['logger'].mock_calls == [
             call.warning(
                 'You are running awslimitchecker %s, but the latest version'
@@ -177,13 +442,15 @@ class TestAwsLimitChecker(object):
             logger=DEFAULT,
             _get_version_info=DEFAULT,
             TrustedAdvisor=DEFAULT,
-            _get_latest_version=DEFAULT,
+            check_latest_version=DEFAULT,
             autospec=True,
         ) as mocks:
             mocks['_get_version_info'].return_value = self.mock_ver_info
-            mocks['_get_latest_version'].return_value = None
-            AwsLimitChecker()
-        assert mocks['_get_latest_version'].mock_calls == [call()]
+            mocks['check_latest_version'].side_effect = lambda cb: cb(None)
+            cls = AwsLimitChecker()
+        assert mocks['check_latest_version'].mock_calls == [
+            call(cls._warn_if_outdated)
+        ]
         assert mocks['logger'].mock_calls == [
             call.debug('Connecting to region %s', None)
         ]
@@ -203,14 +470,14 @@ class TestAwsLimitChecker(object):
                     logger=DEFAULT,
                     _get_version_info=DEFAULT,
                     TrustedAdvisor=DEFAULT,
-                    _get_latest_version=DEFAULT,
+                    check_latest_version=DEFAULT,
                     autospec=True,
             ) as mocks:
                 mock_version = mocks['_get_version_info']
                 mock_version.return_value = self.mock_ver_info
                 mock_ta_constr = mocks['TrustedAdvisor']
                 mocks['TrustedAdvisor'].return_value = mock_ta
-                mocks['_get_latest_version'].return_value = None
+                mocks['check_latest_version'].return_value = None
                 cls = AwsLimitChecker(
                     warning_threshold=5,
                     critical_threshold=22,
@@ -223,20 +490,48 @@ class TestAwsLimitChecker(object):
         assert cls.services == services
         # _AwsService instances should exist, but have no other calls
         assert mock_foo.mock_calls == [
-            call(5, 22, {'region_name': None})
+            call(5, 22, {'region_name': None}, client_pool=cls._client_pool,
+                 max_workers=None, worker_budget=None)
         ]
         assert mock_bar.mock_calls == [
-            call(5, 22, {'region_name': None})
+            call(5, 22, {'region_name': None}, client_pool=cls._client_pool,
+                 max_workers=None, worker_budget=None)
         ]
         assert mock_ta_constr.mock_calls == [
             call(services, {'region_name': None},
-                 ta_refresh_mode=None, ta_refresh_timeout=None)
+                 ta_refresh_mode=None, ta_refresh_timeout=None,
+                 client_pool=cls._client_pool, cache_file=None,
+                 account_id=None)
         ]
         assert mock_svc1.mock_calls == []
         assert mock_svc2.mock_calls == []
         assert self.mock_version.mock_calls == [call()]
         assert self.cls.vinfo == self.mock_ver_info
 
+    def test_init_ta_cache_file(self):
+        svcs = {'SvcFoo': Mock(spec_set=_AwsService)}
+        with patch.dict('%s._services' % pbm, values=svcs, clear=True):
+            with patch.multiple(
+                    'awslimitchecker.checker',
+                    logger=DEFAULT,
+                    _get_version_info=DEFAULT,
+                    TrustedAdvisor=DEFAULT,
+                    check_latest_version=DEFAULT,
+                    autospec=True,
+            ) as mocks:
+                mocks['_get_version_info'].return_value = self.mock_ver_info
+                with patch('%s.AwsLimitChecker._get_sts_token' % pbm,
+                           autospec=True):
+                    cls = AwsLimitChecker(
+                        account_id='123456789012', account_role='myrole',
+                        region='myregion', ta_cache_file='/tmp/ta.json'
+                    )
+        assert mocks['TrustedAdvisor'].mock_calls == [
+            call(cls.services, ANY, ta_refresh_mode=None,
+                 ta_refresh_timeout=None, client_pool=cls._client_pool,
+                 cache_file='/tmp/ta.json', account_id='123456789012')
+        ]
+
     def test_init_region_profile(self):
         mock_svc1 = Mock(spec_set=_AwsService)
         mock_svc2 = Mock(spec_set=_AwsService)
@@ -253,14 +548,14 @@ class TestAwsLimitChecker(object):
                         logger=DEFAULT,
                         _get_version_info=DEFAULT,
                         TrustedAdvisor=DEFAULT,
-                        _get_latest_version=DEFAULT,
+                        check_latest_version=DEFAULT,
                         autospec=True,
                 ) as mocks:
                     mock_boto3.Session.return_value._session = Mock()
                     mock_version = mocks['_get_version_info']
                     mock_version.return_value = self.mock_ver_info
                     mocks['TrustedAdvisor'].return_value = mock_ta
-                    mocks['_get_latest_version'].return_value = None
+                    mocks['check_latest_version'].return_value = None
                     cls = AwsLimitChecker(region='regionX', profile_name='foo')
         # dict should be of _AwsService instances
         services = {
@@ -291,13 +586,13 @@ class TestAwsLimitChecker(object):
                     logger=DEFAULT,
                     _get_version_info=DEFAULT,
                     TrustedAdvisor=DEFAULT,
-                    _get_latest_version=DEFAULT,
+                    check_latest_version=DEFAULT,
                     autospec=True,
                 ) as mocks:
                     mock_version = mocks['_get_version_info']
                     mock_version.return_value = self.mock_ver_info
                     mocks['TrustedAdvisor'].return_value = mock_ta
-                    mocks['_get_latest_version'].return_value = None
+                    mocks['check_latest_version'].return_value = None
                     cls = AwsLimitChecker(
                         account_id='123456789012',
                         account_role='myrole',
@@ -330,13 +625,13 @@ class TestAwsLimitChecker(object):
                         logger=DEFAULT,
                         _get_version_info=DEFAULT,
                         TrustedAdvisor=DEFAULT,
-                        _get_latest_version=DEFAULT,
+                        check_latest_version=DEFAULT,
                         autospec=True,
                 ) as mocks:
                     mock_version = mocks['_get_version_info']
                     mock_version.return_value = self.mock_ver_info
                     mocks['TrustedAdvisor'].return_value = mock_ta
-                    mocks['_get_latest_version'].return_value = None
+                    mocks['check_latest_version'].return_value = None
                     cls = AwsLimitChecker(
                         account_id='123456789012',
                         account_role='myrole',
@@ -456,6 +751,53 @@ class TestAwsLimitChecker(object):
             'aws_session_token': 'sts_token'
         }
 
+    def test_get_sts_token_cached(self):
+        self.cls.account_id = '123'
+        self.cls.account_role = 'myrole'
+        self.cls.external_id = 'myid'
+        self.cls.sts_cache_file = '/tmp/cache.json'
+        mock_creds = Mock()
+        mock_cache = Mock()
+        mock_cache.get.return_value = mock_creds
+        with patch('%s.get_credential_cache' % pbm) as mock_gcc:
+            with patch('%s.boto3' % pbm) as mock_boto3:
+                mock_gcc.return_value = mock_cache
+                res = self.cls._get_sts_token()
+        assert res == mock_creds
+        assert mock_gcc.call_args_list == [call('/tmp/cache.json')]
+        assert mock_cache.mock_calls == [call.get('123', 'myrole', 'myid')]
+        assert mock_boto3.mock_calls == []
+
+    def test_get_sts_token_not_cached(self):
+        self.cls.account_id = '123'
+        self.cls.account_role = 'myrole'
+        self.cls.region = 'myregion'
+        mock_cache = Mock()
+        mock_cache.get.return_value = None
+        mock_sts = Mock()
+        mock_sts.assume_role.return_value = {'foo': 'bar'}
+        with patch('%s.get_credential_cache' % pbm) as mock_gcc:
+            with patch('%s.boto3' % pbm) as mock_boto3:
+                with patch('%s.ConnectableCredentials' % pbm) as mock_cc:
+                    mock_gcc.return_value = mock_cache
+                    mock_boto3.client.return_value = mock_sts
+                    res = self.cls._get_sts_token()
+        assert res == mock_cc.return_value
+        assert res.account_id == '123'
+        assert mock_gcc.call_args_list == [call(None)]
+        assert mock_boto3.mock_calls == [
+            call.client('sts', region_name='myregion'),
+            call.client().assume_role(
+                RoleArn='arn:aws:iam::123:role/myrole',
+                RoleSessionName='awslimitchecker'
+            )
+        ]
+        assert mock_cc.call_args_list == [call({'foo': 'bar'})]
+        assert mock_cache.mock_calls == [
+            call.get('123', 'myrole', None),
+            call.set(mock_cc.return_value, '123', 'myrole', None)
+        ]
+
     def test_get_version(self):
         with patch('%s._get_version_info' % pbm,
                    spec_set=_get_version_info) as mock_version:
@@ -506,10 +848,24 @@ class TestAwsLimitChecker(object):
             call.get_limits()
         ]
         assert self.mock_svc2.mock_calls == [
-            call._update_limits_from_api(),
+            call._update_limits_from_api_if_needed(),
             call.get_limits()
         ]
 
+    def test_get_limits_concurrent(self):
+        limits = sample_limits()
+        self.mock_svc1.get_limits.return_value = limits['SvcFoo']
+        self.mock_svc2.get_limits.return_value = limits['SvcBar']
+        self.cls.max_workers = 2
+        with patch('%s.pool_map' % pbm, autospec=True) as mock_pool:
+            res = self.cls.get_limits(service=['SvcBar'])
+        assert res == {'SvcBar': limits['SvcBar']}
+        assert mock_pool.mock_calls == [
+            call(self.cls._update_service_limits_from_api,
+                 [(None, 'SvcBar', self.mock_svc2)], max_workers=2,
+                 budget=None)
+        ]
+
     def test_get_limits_no_ta(self):
         limits = sample_limits()
         self.mock_svc1.get_limits.return_value = limits['SvcFoo']
@@ -521,7 +877,7 @@ class TestAwsLimitChecker(object):
             call.get_limits()
         ]
         assert self.mock_svc2.mock_calls == [
-            call._update_limits_from_api(),
+            call._update_limits_from_api_if_needed(),
             call.get_limits()
         ]
 
@@ -550,7 +906,7 @@ class TestAwsLimitChecker(object):
         ]
         assert self.mock_svc1.mock_calls == []
         assert self.mock_svc2.mock_calls == [
-            call._update_limits_from_api(),
+            call._update_limits_from_api_if_needed(),
             call.get_limits()
         ]
 
@@ -560,20 +916,31 @@ class TestAwsLimitChecker(object):
             call.find_usage()
         ]
         assert self.mock_svc2.mock_calls == [
-            call._update_limits_from_api(),
+            call._update_limits_from_api_if_needed(),
             call.find_usage()
         ]
         assert self.mock_ta.mock_calls == [
             call.update_limits()
         ]
 
+    def test_clear_response_cache(self):
+        self.mock_svc1.check_thresholds.return_value = {}
+        self.mock_svc2.check_thresholds.return_value = {}
+        self.cls.response_cache = Mock()
+        self.cls.find_usage(use_ta=False)
+        self.cls.get_limits(use_ta=False)
+        self.cls.check_thresholds(use_ta=False)
+        assert self.cls.response_cache.mock_calls == [
+            call.clear(), call.clear(), call.clear()
+        ]
+
     def test_find_usage_no_ta(self):
         self.cls.find_usage(use_ta=False)
         assert self.mock_svc1.mock_calls == [
             call.find_usage()
         ]
         assert self.mock_svc2.mock_calls == [
-            call._update_limits_from_api(),
+            call._update_limits_from_api_if_needed(),
             call.find_usage()
         ]
         assert self.mock_ta.mock_calls == []
@@ -592,7 +959,245 @@ class TestAwsLimitChecker(object):
         self.cls.find_usage(service=['SvcBar'])
         assert self.mock_svc1.mock_calls == []
         assert self.mock_svc2.mock_calls == [
-            call._update_limits_from_api(),
+            call._update_limits_from_api_if_needed(),
+            call.find_usage()
+        ]
+        assert self.mock_ta.mock_calls == [
+            call.update_limits()
+        ]
+
+    def test_find_usage_usage_cache(self):
+        svc = Mock()
+        svc._have_usage = False
+        svc._client.return_value.meta.region_name = 'us-east-2'
+        svc._client.return_value.get_caller_identity.return_value = {
+            'Account': '123456789012'
+        }
+        svc._dump_usage.return_value = {'lim': [[1, None, None]]}
+        cache = Mock()
+        cache.get.return_value = None
+        self.cls.usage_cache = cache
+        self.cls.usage_max_age = 60
+        self.cls.service_usage_max_age = {'SvcBar': 0}
+        res = [
+            self.cls._find_service_usage(('r1', 'SvcFoo', svc)),
+            self.cls._find_service_usage(('r1', 'SvcFoo', svc)),
+            self.cls._find_service_usage((None, 'SvcBar', svc))
+        ]
+        assert res == [
+            ('123456789012', 'r1', 'SvcFoo', {'lim': [[1, None, None]]}),
+            ('123456789012', 'r1', 'SvcFoo', {'lim': [[1, None, None]]}),
+            ('123456789012', 'us-east-2', 'SvcBar',
+             {'lim': [[1, None, None]]})
+        ]
+        # entries are stored by _save_cached_usage
+        assert cache.mock_calls == [
+            call.get('123456789012', 'r1', 'SvcFoo', 60),
+            call.get('123456789012', 'r1', 'SvcFoo', 60)
+        ]
+        # the account ID is only looked up once
+        assert svc._client.return_value.get_caller_identity.mock_calls == [
+            call()
+        ]
+        assert svc.find_usage.call_count == 3
+        assert svc._load_usage.mock_calls == []
+
+    def test_find_usage_usage_cache_single_write(self):
+        self.cls.account_id = '123'
+        for svc, lim in [(self.mock_svc1, 'foo'), (self.mock_svc2, 'bar')]:
+            svc._client.return_value.meta.region_name = 'us-east-1'
+            svc._dump_usage.return_value = {lim: []}
+        cache = Mock()
+        cache.get.return_value = None
+        self.cls.usage_cache = cache
+        self.cls.usage_max_age = 60
+        self.cls.find_usage(use_ta=False)
+        assert cache.mock_calls == [
+            call.get('123', 'us-east-1', 'SvcBar', 60),
+            call.get('123', 'us-east-1', 'SvcFoo', 60),
+            call.set_many([
+                ('123', 'us-east-1', 'SvcBar', {'bar': []}),
+                ('123', 'us-east-1', 'SvcFoo', {'foo': []})
+            ])
+        ]
+
+    def test_find_usage_usage_cache_hit(self):
+        svc = Mock()
+        svc._have_usage = False
+        cache = Mock()
+        cache.get.return_value = {'lim': [[1, None, None]]}
+        self.cls.usage_cache = cache
+        self.cls.usage_max_age = 60
+        self.cls.account_id = '000000000000'
+        self.cls._find_service_usage(('r1', 'SvcFoo', svc))
+        assert cache.mock_calls == [
+            call.get('000000000000', 'r1', 'SvcFoo', 60)
+        ]
+        assert svc._load_usage.mock_calls == [
+            call({'lim': [[1, None, None]]})
+        ]
+        assert svc.find_usage.mock_calls == []
+        assert svc._client.return_value.get_caller_identity.mock_calls == []
+
+    def test_find_usage_usage_cache_if_needed(self):
+        svc = Mock()
+        svc._have_usage = True
+        cache = Mock()
+        self.cls.usage_cache = cache
+        self.cls._find_service_usage(('r1', 'SvcFoo', svc), if_needed=True)
+        assert cache.mock_calls == []
+        assert svc.find_usage.mock_calls == []
+
+    def test_find_usage_usage_cache_no_account_id(self):
+        svc = Mock()
+        svc._have_usage = False
+        svc._client.return_value.get_caller_identity.side_effect = \
+            RuntimeError('foo')
+        cache = Mock()
+        self.cls.usage_cache = cache
+        self.cls.usage_max_age = 60
+        with patch('%s.logger' % pbm, autospec=True) as mock_logger:
+            self.cls._find_service_usage(('r1', 'SvcFoo', svc))
+            self.cls._find_service_usage(('r1', 'SvcFoo', svc))
+        assert cache.mock_calls == []
+        assert self.cls.usage_cache is None
+        assert svc.find_usage.call_count == 2
+        assert mock_logger.warning.mock_calls == [
+            call('Unable to determine AWS account ID; not using usage or '
+                 'limit caches', exc_info=True)
+        ]
+
+    def _setup_limit_cache(self, entries):
+        self.cls.account_id = '123'
+        for svc, lims in [(self.mock_svc1, 'foo'), (self.mock_svc2, 'bar')]:
+            svc._client.return_value.meta.region_name = 'us-east-1'
+            svc._dump_limits.return_value = {lims: [[3, 5]]}
+        cache = Mock()
+        cache.get.side_effect = lambda a, r, s, m: entries.get(s)
+        self.cls.limit_cache = cache
+        return cache
+
+    def test_find_usage_limit_cache_miss(self):
+        cache = self._setup_limit_cache({})
+        self.cls.find_usage()
+        assert cache.mock_calls == [
+            call.get('123', 'us-east-1', 'SvcBar', 604800),
+            call.get('123', 'us-east-1', 'SvcFoo', 604800),
+            call.set_many([
+                ('123', 'us-east-1', 'SvcBar',
+                 {'ta': True, 'limits': {'bar': [[3, 5]]}}),
+                ('123', 'us-east-1', 'SvcFoo',
+                 {'ta': True, 'limits': {'foo': [[3, 5]]}})
+            ]),
+        ]
+        assert self.mock_ta.mock_calls == [call.update_limits()]
+        assert self.mock_svc2._update_limits_from_api_if_needed.mock_calls \
+            == [call()]
+        # the rest of the run uses the limits it already has
+        cache.reset_mock()
+        self.mock_ta.reset_mock()
+        self.cls.get_limits()
+        assert cache.mock_calls == []
+        assert self.mock_ta.mock_calls == []
+
+    def test_find_usage_limit_cache_hit(self):
+        cache = self._setup_limit_cache({
+            'SvcFoo': {'ta': True, 'limits': {'foo': [[2, 1]]}},
+            'SvcBar': {'ta': True, 'limits': {}}
+        })
+        self.cls.find_usage()
+        assert cache.set_many.mock_calls == []
+        assert self.mock_svc1._load_limits.mock_calls == [
+            call({'foo': [[2, 1]]})
+        ]
+        assert self.mock_svc2._load_limits.mock_calls == [call({})]
+        assert self.mock_svc2._update_limits_from_api_if_needed.mock_calls \
+            == []
+        assert self.mock_svc1.find_usage.mock_calls == [call()]
+        assert self.mock_svc2.find_usage.mock_calls == [call()]
+        assert self.mock_ta.mock_calls == []
+        # after invalidating, the next run reads the cache again
+        self.cls.invalidate()
+        cache.reset_mock()
+        self.cls.get_limits()
+        assert len(cache.get.mock_calls) == 2
+        assert self.mock_ta.mock_calls == [call.invalidate()]
+
+    def test_find_usage_limit_cache_partial(self):
+        cache = self._setup_limit_cache({
+            'SvcFoo': {'ta': True, 'limits': {'foo': [[2, 1]]}},
+            'SvcBar': {'ta': False, 'limits': {}}
+        })
+        self.cls.find_usage()
+        assert cache.set_many.mock_calls == [
+            call([('123', 'us-east-1', 'SvcBar',
+                   {'ta': True, 'limits': {'bar': [[3, 5]]}})])
+        ]
+        assert self.mock_svc2._load_limits.mock_calls == []
+        assert self.mock_svc2._update_limits_from_api_if_needed.mock_calls \
+            == [call()]
+        assert self.mock_ta.mock_calls == [call.update_limits()]
+
+    def test_find_usage_limit_cache_no_ta(self):
+        cache = self._setup_limit_cache({
+            'SvcFoo': {'ta': False, 'limits': {'foo': [[3, 1]]}},
+            'SvcBar': {'ta': True, 'limits': {}}
+        })
+        self.cls.find_usage(use_ta=False)
+        assert self.mock_svc1._load_limits.mock_calls == [
+            call({'foo': [[3, 1]]})
+        ]
+        assert cache.set_many.mock_calls == [
+            call([('123', 'us-east-1', 'SvcBar',
+                   {'ta': False, 'limits': {'bar': [[3, 5]]}})])
+        ]
+        assert self.mock_ta.mock_calls == []
+
+    def test_find_usage_limit_cache_refresh(self):
+        cache = self._setup_limit_cache({
+            'SvcFoo': {'ta': True, 'limits': {'foo': [[2, 1]]}},
+            'SvcBar': {'ta': True, 'limits': {}}
+        })
+        self.cls.refresh_limits = True
+        self.cls.find_usage(service=['SvcBar'])
+        assert cache.mock_calls == [
+            call.set_many([('123', 'us-east-1', 'SvcBar',
+                            {'ta': True, 'limits': {'bar': [[3, 5]]}})])
+        ]
+        assert self.mock_svc2._load_limits.mock_calls == []
+        assert self.mock_ta.mock_calls == [call.update_limits()]
+
+    def test_find_usage_limit_cache_no_account_id(self):
+        cache = self._setup_limit_cache({})
+        self.cls.account_id = None
+        self.mock_svc2._client.return_value.get_caller_identity.side_effect \
+            = RuntimeError('foo')
+        self.cls.find_usage()
+        assert cache.mock_calls == []
+        assert self.cls.limit_cache is None
+        assert self.mock_ta.mock_calls == [call.update_limits()]
+
+    def test_find_usage_max_workers(self):
+        self.cls.max_workers = 4
+        with patch('%s.pool_map' % pbm, autospec=True) as mock_pool:
+            self.cls.find_usage(service=['SvcFoo'])
+        assert mock_pool.mock_calls == [
+            call(self.cls._find_service_usage,
+                 [(None, 'SvcFoo', self.mock_svc1)], max_workers=4,
+                 budget=None)
+        ]
+        assert self.mock_ta.mock_calls == [
+            call.update_limits()
+        ]
+
+    def test_find_usage_concurrent(self):
+        self.cls.max_workers = 2
+        self.cls.find_usage()
+        assert self.mock_svc1.mock_calls == [
+            call.find_usage()
+        ]
+        assert self.mock_svc2.mock_calls == [
+            call._update_limits_from_api_if_needed(),
             call.find_usage()
         ]
         assert self.mock_ta.mock_calls == [
@@ -763,6 +1368,7 @@ class TestAwsLimitChecker(object):
                 'Effect': 'Allow',
                 'Resource': '*',
                 'Action': [
+                    'ec2:DescribeRegions',
                     'ec2:bar',
                     'ec2:foo',
                     'foo:perm1',
@@ -804,10 +1410,39 @@ class TestAwsLimitChecker(object):
             call.update_limits(),
         ]
         assert self.mock_svc1.mock_calls == [
+            call.find_usage_if_needed(),
             call.check_thresholds()
         ]
         assert self.mock_svc2.mock_calls == [
-            call._update_limits_from_api(),
+            call._update_limits_from_api_if_needed(),
+            call.find_usage_if_needed(),
+            call.check_thresholds()
+        ]
+
+    def test_check_thresholds_concurrent(self):
+        self.mock_svc1.check_thresholds.return_value = {
+            'foo': 'bar',
+            'baz': 'blam',
+        }
+        self.mock_svc2.check_thresholds.return_value = {}
+        self.cls.max_workers = 2
+        res = self.cls.check_thresholds()
+        assert res == {
+            'SvcFoo': {
+                'foo': 'bar',
+                'baz': 'blam',
+            }
+        }
+        assert self.mock_ta.mock_calls == [
+            call.update_limits(),
+        ]
+        assert self.mock_svc1.mock_calls == [
+            call.find_usage_if_needed(),
+            call.check_thresholds()
+        ]
+        assert self.mock_svc2.mock_calls == [
+            call._update_limits_from_api_if_needed(),
+            call.find_usage_if_needed(),
             call.check_thresholds()
         ]
 
@@ -824,6 +1459,7 @@ class TestAwsLimitChecker(object):
             call.update_limits()
         ]
         assert self.mock_svc1.mock_calls == [
+            call.find_usage_if_needed(),
             call.check_thresholds()
         ]
         assert self.mock_svc2.mock_calls == []
@@ -842,7 +1478,8 @@ class TestAwsLimitChecker(object):
         ]
         assert self.mock_svc1.mock_calls == []
         assert self.mock_svc2.mock_calls == [
-            call._update_limits_from_api(),
+            call._update_limits_from_api_if_needed(),
+            call.find_usage_if_needed(),
             call.check_thresholds()
         ]
 
@@ -862,9 +1499,244 @@ class TestAwsLimitChecker(object):
         }
         assert self.mock_ta.mock_calls == []
         assert self.mock_svc1.mock_calls == [
+            call.find_usage_if_needed(),
             call.check_thresholds()
         ]
         assert self.mock_svc2.mock_calls == [
-            call._update_limits_from_api(),
+            call._update_limits_from_api_if_needed(),
+            call.find_usage_if_needed(),
             call.check_thresholds()
         ]
+
+    def test_check_thresholds_usage_during_ta(self):
+        order = []
+        self.mock_ta.update_limits.side_effect = lambda: order.append('ta')
+        self.mock_svc1.find_usage_if_needed.side_effect = \
+            lambda: order.append('usage')
+        self.mock_svc1.check_thresholds.side_effect = \
+            lambda: order.append('check') or {}
+        with patch('%s.BackgroundCall' % pbm, autospec=True) as mock_bg:
+            mock_bg.return_value.wait.side_effect = \
+                lambda: mock_bg.call_args[0][0]()
+            self.cls.check_thresholds(service=['SvcFoo'])
+        # usage is found before waiting on TA; thresholds are checked after
+        assert order == ['usage', 'ta', 'check']
+        assert mock_bg.mock_calls == [
+            call(self.cls._update_ta),
+            call().wait()
+        ]
+
+    def test_check_thresholds_ta_exception(self):
+        self.mock_ta.update_limits.side_effect = RuntimeError('foo')
+        with pytest.raises(RuntimeError):
+            self.cls.check_thresholds(service=['SvcFoo'])
+        assert self.mock_svc1.mock_calls == [
+            call.find_usage_if_needed()
+        ]
+
+    def test_find_usage_during_ta(self):
+        with patch('%s.BackgroundCall' % pbm, autospec=True) as mock_bg:
+            with patch('%s.pool_map' % pbm, autospec=True) as mock_pool:
+                mock_pool.side_effect = lambda *a, **kw: \
+                    mock_bg.return_value.wait.assert_not_called()
+                self.cls.find_usage(service=['SvcFoo'])
+        assert mock_bg.mock_calls == [
+            call(self.cls._update_ta),
+            call().wait()
+        ]
+        assert mock_pool.mock_calls == [
+            call(self.cls._find_service_usage,
+                 [(None, 'SvcFoo', self.mock_svc1)], max_workers=None,
+                 budget=None)
+        ]
+
+
+class TestAwsLimitCheckerMultiRegion(object):
+
+    def setup(self):
+        self.mock_ver_info = Mock(
+            release='1.2.3',
+            url='http://myurl',
+            commit='abcd',
+            tag='mytag',
+            version_str='1.2.3@mytag'
+        )
+        self.mock_svc1a = Mock(spec_set=_AwsService)
+        self.mock_svc1b = Mock(spec_set=_AwsService)
+        self.mock_svc2a = Mock(spec_set=ApiServiceSpec)
+        self.mock_svc2b = Mock(spec_set=ApiServiceSpec)
+        self.mock_foo = Mock(spec_set=_AwsService)
+        self.mock_bar = Mock(spec_set=_AwsService)
+        self.mock_ta_a = Mock(spec_set=TrustedAdvisor)
+        self.mock_ta_b = Mock(spec_set=TrustedAdvisor)
+        self.mock_foo.side_effect = [self.mock_svc1a, self.mock_svc1b]
+        self.mock_bar.side_effect = [self.mock_svc2a, self.mock_svc2b]
+        self.svcs = {'SvcFoo': self.mock_foo, 'SvcBar': self.mock_bar}
+        self.cls = self._make_checker(regions=['rA', 'rB'])
+
+    def _make_checker(self, **kwargs):
+        with patch.dict('%s._services' % pbm, values=self.svcs, clear=True):
+            with patch.multiple(
+                    'awslimitchecker.checker',
+                    logger=DEFAULT,
+                    _get_version_info=DEFAULT,
+                    TrustedAdvisor=DEFAULT,
+                    check_latest_version=DEFAULT,
+                    autospec=True,
+            ) as mocks:
+                self.mock_logger = mocks['logger']
+                self.mock_ta_constr = mocks['TrustedAdvisor']
+                mocks['TrustedAdvisor'].side_effect = [
+                    self.mock_ta_a, self.mock_ta_b
+                ]
+                mocks['check_latest_version'].return_value = None
+                mocks['_get_version_info'].return_value = self.mock_ver_info
+                return AwsLimitChecker(check_version=False, **kwargs)
+
+    def test_init(self):
+        svcs_a = {'SvcFoo': self.mock_svc1a, 'SvcBar': self.mock_svc2a}
+        svcs_b = {'SvcFoo': self.mock_svc1b, 'SvcBar': self.mock_svc2b}
+        assert self.cls.multi_region is True
+        assert self.cls.region == 'rA'
+        assert self.cls.regions == ['rA', 'rB']
+        assert self.cls.region_services == {'rA': svcs_a, 'rB': svcs_b}
+        assert self.cls.region_ta == {
+            'rA': self.mock_ta_a, 'rB': self.mock_ta_b
+        }
+        assert self.cls.services == svcs_a
+        assert self.cls.ta == self.mock_ta_a
+        assert self.mock_foo.mock_calls == [
+            call(80, 99, {'region_name': 'rA'},
+                 client_pool=self.cls._client_pool, max_workers=None,
+                 worker_budget=None),
+            call(80, 99, {'region_name': 'rB'},
+                 client_pool=self.cls._client_pool, max_workers=None,
+                 worker_budget=None)
+        ]
+        assert self.mock_ta_constr.mock_calls == [
+            call(svcs_a, {'region_name': 'rA'},
+                 ta_refresh_mode=None, ta_refresh_timeout=None,
+                 client_pool=self.cls._client_pool, cache_file=None,
+                 account_id=None),
+            call(svcs_b, {'region_name': 'rB'},
+                 ta_refresh_mode=None, ta_refresh_timeout=None,
+                 client_pool=self.cls._client_pool, cache_file=None,
+                 account_id=None)
+        ]
+
+    def test_init_region_and_regions(self):
+        with pytest.raises(ValueError) as excinfo:
+            AwsLimitChecker(region='foo', regions=['bar'])
+        assert 'mutually exclusive' in str(excinfo.value)
+
+    def test_init_all_regions(self):
+        self.mock_foo.side_effect = [self.mock_svc1a, self.mock_svc1b]
+        with patch('%s.ClientPool' % pbm) as mock_pool:
+            mock_pool.return_value.client.return_value.describe_regions\
+                .return_value = {
+                    'Regions': [
+                        {'RegionName': 'rB', 'Endpoint': 'b'},
+                        {'RegionName': 'rA', 'Endpoint': 'a'}
+                    ]
+                }
+            cls = self._make_checker(regions='all')
+            # static information does not need the regions
+            cls.remove_services(['SvcBar'])
+            assert cls.get_service_names() == ['SvcFoo']
+            assert mock_pool.mock_calls == [
+                call(max_pool_connections=None, rate_limiter=cls.rate_limiter,
+                     timings=cls.timings, response_cache=cls.response_cache,
+                     record_replay=None)
+            ]
+            with patch('%s.TrustedAdvisor' % pbm, autospec=True) as mock_ta:
+                mock_ta.side_effect = [self.mock_ta_a, self.mock_ta_b]
+                assert cls.services == {'SvcFoo': self.mock_svc1a}
+                assert cls.regions == ['rA', 'rB']
+                assert cls.region_services == {
+                    'rA': {'SvcFoo': self.mock_svc1a},
+                    'rB': {'SvcFoo': self.mock_svc1b}
+                }
+                assert cls.ta == self.mock_ta_a
+        assert mock_pool.mock_calls[1:] == [
+            call().client('ec2', {'region_name': None}),
+            call().client().describe_regions()
+        ]
+        assert cls.region is None
+        assert len(mock_ta.mock_calls) == 2
+        assert self.mock_bar.mock_calls == []
+
+    def test_remove_services(self):
+        self.cls.remove_services(['SvcFoo'])
+        assert self.cls.region_services == {
+            'rA': {'SvcBar': self.mock_svc2a},
+            'rB': {'SvcBar': self.mock_svc2b}
+        }
+
+    def test_get_limits(self):
+        self.mock_svc1a.get_limits.return_value = {'l1': 'a1'}
+        self.mock_svc1b.get_limits.return_value = {'l1': 'b1'}
+        self.mock_svc2a.get_limits.return_value = {'l2': 'a2'}
+        self.mock_svc2b.get_limits.return_value = {'l2': 'b2'}
+        res = self.cls.get_limits()
+        assert res == {
+            'rA': {'SvcFoo': {'l1': 'a1'}, 'SvcBar': {'l2': 'a2'}},
+            'rB': {'SvcFoo': {'l1': 'b1'}, 'SvcBar': {'l2': 'b2'}}
+        }
+        # one TA poll updates every region
+        assert self.mock_ta_a.mock_calls == [
+            call.update_limits(region_tas=[self.mock_ta_b])
+        ]
+        assert self.mock_ta_b.mock_calls == []
+        assert sorted(self.cls.get_timings()['rA'].keys()) == [
+            'SvcBar', 'TrustedAdvisor'
+        ]
+        assert self.mock_svc2b.mock_calls == [
+            call._update_limits_from_api_if_needed(),
+            call.get_limits()
+        ]
+
+    def test_find_usage_concurrent(self):
+        self.cls.max_workers = 3
+        with patch('%s.pool_map' % pbm, autospec=True) as mock_pool:
+            self.cls.find_usage(service=['SvcFoo'], use_ta=False)
+        assert mock_pool.mock_calls == [
+            call(
+                self.cls._find_service_usage,
+                [('rA', 'SvcFoo', self.mock_svc1a),
+                 ('rB', 'SvcFoo', self.mock_svc1b)],
+                max_workers=3, budget=None
+            )
+        ]
+        assert self.mock_ta_a.mock_calls == []
+        assert self.mock_ta_b.mock_calls == []
+
+    def test_check_thresholds(self):
+        self.mock_svc1a.check_thresholds.return_value = {'l1': 'a1'}
+        self.mock_svc1b.check_thresholds.return_value = {}
+        self.mock_svc2a.check_thresholds.return_value = {}
+        self.mock_svc2b.check_thresholds.return_value = {'l2': 'b2'}
+        res = self.cls.check_thresholds(use_ta=False)
+        assert res == {
+            'rA': {'SvcFoo': {'l1': 'a1'}},
+            'rB': {'SvcBar': {'l2': 'b2'}}
+        }
+
+    def test_set_limit_override(self):
+        self.cls.set_limit_override('SvcFoo', 'foo', 10)
+        assert self.mock_svc1a.mock_calls == [
+            call.set_limit_override('foo', 10, override_ta=True)
+        ]
+        assert self.mock_svc1b.mock_calls == [
+            call.set_limit_override('foo', 10, override_ta=True)
+        ]
+
+    def test_set_threshold_overrides(self):
+        self.cls.set_threshold_overrides({
+            'SvcBar': {'bar': {'warning': {'percent': 50}}}
+        })
+        assert self.mock_svc2a.mock_calls == [
+            call.set_threshold_override('bar', warn_percent=50)
+        ]
+        assert self.mock_svc2b.mock_calls == [
+            call.set_threshold_override('bar', warn_percent=50)
+        ]
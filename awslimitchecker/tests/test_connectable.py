@@ -37,8 +37,16 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 ################################################################################
 """
 
-from awslimitchecker.connectable import Connectable, ConnectableCredentials
+from awslimitchecker.connectable import (
+    ClientPool, Connectable, ConnectableCredentials, CredentialCache,
+    get_credential_cache
+)
+import awslimitchecker.utils as utils
 from datetime import datetime
+import json
+import os
+import pytz
+import stat
 import sys
 
 # https://code.google.com/p/mock/issues/detail?id=249
@@ -196,6 +204,176 @@ class Test_Connectable(object):
         assert mock_resource.mock_calls == []
         assert cls.resource_conn == mock_conn
 
+    def test_connect_pool(self):
+        mock_pool = Mock(spec_set=ClientPool)
+        cls = ConnectableTester()
+        cls.api_name = 'myapi'
+        cls._client_pool = mock_pool
+        cls._boto3_connection_kwargs = {'region_name': 'foo'}
+        with patch('%s.boto3' % pbm) as mock_boto3:
+            cls.connect()
+            cls.connect_resource()
+        assert mock_boto3.mock_calls == []
+        assert mock_pool.client.call_args_list == [
+            call('myapi', {'region_name': 'foo'})
+        ]
+        assert mock_pool.resource.call_args_list == [
+            call('myapi', {'region_name': 'foo'})
+        ]
+        assert cls.conn == mock_pool.client.return_value
+        assert cls.resource_conn == mock_pool.resource.return_value
+
+    def test_client_config(self):
+        cls = ConnectableTester()
+        cls._boto3_connection_kwargs = {'region_name': 'foo'}
+        with patch('%s.boto3.client' % pbm) as mock_client:
+            with patch('%s.botocore_config.Config' % pbm) as mock_conf:
+                res = cls._client('myapi', retries={'max_attempts': 3})
+        assert res is mock_client.return_value
+        assert mock_conf.mock_calls == [call(retries={'max_attempts': 3})]
+        assert mock_client.mock_calls == [
+            call('myapi', region_name='foo', config=mock_conf.return_value)
+        ]
+        assert cls._boto3_connection_kwargs == {'region_name': 'foo'}
+
+    def test_client_pool(self):
+        mock_pool = Mock(spec_set=ClientPool)
+        cls = ConnectableTester()
+        cls._client_pool = mock_pool
+        cls._boto3_connection_kwargs = {'region_name': 'foo'}
+        with patch('%s.boto3.client' % pbm) as mock_client:
+            res = cls._client('myapi', retries={'max_attempts': 3})
+        assert res is mock_pool.client.return_value
+        assert mock_client.mock_calls == []
+        assert mock_pool.mock_calls == [
+            call.client('myapi', {'region_name': 'foo'},
+                        retries={'max_attempts': 3})
+        ]
+
+
+class TestClientPool(object):
+
+    def test_client_shared(self):
+        cls = ClientPool()
+        kwargs = {'region_name': 'r1'}
+        with patch('%s.boto3.session.Session' % pbm) as mock_sess:
+            mock_sess.return_value.client.side_effect = [1, 2, 3]
+            assert cls.client('ec2', kwargs) == 1
+            assert cls.client('ec2', dict(kwargs)) == 1
+            assert cls.client('ec2', {'region_name': 'r2'}) == 2
+            assert cls.client('elb', kwargs) == 3
+        assert mock_sess.mock_calls == [
+            call(),
+            call().client('ec2', region_name='r1'),
+            call().client('ec2', region_name='r2'),
+            call().client('elb', region_name='r1')
+        ]
+
+    def test_session_per_credentials(self):
+        cls = ClientPool()
+        kw1 = {
+            'region_name': 'r1',
+            'aws_access_key_id': 'ak1',
+            'aws_secret_access_key': 'sk1',
+            'aws_session_token': None
+        }
+        kw2 = {
+            'region_name': 'r1',
+            'aws_access_key_id': 'ak2',
+            'aws_secret_access_key': 'sk2',
+            'aws_session_token': 'tok2'
+        }
+        with patch('%s.boto3.session.Session' % pbm) as mock_sess:
+            mock_sess.side_effect = [Mock(), Mock()]
+            c1 = cls.client('ec2', kw1)
+            c2 = cls.client('ec2', kw2)
+            assert cls.client('ec2', kw1) == c1
+        assert c1 != c2
+        assert mock_sess.mock_calls == [
+            call(aws_access_key_id='ak1', aws_secret_access_key='sk1'),
+            call(aws_access_key_id='ak2', aws_secret_access_key='sk2',
+                 aws_session_token='tok2')
+        ]
+
+    def test_client_config(self):
+        cls = ClientPool(max_pool_connections=20)
+        kwargs = {'region_name': 'r1'}
+        with patch('%s.boto3.session.Session' % pbm) as mock_sess:
+            with patch('%s.botocore_config.Config' % pbm) as mock_conf:
+                mock_conf.side_effect = ['conf1', 'conf2']
+                mock_sess.return_value.client.side_effect = [1, 2]
+                assert cls.client('elbv2', kwargs) == 1
+                assert cls.client('elbv2', kwargs, retries={'a': 1}) == 2
+                assert cls.client('elbv2', kwargs, retries={'a': 1}) == 2
+        assert mock_conf.mock_calls == [
+            call(max_pool_connections=20),
+            call(max_pool_connections=20, retries={'a': 1})
+        ]
+        assert mock_sess.mock_calls == [
+            call(),
+            call().client('elbv2', region_name='r1', config='conf1'),
+            call().client('elbv2', region_name='r1', config='conf2')
+        ]
+
+    def test_resource(self):
+        cls = ClientPool()
+        kwargs = {'region_name': 'r1'}
+        with patch('%s.boto3.session.Session' % pbm) as mock_sess:
+            mock_sess.return_value.client.return_value = 'client'
+            mock_sess.return_value.resource.return_value = 'resource'
+            assert cls.resource('dynamodb', kwargs) == 'resource'
+            assert cls.resource('dynamodb', kwargs) == 'resource'
+            assert cls.client('dynamodb', kwargs) == 'client'
+        assert mock_sess.mock_calls == [
+            call(),
+            call().resource('dynamodb', region_name='r1'),
+            call().client('dynamodb', region_name='r1')
+        ]
+
+    def test_rate_limiter(self):
+        mock_rl = Mock()
+        cls = ClientPool(rate_limiter=mock_rl)
+        kwargs = {'region_name': 'r1'}
+        with patch('%s.boto3.session.Session' % pbm):
+            c = cls.client('ec2', kwargs)
+            cls.client('ec2', kwargs)
+            r = cls.resource('dynamodb', kwargs)
+        assert mock_rl.mock_calls == [
+            call.register(c, 'ec2'),
+            call.register(r.meta.client, 'dynamodb')
+        ]
+
+    def test_timings(self):
+        mock_rl = Mock()
+        mock_t = Mock()
+        cls = ClientPool(rate_limiter=mock_rl, timings=mock_t)
+        kwargs = {'region_name': 'r1'}
+        with patch('%s.boto3.session.Session' % pbm):
+            c = cls.client('ec2', kwargs)
+            r = cls.resource('dynamodb', kwargs)
+        assert mock_rl.mock_calls == [
+            call.register(c, 'ec2'),
+            call.register(r.meta.client, 'dynamodb')
+        ]
+        assert mock_t.mock_calls == [
+            call.register(c, 'ec2'),
+            call.register(r.meta.client, 'dynamodb')
+        ]
+
+    def test_response_cache_record_replay(self):
+        mock_rc = Mock()
+        mock_rr = Mock()
+        cls = ClientPool(response_cache=mock_rc, record_replay=mock_rr)
+        kwargs = {'region_name': 'r1'}
+        with patch('%s.boto3.session.Session' % pbm):
+            c = cls.client('ec2', kwargs)
+            r = cls.resource('dynamodb', kwargs)
+        for m in (mock_rc, mock_rr):
+            assert m.mock_calls == [
+                call.register(c, 'ec2'),
+                call.register(r.meta.client, 'dynamodb')
+            ]
+
 
 class TestConnectableCredentials(object):
 
@@ -220,3 +398,166 @@ class TestConnectableCredentials(object):
         assert c.expiration == datetime(2015, 1, 1)
         assert c.assumed_role_id == 'roleid'
         assert c.assumed_role_arn == 'arn'
+
+    def test_to_dict_from_dict(self):
+        result = {
+            'Credentials': {
+                'AccessKeyId': 'akid',
+                'SecretAccessKey': 'secret',
+                'SessionToken': 'token',
+                'Expiration': datetime(2015, 1, 1, tzinfo=pytz.utc)
+            },
+            'AssumedRoleUser': {
+                'AssumedRoleId': 'roleid',
+                'Arn': 'arn'
+            }
+        }
+        c = ConnectableCredentials(result)
+        assert c.expiration_timestamp == 1420070400
+        d = c.to_dict()
+        assert d['Credentials']['Expiration'] == 1420070400
+        # must be serializable
+        d = json.loads(json.dumps(d))
+        c2 = ConnectableCredentials.from_dict(d)
+        assert c2.access_key == 'akid'
+        assert c2.secret_key == 'secret'
+        assert c2.session_token == 'token'
+        assert c2.expiration == datetime(2015, 1, 1, tzinfo=pytz.utc)
+        assert c2.assumed_role_id == 'roleid'
+        assert c2.assumed_role_arn == 'arn'
+
+
+def creds_expiring_at(ts, akid='akid'):
+    return ConnectableCredentials({
+        'Credentials': {
+            'AccessKeyId': akid,
+            'SecretAccessKey': 'secret',
+            'SessionToken': 'token',
+            'Expiration': datetime.fromtimestamp(ts, pytz.utc)
+        },
+        'AssumedRoleUser': {
+            'AssumedRoleId': 'roleid',
+            'Arn': 'arn'
+        }
+    })
+
+
+class TestCredentialCache(object):
+
+    def test_memory_only(self):
+        cls = CredentialCache()
+        assert cls.get('123', 'role') is None
+        creds = creds_expiring_at(2000)
+        with patch('%s.time.time' % pbm) as mock_time:
+            mock_time.return_value = 1000
+            cls.set(creds, '123', 'role')
+            assert cls.get('123', 'role') == creds
+            assert cls.get('123', 'role', 'extid') is None
+            assert cls.get('456', 'role') is None
+
+    def test_near_expiry(self):
+        cls = CredentialCache(min_remaining=900)
+        creds = creds_expiring_at(2000)
+        cls.set(creds, '123', 'role', 'extid')
+        with patch('%s.time.time' % pbm) as mock_time:
+            mock_time.return_value = 1099
+            assert cls.get('123', 'role', 'extid') == creds
+            mock_time.return_value = 1101
+            assert cls.get('123', 'role', 'extid') is None
+
+    def test_persisted(self, tmpdir):
+        path = str(tmpdir.join('sub', 'creds.json'))
+        creds = creds_expiring_at(2000)
+        creds.account_id = '123'
+        with patch('%s.time.time' % pbm) as mock_time:
+            mock_time.return_value = 1000
+            CredentialCache(path).set(creds, '123', 'role', 'extid')
+            assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+            res = CredentialCache(path).get('123', 'role', 'extid')
+        assert res.access_key == 'akid'
+        assert res.session_token == 'token'
+        assert res.account_id == '123'
+        assert res.expiration_timestamp == 2000
+
+    def test_save_skips_expired(self, tmpdir):
+        path = str(tmpdir.join('creds.json'))
+        cls = CredentialCache(path)
+        with patch('%s.time.time' % pbm) as mock_time:
+            mock_time.return_value = 1000
+            cls.set(creds_expiring_at(500), '123', 'old')
+            cls.set(creds_expiring_at(5000), '123', 'new')
+        with open(path, 'r') as fh:
+            data = json.loads(fh.read())
+        assert list(data.keys()) == ['123/new/']
+
+    def test_load_keeps_later_expiry(self, tmpdir):
+        path = str(tmpdir.join('creds.json'))
+        with patch('%s.time.time' % pbm) as mock_time:
+            mock_time.return_value = 1000
+            CredentialCache(path).set(
+                creds_expiring_at(3000, akid='old'), '123', 'role'
+            )
+            cls = CredentialCache(path)
+            cls._creds['123/role/'] = creds_expiring_at(5000, akid='new')
+            assert cls.get('123', 'role').access_key == 'new'
+            cls._creds['123/role/'] = creds_expiring_at(2000, akid='newer')
+            assert cls.get('123', 'role').access_key == 'old'
+
+    def test_load_bad_file(self, tmpdir):
+        path = str(tmpdir.join('creds.json'))
+        with open(path, 'w') as fh:
+            fh.write('not json')
+        with patch('awslimitchecker.utils.logger') as mock_logger:
+            res = CredentialCache(path).get('123', 'role')
+        assert res is None
+        assert mock_logger.mock_calls == [
+            call.warning('Unable to read %s cache %s', 'STS credential', path,
+                         exc_info=True)
+        ]
+
+    def test_load_bad_entry(self, tmpdir):
+        path = str(tmpdir.join('creds.json'))
+        with open(path, 'w') as fh:
+            fh.write('{"123/role/": {"foo": "bar"}}')
+        with patch('%s.logger' % pbm) as mock_logger:
+            res = CredentialCache(path).get('123', 'role')
+        assert res is None
+        assert mock_logger.mock_calls == [
+            call.warning('Unable to read STS credentials for %s from %s',
+                         '123/role/', path, exc_info=True)
+        ]
+
+    def test_save_error(self, tmpdir):
+        path = str(tmpdir.join('creds.json'))
+        cls = CredentialCache(path)
+        creds = creds_expiring_at(5000)
+        with patch('%s.time.time' % pbm) as mock_time:
+            with patch('awslimitchecker.utils.os.rename') as mock_rename:
+                with patch('awslimitchecker.utils.logger') as mock_logger:
+                    mock_time.return_value = 1000
+                    mock_rename.side_effect = OSError('foo')
+                    cls.set(creds, '123', 'role')
+                    assert cls.get('123', 'role') == creds
+        assert mock_logger.mock_calls[0] == call.warning(
+            'Unable to write %s cache %s', 'STS credential', path,
+            exc_info=True
+        )
+
+
+class TestGetCredentialCache(object):
+
+    def test_shared(self):
+        with patch.dict('awslimitchecker.utils._file_caches', {}, clear=True):
+            a = get_credential_cache()
+            b = get_credential_cache(None)
+            c = get_credential_cache('~/foo.json')
+            d = get_credential_cache(os.path.expanduser('~/foo.json'))
+            assert a is b
+            assert a.path is None
+            assert c is d
+            assert c.path == os.path.abspath(os.path.expanduser('~/foo.json'))
+            assert sorted(
+                utils._file_caches.keys(), key=str
+            ) == sorted([
+                (CredentialCache, None), (CredentialCache, c.path)
+            ], key=str)
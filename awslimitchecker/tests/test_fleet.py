@@ -0,0 +1,242 @@
+"""
+awslimitchecker/tests/test_fleet.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+##############################################################################
+Copyright 2015-2017 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+##############################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+##############################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+##############################################################################
+"""
+
+import sys
+
+from awslimitchecker.checker import AwsLimitChecker
+from awslimitchecker.limit import AwsLimit
+from awslimitchecker.fleet import (
+    FleetTarget, FleetResult, FleetReport, FleetChecker, build_targets,
+    _check_target
+)
+
+# https://code.google.com/p/mock/issues/detail?id=249
+# py>=3.4 should use unittest.mock not the mock package on pypi
+if (
+        sys.version_info[0] < 3 or
+        sys.version_info[0] == 3 and sys.version_info[1] < 4
+):
+    from mock import patch, call, Mock
+else:
+    from unittest.mock import patch, call, Mock
+
+pbm = 'awslimitchecker.fleet'
+
+
+def mock_limit(limit, warns, crits):
+    m = Mock(spec_set=AwsLimit)
+    m.get_limit.return_value = limit
+    m.get_warnings.return_value = warns
+    m.get_criticals.return_value = crits
+    return m
+
+
+class TestBuildTargets(object):
+
+    def test_simple(self):
+        res = build_targets(['123', None, '123'], ['rA', 'rB'],
+                            account_role='role')
+        assert [
+            (t.account_id, t.account_role, t.region, t.regions) for t in res
+        ] == [
+            ('123', 'role', None, ['rA', 'rB']),
+            (None, None, None, ['rA', 'rB']),
+        ]
+
+    def test_single_region(self):
+        res = build_targets(['123'], ['rA'], account_role='role',
+                            external_id='ext')
+        assert [
+            (t.account_id, t.region, t.regions, t.external_id) for t in res
+        ] == [('123', 'rA', None, 'ext')]
+
+    def test_all_regions(self):
+        res = build_targets(['123'], 'all')
+        assert [(t.region, t.regions) for t in res] == [(None, 'all')]
+
+
+class TestCheckTarget(object):
+
+    def test_single_region(self):
+        target = FleetTarget(
+            account_id='123', account_role='role', region='rA',
+            limit_overrides={'SvcFoo': {'lim': 5}},
+            threshold_overrides={'SvcFoo': {'lim': {'warning': {'count': 1}}}}
+        )
+        with patch('%s.AwsLimitChecker' % pbm,
+                   spec_set=AwsLimitChecker) as mock_alc:
+            mock_alc.return_value.check_thresholds.return_value = {
+                'SvcFoo': {'lim': mock_limit(5, ['w1', 'w2'], [])}
+            }
+            res = _check_target((target, {'max_workers': 2}))
+        assert mock_alc.mock_calls == [
+            call(account_id='123', account_role='role', region='rA',
+                 regions=None, external_id=None, max_workers=2),
+            call().set_threshold_overrides(
+                {'SvcFoo': {'lim': {'warning': {'count': 1}}}}
+            ),
+            call().set_limit_overrides({'SvcFoo': {'lim': 5}}),
+            call().check_thresholds()
+        ]
+        assert res.target == target
+        assert res.error is None
+        assert res.limits == {
+            'SvcFoo': {
+                'lim': {'limit': 5, 'warnings': ['w1', 'w2'], 'criticals': []}
+            }
+        }
+        assert res.warning_count == 1
+        assert res.critical_count == 0
+
+    def test_multi_region(self):
+        target = FleetTarget(regions=['rA', 'rB'])
+        with patch('%s.AwsLimitChecker' % pbm,
+                   spec_set=AwsLimitChecker) as mock_alc:
+            mock_alc.return_value.check_thresholds.return_value = {
+                'rB': {'SvcFoo': {'lim': mock_limit(5, [], ['c1'])}}
+            }
+            res = _check_target((target, {}))
+        assert res.limits == {
+            'rB': {
+                'SvcFoo': {
+                    'lim': {'limit': 5, 'warnings': [], 'criticals': ['c1']}
+                }
+            }
+        }
+        assert res.critical_count == 1
+
+    def test_exception(self):
+        target = FleetTarget(account_id='123', region='rA')
+        with patch('%s.AwsLimitChecker' % pbm,
+                   spec_set=AwsLimitChecker) as mock_alc:
+            with patch('%s.logger' % pbm) as mock_logger:
+                mock_alc.side_effect = RuntimeError('foo')
+                res = _check_target((target, {}))
+        assert res.limits == {}
+        assert 'RuntimeError: foo' in res.error
+        assert mock_logger.mock_calls == [
+            call.error('Error checking %s', target, exc_info=True)
+        ]
+
+
+class TestFleetReport(object):
+
+    def test_report(self):
+        t1 = FleetTarget(account_id='1', region='rA')
+        t2 = FleetTarget(account_id='2', regions=['rA', 'rB'])
+        t3 = FleetTarget(account_id='3', region='rA')
+        w = {'limit': 1, 'warnings': ['w'], 'criticals': []}
+        c = {'limit': 1, 'warnings': ['w'], 'criticals': ['c']}
+        cls = FleetReport()
+        cls.add(FleetResult(t1, limits={'S1': {'l1': w, 'l2': c}}))
+        cls.add(FleetResult(t2, limits={'rB': {'S2': {'l3': c}}}))
+        cls.add(FleetResult(t3, error='foo'))
+        assert cls.warning_count == 1
+        assert cls.critical_count == 2
+        assert [r.target for r in cls.errors] == [t3]
+        assert cls.problems() == {
+            '1/rA/S1/l1': w,
+            '1/rA/S1/l2': c,
+            '2/rB/S2/l3': c,
+        }
+
+
+class TestFleetChecker(object):
+
+    def setup(self):
+        self.targets = [
+            FleetTarget(account_id='1', region='rA'),
+            FleetTarget(account_id='2', region='rA'),
+        ]
+
+    def test_init(self):
+        with patch('%s.cpu_count' % pbm) as mock_cpu:
+            mock_cpu.return_value = 6
+            cls = FleetChecker(self.targets, warning_threshold=50)
+        assert cls.processes == 6
+        assert cls.checker_kwargs == {
+            'warning_threshold': 50,
+            'max_workers': None,
+            'check_version': False
+        }
+
+    def test_iter_results_serial(self):
+        cls = FleetChecker(self.targets, processes=1, max_workers=3)
+        with patch('%s._check_target' % pbm) as mock_ct:
+            with patch('%s.Pool' % pbm) as mock_pool:
+                mock_ct.side_effect = ['r1', 'r2']
+                res = list(cls.iter_results())
+        assert res == ['r1', 'r2']
+        kw = {'max_workers': 3, 'check_version': False}
+        assert mock_ct.mock_calls == [
+            call((self.targets[0], kw)),
+            call((self.targets[1], kw))
+        ]
+        assert mock_pool.mock_calls == []
+
+    def test_iter_results_pool(self):
+        cls = FleetChecker(self.targets, processes=4)
+        with patch('%s.Pool' % pbm) as mock_pool:
+            mock_pool.return_value.imap_unordered.return_value = iter(
+                ['r2', 'r1']
+            )
+            res = list(cls.iter_results())
+        assert res == ['r2', 'r1']
+        kw = {'max_workers': None, 'check_version': False}
+        assert mock_pool.mock_calls == [
+            call(2),
+            call().imap_unordered(
+                _check_target,
+                [(self.targets[0], kw), (self.targets[1], kw)]
+            ),
+            call().close(),
+            call().join()
+        ]
+
+    def test_run(self):
+        r1 = FleetResult(self.targets[0], duration=1.0)
+        r2 = FleetResult(self.targets[1], duration=2.0)
+        cb = Mock()
+        cls = FleetChecker(self.targets, processes=1)
+        with patch.object(FleetChecker, 'iter_results') as mock_iter:
+            mock_iter.return_value = iter([r2, r1])
+            res = cls.run(callback=cb)
+        assert isinstance(res, FleetReport)
+        assert res.results == [r2, r1]
+        assert cb.mock_calls == [call(r2), call(r1)]
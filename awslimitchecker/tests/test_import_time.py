@@ -0,0 +1,112 @@
+"""
+awslimitchecker/tests/test_import_time.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+##############################################################################
+Copyright 2015-2017 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+##############################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+##############################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+##############################################################################
+"""
+
+import os
+import sys
+import subprocess
+
+import pytest
+
+#: Maximum cumulative time, in microseconds, that importing
+#: ``awslimitchecker.runner`` may take. This is deliberately generous to
+#: allow for slow CI hosts; before imports were deferred it took well over
+#: twice this long on a fast machine.
+RUNNER_IMPORT_BUDGET_US = 400000
+
+#: Modules that are slow to import and must only be loaded on the code paths
+#: that actually use them.
+DEFERRED_MODULES = [
+    'boto3',
+    'botocore.client',
+    'botocore.session',
+    'dateutil.parser',
+    'pytz',
+    'versionfinder',
+    'pip',
+    'pkg_resources',
+    'multiprocessing.pool',
+]
+
+
+def get_import_times(module_name):
+    """
+    Import ``module_name`` in a new interpreter with ``-X importtime``, and
+    return a dict of every imported module name to its cumulative import time
+    in microseconds.
+    """
+    topdir = os.path.abspath(
+        os.path.join(os.path.dirname(__file__), '..', '..')
+    )
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [topdir] + [p for p in [env.get('PYTHONPATH')] if p]
+    )
+    p = subprocess.Popen(
+        [sys.executable, '-X', 'importtime', '-c',
+         'import {m}'.format(m=module_name)],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env
+    )
+    _, err = p.communicate()
+    assert p.returncode == 0, err
+    res = {}
+    for line in err.decode('utf-8').splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        res[parts[2].strip()] = int(parts[1].strip())
+    return res
+
+
+@pytest.mark.skipif(
+    sys.version_info < (3, 7), reason='-X importtime requires Python >= 3.7'
+)
+class TestImportTime(object):
+
+    def test_runner_defers_heavy_imports(self):
+        times = get_import_times('awslimitchecker.runner')
+        assert 'awslimitchecker.runner' in times
+        loaded = [m for m in DEFERRED_MODULES if m in times]
+        assert loaded == []
+
+    def test_runner_import_budget(self):
+        times = get_import_times('awslimitchecker.runner')
+        assert times['awslimitchecker.runner'] < RUNNER_IMPORT_BUDGET_US
@@ -615,6 +615,12 @@ class TestAwsLimit(object):
         )
         assert limit.ta_limit_name == 'foo'
 
+    def test_no_dict(self):
+        limit = AwsLimit('limitname', self.mock_svc, 3, 7, 11)
+        assert not hasattr(limit, '__dict__')
+        with pytest.raises(AttributeError):
+            limit.foo = 'bar'
+
 
 class TestAwsLimitUsage(object):
 
@@ -640,6 +646,12 @@ class TestAwsLimitUsage(object):
         assert u2.resource_id == 'foobar'
         assert u2.aws_type == 'mytype'
 
+    def test_no_dict(self):
+        u = AwsLimitUsage(Mock(spec_set=AwsLimit), 3, resource_id='foo')
+        assert not hasattr(u, '__dict__')
+        with pytest.raises(AttributeError):
+            u.foo = 'bar'
+
     def test_get_value(self):
         mock_limit = Mock(spec_set=AwsLimit)
         u = AwsLimitUsage(
@@ -0,0 +1,88 @@
+"""
+awslimitchecker/tests/test_limitcache.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+##############################################################################
+Copyright 2015-2017 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+##############################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+##############################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+##############################################################################
+"""
+
+import sys
+
+from awslimitchecker.limitcache import LimitCache, get_limit_cache
+from awslimitchecker.usagecache import get_usage_cache
+
+# https://code.google.com/p/mock/issues/detail?id=249
+# py>=3.4 should use unittest.mock not the mock package on pypi
+if (
+        sys.version_info[0] < 3 or
+        sys.version_info[0] == 3 and sys.version_info[1] < 4
+):
+    from mock import patch, call
+else:
+    from unittest.mock import patch, call
+
+pbm = 'awslimitchecker.usagecache'
+
+LIMITS = {'ta': True, 'limits': {'Foo': [[3, 10], [2, None]]}}
+
+
+class TestLimitCache(object):
+
+    def test_set_get(self, tmpdir):
+        cls = LimitCache(str(tmpdir.join('limits.json')))
+        with patch('%s.time.time' % pbm) as mock_time:
+            mock_time.return_value = 1000
+            cls.set('123', 'us-east-1', 'EC2', LIMITS)
+            mock_time.return_value = 1100
+            with patch('%s.logger' % pbm, autospec=True) as mock_logger:
+                assert cls.get('123', 'us-east-1', 'EC2', 100) == LIMITS
+                assert cls.get('123', 'us-east-1', 'EC2', 99) is None
+        assert mock_logger.mock_calls == [
+            call.info('Using cached %s for %s in %s (%ds old)',
+                      'limits', 'EC2', 'us-east-1', 100),
+            call.debug('Cached %s for %s in %s is %ds old; not reusing',
+                       'limits', 'EC2', 'us-east-1', 100)
+        ]
+
+
+class TestGetLimitCache(object):
+
+    def test_shared(self, tmpdir):
+        path = str(tmpdir.join('limits.json'))
+        res = get_limit_cache(path)
+        assert isinstance(res, LimitCache)
+        assert res.path == path
+        assert get_limit_cache(path) is res
+        # separate from the usage caches
+        assert get_usage_cache(path) is not res
@@ -0,0 +1,217 @@
+"""
+awslimitchecker/tests/test_ratelimit.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+##############################################################################
+Copyright 2015-2017 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+##############################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+##############################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+##############################################################################
+"""
+
+import sys
+
+from awslimitchecker.ratelimit import TokenBucket, RateLimiter
+
+# https://code.google.com/p/mock/issues/detail?id=249
+# py>=3.4 should use unittest.mock not the mock package on pypi
+if (
+        sys.version_info[0] < 3 or
+        sys.version_info[0] == 3 and sys.version_info[1] < 4
+):
+    from mock import patch, call, Mock
+else:
+    from unittest.mock import patch, call, Mock
+
+pbm = 'awslimitchecker.ratelimit'
+
+
+class FakeClock(object):
+    """patches time.time and time.sleep with a clock that sleep advances"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, secs):
+        self.sleeps.append(secs)
+        self.now += secs
+
+
+class TestTokenBucket(object):
+
+    def setup(self):
+        self.clock = FakeClock()
+        self.patchers = [
+            patch('%s.time.time' % pbm, side_effect=self.clock.time),
+            patch('%s.time.sleep' % pbm, side_effect=self.clock.sleep)
+        ]
+        for p in self.patchers:
+            p.start()
+
+    def teardown(self):
+        for p in self.patchers:
+            p.stop()
+
+    def test_burst_then_rate(self):
+        cls = TokenBucket(2, 3)
+        assert [cls.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert self.clock.sleeps == []
+        assert cls.acquire() == 0.5
+        assert cls.acquire() == 0.5
+        assert self.clock.now == 1001.0
+
+    def test_refill_capped_at_burst(self):
+        cls = TokenBucket(2, 3)
+        cls.acquire()
+        self.clock.now += 60
+        for _ in range(3):
+            assert cls.acquire() == 0.0
+        assert cls.acquire() == 0.5
+
+    def test_throttled_and_recovery(self):
+        cls = TokenBucket(4, 10, min_rate=1)
+        cls.throttled()
+        assert cls.rate == 2
+        assert cls.tokens == 0
+        assert cls.acquire() == 0.5
+        cls.throttled()
+        cls.throttled()
+        assert cls.rate == 1
+        for _ in range(20):
+            cls.succeeded()
+        assert cls.rate == 4
+
+    def test_min_rate_above_rate(self):
+        cls = TokenBucket(0.1, 1)
+        assert cls.min_rate == 0.1
+        cls.throttled()
+        assert cls.rate == 0.1
+
+
+class TestRateLimiter(object):
+
+    def test_bucket(self):
+        cls = RateLimiter(rate=5, burst=7, api_rates={'ec2': (20, 100)})
+        b1 = cls.bucket('ec2', 'r1')
+        assert cls.bucket('ec2', 'r1') is b1
+        assert (b1.rate, b1.burst) == (20, 100)
+        b2 = cls.bucket('ec2', 'r2')
+        assert b2 is not b1
+        b3 = cls.bucket('elb', 'r1')
+        assert (b3.rate, b3.burst) == (5, 7)
+
+    def test_bucket_default_api_rates(self):
+        cls = RateLimiter(rate=5, burst=7)
+        b = cls.bucket('apigateway', 'r1')
+        assert (b.rate, b.burst) == (10, 40)
+        cls = RateLimiter(api_rates={'apigateway': (1, 2)})
+        b = cls.bucket('apigateway', 'r1')
+        assert (b.rate, b.burst) == (1, 2)
+
+    def test_register(self):
+        client = Mock()
+        client.meta.region_name = 'r1'
+        cls = RateLimiter()
+        cls.register(client, 'ec2')
+        assert ('ec2', 'r1') in cls._buckets
+        calls = client.meta.events.register.call_args_list
+        assert [c[0][0] for c in calls] == ['before-send', 'needs-retry']
+        assert calls[0][0][1].func == cls._before_send
+        assert calls[0][0][1].args == ('ec2', 'r1')
+        assert calls[1][0][1].func == cls._needs_retry
+        assert calls[1][0][1].args == ('ec2', 'r1')
+
+    def test_before_send(self):
+        cls = RateLimiter()
+        bucket = Mock(spec_set=TokenBucket)
+        bucket.acquire.side_effect = [0.0, 1.5]
+        cls._buckets[('ec2', 'r1')] = bucket
+        cls._stats[('ec2', 'r1')] = {'calls': 0, 'retried': 0, 'throttled': 0}
+        req1 = Mock(context={'retries': {'attempt': 1}})
+        req2 = Mock(context={'retries': {'attempt': 2}})
+        with patch('%s.logger' % pbm) as mock_logger:
+            assert cls._before_send('ec2', 'r1', request=req1) is None
+            assert cls._before_send(
+                'ec2', 'r1', request=req2, event_name='foo') is None
+        assert bucket.mock_calls == [call.acquire(), call.acquire()]
+        assert cls._stats[('ec2', 'r1')] == {
+            'calls': 2, 'retried': 1, 'throttled': 0
+        }
+        assert mock_logger.mock_calls == [
+            call.debug('Rate limited %s in %s for %.3fs', 'ec2', 'r1', 1.5)
+        ]
+
+    def test_needs_retry(self):
+        cls = RateLimiter()
+        bucket = Mock(spec=TokenBucket, rate=1.0)
+        cls._buckets[('ec2', 'r1')] = bucket
+        cls._stats[('ec2', 'r1')] = {'calls': 0, 'retried': 0, 'throttled': 0}
+        with patch('%s.logger' % pbm) as mock_logger:
+            assert cls._needs_retry('ec2', 'r1', response=None) is None
+            assert cls._needs_retry(
+                'ec2', 'r1', response=(Mock(), {'Foo': 'bar'}),
+                attempts=1) is None
+            assert cls._needs_retry(
+                'ec2', 'r1',
+                response=(Mock(), {'Error': {'Code': 'RequestLimitExceeded'}})
+            ) is None
+            assert cls._needs_retry(
+                'ec2', 'r1', response=(Mock(), {'Error': {'Code': 'Other'}})
+            ) is None
+        assert bucket.mock_calls == [call.succeeded(), call.throttled()]
+        assert cls._stats[('ec2', 'r1')]['throttled'] == 1
+        assert mock_logger.mock_calls == [
+            call.info('%s call in %s was throttled (%s); backing off to '
+                      '%.2f requests per second', 'ec2', 'r1',
+                      'RequestLimitExceeded', 1.0)
+        ]
+
+    def test_get_stats(self):
+        cls = RateLimiter(rate=3)
+        cls.bucket('ec2', 'r1')
+        cls.bucket('ec2', 'r2')
+        cls.bucket('elb', 'r1')
+        cls._incr('ec2', 'r1', 'calls')
+        cls._incr('ec2', 'r1', 'throttled')
+        cls._incr('elb', 'r1', 'retried')
+        assert cls.get_stats() == {
+            'ec2': {
+                'r1': {'calls': 1, 'retried': 0, 'throttled': 1, 'rate': 3},
+                'r2': {'calls': 0, 'retried': 0, 'throttled': 0, 'rate': 3}
+            },
+            'elb': {
+                'r1': {'calls': 0, 'retried': 1, 'throttled': 0, 'rate': 3}
+            }
+        }
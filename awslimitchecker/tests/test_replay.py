@@ -0,0 +1,276 @@
+"""
+awslimitchecker/tests/test_replay.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+##############################################################################
+Copyright 2015-2017 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+##############################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+##############################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+##############################################################################
+"""
+
+
+import gzip
+import json
+import sys
+from datetime import datetime
+
+import boto3
+from botocore.awsrequest import AWSResponse
+from botocore.exceptions import ClientError
+from dateutil.tz import tzutc
+import pytest
+
+from awslimitchecker.replay import (
+    ApiRecorder, ApiReplayer, _encode, _decode, _PARAMS_KEY
+)
+from awslimitchecker.responsecache import CONTEXT_HIT_KEY, ResponseCache
+from awslimitchecker.tests.benchmark import synthetic_checker
+from awslimitchecker.tests.synthetic import SyntheticAccount
+from awslimitchecker.checker import AwsLimitChecker
+
+# https://code.google.com/p/mock/issues/detail?id=249
+# py>=3.4 should use unittest.mock not the mock package on pypi
+if (
+        sys.version_info[0] < 3 or
+        sys.version_info[0] == 3 and sys.version_info[1] < 4
+):
+    from mock import patch, call, Mock
+else:
+    from unittest.mock import patch, call, Mock
+
+pbm = 'awslimitchecker.replay'
+
+VPCS_XML = b'<DescribeVpcsResponse>' \
+           b'<vpcSet><item><vpcId>vpc-1</vpcId></item></vpcSet>' \
+           b'</DescribeVpcsResponse>'
+
+
+def live_transport(request=None, **kwargs):
+    """botocore ``before-send`` handler standing in for the network"""
+    raw = Mock()
+    raw.stream.return_value = [VPCS_XML]
+    return AWSResponse(request.url, 200, {}, raw)
+
+
+def make_client(registry):
+    client = boto3.client(
+        'ec2', region_name='us-east-1', aws_access_key_id='a',
+        aws_secret_access_key='b'
+    )
+    registry.register(client, 'ec2')
+    client.meta.events.register('before-send', live_transport)
+    return client
+
+
+def write_archive(path, calls, version=1):
+    with gzip.open(str(path), 'wb') as fh:
+        fh.write(json.dumps(
+            {'version': version, 'calls': calls}, default=_encode
+        ).encode('utf-8'))
+
+
+class TestEncoding(object):
+
+    def test_round_trip(self):
+        d = {
+            'a': datetime(2017, 1, 2, 3, 4, 5, tzinfo=tzutc()),
+            'b': [b'\x00\x01'],
+            'c': {'d': 1}
+        }
+        res = json.loads(json.dumps(d, default=_encode), object_hook=_decode)
+        assert res == d
+
+    def test_unknown_type(self):
+        with pytest.raises(TypeError):
+            json.dumps({'a': object()}, default=_encode)
+
+
+class TestApiRecorder(object):
+
+    def test_record_and_save(self, tmpdir):
+        path = str(tmpdir.join('calls.json.gz'))
+        cls = ApiRecorder(path)
+        client = make_client(cls)
+        client.describe_vpcs(VpcIds=['vpc-1'])
+        client.describe_vpcs()
+        cls.save()
+        with gzip.open(path, 'rb') as fh:
+            data = json.loads(fh.read().decode('utf-8'))
+        assert data == {
+            'version': 1,
+            'calls': [
+                {
+                    'api': 'ec2', 'region': 'us-east-1',
+                    'operation': 'DescribeVpcs',
+                    'params': '{"VpcIds": ["vpc-1"]}',
+                    'status': 200,
+                    'response': {'Vpcs': [{'VpcId': 'vpc-1'}]}
+                },
+                {
+                    'api': 'ec2', 'region': 'us-east-1',
+                    'operation': 'DescribeVpcs',
+                    'params': '{}',
+                    'status': 200,
+                    'response': {'Vpcs': [{'VpcId': 'vpc-1'}]}
+                }
+            ]
+        }
+
+    def test_cache_hits_not_recorded(self):
+        cls = ApiRecorder('/tmp/foo')
+        model = Mock()
+        model.name = 'DescribeVpcs'
+        cls._after_call('ec2', 'r1', http_response=Mock(status_code=200),
+                        parsed={}, model=model,
+                        context={CONTEXT_HIT_KEY: True, _PARAMS_KEY: '{}'})
+        assert cls._calls == []
+
+
+class TestApiReplayer(object):
+
+    def test_replay(self, tmpdir):
+        path = str(tmpdir.join('calls.json.gz'))
+        write_archive(path, [
+            {
+                'api': 'ec2', 'region': 'us-east-1',
+                'operation': 'DescribeVpcs', 'params': '{}', 'status': 200,
+                'response': {'Vpcs': [{'VpcId': 'vpc-1'}]}
+            },
+            {
+                'api': 'ec2', 'region': 'us-east-1',
+                'operation': 'DescribeVpcs', 'params': '{}', 'status': 200,
+                'response': {'Vpcs': [{'VpcId': 'vpc-2'}]}
+            },
+            {
+                'api': 'ec2', 'region': 'us-east-1',
+                'operation': 'DescribeVpcs',
+                'params': '{"VpcIds": ["vpc-3"]}', 'status': 400,
+                'response': {'Error': {'Code': 'InvalidVpcID.NotFound',
+                                       'Message': 'no'}}
+            }
+        ])
+        cls = ApiReplayer(path)
+        client = boto3.client(
+            'ec2', region_name='us-east-1', aws_access_key_id='a',
+            aws_secret_access_key='b'
+        )
+        cls.register(client, 'ec2')
+        mock_send = Mock(return_value=None)
+        client.meta.events.register('before-send', mock_send)
+        # recorded responses are replayed in order; the last one is repeated
+        assert client.describe_vpcs()['Vpcs'] == [{'VpcId': 'vpc-1'}]
+        assert client.describe_vpcs()['Vpcs'] == [{'VpcId': 'vpc-2'}]
+        res = client.describe_vpcs()
+        assert res['Vpcs'] == [{'VpcId': 'vpc-2'}]
+        res['Vpcs'].append('foo')
+        assert client.describe_vpcs()['Vpcs'] == [{'VpcId': 'vpc-2'}]
+        with pytest.raises(ClientError) as excinfo:
+            client.describe_vpcs(VpcIds=['vpc-3'])
+        assert excinfo.value.response['Error']['Code'] == \
+            'InvalidVpcID.NotFound'
+        with patch('%s.logger' % pbm) as mock_logger:
+            with pytest.raises(ClientError) as excinfo:
+                client.describe_vpcs(VpcIds=['vpc-4'])
+        assert excinfo.value.response['Error']['Code'] == 'NotRecorded'
+        assert mock_logger.mock_calls == [
+            call.warning('No recorded response for %s.%s in %s with '
+                         'params %s', 'ec2', 'DescribeVpcs', 'us-east-1',
+                         '{"VpcIds": ["vpc-4"]}')
+        ]
+        assert mock_send.mock_calls == []
+
+    def test_replay_cache_hit_first(self, tmpdir):
+        path = str(tmpdir.join('calls.json.gz'))
+        write_archive(path, [
+            {
+                'api': 'ec2', 'region': 'us-east-1',
+                'operation': 'DescribeAccountAttributes', 'params': '{}',
+                'status': 200, 'response': {'AccountAttributes': []}
+            }
+        ])
+        cache = ResponseCache()
+        cls = ApiReplayer(path)
+        client = boto3.client(
+            'ec2', region_name='us-east-1', aws_access_key_id='a',
+            aws_secret_access_key='b'
+        )
+        cls.register(client, 'ec2')
+        cache.register(client, 'ec2')
+        client.describe_account_attributes()
+        client.describe_account_attributes()
+        assert cache.get_stats() == {
+            'ec2': {'us-east-1': {'hits': 1, 'misses': 1}}
+        }
+
+    def test_latency(self, tmpdir):
+        path = str(tmpdir.join('calls.json.gz'))
+        write_archive(path, [])
+        cls = ApiReplayer(path, latency=0.25)
+        model = Mock()
+        model.name = 'DescribeVpcs'
+        with patch('%s.time.sleep' % pbm) as mock_sleep:
+            with patch('%s.logger' % pbm):
+                cls._before_call('ec2', 'r1', model=model, context={})
+        assert mock_sleep.mock_calls == [call(0.25)]
+
+    def test_bad_version(self, tmpdir):
+        path = str(tmpdir.join('calls.json.gz'))
+        write_archive(path, [], version=99)
+        with pytest.raises(ValueError):
+            ApiReplayer(path)
+
+
+class TestRecordReplayChecker(object):
+
+    def test_round_trip(self, tmpdir, monkeypatch):
+        # no credentials or network are needed to replay
+        for k in ['AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY',
+                  'AWS_SESSION_TOKEN', 'AWS_PROFILE']:
+            monkeypatch.delenv(k, raising=False)
+        path = str(tmpdir.join('calls.json.gz'))
+        account = SyntheticAccount(scale=0.01)
+        recorder = ApiRecorder(path)
+        live = synthetic_checker(account, record_replay=recorder)
+        live.check_thresholds()
+        recorder.save()
+        replayed = AwsLimitChecker(
+            region='us-east-1', check_version=False,
+            record_replay=ApiReplayer(path)
+        )
+        replayed.check_thresholds()
+        for svc, limits in live.get_limits().items():
+            for name, lim in limits.items():
+                other = replayed.get_limits()[svc][name]
+                assert other.get_limit() == lim.get_limit()
+                assert sorted(
+                    str(u) for u in other.get_current_usage()
+                ) == sorted(str(u) for u in lim.get_current_usage())
@@ -0,0 +1,222 @@
+"""
+awslimitchecker/tests/test_responsecache.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+##############################################################################
+Copyright 2015-2017 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+##############################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+##############################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+##############################################################################
+"""
+
+
+import sys
+
+import boto3
+from botocore.awsrequest import AWSResponse
+from botocore.exceptions import ClientError
+import pytest
+
+from awslimitchecker.responsecache import (
+    ResponseCache, CONTEXT_HIT_KEY, _CONTEXT_KEY
+)
+
+# https://code.google.com/p/mock/issues/detail?id=249
+# py>=3.4 should use unittest.mock not the mock package on pypi
+if (
+        sys.version_info[0] < 3 or
+        sys.version_info[0] == 3 and sys.version_info[1] < 4
+):
+    from mock import Mock
+else:
+    from unittest.mock import Mock
+
+pbm = 'awslimitchecker.responsecache'
+
+ATTRS_XML = b'<DescribeAccountAttributesResponse><accountAttributeSet>' \
+            b'<item><attributeName>max-instances</attributeName>' \
+            b'<attributeValueSet><item><attributeValue>20</attributeValue>' \
+            b'</item></attributeValueSet></item>' \
+            b'</accountAttributeSet></DescribeAccountAttributesResponse>'
+
+ATTRS = [{
+    'AttributeName': 'max-instances',
+    'AttributeValues': [{'AttributeValue': '20'}]
+}]
+
+ERROR_XML = b'<Response><Errors><Error><Code>AuthFailure</Code>' \
+            b'<Message>no</Message></Error></Errors></Response>'
+
+
+class FakeTransport(object):
+    """botocore ``before-send`` handler that answers every request"""
+
+    def __init__(self, status_code=200, body=ATTRS_XML):
+        self.status_code = status_code
+        self.body = body
+        self.requests = []
+
+    def __call__(self, request=None, **kwargs):
+        self.requests.append(request)
+        raw = Mock()
+        raw.stream.return_value = [self.body]
+        return AWSResponse(request.url, self.status_code, {}, raw)
+
+
+def make_client(cache, transport, region='us-east-1'):
+    client = boto3.client(
+        'ec2', region_name=region, aws_access_key_id='a',
+        aws_secret_access_key='b'
+    )
+    cache.register(client, 'ec2')
+    client.meta.events.register('before-send', transport)
+    return client
+
+
+class TestResponseCache(object):
+
+    def test_register(self):
+        cls = ResponseCache()
+        client = Mock()
+        client.meta.region_name = 'r1'
+        cls.register(client, 'ec2')
+        calls = client.meta.events.register.mock_calls
+        assert len(calls) == 3
+        assert calls[0][1][0] == 'before-parameter-build'
+        assert calls[0][1][1].func == cls._before_parameter_build
+        assert calls[0][1][1].args == ('ec2', 'r1')
+        assert calls[1][1] == ('before-call', cls._before_call)
+        assert calls[2][1] == ('after-call', cls._after_call)
+
+    def test_register_uncacheable(self):
+        cls = ResponseCache()
+        client = Mock()
+        cls.register(client, 'support')
+        cls.register(client, 's3')
+        assert client.mock_calls == []
+
+    def test_identical_calls(self):
+        cls = ResponseCache()
+        transport = FakeTransport()
+        client = make_client(cls, transport)
+        first = client.describe_account_attributes()
+        second = client.describe_account_attributes()
+        assert len(transport.requests) == 1
+        assert first['AccountAttributes'] == ATTRS
+        assert second['AccountAttributes'] == ATTRS
+        assert cls.get_stats() == {
+            'ec2': {'us-east-1': {'hits': 1, 'misses': 1}}
+        }
+
+    def test_responses_are_copies(self):
+        cls = ResponseCache()
+        transport = FakeTransport()
+        client = make_client(cls, transport)
+        client.describe_account_attributes()
+        res = client.describe_account_attributes()
+        res['AccountAttributes'].append('bar')
+        assert client.describe_account_attributes()[
+            'AccountAttributes'] == ATTRS
+        assert len(transport.requests) == 1
+
+    def test_different_params(self):
+        cls = ResponseCache()
+        transport = FakeTransport()
+        client = make_client(cls, transport)
+        client.describe_account_attributes(AttributeNames=['max-instances'])
+        client.describe_account_attributes(AttributeNames=['max-elastic-ips'])
+        client.describe_account_attributes()
+        client.describe_account_attributes(AttributeNames=['max-elastic-ips'])
+        assert len(transport.requests) == 3
+
+    def test_regions(self):
+        cls = ResponseCache()
+        transport = FakeTransport()
+        make_client(cls, transport, region='r1').describe_account_attributes()
+        make_client(cls, transport, region='r2').describe_account_attributes()
+        make_client(cls, transport, region='r1').describe_account_attributes()
+        assert len(transport.requests) == 2
+        assert cls.get_stats() == {
+            'ec2': {
+                'r1': {'hits': 1, 'misses': 1},
+                'r2': {'hits': 0, 'misses': 1}
+            }
+        }
+
+    def test_errors_not_cached(self):
+        cls = ResponseCache()
+        transport = FakeTransport(status_code=403, body=ERROR_XML)
+        client = make_client(cls, transport)
+        for _ in range(2):
+            with pytest.raises(ClientError):
+                client.describe_account_attributes()
+        assert len(transport.requests) == 2
+
+    def test_not_cacheable(self):
+        cls = ResponseCache()
+        ctx = {}
+        model = Mock()
+        model.name = 'DescribeVpcs'
+        cls._before_parameter_build('ec2', 'r1', params={}, model=model,
+                                    context=ctx)
+        assert ctx == {}
+        assert cls._before_call(context=ctx) is None
+        cls._after_call(http_response=Mock(status_code=200), parsed={},
+                        context=ctx)
+        assert cls._responses == {}
+        assert cls.get_stats() == {}
+
+    def test_hit(self):
+        cls = ResponseCache()
+        key = ('ec2', 'r1', 'DescribeAccountAttributes', '{}')
+        cls._responses[key] = {'AccountAttributes': []}
+        ctx = {_CONTEXT_KEY: key}
+        http, parsed = cls._before_call(context=ctx)
+        assert http.status_code == 200
+        assert parsed == {'AccountAttributes': []}
+        assert parsed is not cls._responses[key]
+        assert ctx[CONTEXT_HIT_KEY] is True
+        # the cached response is not stored again
+        cls._after_call(http_response=http, parsed={'foo': 'bar'},
+                        context=ctx)
+        assert cls._responses[key] == {'AccountAttributes': []}
+
+    def test_clear(self):
+        cls = ResponseCache()
+        transport = FakeTransport()
+        client = make_client(cls, transport)
+        client.describe_account_attributes()
+        cls.clear()
+        client.describe_account_attributes()
+        assert len(transport.requests) == 2
+        assert cls.get_stats() == {
+            'ec2': {'us-east-1': {'hits': 0, 'misses': 2}}
+        }
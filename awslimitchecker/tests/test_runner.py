@@ -56,9 +56,9 @@ if (
         sys.version_info[0] < 3 or
         sys.version_info[0] == 3 and sys.version_info[1] < 4
 ):
-    from mock import patch, call, Mock
+    from mock import patch, call, Mock, DEFAULT
 else:
-    from unittest.mock import patch, call, Mock
+    from unittest.mock import patch, call, Mock, DEFAULT
 
 
 def red(s):
@@ -118,7 +118,9 @@ class TestAwsLimitCheckerRunner(object):
                  'information on the source code location.'
         with patch('awslimitchecker.runner.argparse.ArgumentParser',
                    spec_set=argparse.ArgumentParser) as mock_parser:
-            mock_result = Mock(ta_refresh_wait=True)
+            mock_result = Mock(ta_refresh_wait=True, record_file=None,
+                               replay_file=None, region=None, regions=None,
+                               service_max_age={})
             mock_parser.return_value.parse_args.return_value = mock_result
             self.cls.parse_args(argv)
         assert mock_parser.mock_calls == [
@@ -189,10 +191,25 @@ class TestAwsLimitCheckerRunner(object):
             call().add_argument('-T', '--mfa-token', action='store', type=str,
                                 default=None, help='MFA Token to use when '
                                 'assuming a role via STS'),
+            call().add_argument('--sts-cache-file', dest='sts_cache_file',
+                                action='store', type=str, default=None,
+                                help='file to cache STS assumed role '
+                                'credentials in, so that they can be reused '
+                                'by later runs until shortly before they '
+                                'expire'),
             call().add_argument('-r', '--region', action='store',
                                 type=str, default=None,
                                 help='AWS region name to connect to; required '
                                 'for STS'),
+            call().add_argument('--regions', dest='regions', action='store',
+                                nargs='+', type=str, default=None,
+                                metavar='REGION',
+                                help='check each of these AWS regions '
+                                '(concurrently with --parallel); specify '
+                                '"all" to check every region enabled for the '
+                                'account. Results are shown as '
+                                'region/service/limit. Cannot be used with '
+                                '-r/--region'),
             call().add_argument('--skip-ta', action='store_true', default=False,
                                 help='do not attempt to pull *any* information '
                                 'on limits from Trusted Advisor'),
@@ -225,6 +242,82 @@ class TestAwsLimitCheckerRunner(object):
                                      'wait up to this number of seconds '
                                      'before continuing on anyway.',
                                 type=int),
+            call().add_argument('--ta-cache-file', dest='ta_cache_file',
+                                action='store', type=str, default=None,
+                                help='file to cache the Trusted Advisor check '
+                                'ID and results in, so that later runs only '
+                                'fetch results again when the check has been '
+                                'refreshed'),
+            call().add_argument('--usage-cache-file', dest='usage_cache_file',
+                                action='store', type=str, default=None,
+                                metavar='FILE',
+                                help='file to cache the usage each service '
+                                'finds in, so that later runs can reuse it '
+                                '(see --max-age)'),
+            call().add_argument('--max-age', dest='usage_max_age',
+                                action='store', type=int, default=0,
+                                metavar='SECONDS',
+                                help='with --usage-cache-file, reuse cached '
+                                'usage that is up to this many seconds old '
+                                'instead of finding it again; default 0 '
+                                '(never reuse)'),
+            call().add_argument('--service-max-age', dest='service_max_age',
+                                action=StoreKeyValuePair,
+                                metavar='SERVICE=SECONDS',
+                                help='override --max-age for one service, in '
+                                '"service_name=seconds" format; can be '
+                                'specified multiple times.'),
+            call().add_argument('--limit-cache-file', dest='limit_cache_file',
+                                action='store', type=str, default=None,
+                                metavar='FILE',
+                                help='file to cache the limits each service '
+                                'gets from its API and Trusted Advisor in, '
+                                'so that later runs only have to find usage '
+                                '(see --limit-max-age and --refresh-limits)'),
+            call().add_argument('--limit-max-age', dest='limit_max_age',
+                                action='store', type=int, default=604800,
+                                metavar='SECONDS',
+                                help='with --limit-cache-file, reuse cached '
+                                'limits that are up to this many seconds '
+                                'old; default 604800 (one week)'),
+            call().add_argument('--refresh-limits', dest='refresh_limits',
+                                action='store_true', default=False,
+                                help='with --limit-cache-file, ignore cached '
+                                'limits and retrieve them again, i.e. after '
+                                'AWS has raised a limit'),
+            call().add_argument('--record-api-calls', dest='record_file',
+                                action='store', type=str, default=None,
+                                metavar='FILE',
+                                help='record every AWS API call made, and its '
+                                'response, to FILE (a gzipped JSON archive), '
+                                'for later use with --replay-api-calls'),
+            call().add_argument('--replay-api-calls', dest='replay_file',
+                                action='store', type=str, default=None,
+                                metavar='FILE',
+                                help='answer AWS API calls from a file '
+                                'recorded with --record-api-calls, instead of '
+                                'sending them to AWS'),
+            call().add_argument('--replay-latency', dest='replay_latency',
+                                action='store', type=float, default=0.0,
+                                metavar='SECONDS',
+                                help='when replaying API calls, wait this many '
+                                'seconds before answering each one, to '
+                                'simulate network latency'),
+            call().add_argument('--parallel', dest='max_workers',
+                                action='store', type=int, default=None,
+                                metavar='N',
+                                help='query up to N services concurrently; '
+                                     'services that make per-resource API '
+                                     'calls share the same N threads, so at '
+                                     'most N threads (plus one for Trusted '
+                                     'Advisor) query AWS at once; default is '
+                                     'to query one service at a time'),
+            call().add_argument('--timings', action='store_true',
+                                default=False,
+                                help='after checking, print how long each '
+                                     'service took and how many API calls, '
+                                     'result pages and response bytes it '
+                                     'needed, to STDERR'),
             call().add_argument('--no-color', action='store_true',
                                 default=False,
                                 help='do not colorize output'),
@@ -266,6 +359,116 @@ class TestAwsLimitCheckerRunner(object):
         assert isinstance(res, argparse.Namespace)
         assert res.ta_refresh_mode == 123
 
+    def test_parse_args_parallel(self):
+        res = self.cls.parse_args(['--parallel', '4'])
+        assert res.max_workers == 4
+
+    def test_parse_args_sts_cache_file(self):
+        res = self.cls.parse_args(['--sts-cache-file', '/tmp/foo.json'])
+        assert res.sts_cache_file == '/tmp/foo.json'
+
+    def test_parse_args_ta_cache_file(self):
+        res = self.cls.parse_args(['--ta-cache-file', '/tmp/ta.json'])
+        assert res.ta_cache_file == '/tmp/ta.json'
+
+    def test_parse_args_usage_cache(self):
+        res = self.cls.parse_args([
+            '--usage-cache-file', '/tmp/usage.json', '--max-age', '3600',
+            '--service-max-age', 'EC2=0', '--service-max-age=IAM=86400'
+        ])
+        assert res.usage_cache_file == '/tmp/usage.json'
+        assert res.usage_max_age == 3600
+        assert res.service_max_age == {'EC2': 0, 'IAM': 86400}
+
+    def test_parse_args_service_max_age_invalid(self, capsys):
+        for value in ['EC2=abc', 'EC2']:
+            with pytest.raises(SystemExit) as excinfo:
+                self.cls.parse_args(['--service-max-age', value])
+            assert excinfo.value.code == 2
+        err = capsys.readouterr()[1]
+        assert '--service-max-age must be in SERVICE=SECONDS format' in err
+        assert 'must be in the form key=value' in err
+
+    def test_parse_args_service_max_age_unknown(self, capsys):
+        with pytest.raises(SystemExit) as excinfo:
+            self.cls.parse_args([
+                '--service-max-age', 'EC2=0', '--service-max-age', 'Foo=1',
+                '--service-max-age', 'Bar=2'
+            ])
+        assert excinfo.value.code == 2
+        err = capsys.readouterr()[1]
+        assert '--service-max-age: unknown service name(s): Bar, Foo' in err
+
+    def test_parse_args_limit_cache(self):
+        res = self.cls.parse_args([
+            '--limit-cache-file', '/tmp/limits.json', '--limit-max-age=86400',
+            '--refresh-limits'
+        ])
+        assert res.limit_cache_file == '/tmp/limits.json'
+        assert res.limit_max_age == 86400
+        assert res.refresh_limits is True
+        res = self.cls.parse_args([])
+        assert res.limit_cache_file is None
+        assert res.limit_max_age == 604800
+        assert res.refresh_limits is False
+
+    def test_entry_usage_cache(self):
+        argv = ['awslimitchecker', '--usage-cache-file=/tmp/usage.json',
+                '--max-age=600', '--service-max-age=EC2=0']
+        with patch.object(sys, 'argv', argv):
+            with patch('%s.Runner.check_thresholds' % pb,
+                       autospec=True) as mock_check:
+                mock_check.return_value = 0
+                with patch('%s.AwsLimitChecker' % pb, autospec=True) as mock_c:
+                    with pytest.raises(SystemExit):
+                        self.cls.console_entry_point()
+        kwargs = mock_c.call_args[1]
+        assert kwargs['usage_cache_file'] == '/tmp/usage.json'
+        assert kwargs['usage_max_age'] == 600
+        assert kwargs['service_usage_max_age'] == {'EC2': 0}
+
+    def test_entry_limit_cache(self):
+        argv = ['awslimitchecker', '--limit-cache-file=/tmp/limits.json',
+                '--refresh-limits']
+        with patch.object(sys, 'argv', argv):
+            with patch('%s.Runner.check_thresholds' % pb,
+                       autospec=True) as mock_check:
+                mock_check.return_value = 0
+                with patch('%s.AwsLimitChecker' % pb, autospec=True) as mock_c:
+                    with pytest.raises(SystemExit):
+                        self.cls.console_entry_point()
+        kwargs = mock_c.call_args[1]
+        assert kwargs['limit_cache_file'] == '/tmp/limits.json'
+        assert kwargs['limit_max_age'] == 604800
+        assert kwargs['refresh_limits'] is True
+
+    def test_parse_args_record_replay(self):
+        res = self.cls.parse_args([
+            '--replay-api-calls', '/tmp/calls.json.gz',
+            '--replay-latency', '0.05'
+        ])
+        assert res.record_file is None
+        assert res.replay_file == '/tmp/calls.json.gz'
+        assert res.replay_latency == 0.05
+        res = self.cls.parse_args(['--record-api-calls', '/tmp/c.json.gz'])
+        assert res.record_file == '/tmp/c.json.gz'
+        assert res.replay_file is None
+        assert res.replay_latency == 0.0
+
+    def test_parse_args_record_and_replay(self):
+        with pytest.raises(SystemExit):
+            self.cls.parse_args([
+                '--record-api-calls', 'a', '--replay-api-calls', 'b'
+            ])
+
+    def test_parse_args_regions(self):
+        res = self.cls.parse_args(['--regions', 'us-east-1', 'us-west-2'])
+        assert res.regions == ['us-east-1', 'us-west-2']
+
+    def test_parse_args_region_and_regions(self):
+        with pytest.raises(SystemExit):
+            self.cls.parse_args(['-r', 'us-east-1', '--regions', 'us-west-2'])
+
     def test_parse_args_skip_service_none(self):
         argv = []
         res = self.cls.parse_args(argv)
@@ -311,7 +514,18 @@ class TestAwsLimitCheckerRunner(object):
                 profile_name=None,
                 ta_refresh_mode=None,
                 ta_refresh_timeout=None,
-                check_version=True
+                check_version=True,
+                max_workers=None,
+                regions=None,
+                sts_cache_file=None,
+                ta_cache_file=None,
+                record_replay=None,
+                usage_cache_file=None,
+                usage_max_age=0,
+                service_usage_max_age={},
+                limit_cache_file=None,
+                limit_max_age=604800,
+                refresh_limits=False
             ),
             call().get_project_url(),
             call().get_version()
@@ -495,9 +709,49 @@ class TestAwsLimitCheckerRunner(object):
                  external_id=None, mfa_serial_number=None, mfa_token=None,
                  profile_name=None, region=None, ta_refresh_mode=None,
                  ta_refresh_timeout=None, warning_threshold=80,
-                 check_version=True)
+                 check_version=True, max_workers=None,
+                 regions=None, sts_cache_file=None,
+                 ta_cache_file=None, record_replay=None,
+                 usage_cache_file=None, usage_max_age=0,
+                 service_usage_max_age={},
+                 limit_cache_file=None, limit_max_age=604800,
+                 refresh_limits=False)
         ]
 
+    def test_entry_record(self):
+        argv = ['awslimitchecker', '--record-api-calls=/tmp/calls.json.gz']
+        with patch.object(sys, 'argv', argv):
+            with patch('%s.Runner.check_thresholds' % pb,
+                       autospec=True) as mock_check:
+                mock_check.return_value = 0
+                with patch('%s.AwsLimitChecker' % pb, autospec=True) as mock_c:
+                    with patch('%s.ApiRecorder' % pb,
+                               autospec=True) as mock_rec:
+                        with pytest.raises(SystemExit):
+                            self.cls.console_entry_point()
+        assert mock_rec.mock_calls == [
+            call('/tmp/calls.json.gz'),
+            call().save()
+        ]
+        assert mock_c.call_args[1]['record_replay'] == mock_rec.return_value
+
+    def test_entry_replay(self):
+        argv = ['awslimitchecker', '--replay-api-calls=/tmp/calls.json.gz',
+                '--replay-latency=0.1']
+        with patch.object(sys, 'argv', argv):
+            with patch('%s.Runner.check_thresholds' % pb,
+                       autospec=True) as mock_check:
+                mock_check.return_value = 0
+                with patch('%s.AwsLimitChecker' % pb, autospec=True) as mock_c:
+                    with patch('%s.ApiReplayer' % pb,
+                               autospec=True) as mock_rep:
+                        with pytest.raises(SystemExit):
+                            self.cls.console_entry_point()
+        assert mock_rep.mock_calls == [
+            call('/tmp/calls.json.gz', latency=0.1)
+        ]
+        assert mock_c.call_args[1]['record_replay'] == mock_rep.return_value
+
     def test_entry_skip_service(self):
         argv = ['awslimitchecker', '--skip-service=foo']
         with patch.object(sys, 'argv', argv):
@@ -513,7 +767,13 @@ class TestAwsLimitCheckerRunner(object):
                  external_id=None, mfa_serial_number=None, mfa_token=None,
                  profile_name=None, region=None, ta_refresh_mode=None,
                  ta_refresh_timeout=None, warning_threshold=80,
-                 check_version=True),
+                 check_version=True, max_workers=None,
+                 regions=None, sts_cache_file=None,
+                 ta_cache_file=None, record_replay=None,
+                 usage_cache_file=None, usage_max_age=0,
+                 service_usage_max_age={},
+                 limit_cache_file=None, limit_max_age=604800,
+                 refresh_limits=False),
             call().remove_services(['foo'])
         ]
 
@@ -536,7 +796,13 @@ class TestAwsLimitCheckerRunner(object):
                  external_id=None, mfa_serial_number=None, mfa_token=None,
                  profile_name=None, region=None, ta_refresh_mode=None,
                  ta_refresh_timeout=None, warning_threshold=80,
-                 check_version=True),
+                 check_version=True, max_workers=None,
+                 regions=None, sts_cache_file=None,
+                 ta_cache_file=None, record_replay=None,
+                 usage_cache_file=None, usage_max_age=0,
+                 service_usage_max_age={},
+                 limit_cache_file=None, limit_max_age=604800,
+                 refresh_limits=False),
             call().remove_services(['foo', 'bar'])
         ]
 
@@ -613,6 +879,78 @@ class TestAwsLimitCheckerRunner(object):
             call(self.cls)
         ]
 
+    def test_entry_timings(self):
+        argv = ['awslimitchecker', '-u', '--timings']
+        with patch.object(sys, 'argv', argv):
+            with patch.multiple(
+                '%s.Runner' % pb,
+                show_usage=DEFAULT,
+                print_timings=DEFAULT,
+                autospec=True
+            ) as mocks:
+                with pytest.raises(SystemExit) as excinfo:
+                    self.cls.console_entry_point()
+        assert excinfo.value.code == 0
+        assert mocks['show_usage'].mock_calls == [call(self.cls)]
+        assert mocks['print_timings'].mock_calls == [call(self.cls)]
+
+    def test_entry_no_timings(self):
+        argv = ['awslimitchecker', '-u']
+        with patch.object(sys, 'argv', argv):
+            with patch.multiple(
+                '%s.Runner' % pb,
+                show_usage=DEFAULT,
+                print_timings=DEFAULT,
+                autospec=True
+            ) as mocks:
+                with pytest.raises(SystemExit):
+                    self.cls.console_entry_point()
+        assert mocks['print_timings'].mock_calls == []
+
+    def test_print_timings(self, capsys):
+        mock_checker = Mock(spec_set=AwsLimitChecker)
+        mock_checker.get_timings.return_value = {
+            'SvcFoo': {
+                'find_usage': {
+                    'seconds': 1.23456, 'calls': 3, 'pages': 2,
+                    'bytes': 4567,
+                    'operations': {
+                        'foo.DescribeA': {'calls': 2, 'bytes': 4000},
+                        'foo.DescribeB': {'calls': 1, 'bytes': 567}
+                    }
+                }
+            },
+            'TrustedAdvisor': {
+                'update_limits': {
+                    'seconds': 0.5, 'calls': 0, 'pages': 0, 'bytes': 0,
+                    'operations': {}
+                }
+            }
+        }
+        self.cls.checker = mock_checker
+        self.cls.print_timings()
+        out, err = capsys.readouterr()
+        assert out == ''
+        assert err == (
+            'SvcFoo/find_usage                    1.235s      3 calls'
+            '      2 pages       4567 bytes\n'
+            'SvcFoo/find_usage/foo.DescribeA                  2 calls'
+            '                    4000 bytes\n'
+            'SvcFoo/find_usage/foo.DescribeB                  1 calls'
+            '                     567 bytes\n'
+            'TrustedAdvisor/update_limits         0.500s      0 calls'
+            '      0 pages          0 bytes\n'
+        )
+
+    def test_print_timings_empty(self, capsys):
+        mock_checker = Mock(spec_set=AwsLimitChecker)
+        mock_checker.get_timings.return_value = {}
+        self.cls.checker = mock_checker
+        self.cls.print_timings()
+        out, err = capsys.readouterr()
+        assert out == ''
+        assert err == ''
+
     def test_show_usage(self, capsys):
         limits = sample_limits()
         limits['SvcFoo']['foo limit3']._add_current_usage(33)
@@ -728,11 +1066,62 @@ class TestAwsLimitCheckerRunner(object):
                 profile_name=None,
                 ta_refresh_mode=None,
                 ta_refresh_timeout=None,
-                check_version=True
+                check_version=True,
+                max_workers=None,
+                regions=None,
+                sts_cache_file=None,
+                ta_cache_file=None,
+                record_replay=None,
+                usage_cache_file=None,
+                usage_max_age=0,
+                service_usage_max_age={},
+                limit_cache_file=None,
+                limit_max_age=604800,
+                refresh_limits=False
             )
         ]
         assert self.cls.service_name is None
 
+    def test_entry_regions_all(self, capsys):
+        argv = ['awslimitchecker', '--regions', 'all']
+        with patch.object(sys, 'argv', argv):
+            with patch('%s.Runner.check_thresholds' % pb,
+                       autospec=True) as mock_ct:
+                with patch('%s.AwsLimitChecker' % pb,
+                           spec_set=AwsLimitChecker) as mock_alc:
+                    with pytest.raises(SystemExit) as excinfo:
+                        mock_ct.return_value = 0
+                        self.cls.console_entry_point()
+        assert excinfo.value.code == 0
+        assert mock_alc.mock_calls == [
+            call(
+                warning_threshold=80,
+                critical_threshold=99,
+                account_id=None,
+                account_role=None,
+                region=None,
+                external_id=None,
+                mfa_serial_number=None,
+                mfa_token=None,
+                profile_name=None,
+                ta_refresh_mode=None,
+                ta_refresh_timeout=None,
+                check_version=True,
+                max_workers=None,
+                regions='all',
+                sts_cache_file=None,
+                ta_cache_file=None,
+                record_replay=None,
+                usage_cache_file=None,
+                usage_max_age=0,
+                service_usage_max_age={},
+                limit_cache_file=None,
+                limit_max_age=604800,
+                refresh_limits=False
+            )
+        ]
+        assert self.cls.multi_region is True
+
     def test_entry_no_service_name_sts(self, capsys):
         argv = [
             'awslimitchecker',
@@ -767,7 +1156,18 @@ class TestAwsLimitCheckerRunner(object):
                 profile_name=None,
                 ta_refresh_mode=None,
                 ta_refresh_timeout=None,
-                check_version=True
+                check_version=True,
+                max_workers=None,
+                regions=None,
+                sts_cache_file=None,
+                ta_cache_file=None,
+                record_replay=None,
+                usage_cache_file=None,
+                usage_max_age=0,
+                service_usage_max_age={},
+                limit_cache_file=None,
+                limit_max_age=604800,
+                refresh_limits=False
             )
         ]
         assert self.cls.service_name is None
@@ -809,7 +1209,18 @@ class TestAwsLimitCheckerRunner(object):
                 profile_name=None,
                 ta_refresh_mode=None,
                 ta_refresh_timeout=None,
-                check_version=False
+                check_version=False,
+                max_workers=None,
+                regions=None,
+                sts_cache_file=None,
+                ta_cache_file=None,
+                record_replay=None,
+                usage_cache_file=None,
+                usage_max_age=0,
+                service_usage_max_age={},
+                limit_cache_file=None,
+                limit_max_age=604800,
+                refresh_limits=False
             )
         ]
         assert self.cls.service_name is None
@@ -867,7 +1278,18 @@ class TestAwsLimitCheckerRunner(object):
                 profile_name=None,
                 ta_refresh_mode=None,
                 ta_refresh_timeout=None,
-                check_version=True
+                check_version=True,
+                max_workers=None,
+                regions=None,
+                sts_cache_file=None,
+                ta_cache_file=None,
+                record_replay=None,
+                usage_cache_file=None,
+                usage_max_age=0,
+                service_usage_max_age={},
+                limit_cache_file=None,
+                limit_max_age=604800,
+                refresh_limits=False
             )
         ]
 
@@ -894,7 +1316,18 @@ class TestAwsLimitCheckerRunner(object):
                 profile_name='myprof',
                 ta_refresh_mode=None,
                 ta_refresh_timeout=None,
-                check_version=True
+                check_version=True,
+                max_workers=None,
+                regions=None,
+                sts_cache_file=None,
+                ta_cache_file=None,
+                record_replay=None,
+                usage_cache_file=None,
+                usage_max_age=0,
+                service_usage_max_age={},
+                limit_cache_file=None,
+                limit_max_age=604800,
+                refresh_limits=False
             )
         ]
 
@@ -921,7 +1354,18 @@ class TestAwsLimitCheckerRunner(object):
                 profile_name=None,
                 ta_refresh_mode=None,
                 ta_refresh_timeout=None,
-                check_version=True
+                check_version=True,
+                max_workers=None,
+                regions=None,
+                sts_cache_file=None,
+                ta_cache_file=None,
+                record_replay=None,
+                usage_cache_file=None,
+                usage_max_age=0,
+                service_usage_max_age={},
+                limit_cache_file=None,
+                limit_max_age=604800,
+                refresh_limits=False
             )
         ]
 
@@ -949,7 +1393,18 @@ class TestAwsLimitCheckerRunner(object):
                 profile_name=None,
                 ta_refresh_mode=456,
                 ta_refresh_timeout=123,
-                check_version=True
+                check_version=True,
+                max_workers=None,
+                regions=None,
+                sts_cache_file=None,
+                ta_cache_file=None,
+                record_replay=None,
+                usage_cache_file=None,
+                usage_max_age=0,
+                service_usage_max_age={},
+                limit_cache_file=None,
+                limit_max_age=604800,
+                refresh_limits=False
             )
         ]
 
@@ -1088,6 +1543,52 @@ class TestAwsLimitCheckerRunner(object):
         ]
         assert res == 1
 
+    def test_check_thresholds_multi_region(self):
+        mock_limit1 = Mock(spec_set=AwsLimit)
+        mock_w1 = Mock(spec_set=AwsLimitUsage)
+        mock_limit1.get_warnings.return_value = [mock_w1]
+        mock_limit1.get_criticals.return_value = []
+
+        mock_checker = Mock(spec_set=AwsLimitChecker)
+        mock_checker.check_thresholds.return_value = {
+            'rB': {
+                'svc1': {
+                    'limit1': mock_limit1,
+                },
+            },
+        }
+
+        self.cls.checker = mock_checker
+        self.cls.multi_region = True
+        with patch('awslimitchecker.runner.Runner.print_issue',
+                   autospec=True) as mock_print:
+            mock_print.return_value = ('', '')
+            with patch('awslimitchecker.runner.dict2cols') as mock_d2c:
+                mock_d2c.return_value = 'd2cval'
+                res = self.cls.check_thresholds()
+        assert mock_print.mock_calls == [
+            call(self.cls, 'rB/svc1', mock_limit1, [], [mock_w1]),
+        ]
+        assert res == 1
+
+    def test_list_defaults_multi_region(self, capsys):
+        mock_checker = Mock(spec_set=AwsLimitChecker)
+        mock_checker.get_limits.return_value = {
+            'rA': sample_limits(),
+            'rB': {'SvcFoo': sample_limits()['SvcFoo']}
+        }
+        self.cls.checker = mock_checker
+        self.cls.multi_region = True
+        with patch('awslimitchecker.runner.dict2cols') as mock_d2c:
+            mock_d2c.return_value = 'd2cval'
+            self.cls.list_defaults()
+        assert sorted(mock_d2c.mock_calls[0][1][0].keys()) == [
+            'rA/SvcBar/bar limit2',
+            'rA/SvcBar/barlimit1',
+            'rA/SvcFoo/foo limit3',
+            'rB/SvcFoo/foo limit3',
+        ]
+
     def test_check_thresholds_warn_one_service(self):
         """just warnings"""
         mock_limit1 = Mock(spec_set=AwsLimit)
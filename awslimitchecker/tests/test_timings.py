@@ -0,0 +1,211 @@
+"""
+awslimitchecker/tests/test_timings.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+##############################################################################
+Copyright 2015-2017 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+##############################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+##############################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+##############################################################################
+"""
+
+import sys
+import threading
+
+from awslimitchecker.responsecache import CONTEXT_HIT_KEY
+from awslimitchecker.timings import (
+    Timings, get_context, run_in_context, record_page
+)
+
+# https://code.google.com/p/mock/issues/detail?id=249
+# py>=3.4 should use unittest.mock not the mock package on pypi
+if (
+        sys.version_info[0] < 3 or
+        sys.version_info[0] == 3 and sys.version_info[1] < 4
+):
+    from mock import patch, call, Mock
+else:
+    from unittest.mock import patch, call, Mock
+
+pbm = 'awslimitchecker.timings'
+
+
+class TestContext(object):
+
+    def test_no_context(self):
+        assert get_context() is None
+        # no-op outside of a timed operation
+        record_page()
+
+    def test_timed_context(self):
+        cls = Timings()
+        with cls.timed('r', 'svc', 'find_usage'):
+            assert get_context() == (cls, ('r', 'svc', 'find_usage'))
+            with cls.timed('r', 'svc', 'inner'):
+                assert get_context() == (cls, ('r', 'svc', 'inner'))
+            assert get_context() == (cls, ('r', 'svc', 'find_usage'))
+        assert get_context() is None
+
+    def test_run_in_context(self):
+        cls = Timings()
+        res = []
+
+        def func(x):
+            record_page()
+            res.append(x)
+            return get_context()
+
+        with cls.timed('r', 'svc', 'find_usage'):
+            ctx = get_context()
+        t = threading.Thread(
+            target=lambda: res.append(run_in_context(ctx, func, 'a'))
+        )
+        t.start()
+        t.join()
+        assert res == ['a', ctx]
+        assert cls.get_timings()['r']['svc']['find_usage']['pages'] == 1
+        assert get_context() is None
+
+    def test_run_in_context_none(self):
+        func = Mock()
+        assert run_in_context(None, func, 1, 2) == func.return_value
+        assert func.mock_calls == [call(1, 2)]
+        assert get_context() is None
+
+    def test_run_in_context_exception(self):
+        cls = Timings()
+        func = Mock(side_effect=RuntimeError)
+        try:
+            run_in_context((cls, ('r', 's', 'p')), func)
+        except RuntimeError:
+            pass
+        assert get_context() is None
+
+
+class TestTimings(object):
+
+    def test_timed(self):
+        cls = Timings()
+        with patch('%s.time.time' % pbm) as mock_time:
+            mock_time.side_effect = [10.0, 12.5, 20.0, 21.0]
+            with cls.timed('r1', 'svc', 'find_usage'):
+                record_page()
+                record_page()
+            with cls.timed('r1', 'svc', 'find_usage'):
+                record_page()
+        assert cls.get_timings() == {
+            'r1': {
+                'svc': {
+                    'find_usage': {
+                        'seconds': 3.5,
+                        'calls': 0,
+                        'pages': 3,
+                        'bytes': 0,
+                        'operations': {}
+                    }
+                }
+            }
+        }
+
+    def test_timed_exception(self):
+        cls = Timings()
+        try:
+            with cls.timed(None, 'svc', 'find_usage'):
+                raise RuntimeError()
+        except RuntimeError:
+            pass
+        assert get_context() is None
+        assert cls.get_timings()[None]['svc']['find_usage']['seconds'] >= 0
+
+    def test_register(self):
+        cls = Timings()
+        client = Mock()
+        cls.register(client, 'ec2')
+        assert len(client.meta.events.register.mock_calls) == 1
+        args = client.meta.events.register.mock_calls[0][1]
+        assert args[0] == 'after-call'
+        assert args[1].func == cls._after_call
+        assert args[1].args == ('ec2',)
+
+    def test_after_call(self):
+        cls = Timings()
+        model = Mock()
+        model.name = 'DescribeFoo'
+        resp = Mock(content=b'0123456789')
+        with cls.timed('r1', 'svc', 'find_usage'):
+            cls._after_call('ec2', http_response=resp, model=model)
+            cls._after_call('ec2', http_response=resp, model=model)
+            cls._after_call('ec2', http_response=None, model=model)
+        res = cls.get_timings()['r1']['svc']['find_usage']
+        assert res['calls'] == 3
+        assert res['bytes'] == 20
+        assert res['pages'] == 0
+        assert res['operations'] == {
+            'ec2.DescribeFoo': {'calls': 3, 'bytes': 20}
+        }
+
+    def test_after_call_cache_hit(self):
+        cls = Timings()
+        model = Mock()
+        model.name = 'DescribeFoo'
+        with cls.timed('r1', 'svc', 'find_usage'):
+            cls._after_call('ec2', http_response=None, model=model,
+                            context={CONTEXT_HIT_KEY: True})
+            cls._after_call('ec2', http_response=None, model=model,
+                            context={})
+        assert cls.get_timings()['r1']['svc']['find_usage']['calls'] == 1
+
+    def test_after_call_not_timed(self):
+        cls = Timings()
+        other = Timings()
+        model = Mock()
+        model.name = 'DescribeFoo'
+        cls._after_call('ec2', http_response=Mock(content=b'x'), model=model)
+        with other.timed('r1', 'svc', 'find_usage'):
+            cls._after_call('ec2', http_response=Mock(content=b'x'),
+                            model=model)
+        assert cls.get_timings() == {}
+        assert other.get_timings()['r1']['svc']['find_usage']['calls'] == 0
+
+    def test_get_timings_copies(self):
+        cls = Timings()
+        model = Mock()
+        model.name = 'Op'
+        with cls.timed('r1', 'svc', 'find_usage'):
+            cls._after_call('api', http_response=None, model=model)
+        res = cls.get_timings()
+        res['r1']['svc']['find_usage']['operations']['api.Op']['calls'] = 9
+        res['r1']['svc']['find_usage']['calls'] = 9
+        res = cls.get_timings()
+        assert res['r1']['svc']['find_usage']['calls'] == 1
+        assert res['r1']['svc']['find_usage']['operations'] == {
+            'api.Op': {'calls': 1, 'bytes': 0}
+        }
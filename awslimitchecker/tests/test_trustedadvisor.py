@@ -37,9 +37,12 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 ##############################################################################
 """
 
+import json
 import sys
 from botocore.exceptions import ClientError
-from awslimitchecker.trustedadvisor import TrustedAdvisor, datetime_now
+from awslimitchecker.trustedadvisor import (
+    TrustedAdvisor, TrustedAdvisorCache, get_ta_cache, datetime_now
+)
 from awslimitchecker.services.base import _AwsService
 from awslimitchecker.limit import AwsLimit
 import pytest
@@ -86,9 +89,12 @@ class TestInit(object):
             'region_name': 'us-east-1'
         }
         assert cls.all_services == {}
+        assert cls.ta_services is None
         assert cls.limits_updated is False
         assert cls.refresh_mode is None
         assert cls.refresh_timeout is None
+        assert cls.account_id is None
+        assert cls.cache is None
 
     def test_boto_kwargs(self):
         mock_svc = Mock(spec_set=_AwsService)
@@ -116,6 +122,13 @@ class TestInit(object):
         assert cls.refresh_mode == 123
         assert cls.refresh_timeout == 456
 
+    def test_cache_file(self, tmpdir):
+        path = str(tmpdir.join('ta.json'))
+        cls = TrustedAdvisor({}, {}, cache_file=path, account_id='1234')
+        assert cls.account_id == '1234'
+        assert cls.cache is get_ta_cache(path)
+        assert cls.cache.path == path
+
 
 class TestUpdateLimits(object):
 
@@ -135,7 +148,11 @@ class TestUpdateLimits(object):
         }
 
     def test_simple(self):
-        mock_results = Mock()
+        mock_results = {
+            'us-east-1': {'SvcFoo': {'lim1': 1}, 'IAM': {'lim2': 3}},
+            'us-west-2': {'SvcFoo': {'lim1': 2}},
+            None: {'IAM': {'lim3': 4}}
+        }
         with patch('%s.connect' % pb, autospec=True) as mock_connect:
             with patch('%s._poll' % pb, autospec=True) as mock_poll:
                 with patch('%s._update_services' % pb,
@@ -145,8 +162,51 @@ class TestUpdateLimits(object):
         assert mock_connect.mock_calls == [call(self.cls)]
         assert mock_poll.mock_calls == [call(self.cls)]
         assert mock_update_services.mock_calls == [
-            call(self.cls, mock_results)
+            call(self.cls, {
+                'SvcFoo': {'lim1': 1},
+                'IAM': {'lim2': 3, 'lim3': 4}
+            })
         ]
+        assert self.cls.ta_services == {}
+        assert self.cls.limits_updated is True
+
+    def test_region_tas(self):
+        mock_results = {
+            'us-east-1': {'SvcFoo': {'lim1': 1}},
+            'us-west-2': {'SvcFoo': {'lim1': 2}},
+            'eu-west-1': {'SvcFoo': {'lim1': 3}},
+            None: {'IAM': {'lim3': 4}}
+        }
+        self.cls.ta_region = 'us-east-1'
+        ta2 = TrustedAdvisor({}, {'region_name': 'us-west-2'})
+        ta3 = TrustedAdvisor({}, {'region_name': 'eu-west-1'})
+        ta3.limits_updated = True
+        with patch('%s.connect' % pb, autospec=True) as mock_connect:
+            with patch('%s._poll' % pb, autospec=True) as mock_poll:
+                with patch('%s._update_services' % pb,
+                           autospec=True) as mock_update_services:
+                    mock_poll.return_value = mock_results
+                    self.cls.update_limits(region_tas=[self.cls, ta2, ta3])
+        assert mock_connect.mock_calls == [call(self.cls)]
+        assert mock_poll.mock_calls == [call(self.cls)]
+        assert mock_update_services.mock_calls == [
+            call(self.cls, {'SvcFoo': {'lim1': 1}, 'IAM': {'lim3': 4}}),
+            call(ta2, {'SvcFoo': {'lim1': 2}, 'IAM': {'lim3': 4}})
+        ]
+        assert ta2.conn is None
+        assert ta2.ta_services == {}
+        assert ta2.limits_updated is True
+
+    def test_ta_services_built_once(self):
+        self.cls.ta_services = {'foo': {}}
+        with patch('%s.connect' % pb, autospec=True):
+            with patch('%s._poll' % pb, autospec=True):
+                with patch('%s._update_services' % pb, autospec=True):
+                    with patch('%s._make_ta_service_dict' % pb,
+                               autospec=True) as mock_make:
+                        self.cls.update_limits()
+        assert mock_make.mock_calls == []
+        assert self.cls.ta_services == {'foo': {}}
 
     def test_again(self):
         mock_results = Mock()
@@ -165,6 +225,11 @@ class TestUpdateLimits(object):
             call.debug('Already polled TA; skipping update')
         ]
 
+    def test_invalidate(self):
+        self.cls.limits_updated = True
+        self.cls.invalidate()
+        assert self.cls.limits_updated is False
+
 
 class TestGetLimitCheckId(object):
 
@@ -443,15 +508,24 @@ class TestPoll(object):
             call(self.cls, 'foo')
         ]
         assert res == {
-            'AutoScaling': {
-                'Launch configurations': 20,
-                'Auto Scaling groups': 40,
+            'us-east-1': {
+                'AutoScaling': {
+                    'Launch configurations': 20,
+                    'Auto Scaling groups': 40,
+                },
+                'EC2': {
+                    'On-Demand instances - t2.micro': 'Unlimited'
+                }
             },
-            'EC2': {
-                'On-Demand instances - t2.micro': 'Unlimited'
+            'us-west-2': {
+                'AutoScaling': {
+                    'Auto Scaling groups': 20,
+                }
             },
-            'IAM': {
-                'Users': 5000
+            None: {
+                'IAM': {
+                    'Users': 5000
+                }
             }
         }
 
@@ -567,15 +641,24 @@ class TestPoll(object):
             call(self.cls, 'foo')
         ]
         assert res == {
-            'AutoScaling': {
-                'Launch configurations': 20,
-                'Auto Scaling groups': 40,
+            'us-east-1': {
+                'AutoScaling': {
+                    'Launch configurations': 20,
+                    'Auto Scaling groups': 40,
+                },
+                'EC2': {
+                    'On-Demand instances - t2.micro': 'Unlimited'
+                }
             },
-            'EC2': {
-                'On-Demand instances - t2.micro': 'Unlimited'
+            'us-west-2': {
+                'AutoScaling': {
+                    'Auto Scaling groups': 20,
+                }
             },
-            'IAM': {
-                'Users': 5000
+            None: {
+                'IAM': {
+                    'Users': 5000
+                }
             }
         }
 
@@ -664,14 +747,20 @@ class TestPoll(object):
         assert mock_hr.mock_calls == [
             call(self.cls, 'foo')
         ]
-        assert res == {
-            'AutoScaling': {
-                'Auto Scaling groups': 20,
-            },
-            'IAM': {
-                'Users': 5000
-            }
-        }
+        with patch('%s._update_services' % pb, autospec=True) as mock_us:
+            with patch('%s._make_ta_service_dict' % pb, autospec=True):
+                self.cls._update_from_results(res, 'us-east-1')
+        assert mock_us.mock_calls == [
+            call(self.cls, {
+                'AutoScaling': {
+                    'Auto Scaling groups': 20,
+                },
+                'IAM': {
+                    'Users': 5000
+                }
+            })
+        ]
+        assert self.cls.limits_updated is True
 
     def test_dont_have_ta(self):
         self.cls.have_ta = False
@@ -911,6 +1000,196 @@ class TestGetCheckResult(object):
         assert res == (check_result, None)
 
 
+class TestTrustedAdvisorCache(object):
+
+    def test_get_missing(self, tmpdir):
+        cache = TrustedAdvisorCache(str(tmpdir.join('ta.json')))
+        assert cache.get('1234') == {}
+
+    def test_update(self, tmpdir):
+        path = str(tmpdir.join('foo', 'ta.json'))
+        cache = TrustedAdvisorCache(path)
+        cache.update('1234', check_id='abc', metadata=['a', 'b'])
+        cache.update('1234', result={'check_id': 'abc', 'response': {}})
+        cache.update('5678', check_id='def')
+        assert cache.get('1234') == {
+            'check_id': 'abc',
+            'metadata': ['a', 'b'],
+            'result': {'check_id': 'abc', 'response': {}}
+        }
+        with open(path, 'r') as fh:
+            data = json.loads(fh.read())
+        assert sorted(data.keys()) == ['1234', '5678']
+        # a new instance reads the file
+        assert TrustedAdvisorCache(path).get('5678') == {'check_id': 'def'}
+
+    def test_get_unreadable(self, tmpdir):
+        path = tmpdir.join('ta.json')
+        path.write('not json')
+        cache = TrustedAdvisorCache(str(path))
+        with patch('awslimitchecker.utils.logger',
+                   autospec=True) as mock_logger:
+            assert cache.get('1234') == {}
+        assert mock_logger.warning.call_count == 1
+
+    def test_save_failure(self, tmpdir):
+        # parent "directory" is a file
+        tmpdir.join('foo').write('')
+        cache = TrustedAdvisorCache(str(tmpdir.join('foo', 'ta.json')))
+        with patch('awslimitchecker.utils.logger',
+                   autospec=True) as mock_logger:
+            cache.update('1234', check_id='abc')
+        assert mock_logger.warning.call_count == 1
+
+    def test_get_ta_cache(self, tmpdir):
+        path = str(tmpdir.join('ta.json'))
+        cache = get_ta_cache(path)
+        assert isinstance(cache, TrustedAdvisorCache)
+        assert get_ta_cache(path) is cache
+        assert get_ta_cache(str(tmpdir.join('other.json'))) is not cache
+
+
+class TestCachedResults(object):
+
+    def setup(self):
+        self.mock_conn = Mock()
+        self.mock_client_config = Mock()
+        type(self.mock_client_config).region_name = 'us-east-1'
+        type(self.mock_conn)._client_config = self.mock_client_config
+        self.cache = Mock(spec_set=TrustedAdvisorCache)
+        self.cls = TrustedAdvisor({}, {}, account_id='1234')
+        self.cls.cache = self.cache
+        self.cls.conn = self.mock_conn
+        self.check_result = {
+            'result': {
+                'timestamp': '2015-06-15T20:27:42Z',
+                'flaggedResources': []
+            }
+        }
+
+    def test_check_id_cached(self):
+        self.cache.get.return_value = {'check_id': 'abc', 'metadata': ['a']}
+        res = self.cls._get_limit_check_id()
+        assert res == ('abc', ['a'])
+        assert self.mock_conn.mock_calls == []
+        assert self.cache.mock_calls == [call.get('1234')]
+
+    def test_check_id_not_cached(self):
+        self.cache.get.return_value = {}
+        self.mock_conn.describe_trusted_advisor_checks.return_value = {
+            'checks': [{
+                'category': 'performance',
+                'name': 'Service Limits',
+                'id': 'abc',
+                'metadata': ['a']
+            }]
+        }
+        res = self.cls._get_limit_check_id()
+        assert res == ('abc', ['a'])
+        assert self.cache.mock_calls == [
+            call.get('1234'),
+            call.update('1234', check_id='abc', metadata=['a'])
+        ]
+
+    def test_result_cached(self):
+        self.cache.get.return_value = {
+            'result': {'check_id': 'abc', 'response': self.check_result}
+        }
+        m_sum = self.mock_conn.describe_trusted_advisor_check_summaries
+        m_sum.return_value = {
+            'summaries': [{'timestamp': '2015-06-15T20:27:42Z'}]
+        }
+        res = self.cls._get_check_result('abc')
+        assert res == (
+            self.check_result,
+            datetime(2015, 6, 15, 20, 27, 42, tzinfo=utc)
+        )
+        assert self.mock_conn.mock_calls == [
+            call.describe_trusted_advisor_check_summaries(checkIds=['abc'])
+        ]
+        assert self.cache.mock_calls == [call.get('1234')]
+
+    def test_result_refreshed(self):
+        self.cache.get.return_value = {
+            'result': {'check_id': 'abc', 'response': self.check_result}
+        }
+        m_sum = self.mock_conn.describe_trusted_advisor_check_summaries
+        m_sum.return_value = {
+            'summaries': [{'timestamp': '2015-06-16T01:02:03Z'}]
+        }
+        new_result = {'result': {'timestamp': '2015-06-16T01:02:03Z'}}
+        self.mock_conn.describe_trusted_advisor_check_result.return_value = \
+            new_result
+        res = self.cls._get_check_result('abc')
+        assert res == (
+            new_result,
+            datetime(2015, 6, 16, 1, 2, 3, tzinfo=utc)
+        )
+        assert self.mock_conn.mock_calls == [
+            call.describe_trusted_advisor_check_summaries(checkIds=['abc']),
+            call.describe_trusted_advisor_check_result(
+                checkId='abc', language='en')
+        ]
+        assert self.cache.mock_calls == [
+            call.get('1234'),
+            call.update('1234', result={
+                'check_id': 'abc', 'response': new_result
+            })
+        ]
+
+    def test_result_other_check(self):
+        self.cache.get.return_value = {
+            'result': {'check_id': 'def', 'response': self.check_result}
+        }
+        self.mock_conn.describe_trusted_advisor_check_result.return_value = \
+            self.check_result
+        self.cls._get_check_result('abc')
+        assert self.mock_conn.mock_calls == [
+            call.describe_trusted_advisor_check_result(
+                checkId='abc', language='en')
+        ]
+
+    def test_result_summary_exception(self):
+        self.cache.get.return_value = {
+            'result': {'check_id': 'abc', 'response': self.check_result}
+        }
+        m_sum = self.mock_conn.describe_trusted_advisor_check_summaries
+        m_sum.side_effect = RuntimeError('foo')
+        self.mock_conn.describe_trusted_advisor_check_result.return_value = \
+            self.check_result
+        with patch('%s.logger' % pbm, autospec=True) as mock_logger:
+            self.cls._get_check_result('abc')
+        assert self.mock_conn.describe_trusted_advisor_check_result\
+            .mock_calls == [call(checkId='abc', language='en')]
+        assert mock_logger.warning.call_count == 1
+
+    def test_account_id_from_sts(self):
+        self.cls.account_id = None
+        self.cache.get.return_value = {}
+        with patch('%s._client' % pb, autospec=True) as mock_client:
+            mock_client.return_value.get_caller_identity.return_value = {
+                'Account': '5678'
+            }
+            self.cls._cache_get()
+            self.cls._cache_get()
+        assert mock_client.mock_calls == [
+            call(self.cls, 'sts'),
+            call().get_caller_identity()
+        ]
+        assert self.cache.mock_calls == [call.get('5678'), call.get('5678')]
+
+    def test_account_id_exception(self):
+        self.cls.account_id = None
+        with patch('%s._client' % pb, autospec=True) as mock_client:
+            mock_client.return_value.get_caller_identity.side_effect = \
+                RuntimeError('foo')
+            with patch('%s.logger' % pbm, autospec=True):
+                assert self.cls._cache_get() == {}
+                self.cls._cache_update(check_id='abc')
+        assert self.cls.cache is None
+        assert self.cache.mock_calls == []
+
+
 class TestCanRefreshCheck(object):
 
     def setup(self):
@@ -1033,19 +1312,19 @@ class TestPollForRefresh(object):
         ]
         assert gcr.mock_calls == [call(self.cls, 'abc123')]
         assert mock_sleep.mock_calls == [
-            call(30), call(30), call(30)
+            call(5), call(10), call(20)
         ]
         assert mock_dt_now.mock_calls == [
-            call(), call(), call(), call(), call()
+            call(), call(), call(), call()
         ]
         assert mock_logger.mock_calls == [
             call.warning('Polling for TA check %s refresh...', 'abc123'),
             call.debug('Checking refresh status'),
-            call.info('Refresh status: %s; sleeping 30s', 'none'),
+            call.info('Refresh status: %s; sleeping %ds', 'none', 5),
             call.debug('Checking refresh status'),
-            call.info('Refresh status: %s; sleeping 30s', 'enqueued'),
+            call.info('Refresh status: %s; sleeping %ds', 'enqueued', 10),
             call.debug('Checking refresh status'),
-            call.info('Refresh status: %s; sleeping 30s', 'processing'),
+            call.info('Refresh status: %s; sleeping %ds', 'processing', 20),
             call.debug('Checking refresh status'),
             call.info('Refresh status: %s; done polling', 'success'),
             call.info('Done polling for check refresh'),
@@ -1053,14 +1332,14 @@ class TestPollForRefresh(object):
         ]
 
     def test_timeout(self):
-        self.cls.refresh_timeout = 45
+        self.cls.refresh_timeout = 12
         check_dt = datetime(2016, 12, 16, hour=10, minute=30, second=12,
                             tzinfo=utc)
         now_dts = [
             datetime(2016, 12, 16, hour=11, minute=30, second=0, tzinfo=utc),
-            datetime(2016, 12, 16, hour=11, minute=30, second=0, tzinfo=utc),
-            datetime(2016, 12, 16, hour=11, minute=30, second=30, tzinfo=utc),
-            datetime(2016, 12, 16, hour=11, minute=31, second=0, tzinfo=utc),
+            datetime(2016, 12, 16, hour=11, minute=30, second=5, tzinfo=utc),
+            datetime(2016, 12, 16, hour=11, minute=30, second=12, tzinfo=utc),
+            datetime(2016, 12, 16, hour=11, minute=30, second=13, tzinfo=utc),
         ]
         status = {'statuses': [{'status': 'processing'}]}
         m_s = self.mock_conn.describe_trusted_advisor_check_refresh_statuses
@@ -1074,14 +1353,17 @@ class TestPollForRefresh(object):
                         res = self.cls._poll_for_refresh('abc123')
         assert res == {'foo': 'bar'}
         assert self.mock_conn.mock_calls == [
+            call.describe_trusted_advisor_check_refresh_statuses(
+                checkIds=['abc123']),
             call.describe_trusted_advisor_check_refresh_statuses(
                 checkIds=['abc123']),
             call.describe_trusted_advisor_check_refresh_statuses(
                 checkIds=['abc123'])
         ]
         assert gcr.mock_calls == [call(self.cls, 'abc123')]
+        # the second and third sleeps are cut short by the timeout
         assert mock_sleep.mock_calls == [
-            call(30), call(30)
+            call(5), call(7), call(1)
         ]
         assert mock_dt_now.mock_calls == [
             call(), call(), call(), call()
@@ -1089,9 +1371,11 @@ class TestPollForRefresh(object):
         assert mock_logger.mock_calls == [
             call.warning('Polling for TA check %s refresh...', 'abc123'),
             call.debug('Checking refresh status'),
-            call.info('Refresh status: %s; sleeping 30s', 'processing'),
+            call.info('Refresh status: %s; sleeping %ds', 'processing', 5),
             call.debug('Checking refresh status'),
-            call.info('Refresh status: %s; sleeping 30s', 'processing'),
+            call.info('Refresh status: %s; sleeping %ds', 'processing', 7),
+            call.debug('Checking refresh status'),
+            call.info('Refresh status: %s; sleeping %ds', 'processing', 1),
             call.error('Timed out waiting for TA Check refresh; status=%s',
                        'processing'),
             call.info('Done polling for check refresh'),
@@ -1132,19 +1416,19 @@ class TestPollForRefresh(object):
         ]
         assert gcr.mock_calls == [call(self.cls, 'abc123')]
         assert mock_sleep.mock_calls == [
-            call(30), call(30), call(30)
+            call(5), call(10), call(20)
         ]
         assert mock_dt_now.mock_calls == [
-            call(), call(), call(), call(), call()
+            call(), call(), call(), call()
         ]
         assert mock_logger.mock_calls == [
             call.warning('Polling for TA check %s refresh...', 'abc123'),
             call.debug('Checking refresh status'),
-            call.info('Refresh status: %s; sleeping 30s', 'none'),
+            call.info('Refresh status: %s; sleeping %ds', 'none', 5),
             call.debug('Checking refresh status'),
-            call.info('Refresh status: %s; sleeping 30s', 'enqueued'),
+            call.info('Refresh status: %s; sleeping %ds', 'enqueued', 10),
             call.debug('Checking refresh status'),
-            call.info('Refresh status: %s; sleeping 30s', 'processing'),
+            call.info('Refresh status: %s; sleeping %ds', 'processing', 20),
             call.debug('Checking refresh status'),
             call.warning('Trusted Advisor check refresh status went '
                          'from "%s" to "%s"; refresh is either complete '
@@ -0,0 +1,145 @@
+"""
+awslimitchecker/tests/test_usagecache.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+##############################################################################
+Copyright 2015-2017 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+##############################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+##############################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+##############################################################################
+"""
+
+import json
+import os
+import sys
+
+from awslimitchecker.usagecache import UsageCache, get_usage_cache
+
+# https://code.google.com/p/mock/issues/detail?id=249
+# py>=3.4 should use unittest.mock not the mock package on pypi
+if (
+        sys.version_info[0] < 3 or
+        sys.version_info[0] == 3 and sys.version_info[1] < 4
+):
+    from mock import patch
+else:
+    from unittest.mock import patch
+
+pbm = 'awslimitchecker.usagecache'
+pb_utils = 'awslimitchecker.utils'
+
+USAGE = {'Foo': [[1, 'r1', 'AWS::Foo'], [2.5, None, None]]}
+
+
+class TestUsageCache(object):
+
+    def test_get_missing_file(self, tmpdir):
+        cls = UsageCache(str(tmpdir.join('usage.json')))
+        assert cls.get('123', 'us-east-1', 'EC2', 600) is None
+
+    def test_set_get(self, tmpdir):
+        path = str(tmpdir.join('sub', 'usage.json'))
+        cls = UsageCache(path)
+        with patch('%s.time.time' % pbm) as mock_time:
+            mock_time.return_value = 1000
+            cls.set('123', 'us-east-1', 'EC2', USAGE)
+            mock_time.return_value = 1100
+            assert cls.get('123', 'us-east-1', 'EC2', 100) == USAGE
+            assert cls.get('123', 'us-east-1', 'EC2', 99) is None
+            assert cls.get('123', 'us-east-2', 'EC2', 100) is None
+            assert cls.get('456', 'us-east-1', 'EC2', 100) is None
+            assert cls.get('123', 'us-east-1', 'IAM', 100) is None
+        with open(path, 'r') as fh:
+            data = json.loads(fh.read())
+        assert data == {'123/us-east-1/EC2': {'time': 1000, 'usage': USAGE}}
+        assert os.listdir(str(tmpdir.join('sub'))) == ['usage.json']
+
+    def test_set_keeps_other_entries(self, tmpdir):
+        path = str(tmpdir.join('usage.json'))
+        UsageCache(path).set('123', 'us-east-1', 'EC2', USAGE)
+        # a second process's instance, writing the same file
+        UsageCache(path).set('123', 'us-east-1', 'IAM', {})
+        cls = UsageCache(path)
+        assert cls.get('123', 'us-east-1', 'EC2', 600) == USAGE
+        assert cls.get('123', 'us-east-1', 'IAM', 600) == {}
+
+    def test_set_many(self, tmpdir):
+        path = str(tmpdir.join('usage.json'))
+        cls = UsageCache(path)
+        cls.set('123', 'us-east-1', 'IAM', {})
+        with patch('%s.time.time' % pbm) as mock_time:
+            mock_time.return_value = 1000
+            with patch.object(cls, '_save', wraps=cls._save) as mock_save:
+                cls.set_many([
+                    ('123', 'us-east-1', 'EC2', USAGE),
+                    ('123', 'us-east-2', 'EC2', {})
+                ])
+                cls.set_many([])
+        assert mock_save.call_count == 1
+        with open(path, 'r') as fh:
+            data = json.loads(fh.read())
+        assert sorted(data.keys()) == [
+            '123/us-east-1/EC2', '123/us-east-1/IAM', '123/us-east-2/EC2'
+        ]
+        assert data['123/us-east-1/EC2'] == {'time': 1000, 'usage': USAGE}
+        assert data['123/us-east-2/EC2'] == {'time': 1000, 'usage': {}}
+
+    def test_get_unreadable(self, tmpdir):
+        path = tmpdir.join('usage.json')
+        path.write('not json')
+        cls = UsageCache(str(path))
+        with patch('%s.logger' % pb_utils, autospec=True) as mock_logger:
+            assert cls.get('123', 'us-east-1', 'EC2', 600) is None
+        assert mock_logger.warning.call_count == 1
+        # an unreadable file is replaced on the next update
+        cls.set('123', 'us-east-1', 'EC2', USAGE)
+        assert cls.get('123', 'us-east-1', 'EC2', 600) == USAGE
+
+    def test_set_unwritable(self, tmpdir):
+        path = str(tmpdir.join('usage.json'))
+        cls = UsageCache(path)
+        with patch('%s.os.rename' % pb_utils) as mock_rename:
+            mock_rename.side_effect = OSError('foo')
+            with patch('%s.logger' % pb_utils, autospec=True) as mock_logger:
+                cls.set('123', 'us-east-1', 'EC2', USAGE)
+        assert mock_logger.warning.call_count == 1
+        assert cls.get('123', 'us-east-1', 'EC2', 600) is None
+
+
+class TestGetUsageCache(object):
+
+    def test_shared(self, tmpdir):
+        path = str(tmpdir.join('usage.json'))
+        res = get_usage_cache(path)
+        assert isinstance(res, UsageCache)
+        assert res.path == path
+        assert get_usage_cache(path) is res
+        assert get_usage_cache(str(tmpdir.join('other.json'))) is not res
@@ -38,13 +38,22 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 """
 
 import argparse
+import json
+import os
 import pytest
 import sys
+import threading
+import time
 
 from awslimitchecker.utils import (
-    StoreKeyValuePair, dict2cols, paginate_dict, _get_dict_value_by_path,
-    _set_dict_value_by_path, _get_latest_version
+    StoreKeyValuePair, dict2cols, paginate_dict, paginate_iter, count_iter,
+    _get_dict_value_by_path,
+    _set_dict_value_by_path, pool_map, lazy_import, WorkerBudget,
+    _newer_version, _latest_version_cache_path, _read_latest_version_cache,
+    _write_latest_version_cache, check_latest_version, BackgroundCall,
+    write_json_file, JsonFileCache, get_file_cache
 )
+from awslimitchecker.timings import Timings, run_in_context
 
 # https://code.google.com/p/mock/issues/detail?id=249
 # py>=3.4 should use unittest.mock not the mock package on pypi
@@ -52,9 +61,9 @@ if (
         sys.version_info[0] < 3 or
         sys.version_info[0] == 3 and sys.version_info[1] < 4
 ):
-    from mock import call, Mock, patch
+    from mock import call, Mock, patch, ANY
 else:
-    from unittest.mock import call, Mock, patch
+    from unittest.mock import call, Mock, patch, ANY
 
 pbm = 'awslimitchecker.utils'
 
@@ -266,15 +275,17 @@ class TestPaginateDict(object):
 
         func.side_effect = [res1, res2, res3]
 
-        res = paginate_dict(
-            func,
-            'foo',
-            bar='baz',
-            alc_marker_path=['k1', 'k2', 'Marker'],
-            alc_data_path=['k1', 'k2', 'Data'],
-            alc_marker_param='MarkerParam'
-        )
+        with patch('%s.record_page' % pbm) as mock_rp:
+            res = paginate_dict(
+                func,
+                'foo',
+                bar='baz',
+                alc_marker_path=['k1', 'k2', 'Marker'],
+                alc_data_path=['k1', 'k2', 'Data'],
+                alc_marker_param='MarkerParam'
+            )
         assert res == expected
+        assert mock_rp.mock_calls == [call(), call(), call()]
         assert func.mock_calls == [
             call('foo', bar='baz'),
             call(
@@ -290,6 +301,380 @@ class TestPaginateDict(object):
         ]
 
 
+class TestPaginateIter(object):
+
+    def test_no_marker_path(self):
+        func = Mock()
+
+        with pytest.raises(Exception) as excinfo:
+            paginate_iter(func)
+        ex_str = "alc_marker_path must be specified for queries " \
+                 "that return a dict."
+        assert ex_str in str(excinfo)
+        assert func.mock_calls == []
+
+    def test_no_marker_param(self):
+        func = Mock()
+
+        with pytest.raises(Exception) as excinfo:
+            paginate_iter(
+                func,
+                alc_marker_path=[],
+                alc_data_path=[]
+            )
+        ex_str = "alc_marker_param must be specified for queries " \
+                 "that return a dict."
+        assert ex_str in str(excinfo)
+
+    def test_lazy(self):
+        func = Mock()
+        func.return_value = {'Data': [1, 2]}
+
+        res = paginate_iter(
+            func,
+            alc_marker_path=['Marker'],
+            alc_data_path=['Data'],
+            alc_marker_param='Marker'
+        )
+        assert func.mock_calls == []
+        assert list(res) == [1, 2]
+        assert func.mock_calls == [call()]
+
+    def test_bad_path(self):
+        func = Mock()
+        func.return_value = {'k1': {'badpath': {}}}
+
+        res = paginate_iter(
+            func,
+            alc_marker_path=['k1', 'k2', 'Marker'],
+            alc_data_path=['k1', 'k2', 'Data'],
+            alc_marker_param='Marker'
+        )
+        assert list(res) == []
+        assert func.mock_calls == [call()]
+
+    def test_three_pages(self):
+        func = Mock()
+        func.side_effect = [
+            {'k1': {'Data': [1, 2], 'Marker': 'marker1'}},
+            {'k1': {'Data': [], 'Marker': 'marker2'}},
+            {'k1': {'Data': [3]}}
+        ]
+
+        with patch('%s.record_page' % pbm) as mock_rp:
+            res = list(paginate_iter(
+                func,
+                'foo',
+                bar='baz',
+                alc_marker_path=['k1', 'Marker'],
+                alc_data_path=['k1', 'Data'],
+                alc_marker_param='MarkerParam'
+            ))
+        assert res == [1, 2, 3]
+        assert mock_rp.mock_calls == [call(), call(), call()]
+        assert func.mock_calls == [
+            call('foo', bar='baz'),
+            call('foo', bar='baz', MarkerParam='marker1'),
+            call('foo', bar='baz', MarkerParam='marker2')
+        ]
+
+    def test_count_iter(self):
+        assert count_iter(iter([])) == 0
+        assert count_iter(x for x in range(5)) == 5
+
+
+class TestLazyImport(object):
+
+    def test_lazy(self):
+        with patch('%s.import_module' % pbm) as mock_import:
+            mock_import.return_value.foo = 'bar'
+            res = lazy_import('some.module')
+            assert mock_import.mock_calls == []
+            assert repr(res) == '<lazy module some.module>'
+            assert res.foo == 'bar'
+            assert res.foo == 'bar'
+        assert mock_import.mock_calls == [call('some.module')]
+
+    def test_real_module(self):
+        res = lazy_import('json')
+        assert res.loads('[1]') == [1]
+        assert 'loads' in dir(res)
+
+    def test_missing_module(self):
+        res = lazy_import('awslimitchecker.nonexistent_module')
+        with pytest.raises(ImportError):
+            res.foo
+
+
+class TestPoolMap(object):
+
+    def test_serial(self):
+        func = Mock(side_effect=lambda x: x * 2)
+        with patch('%s.multiprocessing_pool.ThreadPool' % pbm) as mock_pool:
+            res = pool_map(func, [1, 2, 3])
+        assert res == [2, 4, 6]
+        assert func.mock_calls == [call(1), call(2), call(3)]
+        assert mock_pool.mock_calls == []
+
+    def test_serial_one_worker(self):
+        with patch('%s.multiprocessing_pool.ThreadPool' % pbm) as mock_pool:
+            res = pool_map(lambda x: x * 2, [1, 2, 3], max_workers=1)
+        assert res == [2, 4, 6]
+        assert mock_pool.mock_calls == []
+
+    def test_serial_one_item(self):
+        with patch('%s.multiprocessing_pool.ThreadPool' % pbm) as mock_pool:
+            res = pool_map(lambda x: x * 2, [3], max_workers=4)
+        assert res == [6]
+        assert mock_pool.mock_calls == []
+
+    def test_pool(self):
+        func = Mock()
+        with patch('%s.multiprocessing_pool.ThreadPool' % pbm) as mock_pool:
+            with patch('%s.get_context' % pbm) as mock_ctx:
+                mock_pool.return_value.map.return_value = [4, 5]
+                res = pool_map(func, (x for x in [1, 2]), max_workers=8)
+        assert res == [4, 5]
+        assert mock_pool.mock_calls == [
+            call(2),
+            call().map(ANY, [1, 2]),
+            call().close(),
+            call().join()
+        ]
+        wrapped = mock_pool.return_value.map.call_args[0][0]
+        assert wrapped.func == run_in_context
+        assert wrapped.args == (mock_ctx.return_value, func)
+
+    def test_pool_threads(self):
+        res = pool_map(lambda x: x * 2, range(10), max_workers=3)
+        assert res == [0, 2, 4, 6, 8, 10, 12, 14, 16, 18]
+
+    def test_pool_threads_timings(self):
+        timings = Timings()
+        with timings.timed('r', 'svc', 'find_usage'):
+            pool_map(lambda x: paginate_dict(
+                Mock(return_value={'Data': [x]}),
+                alc_marker_path=['Marker'], alc_data_path=['Data'],
+                alc_marker_param='Marker'
+            ), range(4), max_workers=2)
+        assert timings.get_timings()['r']['svc']['find_usage']['pages'] == 4
+
+    def test_pool_exception(self):
+        def func(x):
+            if x == 2:
+                raise RuntimeError('foo')
+            return x
+
+        with pytest.raises(RuntimeError):
+            pool_map(func, [1, 2, 3], max_workers=2)
+
+
+class TestWorkerBudget(object):
+
+    def test_acquire_release(self):
+        cls = WorkerBudget(4)
+        assert cls.max_workers == 4
+        assert cls.acquire(2) == 2
+        assert cls.acquire(5) == 1
+        assert cls.acquire(1) == 0
+        cls.release()
+        assert cls.acquire(0) == 0
+        assert cls.acquire(3) == 1
+
+    def test_one_worker(self):
+        assert WorkerBudget(1).acquire(3) == 0
+        assert WorkerBudget(0).acquire(3) == 0
+
+
+class TestPoolMapBudget(object):
+
+    def test_threads(self):
+        budget = WorkerBudget(3)
+        threads = set()
+
+        def func(x):
+            threads.add(threading.current_thread().name)
+            time.sleep(0.01)
+            return x * 2
+
+        with patch('%s.multiprocessing_pool.ThreadPool' % pbm) as mock_pool:
+            res = pool_map(func, range(10), max_workers=3, budget=budget)
+        assert res == [0, 2, 4, 6, 8, 10, 12, 14, 16, 18]
+        assert mock_pool.mock_calls == []
+        # the calling thread works too
+        assert threading.current_thread().name in threads
+        assert len(threads) <= 3
+        # all threads were returned
+        assert budget.acquire(5) == 2
+
+    def test_exhausted(self):
+        budget = WorkerBudget(3)
+        budget.acquire(2)
+        threads = set()
+
+        def func(x):
+            threads.add(threading.current_thread().name)
+            return x
+
+        assert pool_map(func, [1, 2, 3], max_workers=3, budget=budget) == [
+            1, 2, 3
+        ]
+        assert threads == set([threading.current_thread().name])
+
+    def test_nested(self):
+        budget = WorkerBudget(4)
+        lock = threading.Lock()
+        counts = {'now': 0, 'max': 0}
+
+        def leaf(x):
+            with lock:
+                counts['now'] += 1
+                counts['max'] = max(counts['max'], counts['now'])
+            time.sleep(0.01)
+            with lock:
+                counts['now'] -= 1
+            return x
+
+        def outer(x):
+            return sum(pool_map(
+                leaf, range(x), max_workers=4, budget=budget
+            ))
+
+        res = pool_map(outer, [4, 5, 6], max_workers=4, budget=budget)
+        assert res == [6, 10, 15]
+        assert 1 <= counts['max'] <= 4
+        assert budget.acquire(5) == 3
+
+    def test_timings(self):
+        timings = Timings()
+        with timings.timed('r', 'svc', 'find_usage'):
+            pool_map(lambda x: paginate_dict(
+                Mock(return_value={'Data': [x]}),
+                alc_marker_path=['Marker'], alc_data_path=['Data'],
+                alc_marker_param='Marker'
+            ), range(4), max_workers=2, budget=WorkerBudget(2))
+        assert timings.get_timings()['r']['svc']['find_usage']['pages'] == 4
+
+    def test_exception(self):
+        budget = WorkerBudget(2)
+        calls = []
+
+        def func(x):
+            calls.append(x)
+            if x == 2:
+                raise RuntimeError('foo')
+            return x
+
+        with pytest.raises(RuntimeError):
+            pool_map(func, [1, 2, 3], max_workers=2, budget=budget)
+        assert sorted(calls) == [1, 2, 3]
+        assert budget.acquire(1) == 1
+
+
+class TestBackgroundCall(object):
+
+    def test_result(self):
+        func = Mock(return_value='foo')
+        bg = BackgroundCall(func, 1, 2)
+        assert bg.wait() == 'foo'
+        assert func.mock_calls == [call(1, 2)]
+        assert bg._thread.daemon is True
+
+    def test_runs_in_background(self):
+        started = []
+
+        def func():
+            time.sleep(0.2)
+            started.append('func')
+            return 'done'
+
+        bg = BackgroundCall(func)
+        started.append('caller')
+        assert bg.wait() == 'done'
+        assert started == ['caller', 'func']
+
+    def test_exception(self):
+        func = Mock(side_effect=RuntimeError('foo'))
+        bg = BackgroundCall(func)
+        with pytest.raises(RuntimeError) as excinfo:
+            bg.wait()
+        assert str(excinfo.value) == 'foo'
+
+    def test_timings(self):
+        timings = Timings()
+        with timings.timed('r', 'svc', 'find_usage'):
+            BackgroundCall(lambda: paginate_dict(
+                Mock(return_value={'Data': [1]}),
+                alc_marker_path=['Marker'], alc_data_path=['Data'],
+                alc_marker_param='Marker'
+            )).wait()
+        assert timings.get_timings()['r']['svc']['find_usage']['pages'] == 1
+
+
+class TestWriteJsonFile(object):
+
+    def test_write(self, tmpdir):
+        path = str(tmpdir.join('sub', 'foo.json'))
+        write_json_file(path, {'foo': [1, 2]}, mode=0o600)
+        with open(path, 'r') as fh:
+            assert json.loads(fh.read()) == {'foo': [1, 2]}
+        assert os.stat(path).st_mode & 0o777 == 0o600
+        assert os.listdir(str(tmpdir.join('sub'))) == ['foo.json']
+
+
+class CacheTester(JsonFileCache):
+
+    _description = 'tester'
+
+
+class TestJsonFileCache(object):
+
+    def test_load_save(self, tmpdir):
+        path = str(tmpdir.join('foo.json'))
+        cls = CacheTester(path)
+        assert cls._load() == {}
+        cls._save({'a': 1})
+        assert CacheTester(path)._load() == {'a': 1}
+
+    def test_no_path(self):
+        cls = CacheTester(None)
+        cls._save({'a': 1})
+        assert cls._load() == {}
+
+    def test_load_invalid(self, tmpdir):
+        path = tmpdir.join('foo.json')
+        path.write('not json')
+        with patch('%s.logger' % pbm, autospec=True) as mock_logger:
+            assert CacheTester(str(path))._load() == {}
+        assert mock_logger.mock_calls == [
+            call.warning('Unable to read %s cache %s', 'tester', str(path),
+                         exc_info=True)
+        ]
+
+    def test_save_error(self, tmpdir):
+        path = str(tmpdir.join('foo.json'))
+        with patch('%s.os.rename' % pbm) as mock_rename:
+            mock_rename.side_effect = OSError('foo')
+            with patch('%s.logger' % pbm, autospec=True) as mock_logger:
+                CacheTester(path)._save({'a': 1})
+        assert mock_logger.mock_calls == [
+            call.warning('Unable to write %s cache %s', 'tester', path,
+                         exc_info=True)
+        ]
+
+
+class TestGetFileCache(object):
+
+    def test_shared(self, tmpdir):
+        path = str(tmpdir.join('foo.json'))
+        res = get_file_cache(CacheTester, path)
+        assert isinstance(res, CacheTester)
+        assert res.path == path
+        assert get_file_cache(CacheTester, path) is res
+        assert get_file_cache(JsonFileCache, path) is not res
+        assert get_file_cache(CacheTester, str(tmpdir.join('x'))) is not res
+
+
 class TestDictFuncs(object):
 
     def test_get_dict_value_by_path(self):
@@ -406,54 +791,134 @@ class TestDictFuncs(object):
         assert res == d
 
 
-class TestGetCurrentVersion(object):
+class TestNewerVersion(object):
 
-    def test_exception(self):
+    def test_newer(self):
         with patch('%s._VERSION_TUP' % pbm, (0, 2, 3)):
-            with patch('%s.requests' % pbm, autospec=True) as mock_req:
-                with patch('%s.logger' % pbm, autospec=True) as mock_logger:
-                    mock_req.get.side_effect = RuntimeError()
-                    res = _get_latest_version()
-        assert res is None
+            assert _newer_version('1.0.1') == '1.0.1'
+
+    def test_equal(self):
+        with patch('%s._VERSION_TUP' % pbm, (0, 2, 3)):
+            assert _newer_version('0.2.3') is None
+
+    def test_none(self):
+        assert _newer_version(None) is None
+
+    def test_invalid(self):
+        with patch('%s.logger' % pbm, autospec=True) as mock_logger:
+            assert _newer_version('foo') is None
         assert mock_logger.mock_calls == [
-            call.debug('Error getting latest version from PyPI', exc_info=True)
+            call.debug('Error parsing version %s', 'foo', exc_info=True)
         ]
 
-    def test_older(self):
-        mock_resp = Mock()
-        mock_resp.json.return_value = {
-            'info': {'version': '1.0.1'}
-        }
-        with patch('%s._VERSION_TUP' % pbm, (0, 2, 3)):
-            with patch('%s.requests' % pbm, autospec=True) as mock_req:
-                with patch('%s.logger' % pbm, autospec=True) as mock_logger:
-                    mock_req.get.return_value = mock_resp
-                    res = _get_latest_version()
-        assert res == '1.0.1'
-        assert mock_logger.mock_calls == []
 
-    def test_equal(self):
-        mock_resp = Mock()
-        mock_resp.json.return_value = {
-            'info': {'version': '0.2.3'}
-        }
-        with patch('%s._VERSION_TUP' % pbm, (0, 2, 3)):
-            with patch('%s.requests' % pbm, autospec=True) as mock_req:
-                with patch('%s.logger' % pbm, autospec=True) as mock_logger:
-                    mock_req.get.return_value = mock_resp
-                    res = _get_latest_version()
+class TestLatestVersionCache(object):
+
+    def test_cache_path(self):
+        with patch.dict(os.environ, {'XDG_CACHE_HOME': '/foo'}):
+            res = _latest_version_cache_path()
+        assert res == os.path.join('/foo', 'awslimitchecker',
+                                   'latest_version.json')
+
+    def test_write_read(self, tmpdir):
+        path = str(tmpdir.join('sub', 'cache.json'))
+        _write_latest_version_cache(path, '1.2.3')
+        assert _read_latest_version_cache(path, 60) == (True, '1.2.3')
+
+    def test_read_expired(self, tmpdir):
+        path = str(tmpdir.join('cache.json'))
+        with open(path, 'w') as fh:
+            fh.write(json.dumps({
+                'checked': time.time() - 120, 'version': '1.2.3'
+            }))
+        assert _read_latest_version_cache(path, 60) == (False, None)
+
+    def test_read_failed(self, tmpdir):
+        path = str(tmpdir.join('cache.json'))
+        with open(path, 'w') as fh:
+            fh.write(json.dumps({
+                'checked': time.time() - 120, 'version': None
+            }))
+        assert _read_latest_version_cache(path, 600) == (True, None)
+        assert _read_latest_version_cache(path, 600, failed_ttl=60) == (
+            False, None
+        )
+        assert _read_latest_version_cache(path, 60, failed_ttl=600) == (
+            False, None
+        )
+
+    def test_read_missing(self, tmpdir):
+        path = str(tmpdir.join('cache.json'))
+        assert _read_latest_version_cache(path, 60) == (False, None)
+
+    def test_read_invalid(self, tmpdir):
+        path = str(tmpdir.join('cache.json'))
+        with open(path, 'w') as fh:
+            fh.write('not json')
+        assert _read_latest_version_cache(path, 60) == (False, None)
+
+    def test_write_error(self, tmpdir):
+        path = str(tmpdir.join('cache.json'))
+        with patch('%s.logger' % pbm, autospec=True) as mock_logger:
+            with patch('%s.os.rename' % pbm) as mock_rename:
+                mock_rename.side_effect = OSError('foo')
+                _write_latest_version_cache(path, '1.2.3')
+        assert mock_logger.mock_calls == [
+            call.debug('Unable to write latest version cache %s', path,
+                       exc_info=True)
+        ]
+
+
+class TestCheckLatestVersion(object):
+
+    def test_cached(self, tmpdir):
+        path = str(tmpdir.join('cache.json'))
+        _write_latest_version_cache(path, '99.0.0')
+        cb = Mock()
+        with patch('%s._get_pypi_version' % pbm) as mock_pypi:
+            res = check_latest_version(cb, cache_path=path)
         assert res is None
-        assert mock_logger.mock_calls == []
+        assert cb.mock_calls == [call('99.0.0')]
+        assert mock_pypi.mock_calls == []
+
+    def test_background(self, tmpdir):
+        path = str(tmpdir.join('cache.json'))
+        cb = Mock()
+
+        def se():
+            # the attempt is recorded before PyPI is queried
+            assert _read_latest_version_cache(path, 60) == (True, None)
+            return '99.0.0'
+
+        with patch('%s._get_pypi_version' % pbm) as mock_pypi:
+            mock_pypi.side_effect = se
+            t = check_latest_version(cb, cache_path=path)
+            t.join()
+        assert t.daemon is True
+        assert cb.mock_calls == [call('99.0.0')]
+        assert _read_latest_version_cache(path, 60) == (True, '99.0.0')
+
+    def test_background_failure(self, tmpdir):
+        path = str(tmpdir.join('cache.json'))
+        cb = Mock()
+        with patch('%s._get_pypi_version' % pbm) as mock_pypi:
+            mock_pypi.return_value = None
+            t = check_latest_version(cb, cache_path=path)
+            t.join()
+            # the failure is not retried until it expires
+            assert check_latest_version(cb, cache_path=path) is None
+        assert cb.mock_calls == [call(None), call(None)]
+        assert mock_pypi.mock_calls == [call()]
+        assert _read_latest_version_cache(path, 60) == (True, None)
 
-    def test_newer(self):
-        mock_resp = Mock()
-        mock_resp.json.return_value = {
-            'info': {'version': '0.1.2'}
-        }
-        with patch('%s._VERSION_TUP' % pbm, (0, 2, 3)):
-            with patch('%s.requests' % pbm, autospec=True) as mock_req:
-                with patch('%s.logger' % pbm, autospec=True) as mock_logger:
-                    mock_req.get.return_value = mock_resp
-                    res = _get_latest_version()
+    def test_exception(self):
+        cb = Mock()
+        with patch('%s._latest_version_cache_path' % pbm) as mock_path:
+            with patch('%s.logger' % pbm, autospec=True) as mock_logger:
+                mock_path.side_effect = RuntimeError()
+                res = check_latest_version(cb)
         assert res is None
-        assert mock_logger.mock_calls == []
+        assert cb.mock_calls == []
+        assert mock_logger.mock_calls == [
+            call.debug('Error checking latest version', exc_info=True)
+        ]
@@ -43,6 +43,7 @@ from versionfinder.versioninfo import VersionInfo
 
 import re
 import sys
+import pytest
 from logging import CRITICAL
 
 # https://code.google.com/p/mock/issues/detail?id=249
@@ -58,10 +59,32 @@ else:
 
 class TestVersion(object):
 
+    def setup(self):
+        version._version_info = None
+
+    def teardown(self):
+        version._version_info = None
+
     def test_project_url(self):
         expected = 'https://github.com/jantman/awslimitchecker'
         assert version._PROJECT_URL == expected
 
+    def test_find_version(self):
+        with patch('versionfinder.find_version') as mock_ver:
+            mock_ver.return_value = 'foo'
+            res = version.find_version('awslimitchecker')
+        assert res == 'foo'
+        assert mock_ver.mock_calls == [call('awslimitchecker')]
+
+    def test_find_version_import_error(self):
+        with patch.dict('sys.modules', {'versionfinder': None}):
+            with patch('awslimitchecker.version.logger') as mock_logger:
+                with pytest.raises(ImportError):
+                    version.find_version('awslimitchecker')
+        assert mock_logger.mock_calls == [
+            call.error('Unable to import versionfinder', exc_info=True)
+        ]
+
     def test__get_version_info(self):
         with patch('awslimitchecker.version.find_version') as mock_ver:
             mock_ver.return_value = VersionInfo(
@@ -102,6 +125,18 @@ class TestVersion(object):
         assert v.commit == '12345678'
         assert mock_ver.mock_calls == [call('awslimitchecker')]
 
+    def test__get_version_info_memoized(self):
+        with patch('awslimitchecker.version.find_version') as mock_ver:
+            mock_ver.return_value = VersionInfo(
+                pip_url=version._PROJECT_URL,
+                pip_version=version._VERSION,
+                git_tag='foobar'
+            )
+            v1 = version._get_version_info()
+            v2 = version._get_version_info()
+        assert v1 is v2
+        assert mock_ver.mock_calls == [call('awslimitchecker')]
+
     def test__get_version_info_fallback(self):
         def se(foo):
             raise Exception("foo")
@@ -0,0 +1,226 @@
+"""
+awslimitchecker/timings.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+##############################################################################
+Copyright 2015-2017 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+##############################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+##############################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+##############################################################################
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+
+from .responsecache import CONTEXT_HIT_KEY
+
+logger = logging.getLogger(__name__)
+
+#: Per-thread stack of ``(Timings, key)`` tuples for the operations currently
+#: being timed; the innermost one is charged for API calls and pages.
+_local = threading.local()
+
+
+def _stack():
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+
+def get_context():
+    """
+    Return the operation currently being timed in this thread, so that work
+    handed off to other threads can be charged to it via
+    :py:func:`~.run_in_context`.
+
+    :returns: opaque context object, or None
+    """
+    stack = _stack()
+    if len(stack) == 0:
+        return None
+    return stack[-1]
+
+
+def run_in_context(context, function_ref, *args):
+    """
+    Call ``function_ref(*args)`` with ``context`` (as returned by
+    :py:func:`~.get_context` in another thread) as the operation being timed
+    in this thread.
+
+    :param context: context returned by :py:func:`~.get_context`
+    :param function_ref: the function to call
+    :type function_ref: function
+    :returns: the return value of ``function_ref``
+    """
+    if context is None:
+        return function_ref(*args)
+    stack = _stack()
+    stack.append(context)
+    try:
+        return function_ref(*args)
+    finally:
+        stack.pop()
+
+
+def record_page():
+    """
+    Record that one page of a paginated result was fetched, against the
+    operation currently being timed in this thread (if any).
+    """
+    context = get_context()
+    if context is not None:
+        timings, key = context
+        timings._add(key, pages=1)
+
+
+class Timings(object):
+    """
+    Thread-safe record of how long each service's usage collection and limit
+    lookups took, and of the AWS API calls, result pages and response bytes
+    they needed.
+
+    Operations are timed with :py:meth:`~.timed`. API calls are counted by
+    registering each boto3 client with :py:meth:`~.register` (which
+    :py:class:`~.ClientPool` does), and are charged to the innermost
+    operation being timed in the calling thread; pages are counted by
+    :py:func:`~awslimitchecker.utils.paginate_dict` via
+    :py:func:`~.record_page`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    @staticmethod
+    def _new_stats():
+        return {
+            'seconds': 0.0,
+            'calls': 0,
+            'pages': 0,
+            'bytes': 0,
+            'operations': {}
+        }
+
+    def _add(self, key, seconds=0.0, calls=0, pages=0, nbytes=0,
+             operation=None):
+        with self._lock:
+            stats = self._stats.setdefault(key, self._new_stats())
+            stats['seconds'] += seconds
+            stats['calls'] += calls
+            stats['pages'] += pages
+            stats['bytes'] += nbytes
+            if operation is not None:
+                op = stats['operations'].setdefault(
+                    operation, {'calls': 0, 'bytes': 0}
+                )
+                op['calls'] += calls
+                op['bytes'] += nbytes
+
+    @contextmanager
+    def timed(self, region_name, service_name, phase):
+        """
+        Context manager that times the enclosed block and charges the API
+        calls and pages it makes (in this thread, or in threads started via
+        :py:func:`~.run_in_context`) to the given service and phase.
+
+        :param region_name: region name the service is checking
+        :type region_name: str
+        :param service_name: name of the service, or ``TrustedAdvisor``
+        :type service_name: str
+        :param phase: name of the operation, e.g. ``find_usage``
+        :type phase: str
+        """
+        key = (region_name, service_name, phase)
+        stack = _stack()
+        stack.append((self, key))
+        start = time.time()
+        try:
+            yield
+        finally:
+            stack.pop()
+            self._add(key, seconds=(time.time() - start))
+
+    def register(self, client, api_name):
+        """
+        Count all API calls made by a boto3 client, and the size of their
+        responses.
+
+        :param client: boto3 client
+        :param api_name: name of the AWS API the client connects to
+        :type api_name: str
+        """
+        client.meta.events.register(
+            'after-call', partial(self._after_call, api_name)
+        )
+
+    def _after_call(self, api_name, http_response=None, model=None,
+                    context=None, **kwargs):
+        """
+        botocore ``after-call`` event handler; charge the call to the
+        operation being timed in this thread, if it is one of ours and was
+        actually sent (not answered by a :py:class:`~.ResponseCache`).
+        """
+        if (context or {}).get(CONTEXT_HIT_KEY):
+            return
+        context = get_context()
+        if context is None or context[0] is not self:
+            return
+        nbytes = 0
+        content = getattr(http_response, 'content', None)
+        if content is not None:
+            nbytes = len(content)
+        self._add(
+            context[1], calls=1, nbytes=nbytes,
+            operation='{a}.{o}'.format(a=api_name, o=model.name)
+        )
+
+    def get_timings(self):
+        """
+        Return the recorded timings.
+
+        :returns: dict of region name to dict of service name to dict of
+          phase name to dict with keys ``seconds``, ``calls``, ``pages``,
+          ``bytes`` and ``operations`` (a dict of "api.Operation" to a dict
+          with keys ``calls`` and ``bytes``)
+        :rtype: dict
+        """
+        res = {}
+        with self._lock:
+            for (rname, sname, phase), stats in self._stats.items():
+                d = dict(stats)
+                d['operations'] = dict(
+                    (k, dict(v)) for k, v in stats['operations'].items()
+                )
+                res.setdefault(rname, {}).setdefault(sname, {})[phase] = d
+        return res
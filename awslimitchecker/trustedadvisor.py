@@ -38,16 +38,79 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 """
 
 from botocore.exceptions import ClientError
-from dateutil import parser
 import logging
 from .connectable import Connectable
+from .utils import lazy_import, JsonFileCache, get_file_cache
 from datetime import datetime, timedelta
-from pytz import utc
 from time import sleep
 from copy import deepcopy
 
 logger = logging.getLogger(__name__)
 
+parser = lazy_import('dateutil.parser')
+pytz = lazy_import('pytz')
+
+#: Seconds to wait before the first poll of a Trusted Advisor check refresh
+#: status; the interval doubles after every poll, up to
+#: :py:data:`~.TA_POLL_INTERVAL_MAX`.
+TA_POLL_INTERVAL_MIN = 5
+
+#: Maximum number of seconds to wait between polls of a Trusted Advisor check
+#: refresh status.
+TA_POLL_INTERVAL_MAX = 30
+
+
+class TrustedAdvisorCache(JsonFileCache):
+    """
+    Thread-safe on-disk cache of Trusted Advisor data (see
+    :py:class:`~.JsonFileCache`), keyed by AWS account ID. For each account,
+    this holds the ID and metadata of the "Service Limits" check, which never
+    change, and the last check result fetched; :py:class:`~.TrustedAdvisor`
+    reuses that result until the check has been refreshed since. Use
+    :py:func:`~.get_ta_cache` to get the shared instance for a given path.
+    """
+
+    _description = 'Trusted Advisor'
+
+    def get(self, account_id):
+        """
+        Return the cache entry for an account; a dict that may contain
+        ``check_id`` and ``metadata`` (the Service Limits check ID and
+        metadata) and ``result`` (a dict of the ``check_id`` the result is
+        for, and the DescribeTrustedAdvisorCheckResult ``response``).
+
+        :param account_id: AWS Account ID
+        :type account_id: str
+        :rtype: dict
+        """
+        with self._lock:
+            return self._load().get(account_id, {})
+
+    def update(self, account_id, **values):
+        """
+        Update the cache entry for an account with the given keys and values
+        (see :py:meth:`~.get`), and persist the cache.
+
+        :param account_id: AWS Account ID
+        :type account_id: str
+        """
+        with self._lock:
+            data = self._load()
+            data.setdefault(account_id, {}).update(values)
+            self._save(data)
+
+
+def get_ta_cache(path):
+    """
+    Return the process-wide :py:class:`~.TrustedAdvisorCache` for ``path``,
+    creating it if needed.
+
+    :param path: path to the JSON file to persist the cache to
+    :type path: str
+    :rtype: :py:class:`~.TrustedAdvisorCache`
+    """
+    return get_file_cache(TrustedAdvisorCache, path)
+
 
 class TrustedAdvisor(Connectable):
     """
@@ -59,7 +122,8 @@ class TrustedAdvisor(Connectable):
     api_name = 'support'
 
     def __init__(self, all_services, boto_connection_kwargs,
-                 ta_refresh_mode=None, ta_refresh_timeout=None):
+                 ta_refresh_mode=None, ta_refresh_timeout=None,
+                 client_pool=None, cache_file=None, account_id=None):
         """
         Class to contain all TrustedAdvisor-related logic.
 
@@ -110,6 +174,16 @@ class TrustedAdvisor(Connectable):
           parameter is not None, only wait up to this number of seconds for the
           refresh to finish before continuing on anyway.
         :type ta_refresh_timeout: :py:class:`int` or :py:data:`None`
+        :param client_pool: pool to get shared boto3 clients from; if None,
+          a new client is created.
+        :type client_pool: :py:class:`~.ClientPool`
+        :param cache_file: if set, path to a JSON file to cache the Service
+          Limits check ID, metadata and result in across runs (see
+          :py:class:`~.TrustedAdvisorCache`).
+        :type cache_file: str
+        :param account_id: AWS Account ID that the cache is keyed by; if None
+          and ``cache_file`` is set, it is found with STS GetCallerIdentity.
+        :type account_id: str
         """
         self.conn = None
         self.have_ta = True
@@ -118,43 +192,93 @@ class TrustedAdvisor(Connectable):
         ta_kwargs = deepcopy(boto_connection_kwargs)
         ta_kwargs['region_name'] = 'us-east-1'
         self._boto3_connection_kwargs = ta_kwargs
+        self._client_pool = client_pool
         self.refresh_mode = ta_refresh_mode
         self.refresh_timeout = ta_refresh_timeout
         self.all_services = all_services
-        self.ta_services = self._make_ta_service_dict()
+        # built on first use, so constructing this class does not require
+        # instantiating every service
+        self.ta_services = None
         self.limits_updated = False
+        self.account_id = account_id
+        self.cache = None
+        if cache_file is not None:
+            self.cache = get_ta_cache(cache_file)
 
-    def update_limits(self):
+    def update_limits(self, region_tas=None):
         """
         Poll 'Service Limits' check results from Trusted Advisor, if possible.
         Iterate over all :py:class:`~.AwsLimit` objects for the given services
         and update their limits from TA if present in TA checks.
 
-        :param services: dict of service name (string) to
-          :py:class:`~._AwsService` objects
-        :type services: dict
+        The check result covers every region, so in a multi-region run one
+        poll can update the limits of every region's services; pass the
+        other regions' instances as ``region_tas``.
+
+        :param region_tas: other :py:class:`~.TrustedAdvisor` instances for
+          the same account (one per region) to update from this poll;
+          instances that have already been updated are skipped.
+        :type region_tas: list
         """
         if self.limits_updated:
             logger.debug('Already polled TA; skipping update')
             return
         self.connect()
         ta_results = self._poll()
-        self._update_services(ta_results)
+        default_region = self.conn._client_config.region_name
+        tas = [self]
+        for ta in (region_tas or []):
+            if ta is not self and not ta.limits_updated:
+                tas.append(ta)
+        for ta in tas:
+            ta._update_from_results(ta_results, default_region)
+
+    def invalidate(self):
+        """
+        Forget that limits have been updated from Trusted Advisor, so that
+        the next :py:meth:`~.update_limits` call polls it again.
+        """
+        self.limits_updated = False
+
+    def _update_from_results(self, ta_results, default_region):
+        """
+        Update limits from the results of a :py:meth:`~._poll` (possibly made
+        by the instance for another region) for this instance's region.
+
+        :param ta_results: results returned by :py:meth:`~._poll`
+        :type ta_results: dict
+        :param default_region: region to use if this instance was not
+          given one
+        :type default_region: str
+        """
+        region = self.ta_region or default_region
+        if self.ta_services is None:
+            self.ta_services = self._make_ta_service_dict()
+        res = {}
+        # limits without a region apply to every region
+        for key in (None, region):
+            for svc_name, limits in (ta_results or {}).get(key, {}).items():
+                res.setdefault(svc_name, {}).update(limits)
+        self._update_services(res)
         self.limits_updated = True
 
     def _poll(self):
         """
         Poll Trusted Advisor (Support) API for limit checks.
 
-        Return a dict of service name (string) keys to nested dict vals, where
-        each key is a limit name and each value the current numeric limit.
+        Return a dict of region name keys (None for limits that do not have
+        a region) to nested dicts of service name (string) keys to nested dict
+        vals, where each key is a limit name and each value the current numeric
+        limit.
 
         e.g.:
         ::
 
             {
-                'EC2': {
-                    'SomeLimit': 10,
+                'us-east-1': {
+                    'EC2': {
+                        'SomeLimit': 10,
+                    }
                 }
             }
 
@@ -170,14 +294,12 @@ class TrustedAdvisor(Connectable):
             return
         check_id, metadata = tmp
         checks = self._get_refreshed_check_result(check_id)
-        region = self.ta_region or self.conn._client_config.region_name
         res = {}
         for check in checks['result']['flaggedResources']:
-            if 'region' in check and check['region'] != region:
-                continue
             data = dict(zip(metadata, check['metadata']))
-            if data['Service'] not in res:
-                res[data['Service']] = {}
+            svc_res = res.setdefault(check.get('region'), {}).setdefault(
+                data['Service'], {}
+            )
             try:
                 val = int(data['Limit Amount'])
             except ValueError:
@@ -191,7 +313,7 @@ class TrustedAdvisor(Connectable):
                     logger.debug('TrustedAdvisor setting explicit "Unlimited" '
                                  'limit for %s - %s', data['Service'],
                                  data['Limit Name'])
-            res[data['Service']][data['Limit Name']] = val
+            svc_res[data['Limit Name']] = val
         logger.info("Finished TrustedAdvisor poll")
         return res
 
@@ -204,6 +326,10 @@ class TrustedAdvisor(Connectable):
           metadata (list), or (None, None).
         :rtype: tuple
         """
+        cached = self._cache_get()
+        if 'check_id' in cached:
+            logger.debug("Using cached TA check; id=%s", cached['check_id'])
+            return (cached['check_id'], cached['metadata'])
         logger.debug("Querying Trusted Advisor checks")
         try:
             checks = self.conn.describe_trusted_advisor_checks(
@@ -225,6 +351,9 @@ class TrustedAdvisor(Connectable):
                             check['name'] == 'Service Limits'
             ):
                 logger.debug("Found TA check; id=%s", check['id'])
+                self._cache_update(
+                    check_id=check['id'], metadata=check['metadata']
+                )
                 return (
                     check['id'],
                     check['metadata']
@@ -261,7 +390,7 @@ class TrustedAdvisor(Connectable):
             logger.debug('ta_refresh_mode older; check last refresh: %s; '
                          'threshold=%d seconds', check_datetime,
                          self.refresh_mode)
-            if check_datetime >= datetime.now(utc) - timedelta(
+            if check_datetime >= datetime.now(pytz.utc) - timedelta(
                     seconds=self.refresh_mode):
                 logger.warning('Trusted Advisor check %s last refresh time '
                                'of %s is newer than refresh threshold of %d '
@@ -283,6 +412,11 @@ class TrustedAdvisor(Connectable):
         Given a Trusted Advisor check_id that has just been refreshed, poll
         until the refresh is complete. Once complete, return the check result.
 
+        Polling starts every :py:data:`~.TA_POLL_INTERVAL_MIN` seconds, so
+        that quick refreshes are noticed quickly, and backs off up to
+        :py:data:`~.TA_POLL_INTERVAL_MAX` seconds; it never sleeps past the
+        refresh timeout.
+
         :param check_id: the Trusted Advisor check ID
         :type check_id: str
         :returns: dict check result. The return value of
@@ -290,13 +424,15 @@ class TrustedAdvisor(Connectable):
         :rtype: dict
         """
         logger.warning('Polling for TA check %s refresh...', check_id)
+        now = datetime_now()
         if self.refresh_timeout is None:
             # no timeout...
-            cutoff = datetime_now() + timedelta(days=365)
+            cutoff = now + timedelta(days=365)
         else:
-            cutoff = datetime_now() + timedelta(seconds=self.refresh_timeout)
+            cutoff = now + timedelta(seconds=self.refresh_timeout)
         last_status = None
-        while datetime_now() <= cutoff:
+        interval = TA_POLL_INTERVAL_MIN
+        while now <= cutoff:
             logger.debug('Checking refresh status')
             status = self.conn.describe_trusted_advisor_check_refresh_statuses(
                 checkIds=[check_id]
@@ -311,8 +447,13 @@ class TrustedAdvisor(Connectable):
                                last_status, status)
                 break
             last_status = status
-            logger.info('Refresh status: %s; sleeping 30s', status)
-            sleep(30)
+            secs = min(
+                interval, max(int((cutoff - now).total_seconds()), 1)
+            )
+            logger.info('Refresh status: %s; sleeping %ds', status, secs)
+            sleep(secs)
+            interval = min(interval * 2, TA_POLL_INTERVAL_MAX)
+            now = datetime_now()
         else:
             logger.error('Timed out waiting for TA Check refresh; status=%s',
                          status)
@@ -363,9 +504,15 @@ class TrustedAdvisor(Connectable):
           will be None.
         :rtype: tuple
         """
-        checks = self.conn.describe_trusted_advisor_check_result(
-            checkId=check_id, language='en'
-        )
+        checks = self._get_cached_check_result(check_id)
+        if checks is None:
+            checks = self.conn.describe_trusted_advisor_check_result(
+                checkId=check_id, language='en'
+            )
+            self._cache_update(result={
+                'check_id': check_id,
+                'response': {'result': checks['result']}
+            })
         try:
             check_datetime = parser.parse(checks['result']['timestamp'])
             logger.debug("Got TrustedAdvisor data for check %s as of %s",
@@ -376,6 +523,85 @@ class TrustedAdvisor(Connectable):
                          "parse timestamp", check_id)
         return checks, check_datetime
 
+    def _get_cached_check_result(self, check_id):
+        """
+        If the cache holds a result for ``check_id`` and
+        DescribeTrustedAdvisorCheckSummaries shows that the check has not been
+        refreshed since, return the cached result; otherwise return None.
+
+        :param check_id: the Trusted Advisor check ID
+        :type check_id: str
+        :return: cached return value of
+          :py:meth:`Support.Client.describe_trusted_advisor_check_result`,
+          or None
+        :rtype: dict
+        """
+        cached = self._cache_get().get('result')
+        if cached is None or cached['check_id'] != check_id:
+            return None
+        cached_ts = cached['response']['result'].get('timestamp')
+        try:
+            summary = self.conn.describe_trusted_advisor_check_summaries(
+                checkIds=[check_id]
+            )['summaries'][0]
+        except Exception:
+            logger.warning("Could not get summary for TA check %s; not using "
+                           "cached result", check_id, exc_info=True)
+            return None
+        if cached_ts is None or summary.get('timestamp') != cached_ts:
+            logger.debug("TA check %s was refreshed at %s, after cached "
+                         "result from %s", check_id, summary.get('timestamp'),
+                         cached_ts)
+            return None
+        logger.info("Using cached result for TA check %s from %s",
+                    check_id, cached_ts)
+        return cached['response']
+
+    def _get_cache_account_id(self):
+        """
+        Return the AWS Account ID to key the cache by. If it was not given to
+        the constructor, look it up with STS GetCallerIdentity; if that fails,
+        stop using the cache and return None.
+
+        :rtype: str
+        """
+        if self.account_id is None:
+            try:
+                self.account_id = self._client(
+                    'sts'
+                ).get_caller_identity()['Account']
+            except Exception:
+                logger.warning("Unable to determine AWS account ID; not using "
+                               "Trusted Advisor cache", exc_info=True)
+                self.cache = None
+        return self.account_id
+
+    def _cache_get(self):
+        """
+        Return this account's :py:class:`~.TrustedAdvisorCache` entry, or an
+        empty dict if there is none or no cache is configured.
+
+        :rtype: dict
+        """
+        if self.cache is None:
+            return {}
+        account_id = self._get_cache_account_id()
+        if self.cache is None:
+            return {}
+        return self.cache.get(account_id)
+
+    def _cache_update(self, **values):
+        """
+        Update this account's :py:class:`~.TrustedAdvisorCache` entry, if a
+        cache is configured.
+        """
+        if self.cache is None:
+            return
+        account_id = self._get_cache_account_id()
+        if self.cache is None:
+            return
+        self.cache.update(account_id, **values)
+
     def _update_services(self, ta_results):
         """
         Given a dict of TrustedAdvisor check results from :py:meth:`~._poll`
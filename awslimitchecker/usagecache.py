@@ -0,0 +1,149 @@
+"""
+awslimitchecker/usagecache.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+##############################################################################
+Copyright 2015-2017 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+##############################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+##############################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+##############################################################################
+"""
+
+import logging
+import time
+
+from .utils import JsonFileCache, get_file_cache
+
+logger = logging.getLogger(__name__)
+
+
+class UsageCache(JsonFileCache):
+    """
+    Thread-safe on-disk cache of the usage that services found, keyed by AWS
+    account ID, region and service name, so that runs made shortly after
+    each other can reuse the usage of services that change slowly instead of
+    finding it again. Each entry holds the time the usage was found and, for
+    each limit, a list of ``[value, resource_id, aws_type]`` usage values
+    (see :py:meth:`~._AwsService._dump_usage`).
+
+    The JSON file at ``path`` is re-read before every lookup, and rewritten
+    once per :py:meth:`~.set_many` call (see :py:class:`~.JsonFileCache`).
+    Use :py:func:`~.get_usage_cache` to get the shared instance for a given
+    path.
+    """
+
+    #: what the cached entries hold, for log messages
+    _description = 'usage'
+
+    @staticmethod
+    def _key(account_id, region_name, service_name):
+        return '{a}/{r}/{s}'.format(
+            a=account_id, r=region_name, s=service_name
+        )
+
+    def get(self, account_id, region_name, service_name, max_age):
+        """
+        Return the cached usage of a service, if it was found no more than
+        ``max_age`` seconds ago.
+
+        :param account_id: AWS Account ID
+        :type account_id: str
+        :param region_name: region name
+        :type region_name: str
+        :param service_name: service name
+        :type service_name: str
+        :param max_age: maximum age of the usage to return, in seconds
+        :type max_age: int
+        :returns: dict of limit name to list of ``[value, resource_id,
+          aws_type]`` lists, or None
+        :rtype: dict
+        """
+        with self._lock:
+            entry = self._load().get(
+                self._key(account_id, region_name, service_name)
+            )
+        if entry is None:
+            return None
+        age = time.time() - entry['time']
+        if age > max_age:
+            logger.debug('Cached %s for %s in %s is %ds old; not reusing',
+                         self._description, service_name, region_name, age)
+            return None
+        logger.info('Using cached %s for %s in %s (%ds old)',
+                    self._description, service_name, region_name, age)
+        return entry['usage']
+
+    def set(self, account_id, region_name, service_name, usage):
+        """
+        Store the usage of a service, found now, and persist the cache.
+
+        :param account_id: AWS Account ID
+        :type account_id: str
+        :param region_name: region name
+        :type region_name: str
+        :param service_name: service name
+        :type service_name: str
+        :param usage: dict of limit name to list of ``[value, resource_id,
+          aws_type]`` lists
+        :type usage: dict
+        """
+        self.set_many([(account_id, region_name, service_name, usage)])
+
+    def set_many(self, entries):
+        """
+        Store the usage of any number of services, found now, and persist
+        the cache with a single write.
+
+        :param entries: list of (account ID, region name, service name,
+          usage) 4-tuples; see :py:meth:`~.set`
+        :type entries: list
+        """
+        if not entries:
+            return
+        now = time.time()
+        with self._lock:
+            data = self._load()
+            for account_id, region_name, service_name, usage in entries:
+                key = self._key(account_id, region_name, service_name)
+                data[key] = {'time': now, 'usage': usage}
+            self._save(data)
+
+
+def get_usage_cache(path):
+    """
+    Return the process-wide :py:class:`~.UsageCache` for ``path``, creating
+    it if needed.
+
+    :param path: path to the JSON file to persist the cache to
+    :type path: str
+    :rtype: :py:class:`~.UsageCache`
+    """
+    return get_file_cache(UsageCache, path)
@@ -38,14 +38,74 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 """
 
 import argparse
+import json
 import logging
+import os
+import threading
+import time
 from copy import deepcopy
-import botocore.vendored.requests as requests
+from functools import partial
+from importlib import import_module
 from awslimitchecker.version import _VERSION_TUP
+from awslimitchecker.timings import get_context, record_page, run_in_context
 
 logger = logging.getLogger(__name__)
 
 
+class _LazyModule(object):
+    """
+    Stand-in for a module that is only imported the first time one of its
+    attributes is accessed. See :py:func:`~.lazy_import`.
+    """
+
+    def __init__(self, name):
+        self.__dict__['_lazy_name'] = name
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self):
+        if self._lazy_module is None:
+            logger.debug('Importing module: %s', self._lazy_name)
+            self.__dict__['_lazy_module'] = import_module(self._lazy_name)
+        return self._lazy_module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        return '<lazy module {n}>'.format(n=self._lazy_name)
+
+
+def lazy_import(name):
+    """
+    Return an object that stands in for the module ``name`` and imports it
+    the first time one of its attributes is accessed. This keeps slow
+    imports such as boto3 off of code paths (like ``awslimitchecker -V``)
+    that never use them.
+
+    :param name: full dotted name of the module to import
+    :type name: str
+    :rtype: object
+    """
+    return _LazyModule(name)
+
+
+requests = lazy_import('botocore.vendored.requests')
+multiprocessing_pool = lazy_import('multiprocessing.pool')
+
+#: Number of seconds that a cached result of the PyPI latest version check
+#: (see :py:func:`~.check_latest_version`) is used before PyPI is queried
+#: again.
+LATEST_VERSION_CACHE_TTL = 86400
+
+#: Number of seconds that a failed (or unfinished) PyPI latest version check
+#: is remembered for, so that hosts that cannot reach PyPI do not query it on
+#: every run.
+LATEST_VERSION_FAILED_CACHE_TTL = 3600
+
+
 class StoreKeyValuePair(argparse.Action):
     """
     Store key=value options in a dict as {'key': 'value'}.
@@ -98,6 +158,39 @@ def dict2cols(d, spaces=2, separator=' '):
     return s
 
 
+def _pagination_kwargs(kwargs):
+    """
+    Validate the special ``alc_`` kwargs of :py:func:`~.paginate_dict` and
+    :py:func:`~.paginate_iter`, and split them from the kwargs to pass to the
+    function being paginated.
+
+    :param kwargs: keyword arguments passed to the pagination function
+    :type kwargs: dict
+    :returns: 4-tuple of marker path, data path, marker parameter name and
+      the dict of keyword arguments to pass through
+    :rtype: tuple
+    """
+    if 'alc_marker_path' not in kwargs:
+        raise Exception("alc_marker_path must be specified for queries "
+                        "that return a dict.")
+    if 'alc_data_path' not in kwargs:
+        raise Exception("alc_data_path must be specified for queries "
+                        "that return a dict.")
+    if 'alc_marker_param' not in kwargs:
+        raise Exception("alc_marker_param must be specified for queries "
+                        "that return a dict.")
+
+    # strip off "^alc_" args
+    pass_kwargs = {}
+    for k, v in kwargs.items():
+        if not k.startswith('alc_'):
+            pass_kwargs[k] = v
+    return (
+        kwargs['alc_marker_path'], kwargs['alc_data_path'],
+        kwargs['alc_marker_param'], pass_kwargs
+    )
+
+
 def paginate_dict(function_ref, *argv, **kwargs):
     """
     Paginate through a query that returns a dict result, and return the
@@ -115,6 +208,12 @@ def paginate_dict(function_ref, *argv, **kwargs):
     These paths should be lists, in a form usable by
     :py:func:`~._get_dict_value_by_path`.
 
+    Each page fetched is recorded via :py:func:`~.timings.record_page`.
+
+    Callers that only need to iterate over (or count) the results should use
+    :py:func:`~.paginate_iter` instead, which does not hold every result in
+    memory at once.
+
     :param function_ref: the function to call
     :type function_ref: function
     :param argv: the parameters to pass to the function
@@ -122,28 +221,13 @@ def paginate_dict(function_ref, *argv, **kwargs):
     :param kwargs: keyword arguments to pass to the function
     :type kwargs: dict
     """
-    if 'alc_marker_path' not in kwargs:
-        raise Exception("alc_marker_path must be specified for queries "
-                        "that return a dict.")
-    if 'alc_data_path' not in kwargs:
-        raise Exception("alc_data_path must be specified for queries "
-                        "that return a dict.")
-    if 'alc_marker_param' not in kwargs:
-        raise Exception("alc_marker_param must be specified for queries "
-                        "that return a dict.")
-
-    marker_path = kwargs['alc_marker_path']
-    data_path = kwargs['alc_data_path']
-    marker_param = kwargs['alc_marker_param']
-
-    # strip off "^alc_" args
-    pass_kwargs = {}
-    for k, v in kwargs.items():
-        if not k.startswith('alc_'):
-            pass_kwargs[k] = v
+    marker_path, data_path, marker_param, pass_kwargs = _pagination_kwargs(
+        kwargs
+    )
 
     # first function call
     result = function_ref(*argv, **pass_kwargs)
+    record_page()
 
     # check for marker, return if not present
     marker = _get_dict_value_by_path(result, marker_path)
@@ -159,6 +243,7 @@ def paginate_dict(function_ref, *argv, **kwargs):
                      marker)
         pass_kwargs[marker_param] = marker
         result = function_ref(*argv, **pass_kwargs)
+        record_page()
         data = _get_dict_value_by_path(result, data_path)
         results.extend(data)
         marker = _get_dict_value_by_path(result, marker_path)
@@ -167,6 +252,369 @@ def paginate_dict(function_ref, *argv, **kwargs):
     return res
 
 
+def paginate_iter(function_ref, *argv, **kwargs):
+    """
+    Paginate through a query that returns a dict result, and return an
+    iterator over the items in the list at ``alc_data_path`` of every page.
+
+    Pages are fetched lazily, as the iterator is consumed, and each one is
+    released once its items have been yielded; unlike
+    :py:func:`~.paginate_dict`, the combined result is never built or copied,
+    so memory use does not grow with the number of results.
+
+    This takes the same special ``alc_marker_path``, ``alc_data_path`` and
+    ``alc_marker_param`` kwargs as :py:func:`~.paginate_dict`; they are
+    validated when this is called, not when iteration starts. Each page
+    fetched is recorded via :py:func:`~.timings.record_page`.
+
+    :param function_ref: the function to call
+    :type function_ref: function
+    :param argv: the parameters to pass to the function
+    :type argv: tuple
+    :param kwargs: keyword arguments to pass to the function
+    :type kwargs: dict
+    :returns: iterator over result items
+    """
+    marker_path, data_path, marker_param, pass_kwargs = _pagination_kwargs(
+        kwargs
+    )
+    return _paginate_iter(
+        function_ref, argv, pass_kwargs, marker_path, data_path, marker_param
+    )
+
+
+def _paginate_iter(function_ref, argv, pass_kwargs, marker_path, data_path,
+                   marker_param):
+    """generator implementing :py:func:`~.paginate_iter`"""
+    while True:
+        result = function_ref(*argv, **pass_kwargs)
+        record_page()
+        data = _get_dict_value_by_path(result, data_path)
+        if data is not None:
+            for item in data:
+                yield item
+        marker = _get_dict_value_by_path(result, marker_path)
+        if marker is None:
+            return
+        logger.debug("Querying %s with %s=%s", function_ref, marker_param,
+                     marker)
+        pass_kwargs[marker_param] = marker
+
+
+def count_iter(iterable):
+    """
+    Return the number of items in ``iterable``, consuming it without holding
+    its items in memory.
+
+    :param iterable: the iterable (i.e. from :py:func:`~.paginate_iter`) to
+      count
+    :rtype: int
+    """
+    return sum(1 for _ in iterable)
+
+
+class WorkerBudget(object):
+    """
+    Thread-safe count of the threads that :py:func:`~.pool_map` calls
+    sharing it may start, so that nested calls (i.e. a service spreading its
+    API calls across threads, while services themselves are checked
+    concurrently) together never have more than ``max_workers`` threads
+    working at once. Each call's own thread counts as one of them, as it
+    works through the items too, so the budget holds ``max_workers - 1``
+    extra threads. Threads are returned as soon as they run out of items, so
+    calls started later can use them.
+    """
+
+    def __init__(self, max_workers):
+        """
+        :param max_workers: maximum number of threads working at once,
+          including the thread that makes the outermost call
+        :type max_workers: int
+        """
+        self.max_workers = max_workers
+        self._available = max(0, max_workers - 1)
+        self._lock = threading.Lock()
+
+    def acquire(self, wanted):
+        """
+        Take up to ``wanted`` threads from the budget, without blocking.
+
+        :param wanted: number of extra threads wanted
+        :type wanted: int
+        :returns: number of threads taken, possibly 0
+        :rtype: int
+        """
+        with self._lock:
+            taken = max(0, min(wanted, self._available))
+            self._available -= taken
+            return taken
+
+    def release(self):
+        """
+        Return one thread to the budget.
+        """
+        with self._lock:
+            self._available += 1
+
+
+def pool_map(function_ref, items, max_workers=None, budget=None):
+    """
+    Call ``function_ref`` once for each element of ``items``, and return a
+    list of the results in the same order as ``items``.
+
+    If ``max_workers`` is None or less than 2, or there is only one item,
+    the calls are made serially in the current thread. Otherwise, if
+    ``budget`` is given, the current thread makes the calls along with as
+    many extra threads (up to ``max_workers - 1``) as can be taken from it
+    (see :py:class:`~.WorkerBudget`); without a budget they are spread across
+    a :py:class:`multiprocessing.pool.ThreadPool` of at most ``max_workers``
+    threads. If any call raises an exception, it is re-raised in the calling
+    thread once all calls have finished. Calls made in other threads are
+    charged to the operation being timed (see :py:class:`~.Timings`) in the
+    calling thread.
+
+    :param function_ref: the function to call; takes one positional argument
+    :type function_ref: function
+    :param items: the items to call ``function_ref`` with
+    :type items: list
+    :param max_workers: maximum number of threads to run calls in
+    :type max_workers: int
+    :param budget: budget of threads shared with other (i.e. nested) calls
+    :type budget: :py:class:`~.WorkerBudget`
+    :returns: list of return values of ``function_ref``
+    :rtype: list
+    """
+    items = list(items)
+    if max_workers is None or max_workers < 2 or len(items) < 2:
+        return [function_ref(i) for i in items]
+    if budget is not None:
+        return _pool_map_budget(
+            function_ref, items,
+            budget.acquire(min(max_workers, len(items)) - 1), budget
+        )
+    pool = multiprocessing_pool.ThreadPool(min(max_workers, len(items)))
+    try:
+        return pool.map(
+            partial(run_in_context, get_context(), function_ref), items
+        )
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _pool_map_budget(function_ref, items, extra, budget):
+    """
+    Make the calls of :py:func:`~.pool_map` in the current thread and
+    ``extra`` threads already taken from ``budget``; each extra thread is
+    returned to it as soon as there are no items left to start.
+
+    :param function_ref: the function to call; takes one positional argument
+    :type function_ref: function
+    :param items: the items to call ``function_ref`` with
+    :type items: list
+    :param extra: number of extra threads to start
+    :type extra: int
+    :param budget: the budget the extra threads were taken from
+    :type budget: :py:class:`~.WorkerBudget`
+    :returns: list of return values of ``function_ref``
+    :rtype: list
+    """
+    results = [None] * len(items)
+    errors = []
+    todo = enumerate(items)
+    lock = threading.Lock()
+
+    def work():
+        while True:
+            with lock:
+                nxt = next(todo, None)
+            if nxt is None:
+                return
+            try:
+                results[nxt[0]] = function_ref(nxt[1])
+            except Exception as ex:
+                errors.append(ex)
+
+    def work_extra(context):
+        try:
+            run_in_context(context, work)
+        finally:
+            budget.release()
+
+    threads = []
+    for _ in range(extra):
+        t = threading.Thread(target=work_extra, args=(get_context(),))
+        t.daemon = True
+        t.start()
+        threads.append(t)
+    work()
+    for t in threads:
+        t.join()
+    if errors:
+        raise errors[0]
+    return results
+
+
+class BackgroundCall(object):
+    """
+    Call a function in a daemon thread, so that the caller can do other work
+    in the meantime and then :py:meth:`~.wait` for the result. As with
+    :py:func:`~.pool_map`, the call is charged to the operation being timed
+    (see :py:class:`~.Timings`) in the thread that created this object.
+    """
+
+    def __init__(self, function_ref, *args):
+        """
+        Start calling ``function_ref(*args)``.
+
+        :param function_ref: the function to call
+        :type function_ref: function
+        :param args: positional arguments to pass to the function
+        """
+        self._result = None
+        self._exception = None
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(get_context(), function_ref, args),
+            name='awslimitchecker-background'
+        )
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self, context, function_ref, args):
+        """
+        Thread target; call the function and store its result or exception.
+        """
+        try:
+            self._result = run_in_context(context, function_ref, *args)
+        except Exception as ex:
+            self._exception = ex
+
+    def wait(self):
+        """
+        Wait for the call to finish, and return its return value. If it
+        raised an exception, re-raise it in the calling thread.
+
+        :returns: the return value of the function
+        """
+        self._thread.join()
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+
+def write_json_file(path, data, mode=0o666):
+    """
+    Atomically replace the file at ``path`` with ``data`` serialized as JSON,
+    by writing a temporary file next to it and renaming that over ``path``.
+    The parent directory is created if it does not exist. Errors are left to
+    the caller.
+
+    :param path: path of the file to write
+    :type path: str
+    :param data: JSON-serializable data to write
+    :param mode: permissions to create the file with (before the umask)
+    :type mode: int
+    """
+    dirname = os.path.dirname(os.path.abspath(path))
+    if not os.path.exists(dirname):
+        os.makedirs(dirname)
+    tmp_path = '{p}.{pid}'.format(p=path, pid=os.getpid())
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+    with os.fdopen(fd, 'w') as fh:
+        fh.write(json.dumps(data))
+    os.rename(tmp_path, path)
+
+
+class JsonFileCache(object):
+    """
+    Base class for the thread-safe caches that persist a dict to a JSON file,
+    such as :py:class:`~.CredentialCache`, :py:class:`~.TrustedAdvisorCache`,
+    :py:class:`~.UsageCache` and :py:class:`~.LimitCache`.
+
+    Subclasses re-read the file with :py:meth:`~._load` before every lookup,
+    and update it by calling :py:meth:`~._load` and :py:meth:`~._save` while
+    holding ``self._lock``, so threads sharing an instance never lose each
+    other's entries. The file is replaced atomically; separate processes
+    writing the same file may drop each other's entries, which only costs
+    retrieving them again. Use :py:func:`~.get_file_cache` to get the shared
+    instance of a subclass for a given path.
+    """
+
+    #: what the cache holds, for log messages
+    _description = 'JSON'
+
+    #: permissions to create the file with (before the umask)
+    _file_mode = 0o666
+
+    def __init__(self, path):
+        """
+        :param path: path to the JSON file to persist the cache to, or None
+          to not persist it
+        :type path: str
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _load(self):
+        """
+        Return the contents of ``self.path``, or an empty dict if there is no
+        path, or the file does not exist or cannot be read.
+
+        :rtype: dict
+        """
+        if self.path is None or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as fh:
+                return json.loads(fh.read())
+        except Exception:
+            logger.warning('Unable to read %s cache %s', self._description,
+                           self.path, exc_info=True)
+        return {}
+
+    def _save(self, data):
+        """
+        Replace the contents of ``self.path`` (if set) with ``data``.
+
+        :param data: the whole cache
+        :type data: dict
+        """
+        if self.path is None:
+            return
+        try:
+            write_json_file(self.path, data, mode=self._file_mode)
+        except Exception:
+            logger.warning('Unable to write %s cache %s', self._description,
+                           self.path, exc_info=True)
+
+
+#: Shared :py:class:`~.JsonFileCache` instances, keyed by class and path
+_file_caches = {}
+_file_caches_lock = threading.Lock()
+
+
+def get_file_cache(cache_class, path):
+    """
+    Return the process-wide instance of ``cache_class`` for ``path``,
+    creating it if needed. ``path`` is expanded and made absolute, so that
+    different spellings of the same path share an instance.
+
+    :param cache_class: the :py:class:`~.JsonFileCache` subclass
+    :type cache_class: class
+    :param path: path to the JSON file to persist the cache to, or None
+    :type path: str
+    :rtype: :py:class:`~.JsonFileCache`
+    """
+    if path is not None:
+        path = os.path.abspath(os.path.expanduser(path))
+    key = (cache_class, path)
+    with _file_caches_lock:
+        if key not in _file_caches:
+            _file_caches[key] = cache_class(path)
+        return _file_caches[key]
+
+
 def _get_dict_value_by_path(d, path):
     """
     Given a dict (``d``) and a list specifying the hierarchical path to a key
@@ -213,17 +661,15 @@ def _set_dict_value_by_path(d, val, path):
     return tmp_d
 
 
-def _get_latest_version():
+def _get_pypi_version():
     """
     Attempt to retrieve the latest awslimitchecker version from PyPI, timing
-    out after 4 seconds. If the version can be retrieved and is greater than
-    the currently running version, return it as a string. If the version cannot
-    be retrieved or is not greater than the currently running version, return
-    None.
+    out after 4 seconds. Return the version string, or None if it cannot be
+    retrieved.
 
     This function MUST not ever raise an exception.
 
-    :return: latest version from PyPI, if newer than current version
+    :return: latest version from PyPI
     :rtype: `str` or `None`
     """
     try:
@@ -231,12 +677,163 @@ def _get_latest_version():
             'http://pypi.python.org/pypi/awslimitchecker/json',
             timeout=4.0,
         )
-        j = r.json()
-        latest = tuple([
-            int(i) for i in j['info']['version'].split('.')[0:3]
-        ])
-        if latest > _VERSION_TUP:
-            return j['info']['version']
+        return r.json()['info']['version']
     except Exception:
         logger.debug('Error getting latest version from PyPI', exc_info=True)
     return None
+
+
+def _newer_version(version):
+    """
+    Return ``version`` if it is greater than the currently running version,
+    otherwise None.
+
+    This function MUST not ever raise an exception.
+
+    :param version: version string, or None
+    :type version: str
+    :rtype: `str` or `None`
+    """
+    if version is None:
+        return None
+    try:
+        latest = tuple([int(i) for i in version.split('.')[0:3]])
+        if latest > _VERSION_TUP:
+            return version
+    except Exception:
+        logger.debug('Error parsing version %s', version, exc_info=True)
+    return None
+
+
+def _latest_version_cache_path():
+    """
+    Return the path to the on-disk cache of the PyPI latest version check;
+    ``awslimitchecker/latest_version.json`` under ``$XDG_CACHE_HOME``
+    (default ``~/.cache``).
+
+    :rtype: str
+    """
+    base = os.environ.get(
+        'XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache')
+    )
+    return os.path.join(base, 'awslimitchecker', 'latest_version.json')
+
+
+def _read_latest_version_cache(path, ttl,
+                               failed_ttl=LATEST_VERSION_FAILED_CACHE_TTL):
+    """
+    Read the cached PyPI version from ``path``. Return a 2-tuple of whether
+    a cached result no older than ``ttl`` seconds (or ``failed_ttl``
+    seconds, if the check failed and no version was cached) was found, and
+    the cached version string (or None).
+
+    This function MUST not ever raise an exception.
+
+    :param path: path to the cache file
+    :type path: str
+    :param ttl: maximum age of the cache, in seconds
+    :type ttl: int
+    :param failed_ttl: maximum age of a cached failed check, in seconds
+    :type failed_ttl: int
+    :rtype: tuple
+    """
+    try:
+        with open(path, 'r') as fh:
+            data = json.loads(fh.read())
+        if data['version'] is None:
+            ttl = min(ttl, failed_ttl)
+        if time.time() - data['checked'] <= ttl:
+            return True, data['version']
+        logger.debug('Cached latest version in %s has expired', path)
+    except Exception:
+        logger.debug('Unable to read latest version cache %s', path,
+                     exc_info=True)
+    return False, None
+
+
+def _write_latest_version_cache(path, version):
+    """
+    Write ``version`` (the version string from PyPI, or None) to the cache
+    file at ``path``.
+
+    This function MUST not ever raise an exception.
+
+    :param path: path to the cache file
+    :type path: str
+    :param version: version string from PyPI
+    :type version: str
+    """
+    try:
+        write_json_file(path, {'checked': time.time(), 'version': version})
+    except Exception:
+        logger.debug('Unable to write latest version cache %s', path,
+                     exc_info=True)
+
+
+def check_latest_version(callback, cache_path=None,
+                         ttl=LATEST_VERSION_CACHE_TTL):
+    """
+    Check whether a newer awslimitchecker release is available on PyPI,
+    without blocking on the network.
+
+    If the on-disk cache at ``cache_path`` holds a result no older than
+    ``ttl`` seconds, ``callback`` is called immediately with the newer version
+    (or None). Otherwise a daemon thread queries PyPI, updates the cache and
+    then calls ``callback``; if the process exits before the query finishes,
+    the callback is simply never called. A failed check is recorded in the
+    cache before the query starts, so if PyPI cannot be reached (or the
+    process exits first), it is not queried again for
+    :py:const:`~.LATEST_VERSION_FAILED_CACHE_TTL` seconds.
+
+    This function MUST not ever raise an exception.
+
+    :param callback: function to call with the newer version string, or None
+      if the running version is current or the check failed
+    :type callback: function
+    :param cache_path: path to the cache file; defaults to
+      :py:func:`~._latest_version_cache_path`
+    :type cache_path: str
+    :param ttl: maximum age of the cached result, in seconds
+    :type ttl: int
+    :return: the background thread, or None if the cached result was used
+    :rtype: :py:class:`threading.Thread` or None
+    """
+    try:
+        if cache_path is None:
+            cache_path = _latest_version_cache_path()
+        fresh, version = _read_latest_version_cache(cache_path, ttl)
+        if fresh:
+            callback(_newer_version(version))
+            return None
+        # replaced by the result if the query succeeds
+        _write_latest_version_cache(cache_path, None)
+        t = threading.Thread(
+            target=_check_latest_version_thread,
+            args=(callback, cache_path),
+            name='awslimitchecker-version-check'
+        )
+        t.daemon = True
+        t.start()
+        return t
+    except Exception:
+        logger.debug('Error checking latest version', exc_info=True)
+    return None
+
+
+def _check_latest_version_thread(callback, cache_path):
+    """
+    Body of the background thread started by
+    :py:func:`~.check_latest_version`.
+
+    :param callback: function to call with the newer version string or None
+    :type callback: function
+    :param cache_path: path to the cache file
+    :type cache_path: str
+    """
+    version = _get_pypi_version()
+    if version is not None:
+        _write_latest_version_cache(cache_path, version)
+    try:
+        callback(_newer_version(version))
+    except Exception:
+        logger.debug('Error in latest version callback', exc_info=True)
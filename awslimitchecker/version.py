@@ -42,10 +42,25 @@ import os
 import logging
 logger = logging.getLogger(__name__)
 
-try:
-    from versionfinder import find_version
-except ImportError:
-    logger.error("Unable to import versionfinder", exc_info=True)
+
+def find_version(package_name):
+    """
+    Wrapper around :py:func:`versionfinder.find_version`. versionfinder
+    imports pip and pkg_resources, which are very slow to import, so it is
+    only imported when version information is actually needed.
+
+    :param package_name: name of the package to find the version of
+    :type package_name: str
+    :returns: versionfinder version information
+    :rtype: versionfinder.versioninfo.VersionInfo
+    """
+    try:
+        from versionfinder import find_version as vf_find_version
+    except ImportError:
+        logger.error("Unable to import versionfinder", exc_info=True)
+        raise
+    return vf_find_version(package_name)
+
 
 _VERSION_TUP = (3, 0, 0)
 _VERSION = '.'.join([str(x) for x in _VERSION_TUP])
@@ -102,12 +117,33 @@ class AWSLimitCheckerVersion(object):
         )
 
 
+#: Memoized return value of :py:func:`~._get_version_info`
+_version_info = None
+
+
 def _get_version_info():
     """
     Returns the currently-installed awslimitchecker version, and a best-effort
     attempt at finding the origin URL and commit/tag if installed from an
     editable git clone.
 
+    Finding this information is slow (versionfinder runs pip and git), and
+    it cannot change while we're running, so the result is memoized for the
+    life of the process.
+
+    :returns: awslimitchecker version
+    :rtype: string
+    """
+    global _version_info
+    if _version_info is None:
+        _version_info = _find_version_info()
+    return _version_info
+
+
+def _find_version_info():
+    """
+    Find the version information returned by :py:func:`~._get_version_info`.
+
     :returns: awslimitchecker version
     :rtype: string
     """
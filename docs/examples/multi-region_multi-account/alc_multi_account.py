@@ -52,7 +52,7 @@ import argparse
 import json
 import re
 
-from awslimitchecker.checker import AwsLimitChecker
+from awslimitchecker.fleet import FleetChecker, FleetTarget
 from termcolor import colored
 
 #: This defines the default role name to assume in other accounts that don't
@@ -167,69 +167,12 @@ class MultiAccountChecker(object):
     def __init__(self, config):
         self._conf = config
 
-    def check_limits(self, acct_id, region_name, role_name=None,
-                     limit_overrides={}, threshold_overrides={}):
+    def _targets(self, region=None, accounts=[]):
         """
-        Run the actual usage and limit check, with overrides, against a specific
-        account in a specific region, optionally assuming a role in the account
-        and optionally setting limit and/or threshold overrides.
-
-        Return a 2-tuple of lists, warning strings and critical strings.
-
-        see: http://awslimitchecker.readthedocs.org/en/latest/python_usage.html
-
-        :returns: 2-tuple of lists of strings, warnings and criticals
-        """
-        # instantiate the class
-        if role_name is not None:
-            checker = AwsLimitChecker(
-                account_id=acct_id, region=region_name, account_role=role_name
-            )
-        else:
-            checker = AwsLimitChecker(region=region_name)
-        # set your overrides
-        if len(threshold_overrides) > 0:
-            checker.set_threshold_overrides(threshold_overrides)
-        if len(limit_overrides) > 0:
-            checker.set_limit_overrides(limit_overrides)
-
-        # check usage against thresholds
-        checker.check_thresholds()
-
-        # save state for exit code and summary
-        warnings = []
-        criticals = []
-
-        # iterate the results
-        for service, svc_limits in sorted(checker.get_limits().items()):
-            for limit_name, limit in sorted(svc_limits.items()):
-                # check warnings and criticals for each Limit
-                for warn in limit.get_warnings():
-                    warnings.append(colored("{service} '{limit_name}' usage "
-                                            "({u}) exceeds warning threshold "
-                                            "(limit={l})".format(
-                                                service=service,
-                                                limit_name=limit_name,
-                                                u=str(warn),
-                                                l=limit.get_limit(),
-                                            ), 'yellow'))
-                for crit in limit.get_criticals():
-                    criticals.append(colored("{service} '{limit_name}' usage "
-                                             "({u}) exceeds critical threshold"
-                                             " (limit={l})".format(
-                                                 service=service,
-                                                 limit_name=limit_name,
-                                                 u=str(crit),
-                                                 l=limit.get_limit(),
-                                             ), 'red'))
-        return warnings, criticals
-
-    def run(self, error_on_warning=False, region=None, accounts=[]):
-        """
-        Main entry point.
+        Build the list of :py:class:`awslimitchecker.fleet.FleetTarget` to
+        check, one per account and region, with that region's overrides.
         """
-        all_warnings = []
-        all_criticals = []
+        targets = []
         if len(accounts) == 0:
             # if no accounts specified, run all of them
             accounts = self._conf.list_account_ids
@@ -245,37 +188,77 @@ class MultiAccountChecker(object):
                 ))
                 regions = []
             for rname in regions:
-                print('\n%s (%s) %s' % (acct_id, acct_conf['name'], rname))
-                warnings, criticals = self.check_limits(
-                    acct_id, rname, role_name=acct_conf['role_name'],
+                role_name = acct_conf['role_name']
+                targets.append(FleetTarget(
+                    account_id=acct_id if role_name is not None else None,
+                    account_role=role_name,
+                    region=rname,
+                    name=acct_conf['name'],
                     limit_overrides=acct_conf[
                         'regions'][rname]['limit_overrides'],
                     threshold_overrides=acct_conf[
                         'regions'][rname]['threshold_overrides'],
-                )
-                # output
-                for w in warnings:
-                    print("\tWARNING: %s" % w)
-                    all_warnings.append(w)
-                for c in criticals:
-                    print("\tCRITICAL: %s" % c)
-                    all_criticals.append(c)
-                if len(warnings) == 0 and len(criticals) == 0:
-                    print("\tNo problems found.")
+                ))
+        return targets
+
+    def print_result(self, result):
+        """
+        Print the results for one account and region, as they finish.
+
+        see: http://awslimitchecker.readthedocs.org/en/latest/python_usage.html
+        """
+        t = result.target
+        print('\n%s (%s) %s' % (t.account_id, t.name, t.region))
+        if result.error is not None:
+            print("\tERROR: %s" % result.error)
+            return
+        for service, svc_limits in sorted(result.limits.items()):
+            for limit_name, limit in sorted(svc_limits.items()):
+                for warn in limit['warnings']:
+                    print("\tWARNING: " + colored(
+                        "{service} '{limit_name}' usage ({u}) exceeds warning "
+                        "threshold (limit={l})".format(
+                            service=service, limit_name=limit_name, u=warn,
+                            l=limit['limit']
+                        ), 'yellow'))
+                for crit in limit['criticals']:
+                    print("\tCRITICAL: " + colored(
+                        "{service} '{limit_name}' usage ({u}) exceeds critical "
+                        "threshold (limit={l})".format(
+                            service=service, limit_name=limit_name, u=crit,
+                            l=limit['limit']
+                        ), 'red'))
+        if result.warning_count == 0 and result.critical_count == 0:
+            print("\tNo problems found.")
+
+    def run(self, error_on_warning=False, region=None, accounts=[],
+            processes=None):
+        """
+        Main entry point.
+        """
+        fleet = FleetChecker(
+            self._targets(region=region, accounts=accounts),
+            processes=processes
+        )
+        report = fleet.run(callback=self.print_result)
 
         # summary
-        if len(all_warnings) > 0 or len(all_criticals) > 0:
+        all_warnings = report.warning_count
+        all_criticals = report.critical_count + len(report.errors)
+        if all_warnings > 0 or all_criticals > 0:
             print(
                 "\n{c} limit(s) above CRITICAL threshold; {w} limit(s) above "
-                "WARNING threshold".format(
-                    c=len(all_criticals), w=len(all_warnings)
+                "WARNING threshold; {e} account(s)/region(s) could not be "
+                "checked".format(
+                    c=report.critical_count, w=all_warnings,
+                    e=len(report.errors)
                 )
             )
         else:
             print("All limits are within thresholds.")
         if (
-            (len(all_warnings) > 0 and error_on_warning) or
-            len(all_criticals) > 0
+            (all_warnings > 0 and error_on_warning) or
+            all_criticals > 0
         ):
             print('PROBLEMS FOUND. See above output for details.')
             raise SystemExit(1)
@@ -293,6 +276,11 @@ def parse_args(argv):
         '-r', '--region', action='store', type=str, dest='region_name',
         default=None, help='run only for this region name'
     )
+    p.add_argument(
+        '-p', '--processes', action='store', type=int, dest='processes',
+        default=None, help='number of accounts/regions to check at once; '
+        'defaults to the number of CPUs'
+    )
     p.add_argument(
         'ACCOUNT', nargs='*', help='run only for these account IDs/names'
     )
@@ -306,5 +294,6 @@ if __name__ == "__main__":
     checker.run(
         error_on_warning=args.error_on_warning,
         region=args.region_name,
-        accounts=args.ACCOUNT
+        accounts=args.ACCOUNT,
+        processes=args.processes
     )